@@ -0,0 +1,245 @@
+"""
+Tiered cache shared by every API container.
+
+``TieredCache`` is a cache backend keeping a small LRU of recently read
+entries in the process, in front of a shared backend (Redis in production,
+diskcache on a single node). Local entries live ``LOCAL_TIMEOUT`` seconds at
+most, which bounds how long a container may serve an entry changed by
+another one.
+
+``get_or_compute`` caches a value under tags, ``invalidate_tags`` drops every
+value of a tag at once on every container, and concurrent misses of a key
+are computed once, the other callers waiting for the result.
+"""
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+CACHE_TAG_KEY = "cache_tag_{}"
+CACHE_COMPUTE_LOCK_KEY = "cache_compute_lock_{}"
+# tagged entries are (tag versions, value) pairs, the prefix keeps them apart
+# from the plain values cached under the same keys before
+CACHE_TAGGED_KEY = "cache_tagged_v1_{}"
+CACHE_COMPUTE_POLL_INTERVAL = 0.05
+
+# local entries by cache name, shared by the threads of the process
+_local_caches = {}
+_local_caches_lock = threading.Lock()
+_missing = object()
+
+
+def organization_tag(organization_id) -> str:
+    return f"organization_{organization_id}"
+
+
+def retailer_tag(retailer_id) -> str:
+    return f"retailer_{retailer_id}"
+
+
+class LocalLRU(object):
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _missing
+            expires_at, pickled = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return _missing
+            self.entries.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key: str, value, timeout: float) -> None:
+        if timeout <= 0:
+            self.delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, pickled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+class TieredCache(BaseCache):
+    """In-process LRU in front of the cache named by ``LOCATION``"""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = location
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 5)
+        with _local_caches_lock:
+            self.local = _local_caches.setdefault(
+                location, LocalLRU(options.get("LOCAL_MAX_ENTRIES", 1000))
+            )
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self.shared_alias]
+
+    def get_local_timeout(self, timeout) -> float:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(self.local_timeout, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        local_key = self.make_key(key, version)
+        if added:
+            self.local.set(local_key, value, self.get_local_timeout(timeout))
+        else:
+            self.local.delete(local_key)
+        return added
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_key(key, version)
+        value = self.local.get(local_key)
+        if value is not _missing:
+            return value
+        value = self.shared.get(key, _missing, version)
+        if value is _missing:
+            return default
+        self.local.set(local_key, value, self.local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        values = {}
+        missing_keys = []
+        for key in keys:
+            value = self.local.get(self.make_key(key, version))
+            if value is _missing:
+                missing_keys.append(key)
+            else:
+                values[key] = value
+        if missing_keys:
+            shared_values = self.shared.get_many(missing_keys, version)
+            for key, value in shared_values.items():
+                self.local.set(self.make_key(key, version), value, self.local_timeout)
+            values.update(shared_values)
+        return values
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self.local.set(
+            self.make_key(key, version), value, self.get_local_timeout(timeout)
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self.make_key(key, version))
+        return self.shared.delete(key, version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _missing, version) is not _missing
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self.make_key(key, version))
+        return self.shared.incr(key, delta, version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+def get_tag_versions(tags: Iterable[str]) -> dict:
+    keys = {CACHE_TAG_KEY.format(tag): tag for tag in tags}
+    versions = cache.get_many(list(keys))
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Drop every value cached under one of the tags"""
+    for tag in tags:
+        cache.set(CACHE_TAG_KEY.format(tag), uuid.uuid4().hex, None)
+
+
+# one lock by key being computed in the process
+_compute_locks = {}
+_compute_locks_lock = threading.Lock()
+
+
+def get_or_compute(
+    key: str,
+    compute: Callable[[], Any],
+    timeout=DEFAULT_TIMEOUT,
+    tags: Iterable[str] = (),
+) -> Any:
+    """Cached value of key, computed once across threads and containers.
+
+    The value is stale as soon as a tag is invalidated. On a miss, one caller
+    computes the value under a lock held in the shared cache, the others wait
+    up to CACHE_COMPUTE_LOCK_TIMEOUT for it before computing it themselves.
+    """
+    tags = list(tags)
+    value = get_tagged(key, tags)
+    if value is not _missing:
+        return value
+
+    with _compute_locks_lock:
+        local_lock = _compute_locks.setdefault(key, threading.Lock())
+    with local_lock:
+        value = get_tagged(key, tags)
+        if value is not _missing:
+            return value
+
+        lock_key = CACHE_COMPUTE_LOCK_KEY.format(key)
+        lock_timeout = settings.CACHE_COMPUTE_LOCK_TIMEOUT
+        deadline = time.monotonic() + lock_timeout
+        while not cache.add(lock_key, True, lock_timeout):
+            time.sleep(CACHE_COMPUTE_POLL_INTERVAL)
+            value = get_tagged(key, tags)
+            if value is not _missing:
+                return value
+            if time.monotonic() >= deadline:
+                return compute()
+
+        try:
+            # versions read before computing, an invalidation meanwhile wins
+            tag_versions = get_tag_versions(tags)
+            value = compute()
+            cache.set(CACHE_TAGGED_KEY.format(key), (tag_versions, value), timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+
+def get_tagged(key: str, tags: list):
+    entry = cache.get(CACHE_TAGGED_KEY.format(key))
+    if not isinstance(entry, tuple) or len(entry) != 2:
+        return _missing
+    tag_versions, value = entry
+    if tag_versions != get_tag_versions(tags):
+        return _missing
+    return value
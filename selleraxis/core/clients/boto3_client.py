@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import logging
 import os
+import threading
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, List, Optional, TypeVar
 
@@ -19,6 +20,12 @@ if TYPE_CHECKING:
     from botocore.client import Config
 
 T = TypeVar("T")
+SQS_BATCH_SIZE = 10
+SQS_QUEUE_DOES_NOT_EXIST_CODES = (
+    "AWS.SimpleQueueService.NonExistentQueue",
+    "QueueDoesNotExist",
+)
+S3_MULTIPART_PART_SIZE = 8 * 1024 * 1024
 DEFAULT_LOG_LEVEL = logging.DEBUG
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 LOGGER_FORMAT = (
@@ -30,6 +37,7 @@ __all__ = [
     "Configuration",
     "Boto3ClientManager",
     "SQSClient",
+    "S3MultipartUpload",
     "ClientCreateError",
     "sqs_client",
     "s3_client",
@@ -180,6 +188,9 @@ class SQSClient(Boto3Client):
     """Implements a Singleton Boto3 SQS Client"""
 
     _SERVICE_NAME = "sqs"
+    # queue urls never change for a queue name, share them across the process
+    _queue_urls = {}
+    _queue_urls_lock = threading.Lock()
 
     def create_queue(
         self,
@@ -201,9 +212,19 @@ class SQSClient(Boto3Client):
                 self.logger.info("proceed to send sqs queue")
                 if "message_body" in kwargs:
                     kwargs.pop("message_body")
-                response_data = self.client.send_message(
-                    QueueUrl=queue_url, MessageBody=message_body, *args, **kwargs
-                )
+                try:
+                    response_data = self.client.send_message(
+                        QueueUrl=queue_url, MessageBody=message_body, *args, **kwargs
+                    )
+                except ClientError as e:
+                    if not queue_name or not self.is_queue_does_not_exist(e):
+                        raise
+
+                    # the queue was re-created with a new url
+                    queue_url = self.get_queue_url(queue_name, refresh=True)
+                    response_data = self.client.send_message(
+                        QueueUrl=queue_url, MessageBody=message_body, *args, **kwargs
+                    )
                 self.logger.info("Send SQS Queue successfully")
                 return Response(data=response_data)
 
@@ -243,10 +264,201 @@ class SQSClient(Boto3Client):
             self.logger.error(errors, ExceptionUtilities.stack_trace_as_string(e))
             return Response(data=Error(errors, traceback), status_code=400, ok=False)
 
-    def get_queue_url(self, queue_name: str) -> str:
+    def send_message_batch(
+        self,
+        message_bodies: List[str],
+        queue_url: str = None,
+        queue_name: str = None,
+    ) -> Response:
+        """Send messages with send_message_batch, SQS_BATCH_SIZE messages per call
+
+        :param message_bodies: message bodies to send
+        :param queue_url: SQS queue url
+        :param queue_name: SQS queue name, used when queue_url is not specified
+        :return: Response object, data lists the successful and failed entries
+        """
+        successful = []
+        failed = []
+        try:
+            if not queue_url and queue_name:
+                queue_url = self.get_queue_url(queue_name)
+
+            if not queue_url:
+                self.logger.error(
+                    "Failed to send SQS messages batch. Details: QueueUrl Not Found."
+                )
+                return Response(
+                    data=Error("QueueUrl Not Found"), status_code=404, ok=False
+                )
+
+            for index in range(0, len(message_bodies), SQS_BATCH_SIZE):
+                chunk = message_bodies[index : index + SQS_BATCH_SIZE]  # noqa
+                entries = [
+                    {"Id": str(entry_id), "MessageBody": message_body}
+                    for entry_id, message_body in enumerate(chunk)
+                ]
+                try:
+                    response_data = self.client.send_message_batch(
+                        QueueUrl=queue_url, Entries=entries
+                    )
+                except ClientError as e:
+                    if not queue_name or not self.is_queue_does_not_exist(e):
+                        raise
+
+                    queue_url = self.get_queue_url(queue_name, refresh=True)
+                    response_data = self.client.send_message_batch(
+                        QueueUrl=queue_url, Entries=entries
+                    )
+
+                for entry in response_data.get("Successful", []):
+                    successful.append(
+                        {
+                            "message_body": chunk[int(entry["Id"])],
+                            "message_id": entry.get("MessageId"),
+                        }
+                    )
+                for entry in response_data.get("Failed", []):
+                    failed.append(
+                        {
+                            "message_body": chunk[int(entry["Id"])],
+                            "code": entry.get("Code"),
+                            "detail": entry.get("Message"),
+                        }
+                    )
+
+        except Exception as e:
+            errors = "Failed to send SQS messages batch, queue: '%s'" % (
+                queue_name or queue_url
+            )
+            traceback = ExceptionUtilities.stack_trace_as_string(e)
+            self.logger.error(errors, ExceptionUtilities.stack_trace_as_string(e))
+            sent = {entry["message_body"] for entry in successful + failed}
+            failed += [
+                {"message_body": message_body, "code": "error", "detail": errors}
+                for message_body in message_bodies
+                if message_body not in sent
+            ]
+            return Response(
+                data={
+                    "successful": successful,
+                    "failed": failed,
+                    "traceback": traceback,
+                },
+                status_code=400,
+                ok=False,
+            )
+
+        for entry in failed:
+            self.logger.error(
+                "Failed to send SQS Queue, message body: '%s'. Details: %s"
+                % (entry["message_body"], entry["detail"])
+            )
+        return Response(
+            data={"successful": successful, "failed": failed},
+            status_code=201 if not failed else 207,
+            ok=not failed,
+        )
+
+    def get_queue_url(self, queue_name: str, refresh: bool = False) -> str:
+        cls = self.__class__
+        if not refresh and queue_name in cls._queue_urls:
+            return cls._queue_urls[queue_name]
+
         self.logger.info("Proceed to get SQS Queue URL")
         response = self.client.get_queue_url(QueueName=queue_name)
-        return response.get("QueueUrl", None)
+        queue_url = response.get("QueueUrl", None)
+        with cls._queue_urls_lock:
+            if queue_url:
+                cls._queue_urls[queue_name] = queue_url
+            else:
+                cls._queue_urls.pop(queue_name, None)
+        return queue_url
+
+    @staticmethod
+    def is_queue_does_not_exist(error: ClientError) -> bool:
+        return (
+            error.response.get("Error", {}).get("Code")
+            in SQS_QUEUE_DOES_NOT_EXIST_CODES
+        )
+
+
+class S3MultipartUpload(object):
+    """
+    File-like S3 object writer, buffered data is sent with upload_part every
+    ``part_size`` bytes so the object is never held in memory or on disk.
+        :param client: boto3 S3 client
+        :param str bucket: S3 bucket to upload to
+        :param str key: S3 key
+        :param int part_size: part size, S3 requires at least 5 MB except for the last part
+    """
+
+    def __init__(
+        self, client, bucket: str, key: str, part_size: int = S3_MULTIPART_PART_SIZE
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.upload_id = None
+        self.parts = []
+        self._buffer = bytearray()
+
+    @property
+    def url(self) -> str:
+        return f"https://{self.bucket}.s3.amazonaws.com/{self.key}"
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+
+    def complete(self) -> str:
+        if self.upload_id is None:
+            # small object, a single request is enough
+            self.client.put_object(
+                Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer)
+            )
+            self._buffer.clear()
+            return self.url
+
+        if self._buffer:
+            self._upload_part()
+
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+        # nothing is left to abort once completed
+        self.upload_id = None
+        return self.url
+
+    def abort(self) -> None:
+        self._buffer.clear()
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+            )
+            self.upload_id = None
+
+    def _upload_part(self) -> None:
+        if self.upload_id is None:
+            response = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )
+            self.upload_id = response["UploadId"]
+
+        part_number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=bytes(self._buffer),
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self._buffer.clear()
 
 
 class S3Client(Boto3Client):
@@ -319,6 +531,63 @@ class S3Client(Boto3Client):
         )
         return Response(data=f"https://{bucket}.s3.amazonaws.com/{key}")
 
+    def put_object(
+        self, body: bytes, bucket: str, key: str, content_type: str = None
+    ) -> Response:
+        """Upload bytes to an S3 bucket
+
+        :param body: object content
+        :param bucket: S3 bucket to upload to
+        :param key: S3 key
+        :param content_type: object content type
+        :return: Response object, data is the object url
+        """
+        extra_args = {"ContentType": content_type} if content_type else {}
+        try:
+            self.client.put_object(Bucket=bucket, Key=key, Body=body, **extra_args)
+
+        except Exception as e:
+            errors = "Failed to put object to S3, key: '%s', region: '%s'" % (
+                key,
+                self._config.region_name,
+            )
+            traceback = ExceptionUtilities.stack_trace_as_string(e)
+            self.logger.error(errors, ExceptionUtilities.stack_trace_as_string(e))
+            return Response(data=Error(errors, traceback), status_code=400, ok=False)
+
+        return Response(data=f"https://{bucket}.s3.amazonaws.com/{key}")
+
+    def upload_fileobj(self, fileobj, bucket: str, key: str) -> Response:
+        """Upload a file-like object to an S3 bucket, large objects are sent in parts
+
+        :param fileobj: readable file-like object, e.g. a streamed HTTP response
+        :param bucket: S3 bucket to upload to
+        :param key: S3 key
+        :return: Response object, data is the object url
+        """
+        try:
+            self.client.upload_fileobj(fileobj, bucket, key)
+
+        except Exception as e:
+            errors = "Failed to upload file object to S3, key: '%s', region: '%s'" % (
+                key,
+                self._config.region_name,
+            )
+            traceback = ExceptionUtilities.stack_trace_as_string(e)
+            self.logger.error(errors, ExceptionUtilities.stack_trace_as_string(e))
+            return Response(data=Error(errors, traceback), status_code=400, ok=False)
+
+        return Response(data=f"https://{bucket}.s3.amazonaws.com/{key}")
+
+    def create_multipart_upload(self, bucket: str, key: str) -> S3MultipartUpload:
+        """Start streaming an object to an S3 bucket
+
+        :param bucket: S3 bucket to upload to
+        :param key: S3 key
+        :return: S3MultipartUpload, write data to it then call complete or abort
+        """
+        return S3MultipartUpload(self.client, bucket, key)
+
     def generate_presigned_url(
         self,
         bucket: str,
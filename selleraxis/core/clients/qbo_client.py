@@ -0,0 +1,149 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+from selleraxis.core.clients.http_client import get_http_session
+from selleraxis.core.utils.qbo_environment import production_and_sandbox_environments
+from selleraxis.core.utils.qbo_token import check_token_exp
+from selleraxis.settings.common import DATE_FORMAT, LOGGER_FORMAT
+
+logging.basicConfig(format=LOGGER_FORMAT, datefmt=DATE_FORMAT)
+
+# QBO accepts up to 30 operations in one /batch request
+QBO_BATCH_SIZE = 30
+QBO_QUERY_IN_SIZE = 100
+QBO_QUERY_MAX_RESULTS = 1000
+
+
+class QBOClientError(Exception):
+    """QBO request failed"""
+
+
+class QBOTokenExpired(QBOClientError):
+    """Both access token and refresh token expired"""
+
+
+def quote_query_value(value: str) -> str:
+    return "'{}'".format(str(value).replace("\\", "\\\\").replace("'", "\\'"))
+
+
+def get_fault_message(batch_item: dict) -> str:
+    """Detail of the first error of a failed batch item"""
+    errors = (batch_item.get("Fault") or {}).get("Error") or []
+    if errors:
+        return errors[0].get("Detail") or errors[0].get("Message") or str(errors[0])
+    return json.dumps(batch_item)
+
+
+class QBOClient(object):
+    """
+    QBO accounting API client of an organization
+        :param organization: Organization object
+        :param bool is_sandbox: QBO environment
+        :param str access_token: valid access token, refreshed once on 401
+    """
+
+    def __init__(self, organization, is_sandbox: bool, access_token: str):
+        self.organization = organization
+        self.is_sandbox = is_sandbox
+        self.access_token = access_token
+        self.url = (
+            f"{production_and_sandbox_environments(is_sandbox)}"
+            f"/v3/company/{organization.realm_id}"
+        )
+        self.session = get_http_session()
+
+    def request(self, method: str, path: str, retry=True, **kwargs):
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.access_token}",
+            "Accept": "application/json",
+        }
+        response = self.session.request(
+            method, f"{self.url}/{path}", headers=headers, **kwargs
+        )
+        if response.status_code == 401:
+            get_token_result, token_data = check_token_exp(
+                self.organization, self.is_sandbox
+            )
+            if not retry or get_token_result is False or not token_data:
+                raise QBOTokenExpired(response.text)
+            self.access_token = token_data.get("access_token")
+            return self.request(method, path, retry=False, **kwargs)
+        if response.status_code != 200:
+            logging.error(response.text)
+            raise QBOClientError(response.text)
+        return response
+
+    def query(self, query: str) -> dict:
+        response = self.request("GET", "query", params={"query": query})
+        return response.json().get("QueryResponse") or {}
+
+    def query_in(self, entity: str, field: str, values: List[str]) -> List[dict]:
+        """Entities whose field is one of values, QBO_QUERY_IN_SIZE values per query"""
+        values = list(dict.fromkeys(values))
+        entities = []
+        for start in range(0, len(values), QBO_QUERY_IN_SIZE):
+            in_values = ", ".join(
+                quote_query_value(value)
+                for value in values[start : start + QBO_QUERY_IN_SIZE]  # noqa
+            )
+            query_response = self.query(
+                f"select * from {entity} Where {field} IN ({in_values}) "
+                f"MAXRESULTS {QBO_QUERY_MAX_RESULTS}"
+            )
+            entities += query_response.get(entity) or []
+        return entities
+
+    def cdc(self, entities: List[str], changed_since: datetime) -> Dict[str, list]:
+        """Entities changed or deleted since changed_since, by entity name"""
+        response = self.request(
+            "GET",
+            "cdc",
+            params={
+                "entities": ",".join(entities),
+                "changedSince": changed_since.isoformat(),
+            },
+        )
+        changes = {}
+        for cdc_response in response.json().get("CDCResponse") or []:
+            for query_response in cdc_response.get("QueryResponse") or []:
+                for entity in entities:
+                    if query_response.get(entity):
+                        changes.setdefault(entity, []).extend(query_response[entity])
+        return changes
+
+    def batch(self, operations: List[dict]) -> List[dict]:
+        """Send operations in /batch requests of QBO_BATCH_SIZE
+
+        Each operation is a BatchItemRequest without bId, e.g.
+        {"operation": "create", "Item": {...}}. Returns the BatchItemResponse
+        of every operation, in the same order.
+        """
+        batch_items = []
+        for start in range(0, len(operations), QBO_BATCH_SIZE):
+            chunk = operations[start : start + QBO_BATCH_SIZE]  # noqa
+            response = self.request(
+                "POST",
+                "batch",
+                data=json.dumps(
+                    {
+                        "BatchItemRequest": [
+                            dict(operation, bId=str(index))
+                            for index, operation in enumerate(chunk)
+                        ]
+                    }
+                ),
+            )
+            batch_responses = {
+                batch_item.get("bId"): batch_item
+                for batch_item in response.json().get("BatchItemResponse", [])
+            }
+            batch_items += [
+                batch_responses.get(
+                    str(index), {"Fault": {"Error": [{"Detail": "Missing response"}]}}
+                )
+                for index in range(len(chunk))
+            ]
+        return batch_items
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import copy
 import logging
 import os
-from typing import Generator, List, TypeVar
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Generator, Iterator, List, TypeVar
 
 import paramiko
 
@@ -152,6 +156,7 @@ class SFTPClientManager(BaseClient):
             sftp_hostname, sftp_username, sftp_password, sftp_port, **extend_config
         )
         self._client = None
+        self._transport = None
         self.sftp_hostname = sftp_hostname
         self.sftp_username = sftp_username
         self.sftp_password = sftp_password
@@ -170,6 +175,7 @@ class SFTPClientManager(BaseClient):
                 hostkey=None, username=self.sftp_username, password=self.sftp_password
             )
             self._client = paramiko.SFTPClient.from_transport(transport)
+            self._transport = transport
             self.logger.debug("Connect SFTP Client successfully.")
             return self._client
 
@@ -185,14 +191,55 @@ class SFTPClientManager(BaseClient):
         if isinstance(self.client, paramiko.SFTPClient):
             self._client.close()
 
+        if isinstance(self._transport, paramiko.Transport):
+            self._transport.close()
+
         self.logger.debug("Close SFTP Client successfully.")
 
+    def open_channel(self) -> SFTPClientManager:
+        """New SFTP session over the same SSH connection, without a new handshake"""
+        channel = copy.copy(self)
+        channel._client = paramiko.SFTPClient.from_transport(self._transport)
+        # closing the channel leaves the shared connection open
+        channel._transport = None
+        return channel
+
+    def is_active(self) -> bool:
+        """Whether the underlying SSH transport is still usable"""
+        return (
+            isinstance(self._transport, paramiko.Transport)
+            and self._transport.is_active()
+        )
+
+    def open(self, remotepath: str, prefetch: bool = True) -> paramiko.SFTPFile:
+        """Open a remote file for reading, prefetching its content in the background"""
+        file = self.client.open(remotepath, "rb")
+        if prefetch:
+            file.prefetch()
+        return file
+
     def put(self, localpath: str, remotepath: str, callback=None, confirm=True):
         self.get_or_create_remote_path(remotepath)
         filename = os.path.basename(localpath)
         path = remotepath[:-1] if remotepath.endswith("/") else remotepath
         return self.client.put(localpath, f"{path}/{filename}", callback, confirm)
 
+    def create(self, remotepath: str, filename: str) -> paramiko.SFTPFile:
+        """Open a new remote file for writing, writes are pipelined"""
+        self.get_or_create_remote_path(remotepath)
+        path = remotepath[:-1] if remotepath.endswith("/") else remotepath
+        file = self.client.open(f"{path}/{filename}", "wb")
+        file.set_pipelined(True)
+        return file
+
+    def rename(self, remotepath: str, filename: str, new_filename: str) -> None:
+        path = remotepath[:-1] if remotepath.endswith("/") else remotepath
+        self.client.rename(f"{path}/{filename}", f"{path}/{new_filename}")
+
+    def remove(self, remotepath: str, filename: str) -> None:
+        path = remotepath[:-1] if remotepath.endswith("/") else remotepath
+        self.client.remove(f"{path}/{filename}")
+
     def get_or_create_remote_path(self, remotepath: str) -> None:
         try:
             self.client.chdir(remotepath)
@@ -218,6 +265,68 @@ class SFTPClientManager(BaseClient):
             yield attr
 
 
+class SFTPClientPool(BaseClient):
+    """
+    Bounded pool of connected SFTP sessions sharing the same configuration
+        :param callable client_factory: returns a new, not connected SFTPClientManager
+        :param int max_size: maximum number of sessions opened at the same time
+    """
+
+    def __init__(
+        self, client_factory: Callable[[], SFTPClientManager], max_size: int = 4
+    ):
+        self._client_factory = client_factory
+        self._idle_clients = queue.LifoQueue()
+        self._clients = []
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_size)
+
+    @contextmanager
+    def session(self) -> Iterator[SFTPClientManager]:
+        """Borrow a connected session, waiting while all sessions are in use"""
+        self._semaphore.acquire()
+        try:
+            client = self._checkout()
+            try:
+                yield client
+            finally:
+                self._idle_clients.put(client)
+        finally:
+            self._semaphore.release()
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, []
+
+        for client in clients:
+            client.close()
+
+    def _checkout(self) -> SFTPClientManager:
+        while True:
+            try:
+                client = self._idle_clients.get_nowait()
+            except queue.Empty:
+                break
+
+            if client.is_active():
+                return client
+
+            # the server dropped this session, replace it with a new one
+            self._discard(client)
+
+        client = self._client_factory()
+        client.connect()
+        with self._lock:
+            self._clients.append(client)
+        return client
+
+    def _discard(self, client: SFTPClientManager) -> None:
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+        client.close()
+
+
 class CommerceHubSFTPClient(SFTPClientManager):
     """CommerceHub SFTP Client"""
 
@@ -250,6 +359,9 @@ class CommerceHubSFTPClient(SFTPClientManager):
     def listdir_purchase_orders(self):
         return generator(self.listdir(self.purchase_orders_sftp_directory))
 
+    def listdir_attr_purchase_orders(self):
+        return generator(self.listdir_attr(self.purchase_orders_sftp_directory))
+
     def listdir_acknowledgment(self):
         return generator(self.listdir(self.acknowledgment_sftp_directory))
 
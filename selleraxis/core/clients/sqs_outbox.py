@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import List, Tuple
+
+from django.db import transaction
+
+from ..request_context import get_current_request
+from .boto3_client import sqs_client
+
+
+class SQSOutbox(object):
+    """
+    Buffer SQS messages and send them with send_message_batch once the current
+    transaction commits, instead of one send_message call per saved row.
+
+    Messages queued in a transaction are kept by the on_commit callback of the
+    innermost atomic block, and dropped with it when that block rolls back.
+    Messages queued in autocommit mode while a request is being handled are sent
+    when the request ends, see RequestContextMiddleware.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def logger(self) -> logging.Logger:
+        return logging.getLogger(self.__class__.__name__)
+
+    @property
+    def messages(self) -> List[Tuple[str, str]]:
+        if not hasattr(self._local, "messages"):
+            self._local.messages = []
+        return self._local.messages
+
+    @property
+    def transaction_messages(self) -> dict:
+        """(messages, on_commit callback) by savepoints of the atomic block"""
+        if not hasattr(self._local, "transaction_messages"):
+            self._local.transaction_messages = {}
+        return self._local.transaction_messages
+
+    def add(self, queue_name: str, message_body: dict) -> None:
+        message = (queue_name, json.dumps(message_body))
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            self.transaction_messages.clear()
+            self.messages.append(message)
+            if get_current_request() is None:
+                self.flush()
+            return
+
+        key = tuple(connection.savepoint_ids)
+        messages, send_messages = self.transaction_messages.get(key, (None, None))
+        # a callback no longer registered was run or discarded by a rollback
+        if not any(entry[1] is send_messages for entry in connection.run_on_commit):
+            messages = []
+
+            def send_messages():
+                if self.transaction_messages.get(key, (None,))[0] is messages:
+                    del self.transaction_messages[key]
+                self.send_messages(messages)
+
+            self.transaction_messages[key] = (messages, send_messages)
+            # a single send per atomic block
+            transaction.on_commit(send_messages)
+        messages.append(message)
+
+    def flush(self) -> None:
+        messages, self._local.messages = self.messages, []
+        self.send_messages(messages)
+
+    def send_messages(self, messages: List[Tuple[str, str]]) -> None:
+        queues = {}
+        for queue_name, message_body in messages:
+            queues.setdefault(queue_name, []).append(message_body)
+
+        for queue_name, message_bodies in queues.items():
+            self.send(queue_name, message_bodies)
+
+    def send(self, queue_name: str, message_bodies: List[str]) -> None:
+        response = sqs_client.send_message_batch(
+            message_bodies=message_bodies, queue_name=queue_name
+        )
+        if not response.ok:
+            self.logger.error(
+                "Failed to send %s of %s SQS messages to '%s'."
+                % (len(response.data["failed"]), len(message_bodies), queue_name)
+            )
+
+
+sqs_outbox = SQSOutbox()
@@ -7,18 +7,36 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db import connection
 from django.utils.deprecation import MiddlewareMixin
 
+from selleraxis.core.clients.sqs_outbox import sqs_outbox
+from selleraxis.core.request_context import current_request
 from selleraxis.organizations.models import Organization
 from selleraxis.settings.common import DATE_FORMAT, LOGGER_FORMAT
 
 logging.basicConfig(format=LOGGER_FORMAT, datefmt=DATE_FORMAT)
 
 
+class RequestContextMiddleware(MiddlewareMixin):
+    """Expose the current request to signals and flush messages queued during it"""
+
+    def process_request(self, request):
+        request.context_token = current_request.set(request)
+
+    def process_response(self, request, response):
+        sqs_outbox.flush()
+        context_token = getattr(request, "context_token", None)
+        if context_token is not None:
+            current_request.reset(context_token)
+        return response
+
+
 class OrganizationMiddleware(MiddlewareMixin):
     def process_request(self, request):
         organization_id = request.META.get("HTTP_ORGANIZATION")
         try:
             if organization_id is not None:
                 organization = Organization.objects.get(pk=int(organization_id))
+                # reused by check_permission when the header is not switched
+                request.organization = organization
                 if organization.sandbox_organization:
                     if (
                         organization.is_sandbox
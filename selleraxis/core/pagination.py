@@ -1,10 +1,52 @@
+import base64
+import datetime
+import decimal
+import hashlib
+import json
+import uuid
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import ParseError
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+PAGINATION_COUNT_CACHE_KEY = "pagination_count_{}"
+# cursor values are tagged by type to be decoded back exactly, datetimes
+# keeping their microseconds for the keyset filter to compare equal
+CURSOR_VALUE_TYPES = {
+    "datetime": (
+        datetime.datetime,
+        datetime.datetime.isoformat,
+        datetime.datetime.fromisoformat,
+    ),
+    "date": (datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+    "time": (datetime.time, datetime.time.isoformat, datetime.time.fromisoformat),
+    "decimal": (decimal.Decimal, str, decimal.Decimal),
+    "uuid": (uuid.UUID, str, uuid.UUID),
+}
 
 
 class Pagination(LimitOffsetPagination):
+    """Limit offset pagination, or keyset pagination when ``cursor`` is given.
+
+    Pages of the keyset mode start after the last row of the previous page in
+    the active ordering, so deep pages cost the same as the first one. The
+    first page is requested with an empty ``cursor``, the next ones with the
+    cursor of the ``next`` link, and the total count is cached.
+    """
+
     default_limit = 10
+    cursor_query_param = "cursor"
 
     def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if self.cursor_mode:
+            return self.paginate_queryset_by_cursor(queryset, request)
         if request.query_params.get("limit") == "-1":
             self.count = queryset.count()
             self.limit = self.count
@@ -14,3 +56,135 @@ class Pagination(LimitOffsetPagination):
                 return []
             return list(queryset)
         return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "count": self.count,
+                "next": self.get_next_cursor_link(),
+                "previous": None,
+                "results": data,
+            }
+        )
+
+    def paginate_queryset_by_cursor(self, queryset: QuerySet, request) -> list:
+        self.request = request
+        self.limit = self.get_limit(request)
+        if not self.limit or self.limit <= 0:
+            raise ParseError("Cursor pagination needs a positive limit")
+        self.count = get_cached_count(queryset)
+        self.ordering = get_keyset_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(
+                get_keyset_filter(self.ordering, self.decode_cursor(cursor))
+            )
+
+        page = list(queryset[: self.limit + 1])
+        self.next_values = None
+        if len(page) > self.limit:
+            page = page[: self.limit]
+            self.next_values = (
+                queryset.order_by()
+                .filter(pk=page[-1].pk)
+                .values_list(*[field.lstrip("-") for field in self.ordering])
+                .first()
+            )
+        return page
+
+    def get_next_cursor_link(self) -> Optional[str]:
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_values)
+        )
+
+    def encode_cursor(self, values) -> str:
+        data = json.dumps(
+            {
+                "ordering": self.ordering,
+                "values": [encode_cursor_value(value) for value in values],
+            }
+        )
+        return base64.urlsafe_b64encode(data.encode("UTF-8")).decode("ascii")
+
+    def decode_cursor(self, cursor: str) -> list:
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            values = [decode_cursor_value(value) for value in data["values"]]
+            ordering = data["ordering"]
+        except (TypeError, ValueError, KeyError, decimal.InvalidOperation):
+            raise ParseError("Invalid cursor")
+        if ordering != self.ordering or len(values) != len(ordering):
+            raise ParseError("Invalid cursor, the ordering has changed")
+        return values
+
+
+def encode_cursor_value(value) -> list:
+    # datetime is checked before its date base class
+    for type_name, (value_type, encode, _) in CURSOR_VALUE_TYPES.items():
+        if isinstance(value, value_type):
+            return [type_name, encode(value)]
+    return ["value", value]
+
+
+def decode_cursor_value(value: list):
+    type_name, encoded = value
+    if type_name == "value":
+        return encoded
+    return CURSOR_VALUE_TYPES[type_name][2](encoded)
+
+
+def get_keyset_ordering(queryset: QuerySet) -> List[str]:
+    """Ordering fields of the queryset, ending with the primary key"""
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    for field in ordering:
+        if not isinstance(field, str) or field == "?":
+            raise ParseError("Cursor pagination needs an ordering by fields")
+    names = [field.lstrip("-") for field in ordering]
+    if "pk" not in names and queryset.model._meta.pk.name not in names:
+        descending = bool(ordering) and ordering[-1].startswith("-")
+        ordering.append("-pk" if descending else "pk")
+    return ordering
+
+
+def get_keyset_filter(ordering: List[str], values: list) -> Q:
+    """Rows after ``values`` in ``ordering``, nulls sort last when ascending"""
+    after = Q(pk__in=[])
+    same = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        descending = field.startswith("-")
+        if value is None:
+            if descending:
+                after |= same & Q(**{f"{name}__isnull": False})
+            same &= Q(**{f"{name}__isnull": True})
+        else:
+            field_after = Q(**{f"{name}__lt" if descending else f"{name}__gt": value})
+            if not descending:
+                field_after |= Q(**{f"{name}__isnull": True})
+            after |= same & field_after
+            same &= Q(**{name: value})
+    return after
+
+
+def get_cached_count(queryset: QuerySet) -> int:
+    """Count of the queryset, cached by query for a few minutes"""
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    key = PAGINATION_COUNT_CACHE_KEY.format(
+        hashlib.sha1(f"{sql} {params!r}".encode("UTF-8")).hexdigest()
+    )
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    return count
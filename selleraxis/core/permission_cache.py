@@ -0,0 +1,67 @@
+"""
+Cross-request cache of the permission data used by check_permission.
+
+Cached entries are keyed by an organization version, bumping the version
+invalidates every user of the organization at once. Kept free of model
+imports so the models can invalidate it from their signal receivers.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+PERMISSIONS_VERSION_CACHE_KEY = "permissions_version_{}"
+USER_PERMISSIONS_CACHE_KEY = "permissions_{}_{}_{}"
+ROLE_ORGANIZATION_CACHE_KEY = "permissions_role_organization_{}"
+
+
+def get_organization_version(organization_id) -> str:
+    cache_key = PERMISSIONS_VERSION_CACHE_KEY.format(organization_id)
+    version = cache.get(cache_key)
+    if version is None:
+        cache.add(cache_key, uuid.uuid4().hex, None)
+        version = cache.get(cache_key)
+    return version
+
+
+def get_user_permissions_cache_key(user_id, organization_id) -> str:
+    return USER_PERMISSIONS_CACHE_KEY.format(
+        organization_id, get_organization_version(organization_id), user_id
+    )
+
+
+def get_cached_user_permissions(user_id, organization_id):
+    return cache.get(get_user_permissions_cache_key(user_id, organization_id))
+
+
+def set_cached_user_permissions(user_id, organization_id, permission_sets) -> None:
+    cache.set(
+        get_user_permissions_cache_key(user_id, organization_id),
+        permission_sets,
+        settings.PERMISSION_CACHE_TIMEOUT,
+    )
+
+
+def get_cached_role_organization(organization_id):
+    return cache.get(ROLE_ORGANIZATION_CACHE_KEY.format(organization_id))
+
+
+def set_cached_role_organization(organization_id, role_organization_id) -> None:
+    cache.set(
+        ROLE_ORGANIZATION_CACHE_KEY.format(organization_id),
+        role_organization_id,
+        settings.PERMISSION_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_organization_permissions(*organization_ids) -> None:
+    for organization_id in organization_ids:
+        if organization_id is None:
+            continue
+
+        cache.set(
+            PERMISSIONS_VERSION_CACHE_KEY.format(organization_id),
+            uuid.uuid4().hex,
+            None,
+        )
+        cache.delete(ROLE_ORGANIZATION_CACHE_KEY.format(organization_id))
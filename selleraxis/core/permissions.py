@@ -1,9 +1,90 @@
+from typing import List, Optional
+
 from django.core.exceptions import ObjectDoesNotExist
 
+from selleraxis.core.permission_cache import (
+    get_cached_role_organization,
+    get_cached_user_permissions,
+    set_cached_role_organization,
+    set_cached_user_permissions,
+)
 from selleraxis.organizations.models import Organization
 from selleraxis.permissions.models import Permissions
 from selleraxis.role_user.models import RoleUser
 
+MISSING_ORGANIZATION = 0
+
+
+def get_request_cache(request) -> dict:
+    """Per-request permission cache, kept on the underlying HttpRequest"""
+    request = getattr(request, "_request", request)
+    if not hasattr(request, "permission_cache"):
+        request.permission_cache = {}
+    return request.permission_cache
+
+
+def get_role_organization_id(request, organization) -> Optional[int]:
+    """Organization the roles of ``organization`` belong to, sandbox ones use their production"""
+    request_cache = get_request_cache(request)
+    cache_key = ("role_organization", str(organization))
+    if cache_key in request_cache:
+        return request_cache[cache_key]
+
+    role_organization_id = get_cached_role_organization(organization)
+    if role_organization_id is None:
+        organization_obj = getattr(request, "organization", None)
+        try:
+            if organization_obj is None or str(organization_obj.pk) != str(
+                organization
+            ):
+                organization_obj = Organization.objects.get(id=organization)
+            role_organization_id = organization_obj.pk
+            if organization_obj.sandbox_organization_id is None:
+                role_organization_id = organization_obj.prod_organization.id
+        except (ObjectDoesNotExist, ValueError):
+            role_organization_id = MISSING_ORGANIZATION
+        set_cached_role_organization(organization, role_organization_id)
+
+    if role_organization_id == MISSING_ORGANIZATION:
+        role_organization_id = None
+    request_cache[cache_key] = role_organization_id
+    return role_organization_id
+
+
+def get_permission_sets(request, organization_id: int) -> List[frozenset]:
+    """Permissions of each role the request user has in the organization"""
+    request_cache = get_request_cache(request)
+    user_id = request.user.id
+    cache_key = ("permission_sets", user_id, organization_id)
+    if cache_key in request_cache:
+        return request_cache[cache_key]
+
+    permission_sets = get_cached_user_permissions(user_id, organization_id)
+    if permission_sets is None:
+        permission_sets = [
+            frozenset(permissions)
+            for permissions in RoleUser.objects.filter(
+                user__id=user_id, role__organization__id=organization_id
+            ).values_list("role__permissions", flat=True)
+        ]
+        set_cached_user_permissions(user_id, organization_id, permission_sets)
+
+    request_cache[cache_key] = permission_sets
+    return permission_sets
+
+
+def has_permissions(request, organization, *permissions) -> bool:
+    """Whether one of the user roles in the organization grants all the permissions"""
+    organization_id = get_role_organization_id(request, organization)
+    if organization_id is None:
+        return False
+
+    required = [getattr(permission, "value", permission) for permission in permissions]
+    return any(
+        all(permission in permission_set for permission in required)
+        for permission_set in get_permission_sets(request, organization_id)
+    )
+
 
 def check_permission(context, *permissions):
     if (
@@ -21,22 +102,13 @@ def check_permission(context, *permissions):
     else:
         organization = context.request.headers.get("organization", None)
 
-    if organization is None or organization == "" or organization.isspace():
+    if organization is None or organization == "" or str(organization).isspace():
         return context.permission_denied(context.request)
-    try:
-        organization_obj = Organization.objects.get(id=organization)
-    except ObjectDoesNotExist:
+    if get_role_organization_id(context.request, organization) is None:
         return context.permission_denied(context.request)
-    if organization_obj.sandbox_organization is None:
-        organization = organization_obj.prod_organization.id
-
-    roles = RoleUser.objects.filter(
-        user__id=context.request.user.id, role__organization__id=organization
-    )
 
-    for role in roles:
-        if all(permission in role.role.permissions for permission in permissions):
-            return
+    if has_permissions(context.request, organization, *permissions):
+        return
 
     return context.permission_denied(
         context.request,
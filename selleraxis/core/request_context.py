@@ -0,0 +1,19 @@
+"""
+Request scoped context shared with code that does not receive the request,
+e.g. model signals.
+"""
+from contextvars import ContextVar
+
+current_request = ContextVar("current_request", default=None)
+
+
+def get_current_request():
+    return current_request.get()
+
+
+def get_current_user_id():
+    request = current_request.get()
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user.id
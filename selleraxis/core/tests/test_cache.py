@@ -0,0 +1,27 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from selleraxis.core.cache import get_or_compute, invalidate_tags
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class GetOrComputeTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_legacy_plain_value_is_a_miss(self):
+        cache.set("order_check_1", [{"id": 1}])
+        self.assertEqual(get_or_compute("order_check_1", lambda: [], tags=["a"]), [])
+        self.assertEqual(cache.get("order_check_1"), [{"id": 1}])
+
+    def test_legacy_pair_value_is_a_miss(self):
+        cache.set("next_excution_1", ("a", "b"))
+        self.assertEqual(get_or_compute("next_excution_1", lambda: "c"), "c")
+
+    def test_value_is_cached_until_a_tag_is_invalidated(self):
+        self.assertEqual(get_or_compute("key", lambda: 1, tags=["a"]), 1)
+        self.assertEqual(get_or_compute("key", lambda: 2, tags=["a"]), 1)
+        invalidate_tags("a")
+        self.assertEqual(get_or_compute("key", lambda: 3, tags=["a"]), 3)
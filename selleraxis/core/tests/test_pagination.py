@@ -0,0 +1,97 @@
+import datetime
+import decimal
+import uuid
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from selleraxis.core.pagination import (
+    Pagination,
+    decode_cursor_value,
+    encode_cursor_value,
+    get_keyset_ordering,
+)
+from selleraxis.users.models import User
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+class CursorValueTest(SimpleTestCase):
+    def test_values_are_decoded_back_exactly(self):
+        for value in [
+            datetime.datetime(
+                2023, 5, 1, 8, 30, 0, 123456, tzinfo=datetime.timezone.utc
+            ),
+            datetime.datetime(2023, 5, 1, 8, 30, 0, 123457),
+            datetime.date(2023, 5, 1),
+            datetime.time(8, 30, 0, 1),
+            decimal.Decimal("10.005"),
+            uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "text",
+            1,
+            None,
+        ]:
+            decoded = decode_cursor_value(encode_cursor_value(value))
+            self.assertEqual(decoded, value)
+            self.assertIs(type(decoded), type(value))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base = timezone.now().replace(microsecond=500000)
+        dates = [
+            base,
+            base,
+            base,
+            # same millisecond as base
+            base + datetime.timedelta(microseconds=1),
+            base + datetime.timedelta(microseconds=999),
+            base - datetime.timedelta(microseconds=1),
+            base - datetime.timedelta(microseconds=1),
+            base + datetime.timedelta(seconds=1),
+            base - datetime.timedelta(seconds=1),
+        ]
+        for index, date_joined in enumerate(dates):
+            User.objects.create_user(
+                email=f"user{index}@selleraxis.com", date_joined=date_joined
+            )
+
+    def get_pages(self, queryset, limit: int) -> list:
+        factory = APIRequestFactory()
+        request = factory.get("/users", {"cursor": "", "limit": limit})
+        pages = []
+        while request is not None:
+            pagination = Pagination()
+            page = pagination.paginate_queryset(queryset, Request(request))
+            response = pagination.get_paginated_response([user.pk for user in page])
+            self.assertEqual(response.data["count"], queryset.count())
+            pages.append(response.data["results"])
+            next_link = response.data["next"]
+            request = factory.get(next_link) if next_link else None
+        return pages
+
+    def assert_paginated(self, queryset):
+        expected = list(
+            queryset.order_by(*get_keyset_ordering(queryset)).values_list(
+                "pk", flat=True
+            )
+        )
+        for limit in range(1, len(expected) + 1):
+            pages = self.get_pages(queryset, limit)
+            self.assertEqual([pk for page in pages for pk in page], expected)
+            self.assertTrue(all(len(page) <= limit for page in pages))
+
+    def test_ascending_across_duplicate_timestamps(self):
+        self.assert_paginated(User.objects.order_by("date_joined"))
+
+    def test_descending_across_duplicate_timestamps(self):
+        self.assert_paginated(User.objects.order_by("-date_joined"))
+
+    def test_ties_of_other_fields(self):
+        self.assert_paginated(User.objects.order_by("is_staff", "-date_joined"))
@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase
+
+from selleraxis.core.clients.sqs_outbox import SQSOutbox
+
+
+class SQSOutboxTest(TestCase):
+    def setUp(self):
+        self.outbox = SQSOutbox()
+        patcher = mock.patch.object(self.outbox, "send")
+        self.send = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_messages_are_sent_once_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.outbox.add("queue", {"id": 1})
+            self.outbox.add("queue", {"id": 2})
+            self.send.assert_not_called()
+        self.send.assert_called_once_with("queue", ['{"id": 1}', '{"id": 2}'])
+
+    def test_messages_of_a_rolled_back_block_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.outbox.add("queue", {"id": 1})
+            try:
+                with transaction.atomic():
+                    self.outbox.add("queue", {"id": 2})
+                    raise ValueError
+            except ValueError:
+                pass
+            self.outbox.add("queue", {"id": 3})
+        sent = [
+            message for call in self.send.call_args_list for message in call.args[1]
+        ]
+        self.assertEqual(sent, ['{"id": 1}', '{"id": 3}'])
+        self.outbox.flush()
+        self.assertEqual(self.send.call_count, 1)
+
+    def test_messages_of_a_released_block_are_sent(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.outbox.add("queue", {"id": 1})
+            self.outbox.add("queue", {"id": 2})
+        sent = [
+            message for call in self.send.call_args_list for message in call.args[1]
+        ]
+        self.assertEqual(sent, ['{"id": 1}', '{"id": 2}'])
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from selleraxis.core.utils.xml_generator import XMLGenerator
+
+SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="urn:test" elementFormDefault="qualified">
+    <xs:element name="root">
+        <xs:complexType>
+            <xs:sequence>
+                <xs:element name="name" type="xs:string">
+                    <xs:annotation>
+                        <xs:documentation>name</xs:documentation>
+                    </xs:annotation>
+                </xs:element>
+                <xs:element name="action" minOccurs="0" maxOccurs="unbounded">
+                    <xs:annotation>
+                        <xs:documentation>action</xs:documentation>
+                    </xs:annotation>
+                    <xs:complexType>
+                        <xs:simpleContent>
+                            <xs:extension base="xs:string" />
+                        </xs:simpleContent>
+                    </xs:complexType>
+                </xs:element>
+                <xs:element name="item" maxOccurs="unbounded">
+                    <xs:annotation>
+                        <xs:documentation>items.[items_id]</xs:documentation>
+                    </xs:annotation>
+                    <xs:complexType>
+                        <xs:sequence>
+                            <xs:element name="sku" type="xs:string">
+                                <xs:annotation>
+                                    <xs:documentation>items.[items_id].sku</xs:documentation>
+                                </xs:annotation>
+                            </xs:element>
+                        </xs:sequence>
+                    </xs:complexType>
+                </xs:element>
+            </xs:sequence>
+        </xs:complexType>
+    </xs:element>
+</xs:schema>
+"""
+
+
+class XMLGeneratorTopLevelListTest(unittest.TestCase):
+    def setUp(self):
+        file = tempfile.NamedTemporaryFile("w", suffix=".xsd", delete=False)
+        with file:
+            file.write(SCHEMA)
+        self.schema_file = file.name
+        self.addCleanup(os.remove, self.schema_file)
+        self.data = {
+            "name": "order",
+            "action": "v_cancel",
+            "items": [{"sku": "A"}, {"sku": "B"}],
+        }
+
+    def get_children(self, xml: bytes) -> list:
+        root = ET.fromstring(xml)
+        return [
+            (child.tag.split("}")[-1], child.text, [c.text for c in child])
+            for child in root
+        ]
+
+    def test_generate_skips_list_without_parent_path(self):
+        xml = XMLGenerator(self.schema_file, self.data).generate()
+
+        self.assertEqual(
+            self.get_children(xml),
+            [
+                ("name", "order", []),
+                ("item", None, ["A"]),
+                ("item", None, ["B"]),
+            ],
+        )
+
+    def test_generate_stream_skips_list_without_parent_path(self):
+        chunks = []
+        XMLGenerator(self.schema_file, self.data).generate_stream(chunks.append)
+
+        self.assertEqual(
+            self.get_children(b"".join(chunks)),
+            [
+                ("name", "order", []),
+                ("item", None, ["A"]),
+                ("item", None, ["B"]),
+            ],
+        )
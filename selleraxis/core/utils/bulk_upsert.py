@@ -0,0 +1,65 @@
+from typing import Dict, List, Sequence, Tuple, Type
+
+from django.db import models
+from django.utils import timezone
+
+
+def bulk_upsert(
+    model: Type[models.Model],
+    key_fields: Sequence[str],
+    rows: Dict[tuple, dict],
+    batch_size: int = None,
+    **filters,
+) -> Tuple[Dict[tuple, models.Model], List[models.Model]]:
+    """Set-based ``update_or_create`` for many rows at once.
+
+    :param model: model class to write
+    :param key_fields: fields identifying a row, the keys of ``rows`` are tuples of their values
+    :param rows: values to write for each key
+    :param batch_size: batch size of the bulk queries
+    :param filters: lookups every row shares, e.g. ``retailer=retailer``
+    :return: instances by key and the list of newly created instances
+    """
+    if not rows:
+        return {}, []
+
+    lookups = {
+        f"{field}__in": {key[index] for key in rows}
+        for index, field in enumerate(key_fields)
+    }
+    instances = {}
+    for instance in model.objects.filter(**filters, **lookups):
+        key = tuple(getattr(instance, field) for field in key_fields)
+        instances[key] = instance
+
+    has_updated_at = any(field.name == "updated_at" for field in model._meta.fields)
+    now = timezone.now()
+    update_fields = set()
+    updated_instances = []
+    created_instances = []
+    for key, values in rows.items():
+        instance = instances.get(key)
+        if instance is None:
+            instance = model(**{**filters, **dict(zip(key_fields, key)), **values})
+            created_instances.append(instance)
+            instances[key] = instance
+            continue
+
+        for field, value in values.items():
+            setattr(instance, field, value)
+        if has_updated_at:
+            instance.updated_at = now
+        update_fields.update(values)
+        updated_instances.append(instance)
+
+    if updated_instances and update_fields:
+        if has_updated_at:
+            update_fields.add("updated_at")
+        model.objects.bulk_update(
+            updated_instances, list(update_fields), batch_size=batch_size
+        )
+
+    if created_instances:
+        model.objects.bulk_create(created_instances, batch_size=batch_size)
+
+    return instances, created_instances
@@ -0,0 +1,154 @@
+"""
+Cross-request cache of QBO entities looked up by name during syncs.
+
+Entities are cached per organization and QBO environment under a version,
+bumping the version drops every entry at once. The cache is kept in line
+with QBO through Change Data Capture, entries updated with a stale
+SyncToken are evicted by the syncs.
+"""
+import hashlib
+import logging
+import uuid
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from selleraxis.core.clients.qbo_client import QBOClientError, QBOTokenExpired
+from selleraxis.settings.common import DATE_FORMAT, LOGGER_FORMAT
+
+logging.basicConfig(format=LOGGER_FORMAT, datefmt=DATE_FORMAT)
+
+QBO_CACHE_VERSION_KEY = "qbo_cache_version_{}"
+QBO_CACHE_CDC_LOCK_TIMEOUT = 60
+# QBO only keeps the changes of the last 30 days
+QBO_CDC_MAX_AGE = timedelta(days=29)
+# overlap between two CDC windows, covers the clock skew with QBO
+QBO_CDC_OVERLAP = timedelta(minutes=1)
+
+# name field of the cached entities
+QBO_CACHE_NAME_FIELDS = {
+    "Item": "Name",
+    "Account": "Name",
+    "Customer": "DisplayName",
+}
+
+
+def get_environment(is_sandbox: bool) -> str:
+    return "sandbox" if is_sandbox else "production"
+
+
+class QBOCache(object):
+    """QBO entities of an organization and environment by upper-cased name"""
+
+    def __init__(self, organization_id, is_sandbox: bool):
+        self.prefix = "qbo_cache_{}_{}".format(
+            organization_id, get_environment(is_sandbox)
+        )
+        self.version_key = QBO_CACHE_VERSION_KEY.format(self.prefix)
+        self.version = cache.get(self.version_key)
+        if self.version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            self.version = cache.get(self.version_key)
+
+    def get_key(self, entity: str, name: str) -> str:
+        name_hash = hashlib.sha1(name.strip().upper().encode("UTF-8")).hexdigest()
+        return f"{self.prefix}_{self.version}_{entity}_{name_hash}"
+
+    def get_id_key(self, entity: str, entity_id) -> str:
+        return f"{self.prefix}_{self.version}_{entity}_id_{entity_id}"
+
+    def get_many(self, entity: str, names: List[str]) -> Dict[str, dict]:
+        keys = {self.get_key(entity, name): name.strip().upper() for name in names}
+        return {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    def set_many(self, entity: str, entities: List[dict]) -> None:
+        name_field = QBO_CACHE_NAME_FIELDS[entity]
+        data = {}
+        for obj in entities:
+            name = obj.get(name_field)
+            if not name or obj.get("Id") is None:
+                continue
+            data[self.get_key(entity, name)] = obj
+            data[self.get_id_key(entity, obj.get("Id"))] = name
+        if data:
+            cache.set_many(data, settings.QBO_CACHE_TIMEOUT)
+
+    def delete(self, entity: str, names: List[str]) -> None:
+        cache.delete_many([self.get_key(entity, name) for name in names])
+
+    def invalidate(self) -> None:
+        self.version = uuid.uuid4().hex
+        cache.set(self.version_key, self.version, None)
+
+    def refresh(self, client) -> None:
+        """Apply the QBO changes made since the last refresh.
+
+        Runs at most once per QBO_CDC_REFRESH_INTERVAL and by a single worker,
+        the cache is dropped when the changes can not be read.
+        """
+        cdc_key = f"{self.prefix}_{self.version}_cdc"
+        changed_since = cache.get(cdc_key)
+        now = timezone.now()
+        if changed_since is not None and now - changed_since < timedelta(
+            seconds=settings.QBO_CDC_REFRESH_INTERVAL
+        ):
+            return
+
+        lock_key = f"{self.prefix}_cdc_lock"
+        if not cache.add(lock_key, True, QBO_CACHE_CDC_LOCK_TIMEOUT):
+            return
+
+        try:
+            if changed_since is None or now - changed_since > QBO_CDC_MAX_AGE:
+                self.invalidate()
+            else:
+                try:
+                    changes = client.cdc(
+                        list(QBO_CACHE_NAME_FIELDS), changed_since - QBO_CDC_OVERLAP
+                    )
+                except QBOTokenExpired:
+                    raise
+                except QBOClientError:
+                    self.invalidate()
+                else:
+                    for entity, entities in changes.items():
+                        self.apply_changes(entity, entities)
+            cache.set(
+                f"{self.prefix}_{self.version}_cdc", now, settings.QBO_CACHE_TIMEOUT
+            )
+        finally:
+            cache.delete(lock_key)
+
+    def apply_changes(self, entity: str, entities: List[dict]) -> None:
+        if entity not in QBO_CACHE_NAME_FIELDS:
+            return
+
+        name_field = QBO_CACHE_NAME_FIELDS[entity]
+        changed = []
+        for obj in entities:
+            # drop the entry of the previous name, the entity may be renamed
+            id_key = self.get_id_key(entity, obj.get("Id"))
+            previous_name = cache.get(id_key)
+            if previous_name is not None:
+                cache.delete_many([self.get_key(entity, previous_name), id_key])
+            if (
+                obj.get("status") != "Deleted"
+                and obj.get("Active") is not False
+                and obj.get(name_field)
+            ):
+                changed.append(obj)
+        self.set_many(entity, changed)
+
+
+def invalidate_qbo_cache(organization_id) -> None:
+    for is_sandbox in (True, False):
+        cache.set(
+            QBO_CACHE_VERSION_KEY.format(
+                "qbo_cache_{}_{}".format(organization_id, get_environment(is_sandbox))
+            ),
+            uuid.uuid4().hex,
+            None,
+        )
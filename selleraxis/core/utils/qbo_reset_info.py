@@ -1,5 +1,6 @@
 import logging
 
+from selleraxis.core.utils.qbo_cache import invalidate_qbo_cache
 from selleraxis.invoice.models import Invoice
 from selleraxis.products.models import Product
 from selleraxis.retailers.models import Retailer
@@ -31,6 +32,9 @@ def qbo_reset_infor(organization):
             qbo_product_id=None, sync_token=None, inv_start_date=None
         )
 
+        # drop the cached entities of the previous account
+        invalidate_qbo_cache(organization.id)
+
         return True
     except Exception as e:
         logging.error(f"Error when reset info when change qbo account: {e}")
@@ -0,0 +1,130 @@
+import abc
+import logging
+
+from rest_framework.exceptions import ParseError
+
+from selleraxis.core.clients.qbo_client import (
+    QBOClient,
+    QBOClientError,
+    QBOTokenExpired,
+)
+from selleraxis.core.utils.qbo_cache import QBO_CACHE_NAME_FIELDS, QBOCache
+from selleraxis.core.utils.qbo_token import check_token_exp
+from selleraxis.qbo_unhandled_data.models import QBOUnhandledData
+from selleraxis.settings.common import DATE_FORMAT, LOGGER_FORMAT
+
+logging.basicConfig(format=LOGGER_FORMAT, datefmt=DATE_FORMAT)
+
+# QBO error code of an update sent with an outdated SyncToken
+QBO_STALE_OBJECT_CODE = "5010"
+
+
+def is_stale_object(batch_item: dict) -> bool:
+    errors = (batch_item.get("Fault") or {}).get("Error") or []
+    return any(str(error.get("code")) == QBO_STALE_OBJECT_CODE for error in errors)
+
+
+class QBOBatchSync(abc.ABC):
+    """Sync objects of one organization to QBO in a single run.
+
+    Subclasses look the objects up with ``QBOClient.query_in`` and write them
+    with ``QBOClient.batch``, reporting each object through ``done``/``fail``.
+    Lookups go through the organization QBOCache, refreshed once per run.
+    """
+
+    model = None
+
+    def __init__(self, organization, is_sandbox, action=QBOUnhandledData.Action.CREATE):
+        self.organization = organization
+        self.is_sandbox = is_sandbox
+        self.action = action
+        self.client = None
+        self.cache = QBOCache(organization.id, is_sandbox)
+        self.results = {}
+
+    def sync(self, objects) -> dict:
+        """Returns {object id: (qbo entity, error message)} for every object"""
+        objects = list({obj.id: obj for obj in objects}.values())
+        self.results = {}
+        if not objects:
+            return self.results
+
+        try:
+            self.client = QBOClient(
+                self.organization, self.is_sandbox, self.get_access_token(objects)
+            )
+            self.cache.refresh(self.client)
+            self.sync_objects(objects)
+        except QBOTokenExpired:
+            self.reset_token()
+            self.fail_pending(objects, "Invalid token", QBOUnhandledData.Status.EXPIRED)
+        except QBOClientError as e:
+            self.fail_pending(objects, str(e))
+        except ParseError as e:
+            self.results.update({obj.id: (None, e.detail) for obj in objects})
+        return self.results
+
+    @abc.abstractmethod
+    def sync_objects(self, objects):
+        """Write the objects to QBO, reporting each one through done or fail"""
+
+    def lookup(self, entity, names) -> dict:
+        """Entities by upper-cased name, querying QBO for the cache misses only"""
+        found = self.cache.get_many(entity, names)
+        missing = [name for name in names if name.strip().upper() not in found]
+        if missing:
+            name_field = QBO_CACHE_NAME_FIELDS[entity]
+            entities = self.client.query_in(entity, name_field, missing)
+            self.cache.set_many(entity, entities)
+            found.update({obj.get(name_field, "").upper(): obj for obj in entities})
+        return found
+
+    def get_access_token(self, objects) -> str:
+        if self.organization.realm_id is None:
+            self.create_unhandled(objects, QBOUnhandledData.Status.UNHANDLED)
+            raise ParseError("Missing realm id")
+
+        get_token_result, token_data = check_token_exp(
+            self.organization, self.is_sandbox
+        )
+        if get_token_result is False or not token_data:
+            self.create_unhandled(objects, QBOUnhandledData.Status.EXPIRED)
+            self.reset_token()
+            raise ParseError("Invalid token")
+        return token_data.get("access_token")
+
+    def reset_token(self):
+        self.organization.qbo_access_token = None
+        self.organization.qbo_refresh_token = None
+        self.organization.qbo_access_token_exp_time = None
+        self.organization.qbo_refresh_token_exp_time = None
+        self.organization.save()
+
+    def create_unhandled(self, objects, status):
+        QBOUnhandledData.objects.bulk_create(
+            [
+                QBOUnhandledData(
+                    model=self.model,
+                    action=self.action,
+                    object_id=obj.id,
+                    status=status,
+                    organization=self.organization,
+                    is_sandbox=self.is_sandbox,
+                )
+                for obj in objects
+            ]
+        )
+
+    def done(self, obj, entity):
+        self.results[obj.id] = (entity, None)
+
+    def fail(self, objs, message, status=QBOUnhandledData.Status.FAIL):
+        logging.error(message)
+        self.create_unhandled(objs, status)
+        for obj in objs:
+            self.results[obj.id] = (None, message)
+
+    def fail_pending(self, objects, message, status=QBOUnhandledData.Status.FAIL):
+        pending = [obj for obj in objects if obj.id not in self.results]
+        if pending:
+            self.fail(pending, message, status)
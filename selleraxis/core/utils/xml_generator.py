@@ -1,12 +1,178 @@
 import os
+import threading
 import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Callable
+from xml.sax.saxutils import escape, quoteattr
 
 import xmlschema
 
+SCHEMA_CACHE_MAX_SIZE = 32
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class XMLEmitNode:
+    """One XSD element compiled for emitting, data paths are pre-split."""
+
+    __slots__ = ("name", "guard_path", "text_path", "children", "attributes")
+
+    def __init__(self, name: str, guard_path=None, text_path=None):
+        self.name = name
+        # element is skipped when there is no data at this path
+        self.guard_path = guard_path
+        # simple content value
+        self.text_path = text_path
+        # (node, list_path, index_key) tuples, list_path is None for single
+        # elements and node is None for xs:any
+        self.children = []
+        self.attributes = []
+
+
+class XMLSchemaCache:
+    """Process-level cache of compiled schemas and their emit plans.
+
+    Local schema files are keyed by path and mtime so an edited file is
+    compiled again, remote schemas by their url.
+    """
+
+    def __init__(self, max_size: int = SCHEMA_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(schema_file: str) -> tuple:
+        if os.path.isfile(schema_file):
+            path = os.path.abspath(schema_file)
+            return path, os.path.getmtime(path)
+
+        return schema_file, None
+
+    def get(self, schema_file: str) -> dict:
+        key = self.get_key(schema_file)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = {
+            "schema": xmlschema.XMLSchema(schema_file),
+            "plans": {},
+            "lock": threading.Lock(),
+        }
+        with self._lock:
+            # drop the entries of older versions of the same file
+            for cached_key in [k for k in self._entries if k[0] == key[0]]:
+                del self._entries[cached_key]
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_plan(self, schema_file: str, mandatory_only: bool):
+        entry = self.get(schema_file)
+        plan = entry["plans"].get(mandatory_only)
+        if plan is None:
+            with entry["lock"]:
+                plan = entry["plans"].get(mandatory_only)
+                if plan is None:
+                    plan = compile_plan(entry["schema"], mandatory_only)
+                    entry["plans"][mandatory_only] = plan
+        return entry["schema"], plan
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def split_path(path: str) -> tuple:
+    return tuple(path.split("."))
+
+
+def get_annotation_path(xsdnode):
+    if xsdnode.annotation is None:
+        return None
+
+    return split_path(xsdnode.annotation.documentation[0].text)
+
+
+def compile_plan(schema, mandatory_only: bool):
+    for node in schema.root_elements:
+        if mandatory_only and node.occurs[0] < 1:
+            continue
+
+        return compile_node(node, mandatory_only, True)
+
+
+def compile_node(xsdnode, mandatory_only: bool, isroot=False) -> XMLEmitNode:
+    annotation_path = get_annotation_path(xsdnode)
+    plan = XMLEmitNode(
+        xsdnode.local_name, guard_path=None if isroot else annotation_path
+    )
+
+    # simple content
+    if xsdnode.type.has_simple_content():
+        plan.text_path = annotation_path
+
+    # complex types
+    else:
+        content_type = xsdnode.type.model_group
+        # choice
+        if hasattr(content_type, "model") and content_type.model == "choice":
+            selected_node = content_type._group[0]
+
+            # find mandatory element in group
+            if mandatory_only:
+                for subnode in content_type._group:
+                    if subnode.occurs[0] < 1:
+                        continue
+                    else:
+                        selected_node = subnode
+
+            plan.children.append(
+                (compile_node(selected_node, mandatory_only), None, None)
+            )
+        else:
+            # sequence
+            for subnode in content_type._group:
+                if not hasattr(subnode, "process_contents"):  # xs:element
+                    if hasattr(subnode, "_group"):
+                        subnode = subnode._group[0]
+
+                    child = compile_node(subnode, mandatory_only)
+                    if subnode.annotation is not None and subnode.max_occurs != 1:
+                        path = get_annotation_path(subnode)
+                        # an annotation without a parent path never matches data
+                        list_path = path[:-1] or ("",)
+                        plan.children.append((child, list_path, path[-1]))
+                    else:
+                        plan.children.append((child, None, None))
+                else:  # xs:any
+                    plan.children.append((None, None, None))
+
+    # attributes
+    _attributes = dict
+    if hasattr(xsdnode, "attributes"):
+        _attributes = xsdnode.attributes
+    else:
+        if hasattr(xsdnode.type, "attributes"):
+            _attributes = xsdnode.type.attributes
+
+    for attr, attr_obj in _attributes.items():
+        path = get_annotation_path(attr_obj)
+        if path is not None:
+            plan.attributes.append((attr, path))
+
+    return plan
+
+
+schema_cache = XMLSchemaCache()
+
 
 class XMLGenerator:
     def __init__(self, schema_file: str, data: dict, mandatory_only=False):
-        self.schema = xmlschema.XMLSchema(schema_file)
+        self.schema, self.plan = schema_cache.get_plan(schema_file, mandatory_only)
         self.data = data
         self.mandatory_only = mandatory_only
 
@@ -15,13 +181,13 @@ class XMLGenerator:
         self.file_or_filename = None
 
     def generate(self) -> str:
-        for node in self.schema.root_elements:
-            if self.mandatory_only and node.occurs[0] < 1:
-                continue
-            self.root = ET.Element(node.local_name, xmlns=self.schema.target_namespace)
-            self._recur_build(node, self.root, {}, True)
+        if self.plan is None:
+            return None
+
+        self.root = ET.Element(self.plan.name, xmlns=self.schema.target_namespace)
+        self._emit(self.plan, self.root, {})
 
-            return ET.tostring(self.root)
+        return ET.tostring(self.root)
 
     def write(self, file_or_filename, encoding: str | None = "UTF-8") -> None:
         if self.root is None:
@@ -38,86 +204,151 @@ class XMLGenerator:
             except FileNotFoundError:
                 pass
 
-    def _recur_build(self, xsdnode, xmlnode, index_dict, isroot=False) -> None:
-        if not isroot:
-            if (
-                xsdnode.annotation is not None
-                and self.get_data(xsdnode.annotation.documentation[0].text, index_dict)
-                is None
-            ):
-                return
-
-            xmlnode = ET.SubElement(xmlnode, xsdnode.local_name)
-
-        # simple content
-        if xsdnode.type.has_simple_content():
-            if xsdnode.annotation is not None:
-                data = self.get_data(
-                    xsdnode.annotation.documentation[0].text, index_dict
-                )
-                if data is not None:
-                    xmlnode.text = str(data)
-
-        # complex types
-        else:
-            content_type = xsdnode.type.model_group
-            # choice
-            if hasattr(content_type, "model") and content_type.model == "choice":
-                selected_node = content_type._group[0]
-
-                # find mandatory element in group
-                if self.mandatory_only:
-                    for subnode in content_type._group:
-                        if subnode.occurs[0] < 1:
-                            continue
-                        else:
-                            selected_node = subnode
-
-                self._recur_build(selected_node, xmlnode, index_dict)
-            else:
-                # sequence
-                for subnode in content_type._group:
-                    if not hasattr(subnode, "process_contents"):  # xs:element
-                        if hasattr(subnode, "_group"):
-                            subnode = subnode._group[0]
-
-                        if subnode.annotation is not None and subnode.max_occurs != 1:
-                            path = ".".join(
-                                subnode.annotation.documentation[0].text.split(".")[:-1]
-                            )
-
-                            data = self.get_data(path, index_dict)
-
-                            if data is not None:
-                                for index, item in enumerate(data):
-                                    item_index_dict = index_dict
-                                    item_index_dict[
-                                        subnode.annotation.documentation[0].text.split(
-                                            "."
-                                        )[-1]
-                                    ] = index
-                                    self._recur_build(subnode, xmlnode, item_index_dict)
-                        else:
-                            self._recur_build(subnode, xmlnode, index_dict)
-                    else:  # xs:any
-                        ET.SubElement(xmlnode, "Any")  # any - close with any tag
-
-        # attributes
-        _attributes = dict
-        if hasattr(xsdnode, "attributes"):
-            _attributes = xsdnode.attributes
-        else:
-            if hasattr(xsdnode.type, "attributes"):
-                _attributes = xsdnode.type.attributes
+    def _emit(self, plan: XMLEmitNode, xmlnode, index_dict) -> None:
+        get_data = self.get_data
+        if plan.text_path is not None:
+            data = get_data(plan.text_path, index_dict)
+            if data is not None:
+                xmlnode.text = str(data)
 
-        for attr, attr_obj in _attributes.items():
-            data = self.get_data(attr_obj.annotation.documentation[0].text, index_dict)
+        for child, list_path, index_key in plan.children:
+            if child is None:  # xs:any
+                ET.SubElement(xmlnode, "Any")  # any - close with any tag
+                continue
+
+            if list_path is None:
+                if (
+                    child.guard_path is None
+                    or get_data(child.guard_path, index_dict) is not None
+                ):
+                    self._emit(child, ET.SubElement(xmlnode, child.name), index_dict)
+                continue
+
+            data = get_data(list_path, index_dict)
+            if data is None:
+                continue
+
+            for index, _ in enumerate(data):
+                index_dict[index_key] = index
+                if get_data(child.guard_path, index_dict) is not None:
+                    self._emit(child, ET.SubElement(xmlnode, child.name), index_dict)
+
+        for attr, path in plan.attributes:
+            data = get_data(path, index_dict)
             if data is not None:
                 xmlnode.attrib[attr] = str(data)
 
+    def generate_stream(
+        self, write: Callable[[bytes], None], encoding: str = "UTF-8"
+    ) -> None:
+        """Write the document to ``write`` piece by piece instead of building a tree.
+
+        Repeated elements may be backed by any iterable, e.g. a generator reading
+        rows from a database cursor, each item is only held while it is written.
+        """
+        if self.plan is None:
+            return
+
+        buffer = []
+        buffer_size = 0
+
+        def emit(text: str) -> None:
+            nonlocal buffer_size
+            buffer.append(text)
+            buffer_size += len(text)
+            if buffer_size >= STREAM_BUFFER_SIZE:
+                flush()
+
+        def flush() -> None:
+            nonlocal buffer_size
+            if buffer:
+                write("".join(buffer).encode(encoding))
+                buffer.clear()
+                buffer_size = 0
+
+        emit("<?xml version='1.0' encoding='%s'?>\n" % encoding)
+        self._stream(
+            self.plan,
+            {},
+            emit,
+            [("xmlns", self.schema.target_namespace)],
+        )
+        flush()
+
+    def _stream(self, plan: XMLEmitNode, item_dict, emit, attributes=None) -> None:
+        get_data = self.get_stream_data
+        attributes = list(attributes or [])
+        for attr, path in plan.attributes:
+            data = get_data(path, item_dict)
+            if data is not None:
+                attributes.append((attr, str(data)))
+
+        text = None
+        if plan.text_path is not None:
+            data = get_data(plan.text_path, item_dict)
+            if data is not None:
+                text = str(data)
+
+        emit(
+            "<%s%s"
+            % (
+                plan.name,
+                "".join(
+                    " %s=%s" % (attr, quoteattr(value)) for attr, value in attributes
+                ),
+            )
+        )
+        if text is None and not plan.children:
+            emit(" />")
+            return
+
+        emit(">")
+        if text is not None:
+            emit(escape(text))
+
+        for child, list_path, index_key in plan.children:
+            if child is None:  # xs:any
+                emit("<Any />")  # any - close with any tag
+                continue
+
+            if list_path is None:
+                if (
+                    child.guard_path is None
+                    or get_data(child.guard_path, item_dict) is not None
+                ):
+                    self._stream(child, item_dict, emit)
+                continue
+
+            data = get_data(list_path, item_dict)
+            if data is None:
+                continue
+
+            for item in data:
+                item_dict[index_key] = item
+                if get_data(child.guard_path, item_dict) is not None:
+                    self._stream(child, item_dict, emit)
+
+        emit("</%s>" % plan.name)
+
+    def get_stream_data(self, path, item_dict):
+        """Like get_data, but repeated elements are bound to the item itself"""
+        data = self.data
+        for key in path:
+            if key in item_dict:
+                data = item_dict[key]
+            else:
+                if key in data:
+                    data = data[key]
+                else:
+                    return None
+        return data
+
     def get_data(self, path, index_dict):
+        if isinstance(path, str):
+            path = split_path(path)
+
         data = self.data
-        for key in path.split("."):
+        for key in path:
             if key in index_dict:
                 data = data[index_dict[key]]
             else:
@@ -1,15 +1,21 @@
 import logging
-from typing import Any, Optional, Tuple
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
 
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from rest_framework.exceptions import APIException, status
 
+from selleraxis.core.clients.boto3_client import s3_client
 from selleraxis.core.clients.sftp_client import (
     ClientError,
     CommerceHubSFTPClient,
     FolderNotFoundError,
 )
 from selleraxis.core.utils.xml_generator import XMLGenerator
+from selleraxis.retailer_commercehub_sftp.models import RetailerCommercehubSFTP
 
 from .exception_utilities import ExceptionUtilities
 
@@ -33,6 +39,29 @@ class SFTPFolderNotFoundException(APIException):
     default_code = "sftp_folder_not_found"
 
 
+class S3UploadException(APIException):
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    default_detail = _("Could not upload XML file to Amazon S3.")
+    default_code = "s3_upload_error"
+
+
+class XMLStreamTee:
+    """Write the same XML stream to the SFTP file and the S3 upload"""
+
+    def __init__(self, sftp_file, s3_upload):
+        self.sftp_file = sftp_file
+        self.s3_upload = s3_upload
+        self.s3_failed = False
+
+    def write(self, data: bytes) -> None:
+        self.sftp_file.write(data)
+        try:
+            self.s3_upload.write(data)
+        except Exception:
+            self.s3_failed = True
+            raise
+
+
 class XSD2XML:
     def __init__(
         self,
@@ -41,8 +70,9 @@ class XSD2XML:
         localpath: str = None,
         remotepath: str = None,
         sftp_config: dict = None,
+        commercehub_sftp: RetailerCommercehubSFTP = None,
         *args,
-        **kwargs
+        **kwargs,
     ):
         self.data: Optional[dict] = data
         self.clean_data: Optional[dict] = data
@@ -51,6 +81,11 @@ class XSD2XML:
         self.remotepath: Optional[str] = remotepath
         self.xml_generator: Optional[XMLGenerator] = None
         self.sftp_config: Optional[dict] = None
+        # SFTP settings preloaded by the caller, looked up by retailer if None
+        self.commercehub_sftp: Optional[RetailerCommercehubSFTP] = commercehub_sftp
+        self.retailer_id = None
+        # connected session to upload with, instead of opening a new one
+        self.sftp_client: Optional[CommerceHubSFTPClient] = None
         self.is_process = False
 
     def upload_xml_file(self, is_remove_local_file: bool = True) -> Tuple[Any, bool]:
@@ -67,12 +102,15 @@ class XSD2XML:
 
                 self.write_xml()
 
-                sftp_client = CommerceHubSFTPClient(**self.sftp_config)
-                sftp_client.connect()
+                sftp_client = self.sftp_client
+                if sftp_client is None:
+                    sftp_client = CommerceHubSFTPClient(**self.sftp_config)
+                    sftp_client.connect()
 
                 try:
                     file = sftp_client.put(self.localpath, self.remotepath)
-                    sftp_client.close()
+                    if sftp_client is not self.sftp_client:
+                        sftp_client.close()
                     if is_remove_local_file:
                         self.xml_generator.remove()
 
@@ -98,6 +136,110 @@ class XSD2XML:
         self.xml_generator.remove()
         return error, False
 
+    def stream_xml_file(self, bucket: str) -> Tuple[Any, bool]:
+        """Stream the XML file to SFTP and S3 at once, without a local file.
+
+        The SFTP file is written under a temporary name and renamed once it is
+        complete and archived to S3, so a partial file is never picked up on
+        the server and a failed archive does not deliver it.
+        :return: S3 url and True, or the error and False
+        """
+        if self.is_process is False:
+            self.process()
+
+        if not (self.localpath and self.remotepath and self.xml_generator):
+            return SFTPClientException(), False
+
+        if not isinstance(self.sftp_config, dict):
+            logging.error("sftp_config args should be a dict.")
+            return SFTPClientException(), False
+
+        filename = os.path.basename(self.localpath)
+        partial_filename = f"{filename}.part"
+        try:
+            sftp_client = CommerceHubSFTPClient(**self.sftp_config)
+            sftp_client.connect()
+        except ClientError:
+            logging.error("Failed to connect SFTP")
+            return SFTPClientException(), False
+
+        try:
+            s3_upload = s3_client.create_multipart_upload(bucket=bucket, key=filename)
+        except Exception as e:
+            logging.error(
+                "Failed start S3 upload, filename: '%s'. Details: '%s'"
+                % (filename, ExceptionUtilities.stack_trace_as_string(e))
+            )
+            sftp_client.close()
+            return S3UploadException(), False
+
+        tee = None
+        try:
+            sftp_file = sftp_client.create(self.remotepath, partial_filename)
+            tee = XMLStreamTee(sftp_file, s3_upload)
+            with sftp_file:
+                self.xml_generator.generate_stream(tee.write)
+
+        except FolderNotFoundError:
+            s3_upload.abort()
+            sftp_client.close()
+            return SFTPFolderNotFoundException(), False
+
+        except Exception as e:
+            logging.error(
+                "Failed stream xml file, remotepath: '%s', filename: '%s'. Details: '%s'"
+                % (
+                    self.remotepath,
+                    filename,
+                    ExceptionUtilities.stack_trace_as_string(e),
+                )
+            )
+            s3_upload.abort()
+            self.remove_partial_file(sftp_client, partial_filename)
+            sftp_client.close()
+            if tee is not None and tee.s3_failed:
+                return S3UploadException(), False
+            return SFTPClientException(), False
+
+        try:
+            url = s3_upload.complete()
+        except Exception as e:
+            logging.error(
+                "Failed complete S3 upload, filename: '%s'. Details: '%s'"
+                % (filename, ExceptionUtilities.stack_trace_as_string(e))
+            )
+            s3_upload.abort()
+            self.remove_partial_file(sftp_client, partial_filename)
+            sftp_client.close()
+            return S3UploadException(), False
+
+        try:
+            # publish the file on the server last
+            sftp_client.rename(self.remotepath, partial_filename, filename)
+        except Exception as e:
+            logging.error(
+                "Failed rename xml file, remotepath: '%s', filename: '%s'. Details: '%s'"
+                % (
+                    self.remotepath,
+                    filename,
+                    ExceptionUtilities.stack_trace_as_string(e),
+                )
+            )
+            self.remove_partial_file(sftp_client, partial_filename)
+            sftp_client.close()
+            return SFTPClientException(), False
+
+        sftp_client.close()
+        return url, True
+
+    def remove_partial_file(
+        self, sftp_client: CommerceHubSFTPClient, partial_filename: str
+    ) -> None:
+        try:
+            sftp_client.remove(self.remotepath, partial_filename)
+        except Exception:
+            pass
+
     def process(self):
         self.is_process = True
         self.parse_args()
@@ -143,5 +285,88 @@ class XSD2XML:
     def set_schema_file(self) -> None:
         pass
 
+    def get_retailer_id(self) -> int:
+        return self.data["batch"]["retailer"]["id"]
+
     def set_sftp_info(self) -> None:
-        pass
+        self.retailer_id = self.get_retailer_id()
+        if self.commercehub_sftp is None:
+            self.commercehub_sftp = RetailerCommercehubSFTP.objects.filter(
+                retailer_id=self.retailer_id
+            ).last()
+        if self.commercehub_sftp:
+            self.sftp_config = self.commercehub_sftp.__dict__
+
+
+def upload_xml_files(xml_objs: List[XSD2XML]) -> List[Tuple[Any, bool]]:
+    """Upload the XML files of many documents, like ``upload_xml_file(False)``.
+
+    The documents are grouped by SFTP server and each group is uploaded over
+    one SSH connection, SFTP_UPLOAD_CHANNELS files at a time on channels of
+    that connection.
+    :return: the result of each document, in the same order
+    """
+    results = [None] * len(xml_objs)
+    groups = {}
+    for index, xml_obj in enumerate(xml_objs):
+        try:
+            if xml_obj.is_process is False:
+                xml_obj.process()
+        except APIException as e:
+            results[index] = (e, False)
+            continue
+        except Exception as e:
+            logging.error(
+                "Failed process xml file. Details: '%s'"
+                % (ExceptionUtilities.stack_trace_as_string(e),)
+            )
+            results[index] = (SFTPClientException(), False)
+            continue
+
+        if not isinstance(xml_obj.sftp_config, dict):
+            logging.error("sftp_config args should be a dict.")
+            results[index] = (SFTPClientException(), False)
+            continue
+
+        key = tuple(
+            xml_obj.sftp_config.get(name)
+            for name in ("sftp_host", "sftp_port", "sftp_username", "sftp_password")
+        )
+        groups.setdefault(key, []).append(index)
+
+    for indexes in groups.values():
+        group = [xml_objs[index] for index in indexes]
+        for index, result in zip(indexes, upload_xml_file_group(group)):
+            results[index] = result
+    return results
+
+
+def upload_xml_file_group(xml_objs: List[XSD2XML]) -> List[Tuple[Any, bool]]:
+    sftp_client = CommerceHubSFTPClient(**xml_objs[0].sftp_config)
+    channels = queue.Queue()
+    try:
+        sftp_client.connect()
+        for channel_index in range(min(settings.SFTP_UPLOAD_CHANNELS, len(xml_objs))):
+            channels.put(sftp_client.open_channel())
+    except Exception:
+        logging.error("Failed to connect SFTP")
+        if channels.empty():
+            sftp_client.close()
+            return [(SFTPClientException(), False) for xml_obj in xml_objs]
+
+    def upload(xml_obj: XSD2XML) -> Tuple[Any, bool]:
+        channel = channels.get()
+        try:
+            xml_obj.sftp_client = channel
+            return xml_obj.upload_xml_file(False)
+        finally:
+            xml_obj.sftp_client = None
+            channels.put(channel)
+
+    try:
+        with ThreadPoolExecutor(max_workers=channels.qsize()) as executor:
+            return list(executor.map(upload, xml_objs))
+    finally:
+        while not channels.empty():
+            channels.get().close()
+        sftp_client.close()
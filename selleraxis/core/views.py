@@ -1,9 +1,15 @@
+import json
+
+from django.conf import settings
+from django.db.models import QuerySet, prefetch_related_objects
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.exceptions import MethodNotAllowed, ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.generics import GenericAPIView, ListCreateAPIView, UpdateAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from selleraxis.core.pagination import Pagination
 
@@ -11,6 +17,54 @@ from .serializers import BulkUpdateListSerializer
 from .utils import DataUtilities
 
 
+class StreamingListMixin:
+    """Streams every row of the list on ``limit=-1``.
+
+    Rows are read and serialized by chunks, the response keeps the shape of a
+    page with the count written last.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get("limit") == "-1":
+            return self.stream_list(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
+
+    def get_stream_extra_data(self) -> dict:
+        return {}
+
+    def stream_list(self, queryset: QuerySet) -> StreamingHttpResponse:
+        return StreamingHttpResponse(
+            self.iter_json(queryset), content_type="application/json"
+        )
+
+    def iter_json(self, queryset: QuerySet):
+        yield '{"next": null, "previous": null, "results": ['
+        count = 0
+        for chunk in iter_chunks(queryset, settings.STREAMING_LIST_CHUNK_SIZE):
+            for row in self.get_serializer(chunk, many=True).data:
+                yield ("," if count else "") + json.dumps(row, cls=JSONEncoder)
+                count += 1
+        extra_data = "".join(
+            f", {json.dumps(key)}: {json.dumps(value, cls=JSONEncoder)}"
+            for key, value in self.get_stream_extra_data().items()
+        )
+        yield f'], "count": {count}{extra_data}}}'
+
+
+def iter_chunks(queryset: QuerySet, chunk_size: int):
+    """Lists of rows read with a server side cursor, prefetched by chunk"""
+    chunk = []
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(instance)
+        if len(chunk) == chunk_size:
+            prefetch_related_objects(chunk, *queryset._prefetch_related_lookups)
+            yield chunk
+            chunk = []
+    if chunk:
+        prefetch_related_objects(chunk, *queryset._prefetch_related_lookups)
+        yield chunk
+
+
 class BaseGenericAPIView(GenericAPIView):
     permission_classes = [IsAuthenticated]
 
@@ -5,6 +5,8 @@ from croniter import croniter
 from django.conf import settings
 from django.core.cache import cache
 
+from selleraxis.core.cache import get_or_compute, organization_tag
+
 client_events = settings.EVENT_CLIENT
 NEXT_EXCUTION_TIME_CACHE = "next_excution_{}"
 
@@ -12,19 +14,25 @@ NEXT_EXCUTION_TIME_CACHE = "next_excution_{}"
 def get_next_execution_time(organization):
     try:
         cache_key = NEXT_EXCUTION_TIME_CACHE.format(organization)
-        cache_response = cache.get(cache_key)
-        if cache_response and cache_response > datetime.now(tz=pytz.utc):
-            return cache_response
-        rule_name = settings.GETTING_NEW_ORDER_RULE_NAME
-        rule_details = client_events.describe_rule(Name=rule_name)
-        schedule_expression = rule_details["ScheduleExpression"]
-        schedule_expression = (
-            schedule_expression.replace("cron(", "").replace(")", "").replace("?", "")
-        )
-        current_time = datetime.now(tz=pytz.utc)
-        cron = croniter(schedule_expression, current_time)
-        response = cron.get_next(datetime).astimezone(pytz.utc)
-        cache.set(cache_key, response, 1800)
+        tags = [organization_tag(organization)]
+        response = get_or_compute(cache_key, get_rule_next_execution_time, 1800, tags)
+        if response <= datetime.now(tz=pytz.utc):
+            cache.delete(cache_key)
+            response = get_or_compute(
+                cache_key, get_rule_next_execution_time, 1800, tags
+            )
         return response
     except Exception:
         return None
+
+
+def get_rule_next_execution_time() -> datetime:
+    rule_name = settings.GETTING_NEW_ORDER_RULE_NAME
+    rule_details = client_events.describe_rule(Name=rule_name)
+    schedule_expression = rule_details["ScheduleExpression"]
+    schedule_expression = (
+        schedule_expression.replace("cron(", "").replace(")", "").replace("?", "")
+    )
+    current_time = datetime.now(tz=pytz.utc)
+    cron = croniter(schedule_expression, current_time)
+    return cron.get_next(datetime).astimezone(pytz.utc)
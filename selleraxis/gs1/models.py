@@ -1,8 +1,54 @@
-from django.db import models
+from typing import Iterable, List
+
+from django.db import models, transaction
+from django.utils import timezone
 
 from selleraxis.gs1.exceptions import GS1FullException
 from selleraxis.organizations.models import Organization
 
+# extension digit and company prefix padded to 3 + 16 digits, before the check digit
+SSCC_BODY_LENGTH = 19
+SSCC_LOW_DIGITS = 3
+
+
+def get_weighted_sum(digits: str, start: int = 0) -> int:
+    """GS1 check digit sum, digits at even positions weigh 3 and odd ones 1"""
+    return sum(
+        int(digit) * (3 if (start + index) % 2 == 0 else 1)
+        for index, digit in enumerate(digits)
+    )
+
+
+# weighted sums of the last digits of the body, by their value
+LOW_WEIGHTED_SUMS = [
+    get_weighted_sum(
+        str(value).zfill(SSCC_LOW_DIGITS), SSCC_BODY_LENGTH - SSCC_LOW_DIGITS
+    )
+    for value in range(10**SSCC_LOW_DIGITS)
+]
+
+
+def build_sscc_list(gs1: str, serial_numbers: Iterable[int]) -> List[str]:
+    """SSCC with check digit of each serial number.
+
+    The sum of the prefix and high digits is computed once per thousand
+    consecutive serial numbers, the low digits are read from a table.
+    """
+    high_length = SSCC_BODY_LENGTH - 3 - len(gs1) - SSCC_LOW_DIGITS
+    sscc_list = []
+    high = high_body = high_sum = None
+    for serial_number in serial_numbers:
+        serial_high, serial_low = divmod(serial_number, 10**SSCC_LOW_DIGITS)
+        if serial_high != high:
+            high = serial_high
+            high_body = f"000{gs1}{str(high).zfill(high_length)}"
+            high_sum = get_weighted_sum(high_body)
+        check_digit = (10 - (high_sum + LOW_WEIGHTED_SUMS[serial_low]) % 10) % 10
+        sscc_list.append(
+            f"{high_body}{str(serial_low).zfill(SSCC_LOW_DIGITS)}{check_digit}"
+        )
+    return sscc_list
+
 
 class GS1(models.Model):
     name = models.CharField(max_length=256)
@@ -14,33 +60,35 @@ class GS1(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def get_sscc(self, amount=1):
-        sscc_list = []
-        serial_number_length = 16 - len(self.gs1)
-
-        for i in range(amount):
-            serial_number_str = str(self.next_serial_number)
-
-            if len(serial_number_str) > serial_number_length:
-                raise GS1FullException()
-
-            sscc = f"000{self.gs1}{'0'*(serial_number_length - len(serial_number_str))}{serial_number_str}"
-
-            total = 0
-            for index, item in enumerate(sscc):
-                if index % 2 == 0:
-                    total = total + int(item) * 3
-                else:
-                    total = total + int(item)
-
-            rest = total % 10
-            check_digit = (10 - rest) % 10
-            sscc += str(check_digit)
+    @property
+    def serial_number_capacity(self) -> int:
+        return 10 ** (SSCC_BODY_LENGTH - 3 - len(self.gs1))
 
-            self.next_serial_number += 1
+    @property
+    def remaining_serial_numbers(self) -> int:
+        return max(self.serial_number_capacity - self.next_serial_number, 0)
 
-            sscc_list.append(sscc)
+    def reserve_serial_numbers(self, amount: int) -> range:
+        """Reserve a block of serial numbers under a row lock.
 
-        self.save()
+        Concurrent reservations wait for each other, so blocks never overlap.
+        Raises GS1FullException, reserving nothing, when the block does not fit.
+        """
+        with transaction.atomic():
+            next_serial_number = (
+                GS1.objects.select_for_update()
+                .values_list("next_serial_number", flat=True)
+                .get(pk=self.pk)
+            )
+            if next_serial_number + amount > self.serial_number_capacity:
+                self.next_serial_number = next_serial_number
+                raise GS1FullException()
+            GS1.objects.filter(pk=self.pk).update(
+                next_serial_number=models.F("next_serial_number") + amount,
+                updated_at=timezone.now(),
+            )
+        self.next_serial_number = next_serial_number + amount
+        return range(next_serial_number, next_serial_number + amount)
 
-        return sscc_list
+    def get_sscc(self, amount=1):
+        return build_sscc_list(self.gs1, self.reserve_serial_numbers(amount))
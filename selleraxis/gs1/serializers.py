@@ -1,10 +1,26 @@
+from django.conf import settings
 from rest_framework import exceptions, serializers
 from rest_framework.exceptions import ValidationError
 
 from selleraxis.gs1.models import GS1
+from selleraxis.gs1.services import get_days_until_full
 
 
 class GS1Serializer(serializers.ModelSerializer):
+    remaining_serial_numbers = serializers.IntegerField(read_only=True)
+    days_until_full = serializers.SerializerMethodField()
+    is_almost_full = serializers.SerializerMethodField()
+
+    def get_days_until_full(self, instance: GS1):
+        return get_days_until_full(instance)
+
+    def get_is_almost_full(self, instance: GS1) -> bool:
+        days_until_full = get_days_until_full(instance)
+        return (
+            days_until_full is not None
+            and days_until_full <= settings.GS1_FULL_WARNING_DAYS
+        )
+
     def validate_gs1(self, value):
         if len(value) < 7:
             raise ValidationError("GS1 must more than or equal 7 characters")
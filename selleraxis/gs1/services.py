@@ -0,0 +1,67 @@
+import datetime
+import threading
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Count, Q, QuerySet
+from django.utils import timezone
+
+from selleraxis.gs1.models import GS1, build_sscc_list
+
+SHIPMENTS_LOOKUP = "retailerpurchaseorder__order_packages__shipment_packages"
+
+
+class SSCCAllocator(object):
+    """Hands out SSCC from blocks of serial numbers reserved up front.
+
+    Shared by the workers of a bulk shipping, which reserves the serial
+    numbers of all its packages at once, each shipment then takes its SSCC
+    from the block without a round trip. A worker needing more than what is
+    left reserves a new block. Serial numbers left unused are skipped.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # serial numbers reserved and not handed out yet, by gs1 id
+        self.blocks: Dict[int, List[int]] = {}
+
+    def reserve(self, gs1: GS1, amount: int) -> None:
+        if amount <= 0:
+            return
+        serial_numbers = gs1.reserve_serial_numbers(amount)
+        with self.lock:
+            self.blocks.setdefault(gs1.pk, []).extend(serial_numbers)
+
+    def get_sscc(self, gs1: GS1, amount: int = 1) -> List[str]:
+        with self.lock:
+            block = self.blocks.setdefault(gs1.pk, [])
+            serial_numbers = block[:amount]
+            del block[:amount]
+        if len(serial_numbers) < amount:
+            serial_numbers += gs1.reserve_serial_numbers(amount - len(serial_numbers))
+        return build_sscc_list(gs1.gs1, serial_numbers)
+
+
+def annotate_sscc_usage(queryset: QuerySet) -> QuerySet:
+    """Annotate ``recent_sscc_count``, the SSCC shipped over the usage window"""
+    since = timezone.now() - datetime.timedelta(days=settings.GS1_USAGE_WINDOW_DAYS)
+    return queryset.annotate(
+        recent_sscc_count=Count(
+            SHIPMENTS_LOOKUP,
+            filter=Q(
+                **{
+                    f"{SHIPMENTS_LOOKUP}__created_at__gte": since,
+                    f"{SHIPMENTS_LOOKUP}__sscc__isnull": False,
+                }
+            ),
+        )
+    )
+
+
+def get_days_until_full(gs1: GS1) -> Optional[int]:
+    """Days left at the usage rate of the window, None without recent usage"""
+    recent_sscc_count = getattr(gs1, "recent_sscc_count", None)
+    if not recent_sscc_count:
+        return None
+    daily_usage = recent_sscc_count / settings.GS1_USAGE_WINDOW_DAYS
+    return int(gs1.remaining_serial_numbers / daily_usage)
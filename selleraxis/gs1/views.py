@@ -12,6 +12,7 @@ from ..core.permissions import check_permission
 from ..permissions.models import Permissions
 from .models import GS1
 from .serializers import GS1Serializer
+from .services import annotate_sscc_usage
 
 
 class ListCreateGS1View(ListCreateAPIView):
@@ -24,8 +25,10 @@ class ListCreateGS1View(ListCreateAPIView):
         serializer.save(organization_id=self.request.headers.get("organization"))
 
     def get_queryset(self):
-        return self.queryset.filter(
-            organization_id=self.request.headers.get("organization")
+        return annotate_sscc_usage(
+            self.queryset.filter(
+                organization_id=self.request.headers.get("organization")
+            )
         )
 
     def check_permissions(self, _):
@@ -41,8 +44,10 @@ class UpdateDeleteGS1View(RetrieveUpdateDestroyAPIView):
     queryset = GS1.objects.all()
 
     def get_queryset(self):
-        return self.queryset.filter(
-            organization_id=self.request.headers.get("organization")
+        return annotate_sscc_usage(
+            self.queryset.filter(
+                organization_id=self.request.headers.get("organization")
+            )
         )
 
     def check_permissions(self, _):
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from selleraxis.invoice.services.bulk_invoice_services import (
+    INVOICEABLE_STATUSES,
+    bulk_create_invoices,
+    bulk_send_invoice_xmls,
+    get_invoice_orders,
+)
+from selleraxis.organizations.models import Organization
+from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
+from selleraxis.retailer_queue_histories.models import RetailerQueueHistory
+
+
+class Command(BaseCommand):
+    help = "Invoice the shipped orders of an organization, in QBO batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization", type=int, required=True, help="Organization id"
+        )
+        parser.add_argument(
+            "--orders",
+            help="Comma separated order ids, all the shipped not invoiced orders by default",
+        )
+        parser.add_argument(
+            "--send-xml",
+            action="store_true",
+            help="Send the invoice XML of the Home Depot and Lowe's orders",
+        )
+
+    def handle(self, *args, **options):
+        organization = Organization.objects.filter(id=options["organization"]).first()
+        if organization is None:
+            raise CommandError("Organization is not exist!")
+
+        if options["orders"]:
+            order_ids = [int(order_id) for order_id in options["orders"].split(",")]
+        else:
+            order_ids = list(
+                RetailerPurchaseOrder.objects.filter(
+                    batch__retailer__organization=organization,
+                    status__in=INVOICEABLE_STATUSES,
+                    invoice_order__isnull=True,
+                )
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+
+        completed = 0
+        chunk_size = settings.INVOICE_BULK_MAX_ORDERS
+        for start in range(0, len(order_ids), chunk_size):
+            orders = get_invoice_orders(
+                organization.id, order_ids[start : start + chunk_size]  # noqa
+            )
+            results = bulk_create_invoices(organization, orders)
+            xml_results = {}
+            if options["send_xml"]:
+                xml_results = bulk_send_invoice_xmls(orders)
+            for result in results:
+                if result["status"] == RetailerQueueHistory.Status.COMPLETED.value:
+                    completed += 1
+                else:
+                    self.stderr.write(
+                        f"Order {result['id']} ({result['po_number']}): "
+                        f"{result['data']['error']}"
+                    )
+                xml_result = xml_results.get(result["id"])
+                if (
+                    xml_result
+                    and xml_result["status"] == RetailerQueueHistory.Status.FAILED.value
+                ):
+                    self.stderr.write(
+                        f"Order {result['id']} ({result['po_number']}): "
+                        f"invoice XML failed, {xml_result['data']['error']}"
+                    )
+        self.stdout.write(f"{completed} of {len(order_ids)} order(s) invoiced")
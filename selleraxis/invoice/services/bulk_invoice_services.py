@@ -0,0 +1,485 @@
+"""
+Bulk invoicing of purchase orders.
+
+The invoice lines of all the orders are built from a few set-based queries,
+the missing QBO items are synced once, and the invoices are created through
+QBO /batch requests. The invoice XMLs of the Home Depot and Lowe's orders are
+then uploaded together, over one SFTP connection per retailer.
+
+Every order gets its own result, a failing order does not stop the others.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db.models import Prefetch, Sum
+from requests import RequestException
+from rest_framework.exceptions import APIException
+
+from selleraxis.core.clients.boto3_client import s3_client
+from selleraxis.core.clients.qbo_client import (
+    QBO_BATCH_SIZE,
+    QBOClient,
+    QBOClientError,
+    get_fault_message,
+)
+from selleraxis.core.utils.qbo_token import validate_qbo_token
+from selleraxis.core.utils.xsd_to_xml import upload_xml_files
+from selleraxis.invoice.models import Invoice
+from selleraxis.invoice.services.invoice_xml_handler import InvoiceXMLHandler
+from selleraxis.invoice.services.services import (
+    check_line_list,
+    get_invoice_body,
+    get_invoice_line,
+    get_invoice_txn_date,
+)
+from selleraxis.order_item_package.models import OrderItemPackage
+from selleraxis.order_package.models import OrderPackage
+from selleraxis.products.inventory_services import get_product_aliases
+from selleraxis.products.models import Product
+from selleraxis.products.services import sync_products_qbo
+from selleraxis.retailer_commercehub_sftp.models import RetailerCommercehubSFTP
+from selleraxis.retailer_purchase_order_histories.models import (
+    RetailerPurchaseOrderHistory,
+)
+from selleraxis.retailer_purchase_orders.exceptions import (
+    S3UploadException,
+    XMLSFTPUploadException,
+)
+from selleraxis.retailer_purchase_orders.models import (
+    QueueStatus,
+    RetailerPurchaseOrder,
+    invalidate_order_details,
+)
+from selleraxis.retailer_purchase_orders.serializers import (
+    RetailerPurchaseOrderAcknowledgeSerializer,
+)
+from selleraxis.retailer_queue_histories.models import RetailerQueueHistory
+from selleraxis.retailers.services.retailer_qbo_services import query_retailer_qbo
+from selleraxis.settings.common import DATE_FORMAT, LOGGER_FORMAT
+from selleraxis.shipments.models import Shipment, ShipmentStatus
+
+logging.basicConfig(format=LOGGER_FORMAT, datefmt=DATE_FORMAT)
+
+# retailers whose invoice XML schema is known without invoice_xml_format
+INVOICE_XML_MERCHANT_IDS = ("lowes", "thehomedepot")
+INVOICEABLE_STATUSES = [
+    QueueStatus.Shipped.value,
+    QueueStatus.Shipment_Confirmed.value,
+]
+
+
+def get_invoice_orders(organization_id, order_ids) -> List[RetailerPurchaseOrder]:
+    return list(
+        RetailerPurchaseOrder.objects.filter(
+            id__in=order_ids, batch__retailer__organization_id=organization_id
+        )
+        .select_related("batch__retailer__organization", "invoice_order")
+        .prefetch_related("items")
+        .order_by("id")
+    )
+
+
+def get_item_quantities(order_ids) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """Packed and shipped quantity of each order item of the orders"""
+    order_item_packages = OrderItemPackage.objects.filter(
+        package__order_id__in=order_ids
+    ).order_by()
+    packed = dict(
+        order_item_packages.values("order_item_id")
+        .annotate(quantity=Sum("quantity"))
+        .values_list("order_item_id", "quantity")
+    )
+    shipped = dict(
+        order_item_packages.filter(
+            package__in=OrderPackage.objects.filter(
+                shipment_packages__status__in=[
+                    ShipmentStatus.CREATED,
+                    ShipmentStatus.SUBMITTED,
+                ]
+            )
+        )
+        .values("order_item_id")
+        .annotate(quantity=Sum("quantity"))
+        .values_list("order_item_id", "quantity")
+    )
+    return packed, shipped
+
+
+def prepare_invoices(
+    organization, access_token: str, orders: List[RetailerPurchaseOrder]
+):
+    """Invoice body of each order id, and the error of the orders that can't be invoiced"""
+    errors = {}
+    for order in orders:
+        if getattr(order, "invoice_order", None) is not None:
+            errors[order.id] = "Order has been Invoiced!"
+        elif not order.po_number:
+            errors[order.id] = "Purchase order has no value of po number!"
+    orders = [order for order in orders if order.id not in errors]
+
+    packed, shipped = get_item_quantities([order.id for order in orders])
+    product_aliases = get_product_aliases(
+        (order.batch.retailer_id, item.merchant_sku)
+        for order in orders
+        for item in order.items.all()
+    )
+    for order in orders:
+        for item in order.items.all():
+            if packed.get(item.id, 0) != item.qty_ordered:
+                errors[order.id] = "Only fulfillment shipped order can invoice"
+            elif (order.batch.retailer_id, item.merchant_sku) not in product_aliases:
+                errors[order.id] = "Some item don't have product alias!"
+            if order.id in errors:
+                break
+    orders = [order for order in orders if order.id not in errors]
+    products = Product.objects.in_bulk(
+        {
+            product_aliases[(order.batch.retailer_id, item.merchant_sku)].product_id
+            for order in orders
+            for item in order.items.all()
+        }
+    )
+
+    # products without QBO item are synced once for all the orders
+    unsynced_products = {
+        product.id: product
+        for product in products.values()
+        if product.qbo_product_id is None
+    }
+    failed_skus = set()
+    if unsynced_products:
+        for result in sync_products_qbo(
+            organization=organization,
+            products=list(unsynced_products.values()),
+            is_sandbox=organization.is_sandbox,
+        ):
+            if result.get("qbo_id") is None:
+                failed_skus.add(result.get("sku"))
+
+    retailer_errors = {}
+    for retailer in {order.batch.retailer for order in orders}:
+        check_qbo, query_message = query_retailer_qbo(
+            retailer, access_token, organization.realm_id, organization.is_sandbox
+        )
+        if check_qbo is False:
+            retailer_errors[retailer.id] = (
+                query_message or "Purchase order has retailer not sync with qbo!"
+            )
+
+    bodies = {}
+    for order in orders:
+        retailer = order.batch.retailer
+        if retailer.id in retailer_errors:
+            errors[order.id] = retailer_errors[retailer.id]
+            continue
+        line_list = []
+        order_failed_skus = []
+        for item in order.items.all():
+            quantity = shipped.get(item.id, 0)
+            if not quantity:
+                continue
+            product_alias = product_aliases[(retailer.id, item.merchant_sku)]
+            product = products[product_alias.product_id]
+            if product.sku in failed_skus:
+                order_failed_skus.append(product.sku)
+                continue
+            line_list.append(
+                get_invoice_line(
+                    product, product_alias.sku_quantity, quantity, item.unit_cost
+                )
+            )
+        if order_failed_skus:
+            errors[
+                order.id
+            ] = f'Product(s) {",".join(order_failed_skus)} fail to sync qbo!'
+            continue
+        bodies[order.id] = get_invoice_body(
+            check_line_list(line_list),
+            get_invoice_txn_date(),
+            retailer.qbo_customer_ref_id,
+            order.po_number,
+        )
+    return bodies, errors
+
+
+def save_qbo_invoices(qbo_invoices: Dict[int, dict], user=None) -> List[Invoice]:
+    """Save the QBO invoices created for the order ids, the orders being invoiced"""
+    invoices = Invoice.objects.bulk_create(
+        [
+            Invoice(
+                doc_number=str(qbo_invoice["DocNumber"]),
+                invoice_id=str(qbo_invoice["Id"]),
+                order_id=order_id,
+            )
+            for order_id, qbo_invoice in qbo_invoices.items()
+        ]
+    )
+    RetailerPurchaseOrder.objects.filter(id__in=qbo_invoices).update(
+        status=QueueStatus.Invoiced.value
+    )
+    invalidate_order_details(order_id__in=list(qbo_invoices))
+    RetailerPurchaseOrderHistory.objects.bulk_create(
+        [
+            RetailerPurchaseOrderHistory(
+                status=QueueStatus.Invoiced.value, order_id=order_id, user=user
+            )
+            for order_id in qbo_invoices
+        ]
+    )
+    return invoices
+
+
+def bulk_create_invoices(
+    organization, orders: List[RetailerPurchaseOrder], user=None
+) -> List[dict]:
+    """Create the QBO invoices of the orders, in /batch requests.
+
+    The invoices of each /batch request are saved before the next one is sent,
+    so a failing request leaves the invoices created by the previous ones
+    recorded and a retry does not create them again in QBO.
+    """
+    access_token = validate_qbo_token(organization)
+    bodies, errors = prepare_invoices(organization, access_token, orders)
+    order_ids = list(bodies)
+    invoices = []
+    if order_ids:
+        client = QBOClient(organization, organization.is_sandbox, access_token)
+        for start in range(0, len(order_ids), QBO_BATCH_SIZE):
+            chunk = order_ids[start : start + QBO_BATCH_SIZE]  # noqa
+            try:
+                batch_items = client.batch(
+                    [
+                        {"operation": "create", "Invoice": bodies[order_id]}
+                        for order_id in chunk
+                    ]
+                )
+            except (QBOClientError, RequestException) as e:
+                batch_items = [{"Fault": {"Error": [{"Detail": str(e)}]}}] * len(chunk)
+            qbo_invoices = {}
+            for order_id, batch_item in zip(chunk, batch_items):
+                qbo_invoice = batch_item.get("Invoice")
+                if qbo_invoice is None:
+                    errors[order_id] = "Error creating invoice: {error}".format(
+                        error=get_fault_message(batch_item)
+                    )
+                else:
+                    qbo_invoices[order_id] = qbo_invoice
+            invoices += save_qbo_invoices(qbo_invoices, user)
+
+    invoices = {invoice.order_id: invoice for invoice in invoices}
+    results = []
+    for order in orders:
+        result = {"id": order.id, "po_number": order.po_number}
+        if order.id in invoices:
+            order.invoice_order = invoices[order.id]
+            order.status = QueueStatus.Invoiced.value
+            result["status"] = RetailerQueueHistory.Status.COMPLETED.value
+            result["data"] = {
+                "invoice_id": invoices[order.id].id,
+                "doc_number": invoices[order.id].doc_number,
+                "qbo_invoice_id": invoices[order.id].invoice_id,
+            }
+        else:
+            result["status"] = RetailerQueueHistory.Status.FAILED.value
+            result["data"] = {"error": errors.get(order.id)}
+        results.append(result)
+    return results
+
+
+def archive_to_s3(handler_obj: InvoiceXMLHandler):
+    s3_response = s3_client.upload_file(
+        filename=handler_obj.localpath, bucket=settings.BUCKET_NAME
+    )
+    handler_obj.remove_xml_file_localpath()
+    return s3_response
+
+
+def get_invoice_xml_error(error: APIException) -> dict:
+    return {
+        "error": {
+            "default_code": str(error.default_code),
+            "status_code": error.status_code,
+            "detail": error.detail,
+        }
+    }
+
+
+def is_fully_shipped(order: RetailerPurchaseOrder) -> bool:
+    """Whether every package of the order is shipped and the shipped quantities
+    are the ordered ones, from the prefetched packages of bulk_send_invoice_xmls"""
+    order_packages = order.order_packages.all()
+    if not all(order_package.shipped_shipments for order_package in order_packages):
+        return False
+    shipped = {}
+    for order_package in order_packages:
+        for order_item_package in order_package.order_item_packages.all():
+            shipped[order_item_package.order_item_id] = (
+                shipped.get(order_item_package.order_item_id, 0)
+                + order_item_package.quantity
+            )
+    return all(
+        shipped.get(order_item.id, 0) == order_item.qty_ordered
+        for order_item in order.items.all()
+    )
+
+
+def bulk_send_invoice_xmls(
+    orders: List[RetailerPurchaseOrder], user=None
+) -> Dict[int, dict]:
+    """Upload the invoice XML of the invoiced Home Depot and Lowe's orders.
+
+    Returns the result of each order sent, by order id.
+    """
+    commercehub_sftps = {
+        commercehub_sftp.retailer_id: commercehub_sftp
+        for commercehub_sftp in RetailerCommercehubSFTP.objects.filter(
+            retailer_id__in={order.batch.retailer_id for order in orders}
+        )
+        .select_related("retailer")
+        .order_by("id")
+    }
+    orders = [
+        order
+        for order in orders
+        if order.status == QueueStatus.Invoiced.value
+        and order.batch.retailer_id in commercehub_sftps
+        and (
+            commercehub_sftps[order.batch.retailer_id].invoice_xml_format
+            or order.batch.retailer.merchant_id in INVOICE_XML_MERCHANT_IDS
+        )
+    ]
+    if not orders:
+        return {}
+
+    orders = list(
+        RetailerPurchaseOrder.objects.filter(id__in=[order.id for order in orders])
+        .select_related(
+            "ship_from",
+            "ship_to",
+            "bill_to",
+            "invoice_to",
+            "verified_ship_to",
+            "customer",
+            "batch__retailer",
+            "carrier",
+            "invoice_order",
+        )
+        .prefetch_related(
+            "items",
+            Prefetch(
+                "order_packages",
+                queryset=OrderPackage.objects.prefetch_related(
+                    "order_item_packages__order_item",
+                    "shipment_packages",
+                    Prefetch(
+                        "shipment_packages",
+                        queryset=Shipment.objects.filter(
+                            status__in=[
+                                ShipmentStatus.CREATED,
+                                ShipmentStatus.SUBMITTED,
+                            ]
+                        ),
+                        to_attr="shipped_shipments",
+                    ),
+                ),
+            ),
+        )
+        .order_by("id")
+    )
+    results = {}
+    xml_orders = []
+    for order in orders:
+        if order.batch.retailer.remit_id is None:
+            results[order.id] = {
+                "status": RetailerQueueHistory.Status.FAILED.value,
+                "data": {"error": "remit_id of retailer is null!"},
+            }
+        elif not is_fully_shipped(order):
+            results[order.id] = {
+                "status": RetailerQueueHistory.Status.FAILED.value,
+                "data": {"error": "Only fulfillment shipped order can invoice confirm"},
+            }
+        else:
+            xml_orders.append(order)
+
+    queue_history_objs = [
+        RetailerQueueHistory.objects.create(
+            retailer_id=order.batch.retailer_id,
+            type=order.batch.retailer.type,
+            status=RetailerQueueHistory.Status.PENDING,
+            label=RetailerQueueHistory.Label.INVOICE,
+        )
+        for order in xml_orders
+    ]
+    invoice_objs = [
+        InvoiceXMLHandler(
+            data=RetailerPurchaseOrderAcknowledgeSerializer(order).data,
+            commercehub_sftp=commercehub_sftps[order.batch.retailer_id],
+        )
+        for order in xml_orders
+    ]
+    uploads = upload_xml_files(invoice_objs)
+    uploaded_invoice_objs = [
+        invoice_obj
+        for invoice_obj, (_, file_created) in zip(invoice_objs, uploads)
+        if file_created
+    ]
+    with ThreadPoolExecutor(max_workers=settings.SFTP_UPLOAD_CHANNELS) as executor:
+        s3_responses = dict(
+            zip(
+                map(id, uploaded_invoice_objs),
+                executor.map(archive_to_s3, uploaded_invoice_objs),
+            )
+        )
+
+    confirmed_order_ids = []
+    for order, queue_history_obj, invoice_obj, (file, file_created) in zip(
+        xml_orders, queue_history_objs, invoice_objs, uploads
+    ):
+        s3_response = s3_responses.get(id(invoice_obj))
+        if s3_response is not None and s3_response.ok:
+            queue_history_obj.status = RetailerQueueHistory.Status.COMPLETED
+            queue_history_obj.result_url = s3_response.data
+            confirmed_order_ids.append(order.id)
+            results[order.id] = {
+                "status": RetailerQueueHistory.Status.COMPLETED.value,
+                "data": {"id": order.invoice_order.pk, "file": s3_response.data},
+            }
+        else:
+            queue_history_obj.status = RetailerQueueHistory.Status.FAILED
+            if file_created:
+                error = S3UploadException()
+            elif isinstance(file, APIException):
+                error = file
+            else:
+                error = XMLSFTPUploadException()
+            results[order.id] = {
+                "status": RetailerQueueHistory.Status.FAILED.value,
+                "data": get_invoice_xml_error(error),
+            }
+    RetailerQueueHistory.objects.bulk_update(
+        queue_history_objs, ["status", "result_url"]
+    )
+
+    RetailerPurchaseOrder.objects.filter(id__in=confirmed_order_ids).update(
+        status=QueueStatus.Invoice_Confirmed.value
+    )
+    invalidate_order_details(order_id__in=confirmed_order_ids)
+    queue_history_ids = {
+        order.id: queue_history_obj.id
+        for order, queue_history_obj in zip(xml_orders, queue_history_objs)
+    }
+    RetailerPurchaseOrderHistory.objects.bulk_create(
+        [
+            RetailerPurchaseOrderHistory(
+                status=QueueStatus.Invoice_Confirmed.value,
+                order_id=order_id,
+                user=user,
+                queue_history_id=queue_history_ids[order_id],
+            )
+            for order_id in confirmed_order_ids
+        ]
+    )
+    return results
@@ -232,7 +232,6 @@ def create_invoice(
 ):
     line_list = []
     id_product_list = []
-    shipped_items = []
     order_packages = []
     list_order_item = purchase_order_serializer.data["items"]
     list_order_item_package = OrderItemPackage.objects.filter(
@@ -250,24 +249,15 @@ def create_invoice(
         if len(order_package.get("shipment_packages", [])) > 0:
             order_packages.append(order_package)
 
+    # quantity shipped of each order item, summed over its packages
+    shipped_quantities = {}
     for order_package in order_packages:
-        package_id = order_package["id"]
-        order_item_packages = order_package["order_item_packages"]
-        for order_item_package in order_item_packages:
-            item = order_item_package["retailer_purchase_order_item"]
-            item["package"] = package_id
-            shipped_items.append(item)
-
-    for order_item in shipped_items:
-        new_qty = 0
-        for order_package in order_packages:
-            for order_item_package in order_package.get("order_item_packages"):
-                order_item_id = order_item_package.get(
-                    "retailer_purchase_order_item"
-                ).get("id")
-                if order_item.get("id") == order_item_id:
-                    new_qty += order_item_package.get("quantity")
-        order_item["qty_ordered"] = new_qty
+        for order_item_package in order_package["order_item_packages"]:
+            order_item_id = order_item_package["retailer_purchase_order_item"]["id"]
+            shipped_quantities[order_item_id] = (
+                shipped_quantities.get(order_item_id, 0)
+                + order_item_package["quantity"]
+            )
 
     for purchase_order_item in purchase_order_serializer.data["items"]:
         if purchase_order_item.get("product_alias") is None:
@@ -277,34 +267,20 @@ def create_invoice(
             id_product_list.append(id_product)
     product_list = Product.objects.filter(id__in=id_product_list)
 
-    purchase_order_serializer.data["items"] = shipped_items
-
-    for i, purchase_order_item in enumerate(purchase_order_serializer.data["items"]):
-        product_valid = find_object_with_variable(
-            product_list, purchase_order_item["product_alias"]["product"]
-        )
-        qbo_product_id = product_valid.qbo_product_id
-        if not qbo_product_id:
-            qbo_product_id = 1
-        qty_product = int(purchase_order_item["product_alias"]["sku_quantity"]) * int(
-            purchase_order_item["qty_ordered"]
+    for purchase_order_item in purchase_order_serializer.data["items"]:
+        quantity = shipped_quantities.get(purchase_order_item["id"], 0)
+        if not quantity:
+            continue
+        line_list.append(
+            get_invoice_line(
+                find_object_with_variable(
+                    product_list, purchase_order_item["product_alias"]["product"]
+                ),
+                purchase_order_item["product_alias"]["sku_quantity"],
+                quantity,
+                purchase_order_item["unit_cost"],
+            )
         )
-        amount = purchase_order_item["qty_ordered"] * purchase_order_item["unit_cost"]
-        line = {
-            "DetailType": "SalesItemLineDetail",
-            "Amount": amount,
-            "SalesItemLineDetail": {
-                "Qty": qty_product,
-                "UnitPrice": amount / qty_product,
-                "ItemRef": {
-                    "name": find_object_with_variable(
-                        product_list, purchase_order_item["product_alias"]["product"]
-                    ).sku,
-                    "value": str(qbo_product_id),
-                },
-            },
-        }
-        line_list.append(line)
     line_invoice = check_line_list(line_list)
     if not purchase_order_serializer.data["po_number"]:
         raise ParseError("Purchase order has no value of po number!")
@@ -323,32 +299,55 @@ def create_invoice(
         else:
             raise ParseError(query_message)
 
-    inv_start_date = None
-    if purchase_order_serializer.data.get("inv_start_date") is not None:
-        inv_start_date = purchase_order_serializer.data.get("inv_start_date")
-    convert_date = (
-        inv_start_date.strftime("%Y-%m-%d")
-        if inv_start_date
-        else datetime.now().strftime("%Y-%m-%d")
+    return get_invoice_body(
+        line_invoice,
+        get_invoice_txn_date(),
+        retailer_to_qbo.qbo_customer_ref_id,
+        purchase_order_serializer.data["po_number"],
     )
 
-    qbo_customer_ref_id = retailer_to_qbo.qbo_customer_ref_id
-    invoice = {
+
+def get_invoice_line(product: Product, sku_quantity, quantity, unit_cost) -> dict:
+    """Invoice line of the quantity shipped of an order item"""
+    qty_product = int(sku_quantity) * int(quantity)
+    amount = quantity * unit_cost
+    return {
+        "DetailType": "SalesItemLineDetail",
+        "Amount": amount,
+        "SalesItemLineDetail": {
+            "Qty": qty_product,
+            "UnitPrice": amount / qty_product,
+            "ItemRef": {
+                "name": product.sku,
+                "value": str(product.qbo_product_id or 1),
+            },
+        },
+    }
+
+
+def get_invoice_txn_date() -> str:
+    """Transaction date of an invoice, the day it is created"""
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def get_invoice_body(
+    line_invoice: list, txn_date: str, qbo_customer_ref_id: str, po_number: str
+) -> dict:
+    return {
         "Line": line_invoice,
-        "TxnDate": convert_date,
+        "TxnDate": txn_date,
         "CustomerRef": {
             "value": qbo_customer_ref_id,
         },
         "CustomField": [
             {
                 "DefinitionId": "1",
-                "StringValue": purchase_order_serializer.data["po_number"],
+                "StringValue": po_number,
                 "Type": "StringType",
                 "Name": "Field One",
             }
         ],
     }
-    return invoice
 
 
 def save_invoices(organization, access_token, realm_id, data, is_sandbox):
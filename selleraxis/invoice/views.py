@@ -1,9 +1,9 @@
-import asyncio
 import json
 
-from asgiref.sync import async_to_sync, sync_to_async
 from django.conf import settings
 from django.http import HttpResponse
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.exceptions import APIException, ParseError
 from rest_framework.generics import CreateAPIView, GenericAPIView, get_object_or_404
@@ -15,6 +15,11 @@ from selleraxis.core.clients.boto3_client import s3_client, sqs_client
 from selleraxis.invoice.exceptions import InvoiceInvalidException
 from selleraxis.invoice.models import Invoice
 from selleraxis.invoice.serializers import CodeSerializer
+from selleraxis.invoice.services.bulk_invoice_services import (
+    bulk_create_invoices,
+    bulk_send_invoice_xmls,
+    get_invoice_orders,
+)
 from selleraxis.invoice.services.invoice_xml_handler import InvoiceXMLHandler
 from selleraxis.invoice.services.services import (
     create_invoice,
@@ -25,7 +30,7 @@ from selleraxis.invoice.services.services import (
 )
 from selleraxis.organizations.models import Organization
 from selleraxis.product_alias.models import ProductAlias
-from selleraxis.products.services import create_quickbook_product_service
+from selleraxis.products.services import sync_products_qbo
 from selleraxis.qbo_unhandled_data.models import QBOUnhandledData
 from selleraxis.retailer_purchase_order_histories.models import (
     RetailerPurchaseOrderHistory,
@@ -170,37 +175,12 @@ class CreateInvoiceView(APIView):
         new_order_history.save()
         return Response(data=result, status=status.HTTP_200_OK)
 
-    @async_to_sync
-    async def bulk_create_product_qbo_process(self, list_products, organization):
-        response = await asyncio.gather(
-            *[self.create_QBO(product, organization) for product in list_products]
+    def bulk_create_product_qbo_process(self, list_products, organization):
+        return sync_products_qbo(
+            organization=organization,
+            products=list_products,
+            is_sandbox=organization.is_sandbox,
         )
-        return response
-
-    @sync_to_async
-    def create_QBO(self, product_to_qbo, organization):
-        response_item = {
-            "id": product_to_qbo.id,
-            "sku": product_to_qbo.sku,
-            "qbo_id": None,
-            "create_qbo_message": "Success",
-        }
-        if product_to_qbo.product_series is None:
-            response_item["create_qbo_message"] = "Product not have product series"
-        else:
-            try:
-                organization = product_to_qbo.product_series.organization
-                response = create_quickbook_product_service(
-                    action="Create",
-                    model="Product",
-                    product_to_qbo=product_to_qbo,
-                    is_sandbox=organization.is_sandbox,
-                    organization=organization,
-                )
-                response_item["qbo_id"] = response.get("qbo_id")
-            except Exception as e:
-                response_item["create_qbo_message"] = e.detail
-        return response_item
 
 
 class RefreshInvoiceView(CreateInvoiceView):
@@ -279,6 +259,54 @@ class RefreshInvoiceView(CreateInvoiceView):
         )
 
 
+class BulkCreateInvoiceView(APIView):
+    """
+    Create the invoices of many orders, and send their invoice XML
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "retailer_purchase_order_ids",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "send_xml",
+                openapi.IN_QUERY,
+                description="Send the invoice XML of the Home Depot and Lowe's orders",
+                type=openapi.TYPE_BOOLEAN,
+            ),
+        ]
+    )
+    def post(self, request, *args, **kwargs):
+        organization_id = self.request.headers.get("organization")
+        organization = Organization.objects.filter(id=organization_id).first()
+        if organization is None:
+            raise ParseError("Organization is not exist!")
+        purchase_order_ids = request.query_params.get("retailer_purchase_order_ids")
+        if not purchase_order_ids:
+            raise ParseError("Purchase order ids are required!")
+        purchase_order_ids = set(purchase_order_ids.split(","))
+        if len(purchase_order_ids) > settings.INVOICE_BULK_MAX_ORDERS:
+            raise ParseError(
+                f"At most {settings.INVOICE_BULK_MAX_ORDERS} orders can be invoiced at once!"
+            )
+
+        orders = get_invoice_orders(organization_id, purchase_order_ids)
+        if len(purchase_order_ids) != len(orders):
+            raise ParseError("Purchase order ids doesn't match!")
+
+        results = bulk_create_invoices(organization, orders, user=request.user)
+        if request.query_params.get("send_xml", "").lower() in ("1", "true"):
+            xml_results = bulk_send_invoice_xmls(orders, user=request.user)
+            for result in results:
+                result["xml"] = xml_results.get(result["id"])
+        return Response(data=results, status=status.HTTP_200_OK)
+
+
 class SQSSyncUnhandledDataView(APIView):
     def post(self, request, *args, **kwargs):
         organization = request.headers.get("organization")
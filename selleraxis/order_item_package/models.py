@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from selleraxis.order_package.models import OrderPackage
 from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
+from selleraxis.retailer_purchase_orders.models import invalidate_order_details
 
 
 class OrderItemPackage(models.Model):
@@ -18,3 +21,8 @@ class OrderItemPackage(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+@receiver([post_save, post_delete], sender=OrderItemPackage)
+def invalidate_order_item_package_detail(sender, instance, **kwargs):
+    invalidate_order_details(order__items__id=instance.order_item_id)
@@ -1,7 +1,12 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from selleraxis.boxes.models import Box
-from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
+from selleraxis.retailer_purchase_orders.models import (
+    RetailerPurchaseOrder,
+    invalidate_order_details,
+)
 
 
 class OrderPackage(models.Model):
@@ -18,3 +23,8 @@ class OrderPackage(models.Model):
     weight_unit = models.CharField(max_length=100, choices=WEIGHT_UNIT, default="lb")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+@receiver([post_save, post_delete], sender=OrderPackage)
+def invalidate_order_package_detail(sender, instance, **kwargs):
+    invalidate_order_details(order_id=instance.order_id)
@@ -39,7 +39,10 @@ from selleraxis.package_rules.models import PackageRule
 from selleraxis.permissions.models import Permissions
 from selleraxis.product_alias.models import ProductAlias
 from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
-from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
+from selleraxis.retailer_purchase_orders.models import (
+    RetailerPurchaseOrder,
+    invalidate_order_details,
+)
 from selleraxis.shipments.models import ShipmentStatus
 
 
@@ -63,7 +66,10 @@ class ListCreateOrderPackageView(ListCreateAPIView):
         return check_permission(self, Permissions.READ_ORDER_PACKAGE)
 
     def get_queryset(self):
-        queryset = self.queryset.select_related("box", "order",).prefetch_related(
+        queryset = self.queryset.select_related(
+            "box",
+            "order",
+        ).prefetch_related(
             "order_item_packages__order_item",
             "shipment_packages__type",
         )
@@ -149,7 +155,10 @@ class BulkOrderPackage(GenericAPIView):
         return BulkUpdateOrderPackageSerializer
 
     def get_queryset(self):
-        queryset = self.queryset.select_related("box", "order",).prefetch_related(
+        queryset = self.queryset.select_related(
+            "box",
+            "order",
+        ).prefetch_related(
             "order_item_packages__order_item",
             "shipment_packages__type",
         )
@@ -271,6 +280,7 @@ class BulkOrderPackage(GenericAPIView):
                 )
             )
         OrderItemPackage.objects.bulk_create(order_item_package_list)
+        invalidate_order_details(order_id=order_package.order_id)
         serializer = OrderPackageSerializer(order_package)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from selleraxis.core.base_model import SoftDeleteModel
+from selleraxis.core.permission_cache import invalidate_organization_permissions
 from selleraxis.users.models import User
 
 
@@ -26,3 +29,8 @@ class Organization(SoftDeleteModel):
     sandbox_organization = models.OneToOneField(
         "self", null=True, related_name="prod_organization", on_delete=models.CASCADE
     )
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_organization_permission_cache(sender, instance, **kwargs):
+    invalidate_organization_permissions(instance.pk, instance.sandbox_organization_id)
@@ -1,7 +1,13 @@
 from django.db import models
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 
 from selleraxis.boxes.models import Box
+from selleraxis.product_alias.models import ProductAlias
 from selleraxis.product_series.models import ProductSeries
+from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
+from selleraxis.retailer_purchase_orders.models import invalidate_order_details
 
 
 class PackageRule(models.Model):
@@ -14,3 +20,48 @@ class PackageRule(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+def invalidate_series_order_details(product_series_ids) -> None:
+    """Mark the detail of the orders with items of the product series as stale"""
+    product_aliases = ProductAlias.objects.filter(
+        product__product_series_id__in=product_series_ids,
+        merchant_sku=OuterRef("merchant_sku"),
+        retailer_id=OuterRef("order__batch__retailer_id"),
+    )
+    invalidate_order_details(
+        order_id__in=RetailerPurchaseOrderItem.objects.filter(
+            Exists(product_aliases)
+        ).values("order_id")
+    )
+
+
+@receiver(pre_save, sender=PackageRule)
+def remember_package_rule_product_series(sender, instance, **kwargs):
+    # the orders of the previous product series are affected too
+    instance.previous_product_series_id = (
+        PackageRule.objects.filter(pk=instance.pk)
+        .values_list("product_series_id", flat=True)
+        .first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver([post_save, post_delete], sender=PackageRule)
+def invalidate_package_rule_order_details(sender, instance, **kwargs):
+    product_series_ids = {
+        instance.product_series_id,
+        getattr(instance, "previous_product_series_id", None),
+    } - {None}
+    if product_series_ids:
+        invalidate_series_order_details(product_series_ids)
+
+
+@receiver([post_save, post_delete], sender=Box)
+def invalidate_box_order_details(sender, instance, **kwargs):
+    # orders packed in the box, and the ones the box is a valid choice for
+    invalidate_order_details(order__order_packages__box_id=instance.id)
+    invalidate_series_order_details(
+        PackageRule.objects.filter(box_id=instance.id).values("product_series_id")
+    )
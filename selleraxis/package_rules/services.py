@@ -0,0 +1,251 @@
+"""
+Packing of order items into the boxes allowed by the package rules.
+
+Items of a product series are packed by units of ``sku_quantity`` pieces into
+boxes holding up to ``max_quantity`` pieces. Small orders are solved exactly,
+larger ones with best fit decreasing, both minimizing the shipping cost of the
+boxes. Solutions are cached by series, item quantities and box rules, the same
+order being divided again on each detail view.
+"""
+import bisect
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+CM_PER_INCH = 2.54
+# carriers bill the dimensional weight of a package as inch^3 / 139 lb
+DIM_WEIGHT_DIVISOR = 139
+PACKING_CACHE_KEY = "package_divide_{}"
+
+
+@dataclass(frozen=True)
+class BoxType:
+    box_id: int
+    max_quantity: int
+    length: float = 0
+    width: float = 0
+    height: float = 0
+    dimension_unit: str = "IN"
+
+    @property
+    def cost(self) -> float:
+        """Estimated shipping cost of one package of this box, in billable lb"""
+        volume = (self.length or 0) * (self.width or 0) * (self.height or 0)
+        if (self.dimension_unit or "").upper() == "CM":
+            volume = volume / CM_PER_INCH**3
+        return settings.PACKAGE_DIVIDE_BOX_COST + volume / DIM_WEIGHT_DIVISOR
+
+    @property
+    def sort_key(self) -> tuple:
+        return self.cost, self.max_quantity, self.box_id
+
+
+@dataclass(frozen=True)
+class PackingItem:
+    sku_quantity: int
+    quantity: int
+
+
+@dataclass
+class PackedBox:
+    box_type: BoxType
+    # number of units by item index
+    quantities: Dict[int, int] = field(default_factory=dict)
+    fill: int = 0
+
+
+def pack_items(
+    items: List[PackingItem], box_types: List[BoxType], cache_prefix: str = ""
+) -> Optional[List[PackedBox]]:
+    """Boxes holding every unit of items, None when an item fits no box"""
+    items_to_pack = [item for item in items if item.quantity > 0]
+    if not items_to_pack:
+        return []
+    box_types = sorted(set(box_types), key=lambda box_type: box_type.sort_key)
+    if not box_types or max(item.sku_quantity for item in items_to_pack) > max(
+        box_type.max_quantity for box_type in box_types
+    ):
+        return None
+
+    cache_key = PACKING_CACHE_KEY.format(
+        hashlib.sha1(
+            json.dumps(
+                [
+                    cache_prefix,
+                    [[item.sku_quantity, item.quantity] for item in items],
+                    [
+                        [
+                            box_type.box_id,
+                            box_type.max_quantity,
+                            box_type.length,
+                            box_type.width,
+                            box_type.height,
+                            box_type.dimension_unit,
+                        ]
+                        for box_type in box_types
+                    ],
+                ]
+            ).encode("UTF-8")
+        ).hexdigest()
+    )
+    solution = cache.get(cache_key)
+    if solution is None:
+        if (
+            count_states(items) <= settings.PACKAGE_DIVIDE_EXACT_MAX_STATES
+            and sum(item.quantity for item in items_to_pack)
+            <= settings.PACKAGE_DIVIDE_EXACT_MAX_UNITS
+        ):
+            boxes = ExactPacker(items, box_types).solve()
+        else:
+            boxes = best_fit_decreasing(items, box_types)
+        solution = [
+            (box_types.index(box.box_type), sorted(box.quantities.items()))
+            for box in boxes
+        ]
+        cache.set(cache_key, solution, settings.PACKAGE_DIVIDE_CACHE_TIMEOUT)
+
+    boxes = []
+    for box_type_index, quantities in solution:
+        box = PackedBox(box_types[box_type_index], dict(quantities))
+        box.fill = sum(
+            items[index].sku_quantity * quantity for index, quantity in quantities
+        )
+        boxes.append(box)
+    return boxes
+
+
+def count_states(items: List[PackingItem]) -> int:
+    states = 1
+    for item in items:
+        states *= max(item.quantity, 0) + 1
+    return states
+
+
+class ExactPacker(object):
+    """Cheapest packing by dynamic programming over the remaining quantities.
+
+    Each step fills one box holding at least a unit of the first remaining
+    item, so every packing is reached once. Only fills where no remaining
+    unit could be added are tried, a fuller box never costs more.
+    """
+
+    def __init__(self, items: List[PackingItem], box_types: List[BoxType]):
+        self.items = items
+        self.box_types = box_types
+        self.solutions = {}
+
+    def solve(self) -> List[PackedBox]:
+        remaining = tuple(max(item.quantity, 0) for item in self.items)
+        _, boxes = self.solve_remaining(remaining)
+        return [
+            PackedBox(
+                box_type,
+                {index: quantity for index, quantity in quantities if quantity},
+                sum(
+                    self.items[index].sku_quantity * quantity
+                    for index, quantity in quantities
+                ),
+            )
+            for box_type, quantities in boxes
+        ]
+
+    def solve_remaining(self, remaining: tuple) -> Tuple[float, list]:
+        if not any(remaining):
+            return 0, []
+        if remaining in self.solutions:
+            return self.solutions[remaining]
+
+        first = next(index for index, quantity in enumerate(remaining) if quantity)
+        best = None
+        for box_type in self.box_types:
+            if self.items[first].sku_quantity > box_type.max_quantity:
+                continue
+            for fill in self.get_fills(remaining, first, box_type.max_quantity):
+                cost, boxes = self.solve_remaining(
+                    tuple(
+                        quantity - fill[index]
+                        for index, quantity in enumerate(remaining)
+                    )
+                )
+                cost += box_type.cost
+                if best is None or cost < best[0] - 1e-9:
+                    best = (
+                        cost,
+                        [(box_type, tuple(enumerate(fill)))] + boxes,
+                    )
+        self.solutions[remaining] = best
+        return best
+
+    def get_fills(self, remaining: tuple, first: int, capacity: int):
+        sizes = [item.sku_quantity for item in self.items]
+        fill = [0] * len(remaining)
+
+        def fills(index: int, free: int):
+            if index == len(remaining):
+                # keep maximal fills only
+                if fill[first] and not any(
+                    fill[i] < remaining[i] and sizes[i] <= free
+                    for i in range(len(remaining))
+                ):
+                    yield list(fill)
+                return
+            most = min(remaining[index], free // sizes[index])
+            least = 1 if index == first else 0
+            for quantity in range(most, least - 1, -1):
+                fill[index] = quantity
+                yield from fills(index + 1, free - quantity * sizes[index])
+            fill[index] = 0
+
+        return fills(first, capacity)
+
+
+def best_fit_decreasing(
+    items: List[PackingItem], box_types: List[BoxType]
+) -> List[PackedBox]:
+    """Pack the largest units first into the open box they fill the most.
+
+    Boxes are opened with the largest capacity, then each box is shrunk to
+    the cheapest box type holding its content.
+    """
+    capacity = max(box_type.max_quantity for box_type in box_types)
+    min_size = min(item.sku_quantity for item in items if item.quantity > 0)
+    boxes = []
+    # (free capacity, box index) of the boxes still able to hold a unit
+    open_boxes = []
+
+    def put(box_index: int, item_index: int, quantity: int) -> None:
+        box = boxes[box_index]
+        box.quantities[item_index] = box.quantities.get(item_index, 0) + quantity
+        box.fill += quantity * items[item_index].sku_quantity
+        if capacity - box.fill >= min_size:
+            bisect.insort(open_boxes, (capacity - box.fill, box_index))
+
+    order = sorted(
+        (index for index, item in enumerate(items) if item.quantity > 0),
+        key=lambda index: -items[index].sku_quantity,
+    )
+    for item_index in order:
+        size = items[item_index].sku_quantity
+        quantity = items[item_index].quantity
+        while quantity > 0:
+            position = bisect.bisect_left(open_boxes, (size, -1))
+            if position < len(open_boxes):
+                free, box_index = open_boxes.pop(position)
+                in_box = min(quantity, free // size)
+            else:
+                boxes.append(PackedBox(box_types[-1]))
+                box_index = len(boxes) - 1
+                in_box = min(quantity, capacity // size)
+            put(box_index, item_index, in_box)
+            quantity -= in_box
+
+    for box in boxes:
+        box.box_type = min(
+            (box_type for box_type in box_types if box_type.max_quantity >= box.fill),
+            key=lambda box_type: box_type.sort_key,
+        )
+    return boxes
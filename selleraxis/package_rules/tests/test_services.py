@@ -0,0 +1,124 @@
+import random
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from selleraxis.package_rules import services
+from selleraxis.package_rules.services import (
+    BoxType,
+    ExactPacker,
+    PackingItem,
+    best_fit_decreasing,
+    pack_items,
+)
+
+BOX_TYPES = [
+    BoxType(box_id=1, max_quantity=4, length=10, width=10, height=10),
+    BoxType(box_id=2, max_quantity=6, length=12, width=12, height=12),
+    BoxType(box_id=3, max_quantity=10, length=16, width=16, height=16),
+]
+
+
+def get_cost(boxes) -> float:
+    return sum(box.box_type.cost for box in boxes)
+
+
+def get_random_items(rng: random.Random):
+    return [
+        PackingItem(sku_quantity=rng.randint(1, 4), quantity=rng.randint(0, 3))
+        for _ in range(rng.randint(1, 3))
+    ]
+
+
+@override_settings(
+    PACKAGE_DIVIDE_BOX_COST=10,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class PackItemsTest(SimpleTestCase):
+    def assert_valid_packing(self, items, boxes):
+        packed = {}
+        for box in boxes:
+            fill = sum(
+                items[index].sku_quantity * quantity
+                for index, quantity in box.quantities.items()
+            )
+            self.assertEqual(box.fill, fill)
+            self.assertLessEqual(fill, box.box_type.max_quantity)
+            for index, quantity in box.quantities.items():
+                packed[index] = packed.get(index, 0) + quantity
+        self.assertEqual(
+            packed,
+            {index: item.quantity for index, item in enumerate(items) if item.quantity},
+        )
+
+    def test_exact_packer_respects_capacity_and_packs_all_units(self):
+        rng = random.Random(15)
+        for _ in range(50):
+            items = get_random_items(rng)
+            self.assert_valid_packing(items, ExactPacker(items, BOX_TYPES).solve())
+
+    def test_best_fit_decreasing_respects_capacity_and_packs_all_units(self):
+        rng = random.Random(16)
+        for _ in range(50):
+            items = get_random_items(rng)
+            if not any(item.quantity for item in items):
+                continue
+            self.assert_valid_packing(items, best_fit_decreasing(items, BOX_TYPES))
+
+    def test_exact_cost_is_not_above_best_fit_decreasing(self):
+        rng = random.Random(17)
+        for _ in range(50):
+            items = get_random_items(rng)
+            if not any(item.quantity for item in items):
+                continue
+            exact_boxes = ExactPacker(items, BOX_TYPES).solve()
+            bfd_boxes = best_fit_decreasing(items, BOX_TYPES)
+            self.assertLessEqual(get_cost(exact_boxes), get_cost(bfd_boxes) + 1e-9)
+
+    def test_item_larger_than_every_box(self):
+        items = [PackingItem(sku_quantity=11, quantity=1)]
+        self.assertIsNone(pack_items(items, BOX_TYPES))
+
+    def test_no_units_to_pack(self):
+        items = [PackingItem(sku_quantity=2, quantity=0)]
+        self.assertEqual(pack_items(items, BOX_TYPES), [])
+
+    @override_settings(
+        PACKAGE_DIVIDE_EXACT_MAX_STATES=1000, PACKAGE_DIVIDE_EXACT_MAX_UNITS=5
+    )
+    def test_exact_packer_under_the_threshold(self):
+        items = [PackingItem(sku_quantity=2, quantity=5)]
+        with mock.patch.object(
+            services, "best_fit_decreasing", wraps=best_fit_decreasing
+        ) as bfd:
+            boxes = pack_items(items, BOX_TYPES, cache_prefix="under")
+        bfd.assert_not_called()
+        self.assert_valid_packing(items, boxes)
+
+    @override_settings(
+        PACKAGE_DIVIDE_EXACT_MAX_STATES=1000, PACKAGE_DIVIDE_EXACT_MAX_UNITS=5
+    )
+    def test_best_fit_decreasing_over_the_unit_threshold(self):
+        items = [PackingItem(sku_quantity=2, quantity=6)]
+        with mock.patch.object(
+            services, "best_fit_decreasing", wraps=best_fit_decreasing
+        ) as bfd:
+            boxes = pack_items(items, BOX_TYPES, cache_prefix="units")
+        bfd.assert_called_once()
+        self.assert_valid_packing(items, boxes)
+
+    @override_settings(
+        PACKAGE_DIVIDE_EXACT_MAX_STATES=10, PACKAGE_DIVIDE_EXACT_MAX_UNITS=100
+    )
+    def test_best_fit_decreasing_over_the_state_threshold(self):
+        # (3 + 1) * (3 + 1) states
+        items = [
+            PackingItem(sku_quantity=1, quantity=3),
+            PackingItem(sku_quantity=2, quantity=3),
+        ]
+        with mock.patch.object(
+            services, "best_fit_decreasing", wraps=best_fit_decreasing
+        ) as bfd:
+            boxes = pack_items(items, BOX_TYPES, cache_prefix="states")
+        bfd.assert_called_once()
+        self.assert_valid_packing(items, boxes)
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.14 on 2024-01-24 09:30
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("product_alias", "0006_productalias_availability"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="productalias",
+            index=models.Index(
+                fields=["merchant_sku", "retailer"],
+                name="product_alias_merchant_sku_idx",
+            ),
+        ),
+    ]
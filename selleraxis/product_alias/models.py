@@ -32,3 +32,11 @@ class ProductAlias(models.Model):
     is_live_data = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["merchant_sku", "retailer"],
+                name="product_alias_merchant_sku_idx",
+            ),
+        ]
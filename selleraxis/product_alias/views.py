@@ -1,6 +1,3 @@
-import json
-
-from django.conf import settings
 from django.db.models import OuterRef, Subquery
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
@@ -17,10 +14,9 @@ from rest_framework.generics import (
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from selleraxis.core.clients.boto3_client import sqs_client
 from selleraxis.core.pagination import Pagination
 from selleraxis.core.permissions import check_permission
-from selleraxis.core.views import BulkUpdateAPIView
+from selleraxis.core.views import BulkUpdateAPIView, StreamingListMixin
 from selleraxis.permissions.models import Permissions
 from selleraxis.product_alias.exceptions import (
     DeleteAliasException,
@@ -54,9 +50,10 @@ from selleraxis.retailer_suggestion.models import RetailerSuggestion
 from selleraxis.retailer_warehouse_products.models import RetailerWarehouseProduct
 from selleraxis.retailer_warehouses.models import RetailerWarehouse
 from selleraxis.retailers.models import Retailer
+from selleraxis.retailers.services.inventory_push_services import mark_inventory_changed
 
 
-class ListCreateProductAliasView(ListCreateAPIView):
+class ListCreateProductAliasView(StreamingListMixin, ListCreateAPIView):
     model = ProductAlias
     serializer_class = ProductAliasSerializer
     queryset = ProductAlias.objects.all()
@@ -185,19 +182,8 @@ class UpdateDeleteProductAliasView(RetrieveUpdateDestroyAPIView):
             if len(filter_orders) > 0:
                 raise PutAliasException
 
-        list_warehouse = product_alias.retailer_product_aliases.all()
-        if len(list_warehouse) > 0:
-            dict_data = [
-                {
-                    "retailer_id": product_alias.retailer.id,
-                    "product_alias_ids": str(product_alias.id),
-                }
-            ]
-            message_body = json.dumps(dict_data)
-            sqs_client.create_queue(
-                message_body=message_body,
-                queue_name=settings.SQS_UPDATE_INVENTORY_TO_COMMERCEHUB_SQS_NAME,
-            )
+        if product_alias.retailer_product_aliases.exists():
+            mark_inventory_changed([(product_alias.retailer_id, product_alias.id)])
 
         serializer.save()
 
@@ -379,18 +365,6 @@ class BulkCreateProductAliasView(CreateAPIView):
 
         product_alias = ProductAlias.objects.bulk_create(product_alias)
 
-        # task:  send product alias upload commercehub
-        product_alias_ids = [
-            product_alias_item.id for product_alias_item in product_alias
-        ]
-        product_alias_ids = ",".join(map(str, product_alias_ids))
-        # Create data for sending to SQS
-        dict_data = {
-            "retailer_id": product_alias[0].retailer.id,
-            "product_alias_ids": product_alias_ids,
-        }
-        data_send_sqs = [dict_data]
-
         product_alias_sku_object = {
             product_alias_item.sku: product_alias_item
             for product_alias_item in product_alias
@@ -429,11 +403,10 @@ class BulkCreateProductAliasView(CreateAPIView):
                     )
                     count += 1
         ProductWarehouseStaticData.objects.bulk_create(product_warehouse_static_list)
-        # send data to SQS
-        message_body = json.dumps(data_send_sqs)
-        sqs_client.create_queue(
-            message_body=message_body,
-            queue_name=settings.SQS_UPDATE_INVENTORY_TO_COMMERCEHUB_SQS_NAME,
+        # task:  send product alias upload commercehub
+        mark_inventory_changed(
+            (product_alias_item.retailer_id, product_alias_item.id)
+            for product_alias_item in product_alias
         )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -461,10 +434,8 @@ class BulkUpdateProductAliasView(
 
     def perform_update(self, serializer):
         serializer.save()
-        retailer_ids = [str(instance.retailer_id) for instance in serializer.instance]
-        sqs_client.create_queue(
-            message_body=",".join(retailer_ids),
-            queue_name=settings.SQS_UPDATE_RETAILER_INVENTORY_SQS_NAME,
+        mark_inventory_changed(
+            (instance.retailer_id, instance.id) for instance in serializer.instance
         )
 
 
@@ -476,22 +447,5 @@ class ProductAliasInventoryXMLView(CreateAPIView):
         ids = validated_data.get("product_alias_ids")
         list_id = ids.split(",")
         list_product_alias = ProductAlias.objects.filter(id__in=list_id)
-        product_alias = {}
-        for product_alias_item in list_product_alias:
-            retailer_id = product_alias_item.retailer.id
-            if retailer_id not in product_alias:
-                product_alias[retailer_id] = []
-            product_alias[retailer_id].append(product_alias_item.id)
-        data_send_sqs = []
-        for key, value in product_alias.items():
-            dict_data = {
-                "retailer_id": key,
-                "product_alias_ids": ",".join(map(str, value)),
-            }
-            data_send_sqs.append(dict_data)
-        message_body = json.dumps(data_send_sqs)
-        sqs_client.create_queue(
-            message_body=message_body,
-            queue_name=settings.SQS_UPDATE_INVENTORY_TO_COMMERCEHUB_SQS_NAME,
-        )
-        return Response(message_body)
+        mark_inventory_changed(list_product_alias.values_list("retailer_id", "id"))
+        return Response(ids)
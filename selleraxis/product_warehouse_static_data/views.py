@@ -1,6 +1,3 @@
-import json
-
-from django.conf import settings
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.filters import OrderingFilter, SearchFilter
@@ -9,16 +6,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from selleraxis.core.clients.boto3_client import sqs_client
 from selleraxis.core.pagination import Pagination
 from selleraxis.core.permissions import check_permission
-from selleraxis.core.utils import DataUtilities
 from selleraxis.core.views import BulkUpdateAPIView
 from selleraxis.permissions.models import Permissions
 from selleraxis.product_warehouse_static_data.services import (
     send_all_retailer_id_sqs,
     send_retailer_id_sqs,
 )
+from selleraxis.retailers.services.inventory_push_services import mark_inventory_changed
 
 from ..core.custom_permission import CustomPermission
 from ..retailer_warehouse_products.models import RetailerWarehouseProduct
@@ -59,19 +55,8 @@ class ListCreateProductWarehouseStaticDataView(ListCreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save()
-        dict_data = [
-            {
-                "retailer_id": serializer.instance.product_warehouse.product_alias.retailer.id,
-                "product_alias_ids": str(
-                    serializer.instance.product_warehouse.product_alias.id
-                ),
-            }
-        ]
-        message_body = json.dumps(dict_data)
-        sqs_client.create_queue(
-            message_body=message_body,
-            queue_name=settings.SQS_UPDATE_INVENTORY_TO_COMMERCEHUB_SQS_NAME,
-        )
+        product_alias = serializer.instance.product_warehouse.product_alias
+        mark_inventory_changed([(product_alias.retailer_id, product_alias.id)])
         return serializer
 
 
@@ -130,29 +115,10 @@ class BulkUpdateDeleteProductWarehouseStaticDataView(BulkUpdateAPIView):
         list_product_warehouse = RetailerWarehouseProduct.objects.filter(
             id__in=product_warehouse_ids
         )
-        product_alias_list = [item.product_alias for item in list_product_warehouse]
-        product_alias_objects = {}
-        for product_alias in product_alias_list:
-            retailer_id = product_alias.retailer.id
-            if retailer_id not in product_alias_objects:
-                product_alias_objects[retailer_id] = []
-            product_alias_objects[retailer_id].append(product_alias.id)
-
-        data_send_sqs = []
-        product_alias_objects = DataUtilities.convert_list_id_to_unique(
-            product_alias_objects
-        )
-
-        for key, value in product_alias_objects.items():
-            dict_data = {
-                "retailer_id": key,
-                "product_alias_ids": ",".join(map(str, value)),
-            }
-            data_send_sqs.append(dict_data)
-        message_body = json.dumps(data_send_sqs)
-        sqs_client.create_queue(
-            message_body=message_body,
-            queue_name=settings.SQS_UPDATE_INVENTORY_TO_COMMERCEHUB_SQS_NAME,
+        mark_inventory_changed(
+            list_product_warehouse.values_list(
+                "product_alias__retailer_id", "product_alias_id"
+            )
         )
 
 
@@ -0,0 +1,164 @@
+"""
+Inventory ledger of the product quantities.
+
+Quantity changes are recorded as ProductInventoryMovement rows and applied
+to the products as relative updates, the deltas of every product being
+summed and written in one statement. Concurrent ships, cancels and voids
+add up instead of overwriting each other.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, QuerySet, Sum, Value, When
+
+from selleraxis.product_alias.models import ProductAlias
+from selleraxis.products.models import Product, ProductInventoryMovement
+
+INVENTORY_COMPACTION_LOCK_KEY = "inventory_compaction_lock"
+INVENTORY_COMPACTION_LOCK_TIMEOUT = 600
+
+
+@transaction.atomic
+def record_inventory_movements(movements: List[ProductInventoryMovement]) -> None:
+    movements = [
+        movement
+        for movement in movements
+        if movement.qty_on_hand_delta or movement.qty_pending_delta
+    ]
+    if not movements:
+        return
+    ProductInventoryMovement.objects.bulk_create(movements)
+
+    qty_on_hand_deltas = {}
+    qty_pending_deltas = {}
+    for movement in movements:
+        qty_on_hand_deltas[movement.product_id] = (
+            qty_on_hand_deltas.get(movement.product_id, 0) + movement.qty_on_hand_delta
+        )
+        qty_pending_deltas[movement.product_id] = (
+            qty_pending_deltas.get(movement.product_id, 0) + movement.qty_pending_delta
+        )
+    Product.objects.filter(id__in=qty_on_hand_deltas.keys()).update(
+        qty_on_hand=F("qty_on_hand") + get_delta_case(qty_on_hand_deltas),
+        qty_pending=F("qty_pending") + get_delta_case(qty_pending_deltas),
+    )
+
+
+def get_delta_case(deltas: Dict[int, int]) -> Case:
+    return Case(
+        *[
+            When(id=product_id, then=Value(delta))
+            for product_id, delta in deltas.items()
+            if delta
+        ],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def get_product_aliases(
+    keys: Iterable[Tuple[int, str]]
+) -> Dict[Tuple[int, str], ProductAlias]:
+    """Product alias of each (retailer id, merchant sku), the last one by id"""
+    keys = set(keys)
+    product_aliases = {}
+    for product_alias in ProductAlias.objects.filter(
+        retailer_id__in={retailer_id for retailer_id, _ in keys},
+        merchant_sku__in={merchant_sku for _, merchant_sku in keys},
+    ).order_by("id"):
+        key = (product_alias.retailer_id, product_alias.merchant_sku)
+        if key in keys:
+            product_aliases[key] = product_alias
+    return product_aliases
+
+
+def compact_inventory_movements(before) -> int:
+    """Merge the movements of each product created before ``before``.
+
+    The merged movements are replaced by one COMPACTION movement per product
+    holding their sum, so the ledger totals do not change. Returns the number
+    of merged movements.
+    """
+    # a second compaction of the same movements would count them twice
+    if not cache.add(
+        INVENTORY_COMPACTION_LOCK_KEY, True, INVENTORY_COMPACTION_LOCK_TIMEOUT
+    ):
+        return 0
+    try:
+        return compact_movements_before(before)
+    finally:
+        cache.delete(INVENTORY_COMPACTION_LOCK_KEY)
+
+
+def compact_movements_before(before) -> int:
+    with transaction.atomic():
+        movements = ProductInventoryMovement.objects.filter(created_at__lt=before)
+        totals = list(
+            movements.order_by()
+            .values("product_id")
+            .annotate(
+                qty_on_hand_delta=Sum("qty_on_hand_delta"),
+                qty_pending_delta=Sum("qty_pending_delta"),
+            )
+        )
+        count, _ = movements.delete()
+        ProductInventoryMovement.objects.bulk_create(
+            [
+                ProductInventoryMovement(
+                    product_id=total["product_id"],
+                    reason=ProductInventoryMovement.Reason.COMPACTION,
+                    qty_on_hand_delta=total["qty_on_hand_delta"],
+                    qty_pending_delta=total["qty_pending_delta"],
+                )
+                for total in totals
+            ]
+        )
+    return count
+
+
+def get_inventory_reconciliation(products: QuerySet = None) -> List[dict]:
+    """Products whose quantities differ from the sum of their movements"""
+    if products is None:
+        products = Product.objects.all()
+    ledger = {
+        total["product_id"]: total
+        for total in ProductInventoryMovement.objects.filter(product__in=products)
+        .order_by()
+        .values("product_id")
+        .annotate(
+            qty_on_hand=Sum("qty_on_hand_delta"), qty_pending=Sum("qty_pending_delta")
+        )
+    }
+    report = []
+    for product_id, sku, qty_on_hand, qty_pending in products.values_list(
+        "id", "sku", "qty_on_hand", "qty_pending"
+    ).order_by("id"):
+        total = ledger.get(product_id, {"qty_on_hand": 0, "qty_pending": 0})
+        if (qty_on_hand, qty_pending) != (total["qty_on_hand"], total["qty_pending"]):
+            report.append(
+                {
+                    "product_id": product_id,
+                    "sku": sku,
+                    "qty_on_hand": qty_on_hand,
+                    "ledger_qty_on_hand": total["qty_on_hand"],
+                    "qty_pending": qty_pending,
+                    "ledger_qty_pending": total["qty_pending"],
+                }
+            )
+    return report
+
+
+def create_adjustment_movements(report: List[dict]) -> None:
+    """Record the drift of the report, without changing the products"""
+    ProductInventoryMovement.objects.bulk_create(
+        [
+            ProductInventoryMovement(
+                product_id=row["product_id"],
+                reason=ProductInventoryMovement.Reason.ADJUSTMENT,
+                qty_on_hand_delta=row["qty_on_hand"] - row["ledger_qty_on_hand"],
+                qty_pending_delta=row["qty_pending"] - row["ledger_qty_pending"],
+            )
+            for row in report
+        ]
+    )
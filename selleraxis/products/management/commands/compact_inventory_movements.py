@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from selleraxis.products.inventory_services import compact_inventory_movements
+
+
+class Command(BaseCommand):
+    help = "Merge the old inventory movements of each product, run periodically"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.INVENTORY_MOVEMENT_RETENTION_DAYS,
+            help="Keep the movements of the last days",
+        )
+
+    def handle(self, *args, **options):
+        count = compact_inventory_movements(
+            timezone.now() - timedelta(days=options["days"])
+        )
+        self.stdout.write(f"Compacted {count} inventory movement(s)")
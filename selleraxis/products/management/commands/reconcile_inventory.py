@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from selleraxis.products.inventory_services import (
+    create_adjustment_movements,
+    get_inventory_reconciliation,
+)
+from selleraxis.products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Report the products whose quantities differ from their inventory ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization", type=int, help="Organization id")
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Record the differences as adjustment movements",
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options["organization"]:
+            products = products.filter(
+                product_series__organization_id=options["organization"]
+            )
+        report = get_inventory_reconciliation(products)
+        for row in report:
+            self.stdout.write(
+                "{product_id} {sku}: qty_on_hand {qty_on_hand} "
+                "(ledger {ledger_qty_on_hand}), qty_pending {qty_pending} "
+                "(ledger {ledger_qty_pending})".format(**row)
+            )
+        if report and options["fix"]:
+            create_adjustment_movements(report)
+        self.stdout.write(f"{len(report)} product(s) differ from the ledger")
@@ -0,0 +1,82 @@
+# Generated by Django 3.2.14 on 2024-01-26 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_opening_movements(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductInventoryMovement = apps.get_model("products", "ProductInventoryMovement")
+    ProductInventoryMovement.objects.bulk_create(
+        [
+            ProductInventoryMovement(
+                product_id=product_id,
+                reason="OPENING",
+                qty_on_hand_delta=qty_on_hand,
+                qty_pending_delta=qty_pending,
+            )
+            for product_id, qty_on_hand, qty_pending in Product.objects.values_list(
+                "id", "qty_on_hand", "qty_pending"
+            ).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0030_product_update_income_and_expense_account_ref_info_data"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductInventoryMovement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[
+                            ("OPENING", "Opening"),
+                            ("ORDER", "Order"),
+                            ("SHIP", "Ship"),
+                            ("CANCEL", "Cancel"),
+                            ("VOID", "Void"),
+                            ("ADJUSTMENT", "Adjustment"),
+                            ("COMPACTION", "Compaction"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("qty_on_hand_delta", models.IntegerField(default=0)),
+                ("qty_pending_delta", models.IntegerField(default=0)),
+                ("order_id", models.IntegerField(null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory_movements",
+                        to="products.product",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="productinventorymovement",
+            index=models.Index(
+                fields=["product", "created_at"],
+                name="inventory_movement_product_idx",
+            ),
+        ),
+        migrations.RunPython(create_opening_movements, migrations.RunPython.noop),
+    ]
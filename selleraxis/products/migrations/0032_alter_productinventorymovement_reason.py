@@ -0,0 +1,30 @@
+# Generated by Django 3.2.14 on 2024-01-29 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0031_productinventorymovement"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="productinventorymovement",
+            name="reason",
+            field=models.CharField(
+                choices=[
+                    ("OPENING", "Opening"),
+                    ("ORDER", "Order"),
+                    ("SHIP", "Ship"),
+                    ("CANCEL", "Cancel"),
+                    ("VOID", "Void"),
+                    ("RETURN", "Return"),
+                    ("ADJUSTMENT", "Adjustment"),
+                    ("COMPACTION", "Compaction"),
+                ],
+                max_length=32,
+            ),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 
 from selleraxis.core.base_model import SQSSyncModel
 from selleraxis.product_series.models import ProductSeries
@@ -43,3 +45,49 @@ class Product(SQSSyncModel):
         max_length=255, blank=True, default="Cost of Goods Sold"
     )
     expense_account_ref_id = models.IntegerField(null=True)
+
+
+class ProductInventoryMovement(models.Model):
+    """Append-only change of the quantities of a product.
+
+    Since the opening balance of each product, the deltas of its movements
+    add up to its quantities unless they were changed outside of the ledger.
+    """
+
+    class Reason(models.TextChoices):
+        OPENING = "OPENING"
+        ORDER = "ORDER"
+        SHIP = "SHIP"
+        CANCEL = "CANCEL"
+        VOID = "VOID"
+        RETURN = "RETURN"
+        ADJUSTMENT = "ADJUSTMENT"
+        COMPACTION = "COMPACTION"
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="inventory_movements"
+    )
+    reason = models.CharField(max_length=32, choices=Reason.choices)
+    qty_on_hand_delta = models.IntegerField(default=0)
+    qty_pending_delta = models.IntegerField(default=0)
+    order_id = models.IntegerField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["product", "created_at"],
+                name="inventory_movement_product_idx",
+            ),
+        ]
+
+
+@receiver(post_save, sender=Product)
+def create_product_opening_movement(sender, instance, created, **kwargs):
+    if created:
+        ProductInventoryMovement.objects.create(
+            product=instance,
+            reason=ProductInventoryMovement.Reason.OPENING,
+            qty_on_hand_delta=instance.qty_on_hand,
+            qty_pending_delta=instance.qty_pending,
+        )
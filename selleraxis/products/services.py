@@ -1,6 +1,4 @@
-import asyncio
 import base64
-import json
 import logging
 import re
 import uuid
@@ -8,425 +6,317 @@ from datetime import datetime
 
 import boto3
 import requests
-from asgiref.sync import async_to_sync, sync_to_async
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.forms import URLField
 from rest_framework.exceptions import ParseError
 
-from selleraxis.core.utils.qbo_environment import production_and_sandbox_environments
-from selleraxis.core.utils.qbo_token import check_token_exp, create_qbo_unhandled
+from selleraxis.core.clients.qbo_client import get_fault_message
+from selleraxis.core.utils.qbo_sync import QBOBatchSync, is_stale_object
+from selleraxis.products.models import Product
 from selleraxis.qbo_unhandled_data.models import QBOUnhandledData
 from selleraxis.settings.common import DATE_FORMAT, LOGGER_FORMAT
 
 logging.basicConfig(format=LOGGER_FORMAT, datefmt=DATE_FORMAT)
 
-
-def save_product_qbo(
-    organization, access_token, realm_id, data, action, model, object_id, is_sandbox
-):
-    """Create Item in qbo.
-
-    Args:
-        action: An string.
-        model: An string.
-        object_id: An integer.
-        data: A dict.
-        access_token: An string.
-        organization: Organization object.
-        realm_id: An string.
-        is_sandbox: A boolean.
-    Returns:
-        return status saving process, data return.
-    Raises:
-        ParseError: Error when saving
-        ParseError: Invalid token (both access token and refresh token expired)
+# product field prefix, qbo AccountType and AccountSubType of the item account refs
+PRODUCT_ACCOUNT_REFS = (
+    ("qbo_account_ref", "AssetAccountRef", "Other Current Asset", "Inventory"),
+    ("income_account_ref", "IncomeAccountRef", "Income", "SalesOfProductIncome"),
+    (
+        "expense_account_ref",
+        "ExpenseAccountRef",
+        "Cost of Goods Sold",
+        "SuppliesMaterialsCogs",
+    ),
+)
+PRODUCT_QBO_FIELDS = [
+    "sku",
+    "qbo_product_id",
+    "sync_token",
+    "inv_start_date",
+    "qbo_account_ref_name",
+    "qbo_account_ref_id",
+    "income_account_ref_name",
+    "income_account_ref_id",
+    "expense_account_ref_name",
+    "expense_account_ref_id",
+]
+
+
+class ProductQBOSync(QBOBatchSync):
+    """Sync products to QBO items.
+
+    Products already linked to an item are written with their stored Id and
+    SyncToken, the others are found in the QBO cache or with one
+    ``Name IN (...)`` query. Account refs are resolved once per run and items
+    are created/updated through /batch. Items updated with a stale SyncToken
+    are evicted from the cache, read again by Id and retried once.
     """
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-    }
-    product_data = data
 
-    url = (
-        f"{production_and_sandbox_environments(is_sandbox)}/v3/company/{realm_id}/item"
-    )
-    response = requests.post(url, headers=headers, data=json.dumps(product_data))
-    if response.status_code == 400:
-        status = QBOUnhandledData.Status.FAIL
-        create_qbo_unhandled(action, model, object_id, organization, status, is_sandbox)
-        json_response = json.loads(response.text)
-        response_fault = json_response.get("Fault")
-        if response_fault and response_fault.get("Error"):
-            if (
-                isinstance(response_fault.get("Error"), list)
-                and len(response_fault.get("Error")) == 1
-            ):
-                if response_fault.get("Error")[0].get("code") == "6240":
-                    raise ParseError(response_fault.get("Error")[0].get("Detail"))
-        logging.error(response.text)
-        raise ParseError(response.text)
-    if response.status_code == 401:
-        get_token_result, token_data = check_token_exp(organization, is_sandbox)
-        if get_token_result is False:
-            status = QBOUnhandledData.Status.EXPIRED
-            create_qbo_unhandled(
-                action, model, object_id, organization, status, is_sandbox
-            )
+    model = QBOUnhandledData.Model.PRODUCT
 
-            organization.qbo_access_token = None
-            organization.qbo_refresh_token = None
-            organization.qbo_access_token_exp_time = None
-            organization.qbo_refresh_token_exp_time = None
-            organization.save()
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # {(field prefix, account name upper): {"name": ..., "value": ...}}
+        self.account_refs = {}
 
-            raise ParseError("Invalid token")
-        access_token = token_data.get("access_token")
-        return save_product_qbo(
-            organization=organization,
-            access_token=access_token,
-            realm_id=realm_id,
-            data=data,
-            action=action,
-            model=model,
-            object_id=object_id,
-            is_sandbox=is_sandbox,
+    def sync_objects(self, products):
+        linked_ids = {product.id for product in products if self.is_linked(product)}
+        items = self.lookup(
+            "Item",
+            [product.sku for product in products if product.id not in linked_ids],
         )
 
-    product_qbo = response.json()
-    return True, product_qbo
-
-
-def save_account_ref_qbo(
-    organization, access_token, realm_id, data, action, model, object_id, is_sandbox
-):
-    """Create account ref in qbo.
-
-    Args:
-        action: An string.
-        model: An string.
-        object_id: An integer.
-        data: A dict.
-        access_token: An string.
-        organization: Organization object.
-        realm_id: An string.
-        is_sandbox: A boolean.
-    Returns:
-        return status saving process, data return.
-    Raises:
-        ParseError: Error when saving
-        ParseError: Invalid token (both access token and refresh token expired)
-    """
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-    }
-    account_ref_data = data
-
-    url = f"{production_and_sandbox_environments(is_sandbox)}/v3/company/{realm_id}/account"
-    response = requests.post(url, headers=headers, data=json.dumps(account_ref_data))
-    if response.status_code == 400:
-        status = QBOUnhandledData.Status.FAIL
-        create_qbo_unhandled(action, model, object_id, organization, status, is_sandbox)
-        json_response = json.loads(response.text)
-        response_fault = json_response.get("Fault")
-        if response_fault and response_fault.get("Error"):
-            if (
-                isinstance(response_fault.get("Error"), list)
-                and len(response_fault.get("Error")) == 1
-            ):
-                if response_fault.get("Error")[0].get("code") == "6240":
-                    return False, response_fault.get("Error")[0].get("Detail")
-        logging.error(response.text)
-        return False, response.text
-    if response.status_code == 401:
-        get_token_result, token_data = check_token_exp(organization, is_sandbox)
-        if get_token_result is False:
-            status = QBOUnhandledData.Status.EXPIRED
-            create_qbo_unhandled(
-                action, model, object_id, organization, status, is_sandbox
+        to_create = []
+        to_update = []
+        for product in products:
+            if product.id in linked_ids:
+                if self.action == QBOUnhandledData.Action.UPDATE:
+                    to_update.append(product)
+                else:
+                    self.done(product, self.get_linked_item(product))
+                continue
+            item = items.get(product.sku.strip().upper())
+            if item is None:
+                product.qbo_product_id = None
+                product.sync_token = None
+                product.inv_start_date = None
+                to_create.append(product)
+                continue
+            self.link_item(product, item)
+            if self.action == QBOUnhandledData.Action.UPDATE:
+                to_update.append(product)
+            else:
+                self.done(product, item)
+
+        if to_create:
+            self.resolve_account_refs(to_create)
+        operations = []
+        for product in to_create:
+            missing = self.apply_account_refs(product)
+            if missing:
+                self.fail([product], f"Missing account ref: {', '.join(missing)}")
+            else:
+                operations.append((product, "create"))
+        operations += [(product, "update") for product in to_update]
+
+        try:
+            stale_products = self.write_items(operations)
+            if stale_products:
+                # the stored SyncToken is outdated, read the items again once
+                self.cache.delete("Item", [product.sku for product in stale_products])
+                items = {
+                    str(item.get("Id")): item
+                    for item in self.client.query_in(
+                        "Item",
+                        "Id",
+                        [str(product.qbo_product_id) for product in stale_products],
+                    )
+                }
+                self.cache.set_many("Item", list(items.values()))
+                operations = []
+                for product in stale_products:
+                    item = items.get(str(product.qbo_product_id))
+                    if item is None:
+                        self.fail([product], f"Item {product.sku} not found")
+                        continue
+                    # keep the local fields, they are the ones being written
+                    product.sync_token = int(item.get("SyncToken"))
+                    operations.append((product, "update"))
+                for product in self.write_items(operations):
+                    self.fail([product], f"Item {product.sku} is stale")
+        finally:
+            Product.objects.bulk_update(products, PRODUCT_QBO_FIELDS)
+
+    @staticmethod
+    def is_linked(product) -> bool:
+        """Whether the product holds everything needed to update its item"""
+        return (
+            product.qbo_product_id is not None
+            and product.sync_token is not None
+            and all(
+                getattr(product, f"{prefix}_id") is not None
+                for prefix, _, _, _ in PRODUCT_ACCOUNT_REFS
             )
-
-            organization.qbo_access_token = None
-            organization.qbo_refresh_token = None
-            organization.qbo_access_token_exp_time = None
-            organization.qbo_refresh_token_exp_time = None
-            organization.save()
-
-            return False, "Invalid token"
-        access_token = token_data.get("access_token")
-        return save_account_ref_qbo(
-            organization=organization,
-            access_token=access_token,
-            realm_id=realm_id,
-            data=data,
-            action=action,
-            model=model,
-            object_id=object_id,
-            is_sandbox=is_sandbox,
         )
 
-    account_ref_qbo = response.json()
-    return True, account_ref_qbo
-
-
-def query_product_qbo(
-    action,
-    model,
-    object_id,
-    organization,
-    product_to_qbo,
-    access_token,
-    realm_id,
-    is_sandbox,
-):
-    """Query Item in qbo by name.
-
-    Args:
-        organization: Organization object.
-        action: An string.
-        model: An string.
-        object_id: An integer.
-        product_to_qbo: Product object.
-        access_token: An string.
-        realm_id: An string.
-        is_sandbox: A boolean.
-    Returns:
-        return status saving process, data return.
-    Raises:
-        None
-    """
-    try:
-        headers = {
-            "Content-Type": "text/plain",
-            "Authorization": f"Bearer {access_token}",
-            "Accept": "application/json",
+    @staticmethod
+    def get_linked_item(product) -> dict:
+        return {
+            "Id": str(product.qbo_product_id),
+            "SyncToken": str(product.sync_token),
+            "Name": product.sku,
         }
-        search_sku = product_to_qbo.sku.strip()
-        url = (
-            f"{production_and_sandbox_environments(is_sandbox)}/v3/company/{realm_id}/query?query=select * from Item "
-            f"Where Name = '{search_sku}'"
-        )
-        response = requests.request("GET", url, headers=headers)
-        if response.status_code == 400:
-            return False, f"Error query item: {response.text}"
-        if response.status_code == 401:
-            return False, "Error query product: Expired"
-        if response.status_code != 200:
-            return False, f"Error query item: {response.text}"
 
-        product_qbo = response.json()
-        if (
-            product_qbo.get("QueryResponse") != {}
-            and product_qbo.get("QueryResponse") is not None
-        ):
-            list_item = product_qbo.get("QueryResponse").get("Item")
-            if list_item is not None:
-                if len(list_item) > 0:
-                    if list_item[0].get("Name").upper() == search_sku.upper():
-                        product_to_qbo.qbo_product_id = int(list_item[0].get("Id"))
-                        product_to_qbo.sync_token = int(list_item[0].get("SyncToken"))
-                        product_to_qbo.sku = list_item[0].get("Name")
-                        if list_item[0].get("InvStartDate", None) is not None:
-                            date_response = list_item[0].get("InvStartDate")
-                            element = datetime.strptime(date_response, "%Y-%m-%d")
-                            product_to_qbo.inv_start_date = element
-                        if list_item[0].get("IncomeAccountRef", None) is not None:
-                            income_data = list_item[0].get("IncomeAccountRef")
-                            product_to_qbo.income_account_ref_name = income_data.get(
-                                "name"
-                            )
-                            product_to_qbo.income_account_ref_id = int(
-                                income_data.get("value")
-                            )
-                        if list_item[0].get("IncomeAccountRef", None) is not None:
-                            income_data = list_item[0].get("ExpenseAccountRef")
-                            product_to_qbo.expense_account_ref_name = income_data.get(
-                                "name"
-                            )
-                            product_to_qbo.expense_account_ref_id = int(
-                                income_data.get("value")
-                            )
-                        if list_item[0].get("IncomeAccountRef", None) is not None:
-                            income_data = list_item[0].get("AssetAccountRef")
-                            product_to_qbo.qbo_account_ref_name = income_data.get(
-                                "name"
-                            )
-                            product_to_qbo.qbo_account_ref_id = int(
-                                income_data.get("value")
-                            )
-                        product_to_qbo.save()
-                        return True, None
-            else:
-                return False, f"Error query item: {response.text}"
-        product_to_qbo.qbo_product_id = None
-        product_to_qbo.sync_token = None
-        product_to_qbo.inv_start_date = None
-        product_to_qbo.save()
-        return False, None
-    except Exception as e:
-        status = QBOUnhandledData.Status.FAIL
-        create_qbo_unhandled(action, model, object_id, organization, status, is_sandbox)
-        raise ParseError(f"Error query item: {e}")
-
-
-def query_account_ref_qbo(
-    action,
-    model,
-    object_id,
-    organization,
-    product_to_qbo,
-    access_token,
-    realm_id,
-    is_sandbox,
-):
-    """Query Item in qbo by name.
-
-    Args:
-        organization: Organization object.
-        action: An string.
-        model: An string.
-        object_id: An integer.
-        product_to_qbo: Product object.
-        access_token: An string.
-        realm_id: An string.
-        is_sandbox: A boolean.
-    Returns:
-        return status saving process, data return.
-    Raises:
-        None
-    """
-    try:
-        headers = {
-            "Content-Type": "text/plain",
-            "Authorization": f"Bearer {access_token}",
-            "Accept": "application/json",
-        }
-        list_account_name = []
-        url = (
-            f"{production_and_sandbox_environments(is_sandbox)}/v3/company/{realm_id}/query?"
-            f"query=select * from Account "
-            f"Where Name IN ('{product_to_qbo.qbo_account_ref_name}', "
-            f"'{product_to_qbo.income_account_ref_name}', "
-            f"'{product_to_qbo.expense_account_ref_name}')"
+    def write_items(self, operations) -> list:
+        """Create/update the items, returns the products sent with a stale SyncToken"""
+        stale_products = []
+        written_items = []
+        batch_items = self.client.batch(
+            [
+                {"operation": operation, "Item": self.get_item_body(product)}
+                for product, operation in operations
+            ]
         )
-        response = requests.request("GET", url, headers=headers)
-        if response.status_code == 400:
-            return False, f"Error query account ref: {response.text}"
-        if response.status_code == 401:
-            return False, "Error query account: Expired"
-        if response.status_code != 200:
-            return False, f"Error query account ref: {response.text}"
+        for (product, _), batch_item in zip(operations, batch_items):
+            item = batch_item.get("Item")
+            if item is None:
+                if is_stale_object(batch_item):
+                    stale_products.append(product)
+                else:
+                    self.fail([product], get_fault_message(batch_item))
+                continue
+            self.link_item(product, item)
+            self.done(product, item)
+            written_items.append(item)
+        self.cache.set_many("Item", written_items)
+        return stale_products
+
+    def resolve_account_refs(self, products):
+        """Query the account refs of the products, create the missing ones"""
+        wanted = {}
+        for product in products:
+            for prefix, _, account_type, account_sub_type in PRODUCT_ACCOUNT_REFS:
+                name = getattr(product, f"{prefix}_name")
+                key = (prefix, name.upper())
+                if key not in self.account_refs:
+                    wanted[key] = (name, account_type, account_sub_type)
+        if not wanted:
+            return
+
+        accounts = self.lookup(
+            "Account", [name for name, _, _ in wanted.values()]
+        ).values()
+        taken_names = {account.get("Name", "").upper() for account in accounts}
+        for account in accounts:
+            for prefix, _, account_type, account_sub_type in PRODUCT_ACCOUNT_REFS:
+                key = (prefix, account.get("Name", "").upper())
+                if (
+                    key in wanted
+                    and str(account.get("AccountType")).upper() == account_type.upper()
+                    and str(account.get("AccountSubType")).upper()
+                    == account_sub_type.upper()
+                ):
+                    self.account_refs[key] = {
+                        "name": account.get("Name"),
+                        "value": str(account.get("Id")),
+                    }
+
+        missing = [key for key in wanted if key not in self.account_refs]
+        operations = []
+        for key in missing:
+            name, account_type, account_sub_type = wanted[key]
+            # name used by an account of another type
+            if name.upper() in taken_names:
+                name = f"{name} {uuid.uuid4()}"
+            taken_names.add(name.upper())
+            operations.append(
+                {
+                    "operation": "create",
+                    "Account": {
+                        "Name": name,
+                        "AccountType": account_type,
+                        "AccountSubType": account_sub_type,
+                    },
+                }
+            )
+        created_accounts = []
+        for key, batch_item in zip(missing, self.client.batch(operations)):
+            account = batch_item.get("Account")
+            if account is None:
+                logging.error(get_fault_message(batch_item))
+                continue
+            created_accounts.append(account)
+            self.account_refs[key] = {
+                "name": account.get("Name"),
+                "value": str(account.get("Id")),
+            }
+        self.cache.set_many("Account", created_accounts)
+
+    def apply_account_refs(self, product) -> list:
+        """Set the resolved account refs on product, returns the unresolved names"""
+        missing = []
+        for prefix, _, _, _ in PRODUCT_ACCOUNT_REFS:
+            name = getattr(product, f"{prefix}_name")
+            account_ref = self.account_refs.get((prefix, name.upper()))
+            if account_ref is None:
+                missing.append(name)
+                continue
+            setattr(product, f"{prefix}_name", account_ref["name"])
+            setattr(product, f"{prefix}_id", int(account_ref["value"]))
+        return missing
+
+    @staticmethod
+    def link_item(product, item):
+        product.qbo_product_id = int(item.get("Id"))
+        product.sync_token = int(item.get("SyncToken"))
+        product.sku = item.get("Name")
+        if item.get("InvStartDate") is not None:
+            product.inv_start_date = datetime.strptime(
+                item.get("InvStartDate"), "%Y-%m-%d"
+            )
+        for prefix, ref_key, _, _ in PRODUCT_ACCOUNT_REFS:
+            account_ref = item.get(ref_key)
+            if account_ref is not None:
+                setattr(product, f"{prefix}_name", account_ref.get("name"))
+                setattr(product, f"{prefix}_id", int(account_ref.get("value")))
+
+    @staticmethod
+    def get_item_body(product) -> dict:
+        body = {
+            "TrackQtyOnHand": True,
+            "Name": product.sku,
+            "QtyOnHand": product.qty_on_hand,
+            "InvStartDate": get_inv_start_date(product),
+            "Type": "Inventory",
+        }
+        for prefix, ref_key, _, _ in PRODUCT_ACCOUNT_REFS:
+            body[ref_key] = {
+                "name": getattr(product, f"{prefix}_name"),
+                "value": str(getattr(product, f"{prefix}_id")),
+            }
+        if product.qbo_product_id is not None:
+            body["Id"] = str(product.qbo_product_id)
+            body["SyncToken"] = str(product.sync_token or 0)
+        return body
 
-        product_qbo = response.json()
-        if (
-            product_qbo.get("QueryResponse") != {}
-            and product_qbo.get("QueryResponse") is not None
-        ):
-            list_item = product_qbo.get("QueryResponse").get("Account")
-            if list_item is not None:
-                if len(list_item) > 0:
-                    # remove account exist qbo from list account need create
-                    for account_item in list_item:
-                        if (
-                            account_item.get("Name").upper()
-                            == product_to_qbo.qbo_account_ref_name.upper()
-                            and account_item.get("AccountType").upper()
-                            == "Other Current Asset".upper()
-                            and account_item.get("AccountSubType").upper()
-                            == "Inventory".upper()
-                        ):
-                            product_to_qbo.qbo_account_ref_id = int(
-                                account_item.get("Id")
-                            )
-                            product_to_qbo.qbo_account_ref_name = account_item.get(
-                                "Name"
-                            )
-                            list_account_name.append(account_item.get("Name").upper())
-                        elif (
-                            account_item.get("Name").upper()
-                            == product_to_qbo.income_account_ref_name.upper()
-                            and account_item.get("AccountType").upper()
-                            == "Income".upper()
-                            and account_item.get("AccountSubType").upper()
-                            == "SalesOfProductIncome".upper()
-                        ):
-                            product_to_qbo.income_account_ref_id = int(
-                                account_item.get("Id")
-                            )
-                            product_to_qbo.income_account_ref_name = account_item.get(
-                                "Name"
-                            )
-                            list_account_name.append(account_item.get("Name").upper())
-                        elif (
-                            account_item.get("Name").upper()
-                            == product_to_qbo.expense_account_ref_name.upper()
-                            and account_item.get("AccountType").upper()
-                            == "Cost of goods sold".upper()
-                            and account_item.get("AccountSubType").upper()
-                            == "SuppliesMaterialsCogs".upper()
-                        ):
-                            product_to_qbo.expense_account_ref_id = int(
-                                account_item.get("Id")
-                            )
-                            product_to_qbo.expense_account_ref_name = account_item.get(
-                                "Name"
-                            )
-                            list_account_name.append(account_item.get("Name").upper())
-                        product_to_qbo.save()
-                    return True, list_account_name
-            else:
-                return False, f"Error query account ref: {response.text}"
-        product_to_qbo.qbo_account_ref_id = None
-        product_to_qbo.expense_account_ref_id = None
-        product_to_qbo.income_account_ref_id = None
-        product_to_qbo.save()
-        return False, None
-    except Exception as e:
-        status = QBOUnhandledData.Status.FAIL
-        create_qbo_unhandled(action, model, object_id, organization, status, is_sandbox)
-        raise ParseError(f"Error query account ref: {e}")
 
+def get_inv_start_date(product) -> str:
+    inv_start_date = product.inv_start_date
+    if inv_start_date:
+        return inv_start_date.strftime("%Y-%m-%d")
+    return datetime.now().strftime("%Y-%m-%d")
 
-def validate_token(organization, action, model, object_id, is_sandbox):
-    """Validate qbo token.
+
+def sync_products_qbo(organization, products, is_sandbox, action="Create") -> list:
+    """Sync products of organization to qbo in one run.
 
     Args:
         organization: Organization object.
+        products: List of Product objects.
+        is_sandbox: A bool.
         action: An string.
-        model: An string.
-        object_id: An integer.
-        is_sandbox: An boolean.
     Returns:
-        return status saving process, data return.
-    Raises:
-        ParseError: Missing realm id
-        ParseError: Invalid token (both access token and refresh token expired)
+        return id, sku, qbo id and message of each product.
     """
-    realm_id = organization.realm_id
-
-    if realm_id is None:
-        status = QBOUnhandledData.Status.UNHANDLED
-        create_qbo_unhandled(action, model, object_id, organization, status, is_sandbox)
-        raise ParseError("Missing realm id")
-
-    get_token_result, token_data = check_token_exp(organization, is_sandbox)
-    if get_token_result is False:
-        status = QBOUnhandledData.Status.EXPIRED
-        create_qbo_unhandled(action, model, object_id, organization, status, is_sandbox)
-
-        organization.qbo_access_token = None
-        organization.qbo_refresh_token = None
-        organization.qbo_access_token_exp_time = None
-        organization.qbo_refresh_token_exp_time = None
-        organization.save()
-
-        raise ParseError("Invalid token")
-
-    access_token = token_data.get("access_token")
-    return access_token
+    action, _ = validate_action_and_model(action=action, model="Product")
+    products = list(products)
+    results = ProductQBOSync(organization, is_sandbox, action).sync(
+        [product for product in products if product.product_series_id is not None]
+    )
+    list_response = []
+    for product in products:
+        item, error = results.get(product.id, (None, "Product not have product series"))
+        list_response.append(
+            {
+                "id": product.id,
+                "sku": product.sku,
+                "qbo_id": int(item.get("Id")) if item else None,
+                "create_qbo_message": "Success" if error is None else error,
+            }
+        )
+    return list_response
 
 
 def validate_action_and_model(action, model):
@@ -458,84 +348,17 @@ def validate_action_and_model(action, model):
     return action, model
 
 
-@sync_to_async
-def create_list_account(
-    account_name,
-    product_to_qbo,
-    organization,
-    access_token,
-    realm_id,
-    action,
-    model,
-    is_sandbox,
-):
-    """Validate qbo token.
-
-    Args:
-        account_name: A string.
-        product_to_qbo: Product object.
-        organization: Organization object.
-        access_token: A string.
-        realm_id: A string.
-        action: A string.
-        model: A string.
-        is_sandbox: An boolean.
-    Returns:
-        return status saving process, data return.
-    Raises:
-        ParseError: Missing realm id
-        ParseError: Invalid token (both access token and refresh token expired)
-    """
-    account_ref_name = product_to_qbo.qbo_account_ref_name
-    income_account_ref_name = product_to_qbo.qbo_account_ref_name
-    expense_account_ref_name = product_to_qbo.qbo_account_ref_name
-    account_type = "Other Current Asset"
-    account_sub_type = "Inventory"
-    if account_name == income_account_ref_name:
-        account_type = "Income"
-        account_sub_type = "SalesOfProductIncome"
-    elif account_name == expense_account_ref_name:
-        account_type = "Cost of Goods Sold"
-        account_sub_type = "SuppliesMaterialsCogs"
-
-    create_account_body = {
-        "Name": account_name,
-        "AccountType": account_type,
-        "AccountSubType": account_sub_type,
-    }
-    creating_account_result, account_ref_qbo = save_account_ref_qbo(
-        organization=organization,
-        access_token=access_token,
-        realm_id=realm_id,
-        data=create_account_body,
-        action=action,
-        model=model,
-        object_id=product_to_qbo.id,
-        is_sandbox=is_sandbox,
-    )
-    if isinstance(account_ref_qbo, dict) and account_ref_qbo.get("Account"):
-        if account_name == income_account_ref_name:
-            product_to_qbo.income_account_ref_id = account_ref_qbo.get("Account").get(
-                "Id"
-            )
-        elif account_name == expense_account_ref_name:
-            product_to_qbo.expense_account_ref_id = account_ref_qbo.get("Account").get(
-                "Id"
-            )
-        elif account_name == account_ref_name:
-            product_to_qbo.qbo_account_ref_id = account_ref_qbo.get("Account").get("Id")
-        product_to_qbo.save()
-
-        return {
-            "account_name": account_name,
-            "account_type": account_type,
-            "account_id": account_ref_qbo.get("Account").get("Id"),
-        }
-    return None
+def sync_product_qbo(action, model, product_to_qbo, is_sandbox, organization):
+    action, model = validate_action_and_model(action=action, model=model)
+    item, error = ProductQBOSync(organization, is_sandbox, action).sync(
+        [product_to_qbo]
+    )[product_to_qbo.id]
+    if error is not None:
+        raise ParseError(error)
+    return item
 
 
-@async_to_sync
-async def create_quickbook_product_service(
+def create_quickbook_product_service(
     action, model, product_to_qbo, is_sandbox, organization
 ):
     """Create qbo product(item).
@@ -551,224 +374,17 @@ async def create_quickbook_product_service(
     Raises:
         ParseError: Message create qbo fail.
     """
-    action, model = validate_action_and_model(action=action, model=model)
-    access_token = await sync_to_async(validate_token)(
-        organization, action, model, product_to_qbo.id, is_sandbox
-    )
-    realm_id = organization.realm_id
-    check_qbo, query_message = await sync_to_async(query_product_qbo)(
-        action=action,
-        model=model,
-        object_id=product_to_qbo.id,
-        organization=organization,
-        product_to_qbo=product_to_qbo,
-        access_token=access_token,
-        realm_id=realm_id,
-        is_sandbox=is_sandbox,
-    )
-    await sync_to_async(product_to_qbo.refresh_from_db)()
-    if check_qbo is True:
-        qbo_id = product_to_qbo.qbo_product_id
-        sync_token = product_to_qbo.sync_token
-        inv_start_date = product_to_qbo.inv_start_date
-        convert_date = (
-            inv_start_date.strftime("%Y-%m-%d")
-            if inv_start_date
-            else datetime.now().strftime("%Y-%m-%d")
-        )
-        result = {
-            "id": product_to_qbo.id,
-            "name": product_to_qbo.sku,
-            "qbo_id": qbo_id,
-            "sync_token": sync_token,
-            "inv_start_date": convert_date,
-        }
-        return result
-    inv_start_date = product_to_qbo.inv_start_date
-    convert_date = (
-        inv_start_date.strftime("%Y-%m-%d")
-        if inv_start_date
-        else datetime.now().strftime("%Y-%m-%d")
-    )
-    account_ref_name = product_to_qbo.qbo_account_ref_name
-    account_ref_id = None
-    income_account_ref_name = product_to_qbo.qbo_account_ref_name
-    income_account_ref_id = None
-    expense_account_ref_name = product_to_qbo.qbo_account_ref_name
-    expense_account_ref_id = None
-    list_account_name = [
-        account_ref_name,
-        income_account_ref_name,
-        expense_account_ref_name,
-    ]
-    # check account ref is exist or not in qbo
-    check_account, found_account_list = await sync_to_async(query_account_ref_qbo)(
-        action=action,
-        model=model,
-        object_id=product_to_qbo.id,
-        organization=organization,
-        product_to_qbo=product_to_qbo,
-        access_token=access_token,
-        realm_id=realm_id,
-        is_sandbox=is_sandbox,
-    )
-    # if check status false, both 3 type account seem to be not exist, create all
-    if check_account is False:
-        # for account_name in list_account_name:
-        list_account_info = await asyncio.gather(
-            *[
-                create_list_account(
-                    account_name=account_name,
-                    product_to_qbo=product_to_qbo,
-                    organization=organization,
-                    access_token=access_token,
-                    realm_id=realm_id,
-                    action=action,
-                    model=model,
-                    is_sandbox=is_sandbox,
-                )
-                for account_name in list_account_name
-            ]
-        )
-        for account_info in list_account_info:
-            if isinstance(account_info, dict):
-                if account_info.get("account_type").upper() == "Income".upper():
-                    income_account_ref_id = account_info.get("account_id")
-                    product_to_qbo.income_account_ref_name = account_info.get(
-                        "account_name"
-                    )
-                elif (
-                    account_info.get("account_type").upper()
-                    == "Cost of goods sold".upper()
-                ):
-                    expense_account_ref_id = account_info.get("account_id")
-                    product_to_qbo.expense_account_ref_name = account_info.get(
-                        "account_name"
-                    )
-                elif (
-                    account_info.get("account_type").upper()
-                    == "Other Current Asset".upper()
-                ):
-                    account_ref_id = account_info.get("account_id")
-                    product_to_qbo.qbo_account_ref_name = account_info.get(
-                        "account_name"
-                    )
-
-    else:
-        # if check status is true, we check list account is missing, and create
-        if isinstance(found_account_list, list) and len(found_account_list) != len(
-            list_account_name
-        ):
-            handle_account_list = []
-            for account_name in list_account_name:
-                if account_name.upper() not in found_account_list:
-                    key = str(uuid.uuid4())
-                    handle_account_list.append(f"{account_name} {key}")
-            list_account_info = await asyncio.gather(
-                *[
-                    create_list_account(
-                        account_name=account_name,
-                        product_to_qbo=product_to_qbo,
-                        organization=organization,
-                        access_token=access_token,
-                        realm_id=realm_id,
-                        action=action,
-                        model=model,
-                        is_sandbox=is_sandbox,
-                    )
-                    for account_name in handle_account_list
-                ]
-            )
-            for account_info in list_account_info:
-                if isinstance(account_info, dict):
-                    if account_info.get("account_type").upper() == "Income".upper():
-                        income_account_ref_id = account_info.get("account_id")
-                        product_to_qbo.income_account_ref_name = account_info.get(
-                            "account_name"
-                        )
-                    elif (
-                        account_info.get("account_type").upper()
-                        == "Cost of goods sold".upper()
-                    ):
-                        expense_account_ref_id = account_info.get("account_id")
-                        product_to_qbo.expense_account_ref_name = account_info.get(
-                            "account_name"
-                        )
-                    elif (
-                        account_info.get("account_type").upper()
-                        == "Other Current Asset".upper()
-                    ):
-                        account_ref_id = account_info.get("account_id")
-                        product_to_qbo.qbo_account_ref_name = account_info.get(
-                            "account_name"
-                        )
-    # update db with account ids we found
-    if account_ref_id is not None:
-        product_to_qbo.qbo_account_ref_id = account_ref_id
-    if income_account_ref_id is not None:
-        product_to_qbo.income_account_ref_id = income_account_ref_id
-    if expense_account_ref_id is not None:
-        product_to_qbo.expense_account_ref_id = expense_account_ref_id
-    await sync_to_async(product_to_qbo.save)()
-    request_body = {
-        "TrackQtyOnHand": True,
-        "Name": product_to_qbo.sku,
-        "QtyOnHand": product_to_qbo.qty_on_hand,
-        "IncomeAccountRef": {
-            "name": product_to_qbo.income_account_ref_name,
-            "value": str(product_to_qbo.income_account_ref_id),
-        },
-        "AssetAccountRef": {
-            "name": product_to_qbo.qbo_account_ref_name,
-            "value": str(product_to_qbo.qbo_account_ref_id),
-        },
-        "InvStartDate": convert_date,
-        "Type": "Inventory",
-        "ExpenseAccountRef": {
-            "name": product_to_qbo.expense_account_ref_name,
-            "value": str(product_to_qbo.expense_account_ref_id),
-        },
-    }
-    creating_result, product_qbo = await sync_to_async(save_product_qbo)(
-        organization=organization,
-        access_token=access_token,
-        realm_id=realm_id,
-        data=request_body,
-        action=action,
-        model=model,
-        object_id=product_to_qbo.id,
-        is_sandbox=is_sandbox,
-    )
-    qbo_id = None
-    qbo_synctoken = None
-    qbo_inv_start_date = None
-
-    return_response = {
+    sync_product_qbo(action, model, product_to_qbo, is_sandbox, organization)
+    return {
         "id": product_to_qbo.id,
         "name": product_to_qbo.sku,
+        "qbo_id": product_to_qbo.qbo_product_id,
+        "sync_token": product_to_qbo.sync_token,
+        "inv_start_date": get_inv_start_date(product_to_qbo),
     }
 
-    if product_qbo.get("Item"):
-        qbo_id = product_qbo.get("Item").get("Id")
-        qbo_synctoken = product_qbo.get("Item").get("SyncToken")
-        qbo_inv_start_date = product_qbo.get("Item").get("InvStartDate")
-    if qbo_id is not None:
-        return_response["qbo_id"] = int(qbo_id)
-        product_to_qbo.qbo_product_id = int(qbo_id)
-    if qbo_synctoken is not None:
-        return_response["sync_token"] = int(qbo_synctoken)
-        product_to_qbo.sync_token = int(qbo_synctoken)
-    if qbo_inv_start_date is not None:
-        element = datetime.strptime(qbo_inv_start_date, "%Y-%m-%d")
-        return_response["inv_start_date"] = element
-        product_to_qbo.inv_start_date = element
-    await sync_to_async(product_to_qbo.save)()
 
-    return return_response
-
-
-@async_to_sync
-async def update_quickbook_product_service(
+def update_quickbook_product_service(
     action, model, product_to_qbo, is_sandbox, organization
 ):
     """Update qbo product(item).
@@ -780,278 +396,12 @@ async def update_quickbook_product_service(
         is_sandbox: A bool.
         organization: Organization object.
     Returns:
-        return product id, name and qbo info.
+        return qbo item.
     Raises:
         ParseError: Message update qbo fail.
     """
-    action, model = validate_action_and_model(action=action, model=model)
-    access_token = await sync_to_async(validate_token)(
-        organization, action, model, product_to_qbo.id, is_sandbox
-    )
-    realm_id = organization.realm_id
-
-    account_ref_name = product_to_qbo.qbo_account_ref_name
-    account_ref_id = None
-    income_account_ref_name = product_to_qbo.qbo_account_ref_name
-    income_account_ref_id = None
-    expense_account_ref_name = product_to_qbo.qbo_account_ref_name
-    expense_account_ref_id = None
-    list_account_name = [
-        account_ref_name,
-        income_account_ref_name,
-        expense_account_ref_name,
-    ]
-    check_qbo, query_message = await sync_to_async(query_product_qbo)(
-        action=action,
-        model=model,
-        object_id=product_to_qbo.id,
-        organization=organization,
-        product_to_qbo=product_to_qbo,
-        access_token=access_token,
-        realm_id=realm_id,
-        is_sandbox=is_sandbox,
-    )
-    if check_qbo is False:
-        if query_message is None:
-
-            # check account ref is exist or not in qbo
-            check_account, found_account_list = await sync_to_async(
-                query_account_ref_qbo
-            )(
-                action=action,
-                model=model,
-                object_id=product_to_qbo.id,
-                organization=organization,
-                product_to_qbo=product_to_qbo,
-                access_token=access_token,
-                realm_id=realm_id,
-                is_sandbox=is_sandbox,
-            )
-            # if check status false, both 3 type account seem to be not exist, create all
-            if check_account is False:
-                list_account_info = await asyncio.gather(
-                    *[
-                        create_list_account(
-                            account_name=account_name,
-                            product_to_qbo=product_to_qbo,
-                            organization=organization,
-                            access_token=access_token,
-                            realm_id=realm_id,
-                            action=action,
-                            model=model,
-                            is_sandbox=is_sandbox,
-                        )
-                        for account_name in list_account_name
-                    ]
-                )
-                for account_info in list_account_info:
-                    if isinstance(account_info, dict):
-                        if account_info.get("account_type").upper() == "Income".upper():
-                            income_account_ref_id = account_info.get("account_id")
-                            product_to_qbo.income_account_ref_name = account_info.get(
-                                "account_name"
-                            )
-                        elif (
-                            account_info.get("account_type").upper()
-                            == "Cost of goods sold".upper()
-                        ):
-                            expense_account_ref_id = account_info.get("account_id")
-                            product_to_qbo.expense_account_ref_name = account_info.get(
-                                "account_name"
-                            )
-                        elif (
-                            account_info.get("account_type").upper()
-                            == "Other Current Asset".upper()
-                        ):
-                            account_ref_id = account_info.get("account_id")
-                            product_to_qbo.qbo_account_ref_name = account_info.get(
-                                "account_name"
-                            )
-            else:
-                # if check status is true, we check list account is missing, and create
-                if isinstance(found_account_list, list) and len(
-                    found_account_list
-                ) != len(list_account_name):
-                    handle_account_list = []
-                    for account_name in list_account_name:
-                        if account_name.upper() not in found_account_list:
-                            key = str(uuid.uuid4())
-                            handle_account_list.append(f"{account_name} {key}")
-                    list_account_info = await asyncio.gather(
-                        *[
-                            create_list_account(
-                                account_name=account_name,
-                                product_to_qbo=product_to_qbo,
-                                organization=organization,
-                                access_token=access_token,
-                                realm_id=realm_id,
-                                action=action,
-                                model=model,
-                                is_sandbox=is_sandbox,
-                            )
-                            for account_name in handle_account_list
-                        ]
-                    )
-                    for account_info in list_account_info:
-                        if isinstance(account_info, dict):
-                            if (
-                                account_info.get("account_type").upper()
-                                == "Income".upper()
-                            ):
-                                income_account_ref_id = account_info.get("account_id")
-                                product_to_qbo.income_account_ref_name = (
-                                    account_info.get("account_name")
-                                )
-                            elif (
-                                account_info.get("account_type").upper()
-                                == "Cost of goods sold".upper()
-                            ):
-                                expense_account_ref_id = account_info.get("account_id")
-                                product_to_qbo.expense_account_ref_name = (
-                                    account_info.get("account_name")
-                                )
-                            elif (
-                                account_info.get("account_type").upper()
-                                == "Other Current Asset".upper()
-                            ):
-                                account_ref_id = account_info.get("account_id")
-                                product_to_qbo.qbo_account_ref_name = account_info.get(
-                                    "account_name"
-                                )
-
-                    # update db with account ids we found
-                    if account_ref_id is not None:
-                        product_to_qbo.qbo_account_ref_id = account_ref_id
-                    if income_account_ref_id is not None:
-                        product_to_qbo.income_account_ref_id = income_account_ref_id
-                    if expense_account_ref_id is not None:
-                        product_to_qbo.expense_account_ref_id = expense_account_ref_id
-                    await sync_to_async(product_to_qbo.save)()
-            await sync_to_async(product_to_qbo.refresh_from_db)()
-            # create new obj qbo when not exist
-            inv_start_date = product_to_qbo.inv_start_date
-            convert_date = (
-                inv_start_date.strftime("%Y-%m-%d")
-                if inv_start_date
-                else datetime.now().strftime("%Y-%m-%d")
-            )
-            request_body = {
-                "TrackQtyOnHand": True,
-                "Name": product_to_qbo.sku,
-                "QtyOnHand": product_to_qbo.qty_on_hand,
-                "IncomeAccountRef": {
-                    "name": product_to_qbo.income_account_ref_name,
-                    "value": str(product_to_qbo.income_account_ref_id),
-                },
-                "AssetAccountRef": {
-                    "name": product_to_qbo.qbo_account_ref_name,
-                    "value": str(product_to_qbo.qbo_account_ref_id),
-                },
-                "InvStartDate": convert_date,
-                "Type": "Inventory",
-                "ExpenseAccountRef": {
-                    "name": product_to_qbo.expense_account_ref_name,
-                    "value": str(product_to_qbo.expense_account_ref_id),
-                },
-            }
-            creating_result, product_qbo = await sync_to_async(save_product_qbo)(
-                organization=organization,
-                access_token=access_token,
-                realm_id=realm_id,
-                data=request_body,
-                action=action,
-                model=model,
-                object_id=product_to_qbo.id,
-                is_sandbox=is_sandbox,
-            )
-            qbo_id = None
-            qbo_synctoken = None
-            qbo_inv_start_date = None
-            if product_qbo.get("Item"):
-                qbo_id = product_qbo.get("Item").get("Id")
-                qbo_synctoken = product_qbo.get("Item").get("SyncToken")
-                qbo_inv_start_date = product_qbo.get("Item").get("InvStartDate")
-            if qbo_id is not None:
-                product_to_qbo.qbo_product_id = int(qbo_id)
-            if qbo_synctoken is not None:
-                product_to_qbo.sync_token = int(qbo_synctoken)
-            if qbo_inv_start_date is not None:
-                element = datetime.strptime(qbo_inv_start_date, "%Y-%m-%d")
-                product_to_qbo.inv_start_date = element
-            await sync_to_async(product_to_qbo.save)()
-            return product_qbo
-        # If toke expired when query
-        elif query_message == "Error query product: Expired":
-            status = QBOUnhandledData.Status.EXPIRED
-            await sync_to_async(create_qbo_unhandled)(
-                action, model, product_to_qbo.id, organization, status, is_sandbox
-            )
-            raise ParseError(query_message)
-        # If cant not query
-        else:
-            status = QBOUnhandledData.Status.FAIL
-            await sync_to_async(create_qbo_unhandled)(
-                action, model, product_to_qbo.id, organization, status, is_sandbox
-            )
-            raise ParseError(query_message)
-    await sync_to_async(product_to_qbo.refresh_from_db)()
-    qbo_product_id = product_to_qbo.qbo_product_id
-    sync_token = product_to_qbo.sync_token
-    inv_start_date = product_to_qbo.inv_start_date
-    if qbo_product_id is None:
-        status = QBOUnhandledData.Status.FAIL
-        await sync_to_async(create_qbo_unhandled)(
-            action, model, product_to_qbo.id, organization, status, is_sandbox
-        )
-        raise ParseError(query_message)
-    convert_date = (
-        inv_start_date.strftime("%Y-%m-%d")
-        if inv_start_date
-        else datetime.now().strftime("%Y-%m-%d")
-    )
-    request_body = {
-        "TrackQtyOnHand": True,
-        "Id": str(qbo_product_id),
-        "Name": product_to_qbo.sku,
-        "QtyOnHand": product_to_qbo.qty_on_hand,
-        "IncomeAccountRef": {
-            "name": product_to_qbo.income_account_ref_name,
-            "value": str(product_to_qbo.income_account_ref_id),
-        },
-        "AssetAccountRef": {
-            "name": product_to_qbo.qbo_account_ref_name,
-            "value": str(product_to_qbo.qbo_account_ref_id),
-        },
-        "InvStartDate": convert_date,
-        "Type": "Inventory",
-        "ExpenseAccountRef": {
-            "name": product_to_qbo.expense_account_ref_name,
-            "value": str(product_to_qbo.expense_account_ref_id),
-        },
-        "SyncToken": str(sync_token) if sync_token else 0,
-    }
-    update_result, product_qbo = await sync_to_async(save_product_qbo)(
-        organization=organization,
-        access_token=access_token,
-        realm_id=realm_id,
-        data=request_body,
-        action=action,
-        model=model,
-        object_id=product_to_qbo.id,
-        is_sandbox=is_sandbox,
-    )
-    sync_token = None
-    qbo_inv_start_date = None
-    if product_qbo.get("Item"):
-        sync_token = product_qbo.get("Item").get("SyncToken")
-        qbo_inv_start_date = product_qbo.get("Item").get("InvStartDate")
-    if sync_token is not None:
-        product_to_qbo.sync_token = int(sync_token)
-    if qbo_inv_start_date is not None:
-        element = datetime.strptime(qbo_inv_start_date, "%Y-%m-%d")
-        product_to_qbo.inv_start_date = element
-    await sync_to_async(product_to_qbo.save)()
-    return product_qbo
+    item = sync_product_qbo(action, model, product_to_qbo, is_sandbox, organization)
+    return {"Item": item}
 
 
 def is_s3_url(url):
@@ -1,6 +1,3 @@
-import asyncio
-
-from asgiref.sync import async_to_sync, sync_to_async
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
@@ -19,6 +16,7 @@ from rest_framework.views import APIView
 from selleraxis.core.custom_permission import CustomPermission
 from selleraxis.core.pagination import Pagination
 from selleraxis.core.permissions import check_permission
+from selleraxis.core.views import StreamingListMixin
 from selleraxis.organizations.models import Organization
 from selleraxis.permissions.models import Permissions
 from selleraxis.products.exceptions import ProductIsEmptyArray
@@ -35,12 +33,13 @@ from selleraxis.products.services import (
     is_base64,
     is_s3_url,
     is_valid_url,
+    sync_products_qbo,
     update_quickbook_product_service,
     url_put_image_s3,
 )
 
 
-class ListCreateProductView(ListCreateAPIView):
+class ListCreateProductView(StreamingListMixin, ListCreateAPIView):
     model: Product
     serializer_class = ProductSerializer
     queryset = Product.objects.all()
@@ -313,38 +312,14 @@ class BulkManualCreateProductQBOView(APIView):
                 }
                 list_response.append(response_item)
 
-        res = self.bulk_create_product_qbo_process(list_product, organization)
-        list_response += res
+        list_response += self.bulk_create_product_qbo_process(
+            list_product, organization
+        )
         return Response(data=list_response, status=status.HTTP_200_OK)
 
-    @async_to_sync
-    async def bulk_create_product_qbo_process(self, list_products, organization):
-        response = await asyncio.gather(
-            *[self.create_QBO(product, organization) for product in list_products]
+    def bulk_create_product_qbo_process(self, list_products, organization):
+        return sync_products_qbo(
+            organization=organization,
+            products=list_products,
+            is_sandbox=organization.is_sandbox,
         )
-        return response
-
-    @sync_to_async
-    def create_QBO(self, product_to_qbo, organization):
-        response_item = {
-            "id": product_to_qbo.id,
-            "sku": product_to_qbo.sku,
-            "qbo_id": None,
-            "create_qbo_message": "Success",
-        }
-        if product_to_qbo.product_series is None:
-            response_item["create_qbo_message"] = "Product not have product series"
-        else:
-            try:
-                organization = product_to_qbo.product_series.organization
-                response = create_quickbook_product_service(
-                    action="Create",
-                    model="Product",
-                    product_to_qbo=product_to_qbo,
-                    is_sandbox=organization.is_sandbox,
-                    organization=organization,
-                )
-                response_item["qbo_id"] = response.get("qbo_id")
-            except Exception as e:
-                response_item["create_qbo_message"] = e.detail
-        return response_item
@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from selleraxis.retailer_commercehub_sftp.models import RetailerCommercehubSFTP
+from selleraxis.retailer_commercehub_sftp.models import (
+    RetailerCommercehubSFTP,
+    RetailerOrderFileCursor,
+)
 
 
 @admin.register(RetailerCommercehubSFTP)
@@ -21,3 +24,15 @@ class ProductAliasAdmin(admin.ModelAdmin):
         "created_at",
         "updated_at",
     )
+
+
+@admin.register(RetailerOrderFileCursor)
+class RetailerOrderFileCursorAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "retailer",
+        "file_name",
+        "file_size",
+        "file_mtime",
+        "updated_at",
+    )
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.14 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("retailers", "0019_retailer_remove_live_qbo_info"),
+        ("retailer_commercehub_sftp", "0011_update_xsd__for_inventory_2"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RetailerOrderFileCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file_name", models.CharField(max_length=255)),
+                ("file_size", models.BigIntegerField(null=True)),
+                ("file_mtime", models.BigIntegerField(null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "retailer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="order_file_cursors",
+                        to="retailers.retailer",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("retailer", "file_name")},
+            },
+        ),
+    ]
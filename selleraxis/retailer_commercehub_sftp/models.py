@@ -28,3 +28,19 @@ class RetailerCommercehubSFTP(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class RetailerOrderFileCursor(models.Model):
+    """Last seen state of an order file already imported from the retailer's SFTP"""
+
+    retailer = models.ForeignKey(
+        Retailer, on_delete=models.CASCADE, related_name="order_file_cursors"
+    )
+    file_name = models.CharField(max_length=255)
+    file_size = models.BigIntegerField(null=True)
+    file_mtime = models.BigIntegerField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("retailer", "file_name")
@@ -1,10 +1,9 @@
-from django.core.cache import cache
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from selleraxis.core.cache import invalidate_tags, retailer_tag
 from selleraxis.core.clients.sftp_client import ClientError, CommerceHubSFTPClient
 from selleraxis.retailer_commercehub_sftp.models import RetailerCommercehubSFTP
-from selleraxis.retailer_purchase_orders.serializers import CHECK_ORDER_CACHE_KEY_PREFIX
 from selleraxis.retailers.models import Retailer
 
 DEFAULT_INVENTORY_XSD_FILE_URL = "./selleraxis/retailers/services/HubXML_Inventory.xsd"
@@ -36,10 +35,7 @@ class RetailerCommercehubSFTPSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance: RetailerCommercehubSFTP):
         # clean cache
-        cache_key = CHECK_ORDER_CACHE_KEY_PREFIX.format(
-            instance.retailer.organization_id
-        )
-        cache.delete(cache_key)
+        invalidate_tags(retailer_tag(instance.retailer_id))
         return super().to_representation(instance)
 
     def safe_load_xml_file(self, file_path):
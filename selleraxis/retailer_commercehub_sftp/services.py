@@ -1,4 +1,3 @@
-import asyncio
 import socket
 
 import paramiko
@@ -6,14 +5,10 @@ from asgiref.sync import sync_to_async
 from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import exceptions
 
-from selleraxis.core.clients.sftp_client import (
-    ClientError,
-    CommerceHubSFTPClient,
-    FolderNotFoundError,
-)
+from selleraxis.core.clients.sftp_client import ClientError, FolderNotFoundError
 from selleraxis.retailer_order_batchs.models import RetailerOrderBatch
 from selleraxis.retailers.models import Retailer
-from selleraxis.retailers.services.import_data import read_purchase_order_xml_data
+from selleraxis.retailers.services.import_data import PurchaseOrderImportEngine
 
 
 def check_sftp(data):
@@ -49,52 +44,31 @@ def check_sftp(data):
         raise exceptions.ParseError("Invalid SFTP information")
 
 
-async def from_retailer_import_order(retailer: Retailer, history) -> dict:
+async def from_retailer_import_order(
+    retailer: Retailer, history, backfill: bool = False
+) -> dict:
     await sync_to_async(
         RetailerOrderBatch.objects.filter(retailer_id=retailer.pk).update
     )(getting_order_history=history.id)
-    read_xml_cursors = []
     status_code = 201
     detail = "SUCCESSFULLY"
     try:
-        sftp_config = retailer.retailer_commercehub_sftp.__dict__
-        sftp_client = CommerceHubSFTPClient(**sftp_config)
-        sftp_client.connect()
-
         order_batches = await sync_to_async(
             lambda: list(RetailerOrderBatch.objects.filter(retailer_id=retailer.pk))
         )()
-        batch_numbers = [order_batch.batch_number for order_batch in order_batches]
-        if not sftp_client.purchase_orders_sftp_directory:
-            sftp_client.purchase_orders_sftp_directory = (
-                f"/outgoing/orders/{retailer.merchant_id}/"
-            )
-        path = (
-            sftp_client.purchase_orders_sftp_directory
-            if sftp_client.purchase_orders_sftp_directory[-1] == "/"
-            else sftp_client.purchase_orders_sftp_directory + "/"
+
+        # the engine runs its own bounded worker pool, keep it off the shared thread
+        import_engine = await sync_to_async(PurchaseOrderImportEngine)(
+            retailer=retailer, history=history, backfill=backfill
         )
+        file_names = await sync_to_async(import_engine.run, thread_sensitive=False)()
 
         new_order_files = {}
-        for file_xml in sftp_client.listdir_purchase_orders():
-            read_xml_cursors.append(
-                read_purchase_order_xml_data(
-                    sftp_client.client,
-                    path,
-                    file_xml,
-                    batch_numbers,
-                    retailer,
-                    history,
-                )
-            )
-
+        for file_xml in file_names:
             if "neworders" in file_xml:
                 batch_number, *_ = file_xml.split(".")
                 new_order_files[batch_number] = file_xml
 
-        await asyncio.gather(*read_xml_cursors)
-        sftp_client.close()
-
         # update file name to Retailer Order Batch
         if new_order_files:
             for order_batch in order_batches:
@@ -112,7 +86,6 @@ async def from_retailer_import_order(retailer: Retailer, history) -> dict:
     except FolderNotFoundError:
         status_code = 404
         detail = "SFTP_FOLDER_NOT_FOUND"
-        sftp_client.close()
 
     except RetailerOrderBatch.DoesNotExist:
         status_code = 404
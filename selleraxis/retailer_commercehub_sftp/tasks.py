@@ -16,7 +16,7 @@ sqs_client = settings.SQS_CLIENT_TASK
     wait_time_seconds=20,
     visibility_timeout=300,
 )
-def retailer_getting_order(retailers, history):
+def retailer_getting_order(retailers, history, backfill=False):
     retailers = json.loads(retailers)
     history = GettingOrderHistory.objects.get(pk=history)
     for retailer_id in retailers:
@@ -28,6 +28,7 @@ def retailer_getting_order(retailers, history):
                 async_to_sync(from_retailer_import_order)(
                     retailer=retailer,
                     history=history,
+                    backfill=backfill,
                 )
             except Exception:
                 pass
@@ -1,13 +1,15 @@
 import json
 
 from django.contrib.postgres.aggregates import ArrayAgg
-from django.core.cache import cache
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from selleraxis.core.cache import invalidate_tags, organization_tag
 from selleraxis.core.custom_permission import CustomPermission
 from selleraxis.core.pagination import Pagination
 from selleraxis.core.permissions import check_permission
@@ -22,9 +24,6 @@ from selleraxis.retailer_commercehub_sftp.serializers import (
 
 from .tasks import retailer_getting_order
 
-CHECK_ORDER_CACHE_KEY_PREFIX = "order_check_{}"
-NEXT_EXCUTION_TIME_CACHE = "next_excution_{}"
-
 
 class ListCreateRetailerCommercehubSFTPView(ListCreateAPIView):
     model: RetailerCommercehubSFTP
@@ -81,7 +80,18 @@ class UpdateDeleteRetailerCommercehubSFTPView(RetrieveUpdateDestroyAPIView):
 class RetailerCommercehubSFTPGetOrderView(APIView):
     permission_classes = [CustomPermission]
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "backfill",
+                openapi.IN_QUERY,
+                description="Re-read every order file, even the ones already imported",
+                type=openapi.TYPE_BOOLEAN,
+            ),
+        ]
+    )
     def get(self, request, *args, **kwargs):
+        backfill = str(request.query_params.get("backfill", "")).lower() == "true"
         organizations = Organization.objects.values("id", "name").annotate(
             retailers=ArrayAgg("retailer_organization")
         )
@@ -90,16 +100,9 @@ class RetailerCommercehubSFTPGetOrderView(APIView):
                 organization_id=organization["id"]
             )
             retailer_getting_order.trigger(
-                json.dumps(organization["retailers"]), history.id
-            )
-            cache_key_check_order = CHECK_ORDER_CACHE_KEY_PREFIX.format(
-                organization["id"]
+                json.dumps(organization["retailers"]), history.id, backfill
             )
-            cache_key_next_excution = NEXT_EXCUTION_TIME_CACHE.format(
-                organization["id"]
-            )
-
-            cache.delete(cache_key_check_order)
-            cache.delete(cache_key_next_excution)
+            # order checks and next execution time of every container
+            invalidate_tags(organization_tag(organization["id"]))
 
         return Response({"detail": "Requested retailer getting order!"})
@@ -1,9 +1,14 @@
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from selleraxis.product_alias.models import ProductAlias
-from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
+from selleraxis.products.inventory_services import record_inventory_movements
+from selleraxis.products.models import ProductInventoryMovement
+from selleraxis.retailer_purchase_orders.models import (
+    RetailerPurchaseOrder,
+    invalidate_order_details,
+)
 
 
 class RetailerPurchaseOrderItem(models.Model):
@@ -35,48 +40,91 @@ class PendingInventorySubtraction(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+def subtract_inventory_for_order_items(items, retailer_id):
+    """Bulk equivalent of create_purchase_order_item for items saved with bulk_create"""
+    product_aliases = {
+        product_alias.merchant_sku: product_alias
+        for product_alias in ProductAlias.objects.filter(
+            merchant_sku__in={item.merchant_sku for item in items},
+            retailer_id=retailer_id,
+        ).order_by("id")
+    }
+    movements = []
+    pending_inventory_subtraction = []
+    for item in items:
+        product_alias = product_aliases.get(item.merchant_sku)
+        if product_alias:
+            movements.append(
+                get_order_item_movement(
+                    item, product_alias.product_id, product_alias.sku_quantity
+                )
+            )
+        else:
+            pending_inventory_subtraction.append(
+                PendingInventorySubtraction(order_item=item)
+            )
+
+    record_inventory_movements(movements)
+    PendingInventorySubtraction.objects.bulk_create(pending_inventory_subtraction)
+
+
+def get_order_item_movement(
+    item: RetailerPurchaseOrderItem, product_id: int, sku_quantity: int
+) -> ProductInventoryMovement:
+    """Ordered units move from on hand to pending"""
+    qty = int(item.qty_ordered) * int(sku_quantity)
+    return ProductInventoryMovement(
+        product_id=product_id,
+        reason=ProductInventoryMovement.Reason.ORDER,
+        qty_on_hand_delta=-qty,
+        qty_pending_delta=qty,
+        order_id=item.order_id,
+    )
+
+
 @receiver(post_save, sender=RetailerPurchaseOrderItem)
 def create_purchase_order_item(sender, instance, **kwargs):
     if kwargs.get("created", False):
-        qty_order = int(instance.qty_ordered)
         product_alias = ProductAlias.objects.filter(
             merchant_sku=instance.merchant_sku,
             retailer_id=instance.order.batch.retailer_id,
         ).last()
-        pending_inventory_subtraction = []
         if product_alias:
-            sku_quantity = int(product_alias.sku_quantity)
-            product = product_alias.product
-            qty_on_hand = product.qty_on_hand
-            qty_pending = product.qty_pending
-            update_qty_on_hand = qty_on_hand - (qty_order * sku_quantity)
-            update_qty_pending = qty_pending + (qty_order * sku_quantity)
-            product.qty_on_hand = update_qty_on_hand
-            product.qty_pending = update_qty_pending
-            product.save(update_fields=["qty_on_hand", "qty_pending"])
-        else:
-            pending_inventory_subtraction.append(
-                PendingInventorySubtraction(order_item=instance)
+            record_inventory_movements(
+                [
+                    get_order_item_movement(
+                        instance, product_alias.product_id, product_alias.sku_quantity
+                    )
+                ]
             )
-        PendingInventorySubtraction.objects.bulk_create(pending_inventory_subtraction)
+        else:
+            PendingInventorySubtraction.objects.create(order_item=instance)
 
 
 @receiver(post_save, sender=ProductAlias)
 def create_product_alias(sender, instance, created, **kwargs):
     if created:
-        sku_quantity = instance.sku_quantity
         po_items = RetailerPurchaseOrderItem.objects.filter(
             merchant_sku=instance.merchant_sku, order__batch__retailer=instance.retailer
         )
-        if len(po_items) > 0:
-            product = instance.product
-            qty_on_hand = product.qty_on_hand
-            qty_pending = product.qty_pending
-            qty = 0
-            for item in po_items:
-                qty += sku_quantity * item.qty_ordered
-            update_qty_on_hand = qty_on_hand - qty
-            update_qty_pending = qty_pending + qty
-            product.qty_on_hand = update_qty_on_hand
-            product.qty_pending = update_qty_pending
-            product.save(update_fields=["qty_on_hand", "qty_pending"])
+        record_inventory_movements(
+            [
+                get_order_item_movement(
+                    item, instance.product_id, instance.sku_quantity
+                )
+                for item in po_items
+            ]
+        )
+
+
+@receiver([post_save, post_delete], sender=RetailerPurchaseOrderItem)
+def invalidate_order_item_detail(sender, instance, **kwargs):
+    invalidate_order_details(order_id=instance.order_id)
+
+
+@receiver([post_save, post_delete], sender=ProductAlias)
+def invalidate_product_alias_order_details(sender, instance, **kwargs):
+    invalidate_order_details(
+        order__batch__retailer_id=instance.retailer_id,
+        order__items__merchant_sku=instance.merchant_sku,
+    )
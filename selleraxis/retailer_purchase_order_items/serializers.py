@@ -10,10 +10,13 @@ class RetailerPurchaseOrderItemSerializer(serializers.ModelSerializer):
     product_alias = serializers.SerializerMethodField()
 
     def get_product_alias(self, instance: RetailerPurchaseOrderItem) -> dict | None:
-        product_alias = ProductAlias.objects.filter(
-            merchant_sku=instance.merchant_sku,
-            retailer_id=instance.order.batch.retailer_id,
-        ).last()
+        if hasattr(instance, "preloaded_product_alias"):
+            product_alias = instance.preloaded_product_alias
+        else:
+            product_alias = ProductAlias.objects.filter(
+                merchant_sku=instance.merchant_sku,
+                retailer_id=instance.order.batch.retailer_id,
+            ).last()
         if product_alias:
             product_alias_serializer = ProductAliasSerializer(product_alias)
             return product_alias_serializer.data
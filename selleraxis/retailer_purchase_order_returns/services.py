@@ -1,8 +1,10 @@
-from django.db.models import Q
 from rest_framework.exceptions import NotFound, ValidationError
 
-from selleraxis.product_alias.models import ProductAlias
-from selleraxis.products.models import Product
+from selleraxis.products.inventory_services import (
+    get_product_aliases,
+    record_inventory_movements,
+)
+from selleraxis.products.models import ProductInventoryMovement
 from selleraxis.retailer_purchase_order_histories.models import (
     RetailerPurchaseOrderHistory,
 )
@@ -40,24 +42,12 @@ def update_product_quantity_when_return(
     Raises:
         NotFound: Raised if the associated product is not found for the given item.
     """
-    product_alias = (
-        ProductAlias.objects.filter(
-            merchant_sku=return_item_instance.item.merchant_sku,
-            retailer_id=return_item_instance.item.order.batch.retailer_id,
+    if (order_return_status == Status.Return_received and delete) or (
+        order_return_status == Status.Return_opened and delete is False
+    ):
+        bulk_update_product_quantity_when_return(
+            [return_item_instance], order_return_status, delete
         )
-        .select_related("product")
-        .last()
-    )
-    try:
-        product = product_alias.product
-    except Exception:
-        raise NotFound("not found product from this item")
-    sku_quantity = product_alias.sku_quantity
-    if order_return_status == Status.Return_received and delete:
-        product.qty_on_hand -= return_item_instance.return_qty * sku_quantity
-    elif order_return_status == Status.Return_opened and delete is False:
-        product.qty_on_hand += return_item_instance.return_qty * sku_quantity
-    product.save()
 
 
 def bulk_update_product_quantity_when_return(
@@ -76,40 +66,38 @@ def bulk_update_product_quantity_when_return(
         ValidationError: Raised if the order is not eligible to perform the specified action.
     """
 
-    conditions = []
-    for return_item_instance in return_item_instances:
-        condition = Q(merchant_sku=return_item_instance.item.merchant_sku) & Q(
-            retailer_id=return_item_instance.item.order.batch.retailer_id
+    if order_return_status == Status.Return_received and delete:
+        sign = -1
+    elif order_return_status == Status.Return_opened and delete is False:
+        sign = 1
+    else:
+        raise ValidationError("the order is not eligible to perform this action")
+
+    product_aliases = get_product_aliases(
+        (
+            return_item_instance.item.order.batch.retailer_id,
+            return_item_instance.item.merchant_sku,
         )
-        conditions.append(condition)
-    combined_condition = conditions.pop()
-    for condition in conditions:
-        combined_condition = combined_condition.__or__(condition)
-    list_product_alias = ProductAlias.objects.filter(combined_condition).select_related(
-        "retailer", "product"
-    )
-    list_return_qty = [
-        return_item_instance.return_qty
         for return_item_instance in return_item_instances
-    ]
-    product_qty_dict = {}
-    product_lst = []
-    for idx, product_alias in enumerate(list_product_alias):
-        try:
-            product = product_alias.product
-        except Exception:
+    )
+    movements = []
+    for return_item_instance in return_item_instances:
+        product_alias = product_aliases.get(
+            (
+                return_item_instance.item.order.batch.retailer_id,
+                return_item_instance.item.merchant_sku,
+            )
+        )
+        if product_alias is None:
             raise NotFound("Product not found for the item")
-        product_lst.append(product)
-        sku_quantity = product_alias.sku_quantity
-        if product.id not in product_qty_dict:
-            product_qty_dict[product.id] = 0
-        if order_return_status == Status.Return_received and delete:
-            product_qty_dict[product.id] -= list_return_qty[idx] * sku_quantity
-        elif order_return_status == Status.Return_opened and delete is False:
-            product_qty_dict[product.id] += list_return_qty[idx] * sku_quantity
-        else:
-            raise ValidationError("the order is not eligible to perform this action")
-
-    for product in product_lst:
-        product.qty_on_hand += product_qty_dict[product.id]
-    Product.objects.bulk_update(product_lst, ["qty_on_hand"])
+        movements.append(
+            ProductInventoryMovement(
+                product_id=product_alias.product_id,
+                reason=ProductInventoryMovement.Reason.RETURN,
+                qty_on_hand_delta=sign
+                * int(return_item_instance.return_qty)
+                * int(product_alias.sku_quantity),
+                order_id=return_item_instance.item.order_id,
+            )
+        )
+    record_inventory_movements(movements)
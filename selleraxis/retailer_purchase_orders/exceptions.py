@@ -69,6 +69,12 @@ class XMLSFTPUploadException(APIException):
     default_code = "sftp_upload_error"
 
 
+class ShippingLabelUploadException(APIException):
+    status_code = status.HTTP_406_NOT_ACCEPTABLE
+    default_detail = _("Could not upload shipping label to Amazon S3.")
+    default_code = "shipping_label_upload_error"
+
+
 class S3UploadException(APIException):
     status_code = status.HTTP_406_NOT_ACCEPTABLE
     default_detail = _("Could not upload XML file to Amazon S3.")
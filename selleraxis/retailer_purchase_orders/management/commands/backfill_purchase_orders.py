@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
+from selleraxis.retailer_purchase_orders.services.backfill_services import (
+    backfill_orders,
+)
+
+
+class Command(BaseCommand):
+    help = "Set the missing warehouse, ship from and verified ship to of orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization", type=int, help="Organization id")
+
+    def handle(self, *args, **options):
+        queryset = RetailerPurchaseOrder.objects.all()
+        if options["organization"]:
+            queryset = queryset.filter(
+                batch__retailer__organization_id=options["organization"]
+            )
+        count = backfill_orders(queryset)
+        self.stdout.write(f"Backfilled {count} order(s)")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from selleraxis.retailer_purchase_orders.models import (
+    RetailerPurchaseOrder,
+    RetailerPurchaseOrderDetail,
+    schedule_order_detail_build,
+)
+
+
+class Command(BaseCommand):
+    help = "Queue the detail build of the orders whose detail was never built"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization", type=int, help="Organization id")
+
+    def handle(self, *args, **options):
+        queryset = RetailerPurchaseOrder.objects.filter(
+            ~Exists(
+                RetailerPurchaseOrderDetail.objects.filter(
+                    order_id=OuterRef("pk"), built_version__isnull=False
+                )
+            )
+        )
+        if options["organization"]:
+            queryset = queryset.filter(
+                batch__retailer__organization_id=options["organization"]
+            )
+        order_ids = list(queryset.order_by("id").values_list("id", flat=True))
+        schedule_order_detail_build(order_ids)
+        self.stdout.write(f"Queued the detail build of {len(order_ids)} order(s)")
@@ -0,0 +1,128 @@
+import json
+from typing import Iterator
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from selleraxis.product_alias.models import ProductAlias
+from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
+from selleraxis.retailer_purchase_orders.models import (
+    QueueStatus,
+    RetailerPurchaseOrder,
+)
+from selleraxis.retailer_queue_histories.models import RetailerQueueHistory
+
+
+def get_query_checks(organization_id: int, retailer_id: int) -> list:
+    """Hot queries with the model whose table they must read through an index"""
+    orders = RetailerPurchaseOrder.objects.filter(
+        batch__retailer__organization_id=organization_id
+    )
+    return [
+        (
+            "order list by status",
+            orders.filter(status=QueueStatus.Opened).order_by("-order_date")[:25],
+            RetailerPurchaseOrder,
+        ),
+        (
+            "order list by po number",
+            orders.filter(po_number="0").order_by("-order_date")[:25],
+            RetailerPurchaseOrder,
+        ),
+        (
+            "orders to ship",
+            orders.filter(
+                status__in=[
+                    QueueStatus.Opened,
+                    QueueStatus.Acknowledged,
+                    QueueStatus.Partly_Shipped,
+                    QueueStatus.Partly_Shipped_Confirmed,
+                ]
+            ).order_by("-order_date")[:25],
+            RetailerPurchaseOrder,
+        ),
+        ("order detail", orders.filter(pk=0), RetailerPurchaseOrder),
+        (
+            "order items",
+            RetailerPurchaseOrderItem.objects.filter(order_id=0),
+            RetailerPurchaseOrderItem,
+        ),
+        (
+            "product alias by merchant sku",
+            ProductAlias.objects.filter(merchant_sku="0", retailer_id=retailer_id),
+            ProductAlias,
+        ),
+        (
+            "product aliases by merchant skus",
+            ProductAlias.objects.filter(
+                merchant_sku__in=["0", "1"], retailer_id=retailer_id
+            ),
+            ProductAlias,
+        ),
+        (
+            "last queue history",
+            RetailerQueueHistory.objects.filter(
+                retailer_id=retailer_id, label=RetailerQueueHistory.Label.INVENTORY
+            ).order_by("-created_at")[:1],
+            RetailerQueueHistory,
+        ),
+    ]
+
+
+def explain(queryset) -> dict:
+    """Plan of the queryset, EXPLAIN (FORMAT JSON) parsed by the driver"""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    # psycopg2 parses json columns, the text of other drivers is parsed here
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def get_plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from get_plan_nodes(child)
+
+
+class Command(BaseCommand):
+    help = (
+        "Explain the hot order, product alias and queue history queries and "
+        "fail when one of them reads its table with a sequential scan"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organization", type=int, default=0)
+        parser.add_argument("--retailer", type=int, default=0)
+
+    def handle(self, *args, **options):
+        regressions = []
+        for name, queryset, model in get_query_checks(
+            options["organization"], options["retailer"]
+        ):
+            with transaction.atomic():
+                # seeded tables are small enough for the planner to prefer a
+                # sequential scan, a sequential scan left means no index fits
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                plan = explain(queryset)
+
+            seq_scans = [
+                node
+                for node in get_plan_nodes(plan)
+                if node["Node Type"] == "Seq Scan"
+                and node.get("Relation Name") == model._meta.db_table
+            ]
+            if seq_scans:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f"{name}: sequential scan"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: index scan"))
+
+        if regressions:
+            raise CommandError(
+                f"Sequential scan in {len(regressions)} query plan(s): "
+                + ", ".join(regressions)
+            )
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.14 on 2024-01-22 08:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retailer_purchase_orders", "0030_update_status_for_order_4"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RetailerPurchaseOrderDetail",
+            fields=[
+                (
+                    "order",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="detail",
+                        serialize=False,
+                        to="retailer_purchase_orders.retailerpurchaseorder",
+                    ),
+                ),
+                ("version", models.IntegerField(default=0)),
+                ("built_version", models.IntegerField(null=True)),
+                ("data", models.JSONField(default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
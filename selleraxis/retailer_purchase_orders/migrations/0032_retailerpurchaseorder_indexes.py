@@ -0,0 +1,49 @@
+# Generated by Django 3.2.14 on 2024-01-24 09:30
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("retailer_purchase_orders", "0031_retailerpurchaseorderdetail"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="retailerpurchaseorder",
+            index=models.Index(
+                fields=["batch", "status"], name="rpo_batch_status_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="retailerpurchaseorder",
+            index=models.Index(
+                fields=["batch", "-order_date"], name="rpo_batch_order_date_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="retailerpurchaseorder",
+            index=models.Index(fields=["po_number"], name="rpo_po_number_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="retailerpurchaseorder",
+            index=models.Index(
+                condition=models.Q(
+                    (
+                        "status__in",
+                        [
+                            "Opened",
+                            "Acknowledged",
+                            "Partly Shipped",
+                            "Partly Shipped Confirmed",
+                        ],
+                    )
+                ),
+                fields=["batch", "-order_date"],
+                name="rpo_to_ship_order_date_idx",
+            ),
+        ),
+    ]
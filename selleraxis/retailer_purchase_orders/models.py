@@ -1,4 +1,11 @@
-from django.db import models
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -106,3 +113,97 @@ class RetailerPurchaseOrder(models.Model):
     updated_at = models.DateTimeField(auto_now=True, null=True)
     is_divide = models.BooleanField(default=False)
     ship_times = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["batch", "status"], name="rpo_batch_status_idx"),
+            models.Index(
+                fields=["batch", "-order_date"], name="rpo_batch_order_date_idx"
+            ),
+            models.Index(fields=["po_number"], name="rpo_po_number_idx"),
+            # orders waiting to be shipped
+            models.Index(
+                fields=["batch", "-order_date"],
+                name="rpo_to_ship_order_date_idx",
+                condition=models.Q(
+                    status__in=[
+                        QueueStatus.Opened,
+                        QueueStatus.Acknowledged,
+                        QueueStatus.Partly_Shipped,
+                        QueueStatus.Partly_Shipped_Confirmed,
+                    ]
+                ),
+            ),
+        ]
+
+
+class RetailerPurchaseOrderDetail(models.Model):
+    """Package, shipment and print data of the order detail page.
+
+    ``version`` is bumped whenever packages, shipments or items of the order
+    change, the data is up to date while ``built_version`` equals it.
+    """
+
+    order = models.OneToOneField(
+        RetailerPurchaseOrder,
+        primary_key=True,
+        related_name="detail",
+        on_delete=models.CASCADE,
+    )
+    version = models.IntegerField(default=0)
+    built_version = models.IntegerField(null=True)
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_stale(self) -> bool:
+        return self.built_version != self.version
+
+
+ORDER_DETAIL_BUILD_KEY = "order_detail_build_{}"
+
+
+def invalidate_order_details(**filters) -> None:
+    """Mark the detail of the orders matching filters as stale, e.g. order_id__in,
+    and queue their rebuild"""
+    order_ids = list(
+        RetailerPurchaseOrderDetail.objects.filter(**filters).values_list(
+            "order_id", flat=True
+        )
+    )
+    if order_ids:
+        RetailerPurchaseOrderDetail.objects.filter(order_id__in=order_ids).update(
+            version=F("version") + 1
+        )
+        schedule_order_detail_build(order_ids)
+
+
+def schedule_order_detail_build(order_ids) -> None:
+    """Build the detail of the orders in the task worker once the transaction
+    commits, an order is queued once until the worker picks it up"""
+    # the task module imports the order models
+    from selleraxis.retailer_purchase_orders.tasks import build_order_details
+
+    order_ids = [
+        order_id
+        for order_id in set(order_ids)
+        if cache.add(
+            ORDER_DETAIL_BUILD_KEY.format(order_id),
+            True,
+            settings.ORDER_DETAIL_BUILD_TIMEOUT,
+        )
+    ]
+    chunk_size = settings.ORDER_DETAIL_BUILD_CHUNK_SIZE
+    for start in range(0, len(order_ids), chunk_size):
+        chunk = order_ids[start : start + chunk_size]  # noqa
+        transaction.on_commit(
+            lambda chunk=chunk: build_order_details.trigger(json.dumps(chunk))
+        )
+
+
+@receiver(post_save, sender=RetailerPurchaseOrder)
+def invalidate_purchase_order_detail(sender, instance, created, **kwargs):
+    if created:
+        schedule_order_detail_build([instance.id])
+    else:
+        invalidate_order_details(order_id=instance.id)
@@ -2,14 +2,19 @@ import asyncio
 from datetime import datetime, timezone
 
 from asgiref.sync import async_to_sync, sync_to_async
-from django.core.cache import cache
+from django.db.models import Manager
 from rest_framework import serializers
 from rest_framework.exceptions import ParseError
 from rest_framework.validators import UniqueTogetherValidator
 
-from selleraxis.addresses.models import Address
 from selleraxis.addresses.serializers import AddressSerializer
 from selleraxis.boxes.serializers import BoxSerializer
+from selleraxis.core.cache import (
+    get_or_compute,
+    invalidate_tags,
+    organization_tag,
+    retailer_tag,
+)
 from selleraxis.getting_order_histories.models import GettingOrderHistory
 from selleraxis.gs1.serializers import GS1Serializer
 from selleraxis.invoice.serializers import InvoiceSerializerShow
@@ -36,6 +41,12 @@ from selleraxis.retailer_purchase_order_returns.serializers import (
     ReadRetailerPurchaseOrderReturnSerializer,
 )
 from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
+from selleraxis.retailer_purchase_orders.services.backfill_services import (
+    get_default_warehouse,
+)
+from selleraxis.retailer_purchase_orders.services.preload_services import (
+    preload_purchase_orders,
+)
 from selleraxis.retailer_purchase_orders.services.services import (
     get_shipping_ref,
     get_shipping_ref_code,
@@ -169,6 +180,13 @@ class CustomOrderPackageSerializer(OrderPackageSerializerShow):
     shipment_packages = ShipmentSerializerShow(many=True, read_only=True)
 
 
+class ReadRetailerPurchaseOrderListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        orders = list(data.all() if isinstance(data, Manager) else data)
+        preload_purchase_orders(orders)
+        return super().to_representation(orders)
+
+
 class ReadRetailerPurchaseOrderSerializer(serializers.ModelSerializer):
     batch = ReadRetailerOrderBatchSerializer(read_only=True)
     participating_party = RetailerParticipatingPartySerializer(read_only=True)
@@ -254,9 +272,12 @@ class ReadRetailerPurchaseOrderSerializer(serializers.ModelSerializer):
         return get_shipping_ref(obj, response, shipping_ref_type, value)
 
     def get_shipping_service(self, obj):
-        shipping_service = ShippingServiceType.objects.filter(
-            code=obj.shipping_service
-        ).first()
+        if hasattr(obj, "preloaded_shipping_service"):
+            shipping_service = obj.preloaded_shipping_service
+        else:
+            shipping_service = ShippingServiceType.objects.filter(
+                code=obj.shipping_service
+            ).first()
         shipping_service_serializer = ShippingServiceTypeSerializerShow(
             shipping_service
         )
@@ -270,79 +291,22 @@ class ReadRetailerPurchaseOrderSerializer(serializers.ModelSerializer):
             "created_at": {"read_only": True},
             "updated_at": {"read_only": True},
         }
+        list_serializer_class = ReadRetailerPurchaseOrderListSerializer
 
     def to_representation(self, instance: RetailerPurchaseOrder):
+        # orders get their warehouse from backfill_orders, show the default
+        # one until then
         if instance.warehouse is None:
-            warehouses = RetailerWarehouse.objects.filter(
-                organization=instance.batch.retailer.organization.id
-            )
-            if warehouses.filter(name=instance.vendor_warehouse_id).exists():
-                instance.warehouse = warehouses.filter(
-                    name=instance.vendor_warehouse_id
-                ).first()
-            elif instance.batch.retailer.default_warehouse:
-                instance.warehouse = instance.batch.retailer.default_warehouse
-            else:
-                instance.warehouse = warehouses.first()
-        if instance.ship_from is None and instance.batch.retailer.ship_from_address:
-            self.create_ship_from(instance)
-
-        if instance.verified_ship_to is None and instance.ship_to:
-            self.create_verified_ship_to(instance)
-
+            warehouses = getattr(instance, "preloaded_warehouses", None)
+            if warehouses is None:
+                warehouses = list(
+                    RetailerWarehouse.objects.filter(
+                        organization=instance.batch.retailer.organization_id
+                    ).order_by("id")
+                )
+            instance.warehouse = get_default_warehouse(instance, warehouses)
         return super().to_representation(instance)
 
-    def create_ship_from(self, order: RetailerPurchaseOrder):
-        retailer_address = order.batch.retailer.ship_from_address
-        write_fields = {
-            key: value
-            for key, value in retailer_address.__dict__.items()
-            if hasattr(Address, key)
-        }
-        write_fields.pop("id")
-        write_fields["status"] = Address.Status.ORIGIN
-        instance = Address(**write_fields)
-        instance.save()
-        order.ship_from = instance
-        order.save()
-
-    def create_verified_ship_to(self, order: RetailerPurchaseOrder):
-        is_attention = self.is_attention_from_address_1(
-            address_1=order.ship_to.address_1
-        )
-        status = Address.Status.ORIGIN.value
-        if is_attention and order.ship_to.address_2:
-            order.ship_to.company = order.ship_to.address_1
-            order.ship_to.address_1 = order.ship_to.address_2
-            order.ship_to.address_2 = None
-            order.ship_to.save()
-            status = Address.Status.EDITED.value
-
-        verified_ship_to = Address(
-            company=order.ship_to.company,
-            contact_name=order.ship_to.name,
-            address_1=order.ship_to.address_1,
-            address_2=order.ship_to.address_2,
-            city=order.ship_to.city,
-            state=order.ship_to.state,
-            country=order.ship_to.country,
-            postal_code=order.ship_to.postal_code,
-            phone=order.ship_to.day_phone,
-            status=status,
-            organization=order.batch.retailer.organization,
-        )
-        verified_ship_to.save()
-        order.verified_ship_to = verified_ship_to
-        order.save()
-
-    def is_attention_from_address_1(self, address_1: str) -> bool:
-        if "ship to store" in address_1.lower():
-            return True
-        if "c/o thd" in address_1.lower():
-            return True
-        if "co thd" in address_1.lower():
-            return True
-
 
 class PurchaseOrderXMLMixinSerializer(ReadRetailerPurchaseOrderSerializer):
     partner_id = serializers.SerializerMethodField()
@@ -586,14 +550,17 @@ class OrganizationPurchaseOrderSerializer(serializers.ModelSerializer):
 
 
 class OrganizationPurchaseOrderCheckSerializer(OrganizationPurchaseOrderSerializer):
-    @async_to_sync
-    async def get_retailers(self, instance):
-        # cache validation, if cache response cache data
-        cache_key = CHECK_ORDER_CACHE_KEY_PREFIX.format(instance.pk)
-        cache_response = cache.get(cache_key)
-        if cache_response:
-            return cache_response
+    def get_retailers(self, instance):
+        retailer_ids = instance.retailer_organization.values_list("id", flat=True)
+        return get_or_compute(
+            CHECK_ORDER_CACHE_KEY_PREFIX.format(instance.pk),
+            lambda: self.get_retailers_data(instance),
+            tags=[organization_tag(instance.pk)]
+            + [retailer_tag(retailer_id) for retailer_id in retailer_ids],
+        )
 
+    @async_to_sync
+    async def get_retailers_data(self, instance):
         retailers = instance.retailer_organization.all()
         retailers = await asyncio.gather(
             *[
@@ -601,7 +568,6 @@ class OrganizationPurchaseOrderCheckSerializer(OrganizationPurchaseOrderSerializ
                 for retailer in retailers
             ]
         )
-        cache.set(cache_key, retailers)
         return retailers
 
     @staticmethod
@@ -625,9 +591,7 @@ class OrganizationPurchaseOrderImportSerializer(OrganizationPurchaseOrderSeriali
             ]
         )
 
-        cache_key = CHECK_ORDER_CACHE_KEY_PREFIX.format(instance.pk)
-
-        cache.delete(cache_key)
+        invalidate_tags(organization_tag(instance.pk))
 
         return retailers
 
@@ -0,0 +1,221 @@
+"""
+Cached address validation.
+
+Validation results are cached by carrier service and address fingerprint,
+the address being normalized first (case, whitespace, punctuation, common
+USPS abbreviations, ZIP+4) so the spellings of the same address share one
+entry. Addresses rejected by the carrier are cached for a shorter time,
+errors of the carrier API itself are not cached.
+"""
+import copy
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.exceptions import APIException
+
+from selleraxis.retailer_carriers.models import RetailerCarrier
+from selleraxis.retailer_purchase_orders.exceptions import (
+    AddressValidationFailed,
+    ServiceAPILoginFailed,
+)
+from selleraxis.service_api.models import ServiceAPI, ServiceAPIAction
+from selleraxis.service_api.services import (
+    get_carrier_access_token,
+    invalidate_carrier_access_token,
+)
+
+ADDRESS_VALIDATION_CACHE_KEY = "address_validation_{}_{}"
+ADDRESS_FINGERPRINT_FIELDS = (
+    "address_1",
+    "address_2",
+    "city",
+    "state",
+    "postal_code",
+    "country",
+)
+# cached instead of the response of an address rejected by the carrier
+INVALID_ADDRESS = {"invalid": True}
+ADDRESS_ABBREVIATIONS = {
+    "APARTMENT": "APT",
+    "AVENUE": "AVE",
+    "BOULEVARD": "BLVD",
+    "BUILDING": "BLDG",
+    "CIRCLE": "CIR",
+    "COURT": "CT",
+    "DRIVE": "DR",
+    "EAST": "E",
+    "EXPRESSWAY": "EXPY",
+    "FLOOR": "FL",
+    "FREEWAY": "FWY",
+    "HIGHWAY": "HWY",
+    "LANE": "LN",
+    "NORTH": "N",
+    "NORTHEAST": "NE",
+    "NORTHWEST": "NW",
+    "PARKWAY": "PKWY",
+    "PLACE": "PL",
+    "ROAD": "RD",
+    "ROUTE": "RTE",
+    "SOUTH": "S",
+    "SOUTHEAST": "SE",
+    "SOUTHWEST": "SW",
+    "SQUARE": "SQ",
+    "STREET": "ST",
+    "SUITE": "STE",
+    "TERRACE": "TER",
+    "WEST": "W",
+}
+COUNTRY_ALIASES = {"USA": "US", "UNITED STATES": "US", "UNITED STATES OF AMERICA": "US"}
+
+
+def normalize_address_value(value) -> str:
+    words = re.sub(r"[.,]", " ", str(value or "")).upper().split()
+    return " ".join(ADDRESS_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def normalize_postal_code(value) -> str:
+    postal_code = re.sub(r"[\s-]", "", str(value or "")).upper()
+    # ZIP+4 is validated like its ZIP
+    if re.fullmatch(r"\d{9}", postal_code):
+        return postal_code[:5]
+    return postal_code
+
+
+def get_address_fingerprint(address: dict) -> str:
+    normalized = {
+        field: normalize_address_value(address.get(field))
+        for field in ADDRESS_FINGERPRINT_FIELDS
+    }
+    normalized["postal_code"] = normalize_postal_code(address.get("postal_code"))
+    normalized["country"] = COUNTRY_ALIASES.get(
+        normalized["country"], normalized["country"]
+    )
+    return hashlib.sha256(
+        json.dumps(normalized, sort_keys=True).encode("UTF-8")
+    ).hexdigest()
+
+
+def get_address_validation_key(carrier: RetailerCarrier, address: dict) -> str:
+    return ADDRESS_VALIDATION_CACHE_KEY.format(
+        carrier.service_id, get_address_fingerprint(address)
+    )
+
+
+def validate_address(carrier: RetailerCarrier, address: dict) -> dict:
+    """Response of the carrier address validation API for the address.
+
+    Raises AddressValidationFailed when the carrier rejects the address,
+    ServiceAPILoginFailed or the APIException of the carrier otherwise.
+    """
+    cache_key = get_address_validation_key(carrier, address)
+    response = cache.get(cache_key)
+    if response == INVALID_ADDRESS:
+        raise AddressValidationFailed
+    if response is not None:
+        return copy.deepcopy(response)
+
+    try:
+        access_token = get_carrier_access_token(carrier)
+    except KeyError:
+        raise ServiceAPILoginFailed
+
+    address_validation_data = copy.deepcopy(address)
+    address_validation_data["access_token"] = access_token
+    address_validation_api = ServiceAPI.objects.filter(
+        service_id=carrier.service, action=ServiceAPIAction.ADDRESS_VALIDATION
+    ).first()
+
+    try:
+        response = address_validation_api.request(address_validation_data)
+    except KeyError:
+        cache.set(
+            cache_key,
+            INVALID_ADDRESS,
+            settings.ADDRESS_VALIDATION_NEGATIVE_CACHE_TIMEOUT,
+        )
+        raise AddressValidationFailed
+    except APIException:
+        # the token may have been revoked, log in again on the next call
+        invalidate_carrier_access_token(carrier)
+        raise
+    except Exception:
+        raise AddressValidationFailed
+
+    if "address_1" not in response and str(response.get("status")).lower() != (
+        "success"
+    ):
+        cache.set(
+            cache_key,
+            INVALID_ADDRESS,
+            settings.ADDRESS_VALIDATION_NEGATIVE_CACHE_TIMEOUT,
+        )
+        raise AddressValidationFailed
+
+    # keep original city
+    response.pop("city", None)
+    cache.set(cache_key, response, settings.ADDRESS_VALIDATION_CACHE_TIMEOUT)
+    return copy.deepcopy(response)
+
+
+def validate_address_in_worker(carrier: RetailerCarrier, address: dict) -> dict:
+    try:
+        return validate_address(carrier, address)
+    finally:
+        # every worker thread owns a database connection
+        connections.close_all()
+
+
+def validate_addresses(
+    carrier_addresses: Iterable[Tuple[RetailerCarrier, dict]]
+) -> List[dict | Exception]:
+    """Validate many addresses, calling the carrier once by distinct address.
+
+    Cached validations are read first, the other addresses are validated by
+    up to ADDRESS_VALIDATION_MAX_WORKERS concurrent carrier calls. Returns the
+    response, or the raised exception, of each address.
+    """
+    carrier_addresses = list(carrier_addresses)
+    cache_keys = [
+        get_address_validation_key(carrier, address)
+        for carrier, address in carrier_addresses
+    ]
+    cached = cache.get_many(set(cache_keys))
+    results = {}
+    misses = {}
+    for cache_key, (carrier, address) in zip(cache_keys, carrier_addresses):
+        if cache_key in results or cache_key in misses:
+            continue
+        response = cached.get(cache_key)
+        if response == INVALID_ADDRESS:
+            results[cache_key] = AddressValidationFailed()
+        elif response is not None:
+            results[cache_key] = response
+        else:
+            misses[cache_key] = (carrier, address)
+
+    if misses:
+        with ThreadPoolExecutor(
+            max_workers=min(len(misses), settings.ADDRESS_VALIDATION_MAX_WORKERS)
+        ) as executor:
+            futures = {
+                cache_key: executor.submit(validate_address_in_worker, carrier, address)
+                for cache_key, (carrier, address) in misses.items()
+            }
+        for cache_key, future in futures.items():
+            try:
+                results[cache_key] = future.result()
+            except Exception as e:
+                results[cache_key] = e
+
+    return [
+        results[cache_key]
+        if isinstance(results[cache_key], Exception)
+        else copy.deepcopy(results[cache_key])
+        for cache_key in cache_keys
+    ]
@@ -0,0 +1,139 @@
+from typing import List, Optional
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+
+from selleraxis.addresses.models import Address
+from selleraxis.retailer_person_places.models import RetailerPersonPlace
+from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
+from selleraxis.retailer_warehouses.models import RetailerWarehouse
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def get_default_warehouse(
+    order: RetailerPurchaseOrder, warehouses: List[RetailerWarehouse]
+) -> Optional[RetailerWarehouse]:
+    """Warehouse of an order without one, warehouses are the organization ones by id"""
+    for warehouse in warehouses:
+        if warehouse.name == order.vendor_warehouse_id:
+            return warehouse
+    retailer = order.batch.retailer
+    if retailer.default_warehouse_id:
+        for warehouse in warehouses:
+            if warehouse.id == retailer.default_warehouse_id:
+                return warehouse
+        return retailer.default_warehouse
+    return warehouses[0] if warehouses else None
+
+
+def is_attention_from_address_1(address_1: str) -> bool:
+    address_1 = address_1.lower()
+    return (
+        "ship to store" in address_1 or "c/o thd" in address_1 or "co thd" in address_1
+    )
+
+
+def copy_ship_from(retailer_address: Address) -> Address:
+    address = Address(
+        **{
+            field.attname: getattr(retailer_address, field.attname)
+            for field in Address._meta.concrete_fields
+            if not field.primary_key
+        }
+    )
+    address.status = Address.Status.ORIGIN
+    return address
+
+
+def create_verified_ship_to(order: RetailerPurchaseOrder) -> Address:
+    """Unverified copy of the ship to, moving the attention line to company"""
+    ship_to = order.ship_to
+    status = Address.Status.ORIGIN.value
+    if is_attention_from_address_1(ship_to.address_1) and ship_to.address_2:
+        ship_to.company = ship_to.address_1
+        ship_to.address_1 = ship_to.address_2
+        ship_to.address_2 = None
+        status = Address.Status.EDITED.value
+
+    return Address(
+        company=ship_to.company,
+        contact_name=ship_to.name,
+        address_1=ship_to.address_1,
+        address_2=ship_to.address_2,
+        city=ship_to.city,
+        state=ship_to.state,
+        country=ship_to.country,
+        postal_code=ship_to.postal_code,
+        phone=ship_to.day_phone,
+        status=status,
+        organization=order.batch.retailer.organization,
+    )
+
+
+def get_orders_to_backfill(queryset: QuerySet) -> QuerySet:
+    return queryset.filter(
+        Q(warehouse__isnull=True)
+        | Q(
+            ship_from__isnull=True,
+            batch__retailer__ship_from_address__isnull=False,
+        )
+        | Q(verified_ship_to__isnull=True, ship_to__isnull=False)
+    ).select_related(
+        "ship_to",
+        "batch__retailer__organization",
+        "batch__retailer__ship_from_address",
+    )
+
+
+def backfill_orders(queryset: QuerySet) -> int:
+    """Set the missing warehouse, ship from and verified ship to of the orders.
+
+    Orders used to get them while being serialized, they are now written in
+    batches after the import and by the backfill_purchase_orders command.
+    Returns the number of updated orders.
+    """
+    orders = list(get_orders_to_backfill(queryset).order_by("id"))
+    for start in range(0, len(orders), BACKFILL_BATCH_SIZE):
+        backfill_order_batch(orders[start : start + BACKFILL_BATCH_SIZE])  # noqa
+    return len(orders)
+
+
+@transaction.atomic
+def backfill_order_batch(orders: List[RetailerPurchaseOrder]) -> None:
+    warehouses = {}
+    for warehouse in RetailerWarehouse.objects.filter(
+        organization_id__in={order.batch.retailer.organization_id for order in orders}
+    ).order_by("id"):
+        warehouses.setdefault(warehouse.organization_id, []).append(warehouse)
+
+    ship_tos = {}
+    edited_ship_tos = {}
+    new_addresses = []
+    for order in orders:
+        if order.warehouse_id is None:
+            order.warehouse = get_default_warehouse(
+                order, warehouses.get(order.batch.retailer.organization_id, [])
+            )
+        if order.ship_from_id is None and order.batch.retailer.ship_from_address:
+            order.ship_from = copy_ship_from(order.batch.retailer.ship_from_address)
+            new_addresses.append(order.ship_from)
+        if order.verified_ship_to_id is None and order.ship_to_id is not None:
+            # orders sharing a ship to edit it once
+            order.ship_to = ship_tos.setdefault(order.ship_to_id, order.ship_to)
+            order.verified_ship_to = create_verified_ship_to(order)
+            new_addresses.append(order.verified_ship_to)
+            if order.verified_ship_to.status == Address.Status.EDITED.value:
+                edited_ship_tos[order.ship_to_id] = order.ship_to
+
+    Address.objects.bulk_create(new_addresses)
+    RetailerPersonPlace.objects.bulk_update(
+        list(edited_ship_tos.values()), ["company", "address_1", "address_2"]
+    )
+    for order in orders:
+        # re-assign to pick up the ids of the created addresses
+        order.ship_from = order.ship_from
+        order.verified_ship_to = order.verified_ship_to
+    RetailerPurchaseOrder.objects.bulk_update(
+        orders, ["warehouse", "ship_from", "verified_ship_to"]
+    )
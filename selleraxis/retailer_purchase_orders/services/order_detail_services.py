@@ -0,0 +1,177 @@
+import logging
+from typing import List, Tuple
+
+from django.core.cache import cache
+
+from selleraxis.core.utils.exception_utilities import ExceptionUtilities
+from selleraxis.order_item_package.models import OrderItemPackage
+from selleraxis.order_package.models import OrderPackage
+from selleraxis.product_alias.models import ProductAlias
+from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
+from selleraxis.retailer_purchase_orders.models import (
+    ORDER_DETAIL_BUILD_KEY,
+    RetailerPurchaseOrder,
+    RetailerPurchaseOrderDetail,
+    schedule_order_detail_build,
+)
+from selleraxis.retailer_purchase_orders.services.services import package_divide_service
+from selleraxis.shipments.models import Shipment, ShipmentStatus
+
+SHIPPED_STATUSES = [ShipmentStatus.CREATED, ShipmentStatus.SUBMITTED]
+
+
+def get_order_detail(order: RetailerPurchaseOrder) -> Tuple[dict, bool]:
+    """Detail data of the order and whether a newer one is pending.
+
+    A missing or stale detail is built on the request, the detail matching the
+    packages it is served with. Only the package divide of an order already
+    viewed is left to the task worker, its last data being served meanwhile.
+    """
+    detail = RetailerPurchaseOrderDetail.objects.filter(order_id=order.id).first()
+    if detail is not None and not detail.is_stale:
+        return detail.data, False
+
+    if (
+        detail is not None
+        and detail.built_version is not None
+        and not order.is_divide
+        and not OrderPackage.objects.filter(order_id=order.id).exists()
+    ):
+        schedule_order_detail_build([order.id])
+        return detail.data, True
+    return build_order_detail(order), False
+
+
+def build_order_details(order_ids: List[int]) -> None:
+    """Divide the orders into packages if needed and build their detail"""
+    for order in RetailerPurchaseOrder.objects.filter(id__in=order_ids).select_related(
+        "batch"
+    ):
+        try:
+            build_order_detail(order)
+        except Exception as e:
+            logging.error(
+                "Failed build order detail, order id: '%s'. Details: '%s'"
+                % (order.id, ExceptionUtilities.stack_trace_as_string(e))
+            )
+
+
+def build_order_detail(order: RetailerPurchaseOrder) -> dict:
+    package_divide_data = package_divide_service(
+        reset=False,
+        retailer_purchase_order=order,
+        retailer_id=order.batch.retailer_id,
+    )
+    # read the version once the packages are divided, so the changes made by
+    # the divide don't mark the new data as stale, and the changes made from
+    # now on queue another build
+    cache.delete(ORDER_DETAIL_BUILD_KEY.format(order.id))
+    detail, _ = RetailerPurchaseOrderDetail.objects.get_or_create(order_id=order.id)
+    version = detail.version
+    order.refresh_from_db(fields=["ship_times", "is_divide"])
+
+    error_message = None
+    box_max_quantity = {}
+    if package_divide_data.get("status") != 200:
+        error_message = package_divide_data.get("data").get("message")
+    else:
+        for divide_data in package_divide_data.get("data"):
+            box_max_quantity[divide_data.get("order_package_id")] = divide_data.get(
+                "max_quantity"
+            )
+
+    items = list(
+        RetailerPurchaseOrderItem.objects.filter(order_id=order.id).values(
+            "id", "merchant_sku", "qty_ordered"
+        )
+    )
+    sku_quantity = dict(
+        ProductAlias.objects.filter(
+            merchant_sku__in={item["merchant_sku"] for item in items},
+            retailer_id=order.batch.retailer_id,
+        )
+        .order_by("id")
+        .values_list("merchant_sku", "sku_quantity")
+    )
+    item_sku_quantity = {
+        item["id"]: sku_quantity.get(item["merchant_sku"]) for item in items
+    }
+
+    package_ids = list(
+        OrderPackage.objects.filter(order_id=order.id)
+        .order_by("updated_at")
+        .values_list("id", flat=True)
+    )
+    item_packages = {package_id: [] for package_id in package_ids}
+    for item_package in (
+        OrderItemPackage.objects.filter(package__order_id=order.id)
+        .order_by("id")
+        .values("id", "package_id", "order_item_id", "quantity")
+    ):
+        item_packages[item_package["package_id"]].append(item_package)
+
+    ship_times = {package_id: [] for package_id in package_ids}
+    for package_id, ship_time in Shipment.objects.filter(
+        package__order_id=order.id, status__in=SHIPPED_STATUSES
+    ).values_list("package_id", "ship_times"):
+        if ship_time not in ship_times[package_id]:
+            ship_times[package_id].append(ship_time)
+
+    packages = {}
+    ship_qty_ordered = {item["id"]: 0 for item in items}
+    for package_id in package_ids:
+        package = {"remain": box_max_quantity.get(package_id, 0)}
+        if package_id in box_max_quantity:
+            package["box_max_quantity"] = box_max_quantity[package_id]
+        if package["remain"] > 0:
+            for item_package in item_packages[package_id]:
+                package["remain"] -= item_package["quantity"] * (
+                    item_sku_quantity.get(item_package["order_item_id"]) or 0
+                )
+        packages[str(package_id)] = package
+
+        if ship_times[package_id]:
+            for item_package in item_packages[package_id]:
+                if item_package["order_item_id"] in ship_qty_ordered:
+                    ship_qty_ordered[item_package["order_item_id"]] += item_package[
+                        "quantity"
+                    ]
+
+    print_data = []
+    for n in range(1, order.ship_times + 1):
+        list_package = []
+        list_item_package = []
+        list_item_id = set()
+        for package_id in package_ids:
+            if n not in ship_times[package_id]:
+                continue
+            list_package.append(package_id)
+            for item_package in item_packages[package_id]:
+                if item_package["order_item_id"] not in list_item_id:
+                    list_item_id.add(item_package["order_item_id"])
+                    list_item_package.append(item_package["id"])
+        if list_package:
+            print_data.append(
+                {"list_package": list_package, "list_item_package": list_item_package}
+            )
+
+    data = {
+        "package_divide_error": error_message,
+        "list_box_valid": sorted(
+            package_divide_data.get("list_box_valid", []),
+            key=lambda x: x["max_quantity"],
+        ),
+        "order_packages": packages,
+        "ship_qty_ordered": {
+            str(item_id): qty for item_id, qty in ship_qty_ordered.items()
+        },
+        "order_full_divide": all(
+            ship_qty_ordered[item["id"]] == item["qty_ordered"] for item in items
+        ),
+        "print_data": print_data,
+    }
+    # skip the write when the order changed while building, next read rebuilds
+    RetailerPurchaseOrderDetail.objects.filter(
+        order_id=order.id, version=version
+    ).update(data=data, built_version=version)
+    return data
@@ -0,0 +1,165 @@
+import csv
+import datetime
+from typing import Iterator, List
+
+from django.db.models import F, Q, QuerySet, Sum
+
+from selleraxis.product_alias.models import ProductAlias
+
+PICKLIST_ORDER = "retailer__retailer_order_batch__order_batch"
+PICKLIST_ITEM = f"{PICKLIST_ORDER}__items"
+PICKLIST_CSV_HEADER = [
+    "product_sku",
+    "available_quantity",
+    "product_alias_sku",
+    "merchant_sku",
+    "packaging",
+    "po_number",
+    "quantity",
+]
+
+
+def get_picklist_rows(
+    organization_id, order_date: datetime.date = None, list_status: List[str] = None
+) -> QuerySet:
+    """Ordered quantity of each product alias by order, in one grouped query.
+
+    Items are matched to the aliases of their retailer by merchant sku,
+    ``order_date`` keeps the orders of the surrounding day and ``list_status``
+    the orders in one of the statuses, case insensitive, unless it has "ALL".
+    """
+    filters = Q(
+        retailer__organization_id=organization_id,
+        **{f"{PICKLIST_ITEM}__merchant_sku": F("merchant_sku")},
+    )
+    if order_date:
+        filters &= Q(
+            **{
+                f"{PICKLIST_ORDER}__order_date__gt": order_date
+                - datetime.timedelta(days=1),
+                f"{PICKLIST_ORDER}__order_date__lt": order_date
+                + datetime.timedelta(days=1),
+            }
+        )
+    if list_status and "ALL" not in list_status:
+        status_filters = Q()
+        for status in list_status:
+            status_filters |= Q(**{f"{PICKLIST_ORDER}__status__iexact": status})
+        filters &= status_filters
+
+    # a single filter call, so the status and date apply to the summed items
+    return (
+        ProductAlias.objects.filter(filters)
+        .values(
+            "product_id",
+            "merchant_sku",
+            "sku_quantity",
+            product_alias_id=F("id"),
+            product_alias_sku=F("sku"),
+            product_sku=F("product__sku"),
+            available_quantity=F("product__qty_on_hand"),
+            order_id=F(f"{PICKLIST_ORDER}__id"),
+            po_number=F(f"{PICKLIST_ORDER}__po_number"),
+        )
+        .annotate(quantity=Sum(f"{PICKLIST_ITEM}__qty_ordered"))
+        .order_by("sku_quantity", "product__sku", "id", f"{PICKLIST_ORDER}__id")
+    )
+
+
+def build_picklist(rows) -> List[dict]:
+    """Picklist of each product with a group of quantities by packaging"""
+    products = {}
+    packagings = set()
+    for row in rows:
+        packaging = row["sku_quantity"]
+        packagings.add(packaging)
+        product = products.setdefault(
+            row["product_id"],
+            {
+                "id": row["product_id"],
+                "product_sku": row["product_sku"],
+                "available_quantity": row["available_quantity"],
+                "product_alias_info": {},
+                "group": {},
+                "quantity": 0,
+            },
+        )
+        product_alias_info = product["product_alias_info"].setdefault(
+            row["product_alias_id"],
+            {
+                "product_alias_id": row["product_alias_id"],
+                "product_alias_sku": row["product_alias_sku"],
+                "merchant_sku": row["merchant_sku"],
+                "packaging": packaging,
+                "list_quantity": [],
+            },
+        )
+        product_alias_info["list_quantity"].append(
+            {
+                "quantity": row["quantity"],
+                "po_number": row["po_number"],
+                "order_id": row["order_id"],
+            }
+        )
+        group = product["group"].setdefault(
+            packaging,
+            {
+                "name": packaging,
+                "quantity": packaging,
+                "count": 0,
+                "alias_count": 0,
+                "total_quantity": 0,
+                "product_alias_ids": set(),
+            },
+        )
+        group["count"] += row["quantity"]
+        product["quantity"] += row["quantity"] * packaging
+        if row["product_alias_id"] not in group["product_alias_ids"]:
+            group["product_alias_ids"].add(row["product_alias_id"])
+            group["alias_count"] += 1
+            group["total_quantity"] += packaging
+
+    picklist = []
+    for product in products.values():
+        product["product_alias_info"] = list(product["product_alias_info"].values())
+        groups = []
+        for packaging in sorted(packagings):
+            group = product["group"].get(packaging)
+            if group is None:
+                group = {
+                    "name": packaging,
+                    "quantity": packaging,
+                    "count": 0,
+                    "alias_count": 0,
+                    "total_quantity": 0,
+                }
+            else:
+                group.pop("product_alias_ids")
+            groups.append(group)
+        product["group"] = groups
+        picklist.append(product)
+    return picklist
+
+
+class Echo:
+    """File-like object returning what is written, for streaming csv rows"""
+
+    def write(self, value):
+        return value
+
+
+def stream_picklist_csv(rows) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(PICKLIST_CSV_HEADER)
+    for row in rows:
+        yield writer.writerow(
+            [
+                row["product_sku"],
+                row["available_quantity"],
+                row["product_alias_sku"],
+                row["merchant_sku"],
+                row["sku_quantity"],
+                row["po_number"],
+                row["quantity"],
+            ]
+        )
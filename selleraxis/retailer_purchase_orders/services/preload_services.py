@@ -0,0 +1,100 @@
+from typing import List
+
+from django.db.models import prefetch_related_objects
+
+from selleraxis.product_alias.models import ProductAlias
+from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
+from selleraxis.retailer_warehouses.models import RetailerWarehouse
+from selleraxis.shipping_service_types.models import ShippingServiceType
+
+# relations read by ReadRetailerPurchaseOrderSerializer
+PURCHASE_ORDER_PREFETCH = [
+    "items",
+    "participating_party",
+    "warehouse",
+    "gs1",
+    "invoice_order",
+    "notes__user",
+    "carrier__organization",
+    "carrier__shipper",
+    "carrier__default_service_type",
+    "carrier__service__shipping_ref_service",
+    "batch__retailer__shipping_ref_1_type",
+    "batch__retailer__shipping_ref_2_type",
+    "batch__retailer__shipping_ref_3_type",
+    "batch__retailer__shipping_ref_4_type",
+    "batch__retailer__shipping_ref_5_type",
+    "order_packages__box",
+    "order_packages__shipment_packages",
+    "order_packages__order_item_packages__order_item",
+    "order_returns__notes__user",
+    "order_returns__order_returns_items__item",
+    "order_returns__warehouse",
+    "order_returns__user",
+]
+
+
+def preload_purchase_orders(orders: List[RetailerPurchaseOrder]) -> None:
+    """Load what the read serializer needs for a page of orders in bulk.
+
+    Prefetches the nested relations and sets ``preloaded_warehouses``,
+    ``preloaded_shipping_service`` on the orders and ``preloaded_product_alias``
+    on their items, so serializing the page issues a fixed number of queries.
+    """
+    if not orders:
+        return
+
+    prefetch_related_objects(orders, *PURCHASE_ORDER_PREFETCH)
+
+    warehouses = {}
+    for warehouse in RetailerWarehouse.objects.filter(
+        organization_id__in={order.batch.retailer.organization_id for order in orders}
+    ).order_by("id"):
+        warehouses.setdefault(warehouse.organization_id, []).append(warehouse)
+
+    shipping_services = {}
+    for shipping_service in ShippingServiceType.objects.filter(
+        code__in={order.shipping_service for order in orders if order.shipping_service}
+    ).order_by("-id"):
+        # keep the first one by id, as ``.first()`` does
+        shipping_services[shipping_service.code] = shipping_service
+
+    retailer_ids = {order.id: order.batch.retailer_id for order in orders}
+    items = []
+    for order in orders:
+        order.preloaded_warehouses = warehouses.get(
+            order.batch.retailer.organization_id, []
+        )
+        order.preloaded_shipping_service = shipping_services.get(order.shipping_service)
+        items += order.items.all()
+        for order_package in order.order_packages.all():
+            items += [
+                order_item_package.order_item
+                for order_item_package in order_package.order_item_packages.all()
+            ]
+        for order_return in order.order_returns.all():
+            items += [
+                return_item.item
+                for return_item in order_return.order_returns_items.all()
+                if return_item.item is not None
+            ]
+    items = [item for item in items if item.order_id in retailer_ids]
+
+    product_aliases = {}
+    for product_alias in (
+        ProductAlias.objects.filter(
+            retailer_id__in=set(retailer_ids.values()),
+            merchant_sku__in={item.merchant_sku for item in items},
+        )
+        .select_related("product")
+        .prefetch_related("retailer_product_aliases")
+        .order_by("id")
+    ):
+        # keep the last one by id, as ``.last()`` does
+        product_aliases[
+            (product_alias.retailer_id, product_alias.merchant_sku)
+        ] = product_alias
+    for item in items:
+        item.preloaded_product_alias = product_aliases.get(
+            (retailer_ids[item.order_id], item.merchant_sku)
+        )
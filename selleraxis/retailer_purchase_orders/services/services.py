@@ -1,4 +1,3 @@
-from django.db.models import Case, IntegerField, Value, When
 from jinja2 import Template, exceptions
 from rest_framework.exceptions import ParseError
 
@@ -6,13 +5,14 @@ from selleraxis.core.utils.convert_weight_by_unit import convert_weight
 from selleraxis.order_item_package.models import OrderItemPackage
 from selleraxis.order_package.models import OrderPackage
 from selleraxis.package_rules.models import PackageRule
+from selleraxis.package_rules.services import BoxType, PackingItem, pack_items
 from selleraxis.product_alias.models import ProductAlias
-from selleraxis.products.models import Product
-from selleraxis.retailer_carriers.serializers import ServicesSerializerShowInCarrier
-from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
-from selleraxis.retailer_purchase_order_items.serializers import (
-    RetailerPurchaseOrderItemSerializer,
+from selleraxis.products.inventory_services import (
+    get_product_aliases,
+    record_inventory_movements,
 )
+from selleraxis.products.models import ProductInventoryMovement
+from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
 from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
 from selleraxis.shipments.models import ShipmentStatus
 
@@ -33,141 +33,69 @@ def change_weight(element):
 
 
 def divide_process(item_for_series, list_order_package_item_shipped):
-    # calculate shipped quantity for each item in series
-    list_item_shipped = []
-    list_item_id_shipped = []
-    for order_package_item_shipped in list_order_package_item_shipped:
-        if order_package_item_shipped.order_item.id not in list_item_id_shipped:
-            list_item_id_shipped.append(order_package_item_shipped.order_item.id)
-            item_shipped = {
-                "order_item_id": order_package_item_shipped.order_item.id,
-                "qty_order": order_package_item_shipped.quantity,
-            }
-            list_item_shipped.append(item_shipped)
-        else:
-            for item_shipped in list_item_shipped:
-                if (
-                    item_shipped.get("order_item_id")
-                    == order_package_item_shipped.order_item.id
-                ):
-                    item_shipped["qty_order"] += order_package_item_shipped.quantity
-    # sort item by decreasing sku_quantity
-    item_for_series.sort(key=lambda x: x["sku_quantity"], reverse=True)
-    # list box info valid for series
-    list_uni_package_rule = []
+    """Divide the unshipped quantity of a series items into boxes"""
+    shipped_quantities = {}
+    for order_item_id, quantity in list_order_package_item_shipped.values_list(
+        "order_item_id", "quantity"
+    ):
+        shipped_quantities[order_item_id] = (
+            shipped_quantities.get(order_item_id, 0) + quantity
+        )
+
+    box_types = {}
     for item in item_for_series:
         for package_rule_info in item.get("box_divide_info"):
-            if package_rule_info not in list_uni_package_rule:
-                package_rule_info["order_item_id"] = item.get("order_item_id")
-                list_uni_package_rule.append(package_rule_info)
-    # list box max quantity valid for series
-    list_max_quantity = []
-    for package_rule in list_uni_package_rule:
-        if package_rule.get("max_quantity") not in list_max_quantity:
-            list_max_quantity.append(package_rule.get("max_quantity"))
-    # sort max_quantity by decreasing
-    list_max_quantity = sorted(list_max_quantity, reverse=True)
-    list_box = []
-    # if the biggest box max capacity smaller than min sku_quantity, there is no solution to divide
-    if list_max_quantity[0] < item_for_series[-1].get("sku_quantity"):
+            box_types[package_rule_info.get("box_id")] = BoxType(
+                box_id=package_rule_info.get("box_id"),
+                max_quantity=package_rule_info.get("max_quantity"),
+                length=package_rule_info.get("length"),
+                width=package_rule_info.get("width"),
+                height=package_rule_info.get("height"),
+                dimension_unit=package_rule_info.get("dimension_unit"),
+            )
+    packing_items = [
+        PackingItem(
+            sku_quantity=item.get("sku_quantity"),
+            quantity=item.get("qty_order")
+            - shipped_quantities.get(item.get("order_item_id"), 0),
+        )
+        for item in item_for_series
+    ]
+    packed_boxes = pack_items(
+        packing_items,
+        list(box_types.values()),
+        cache_prefix=str(item_for_series[0].get("product_series_id")),
+    )
+    if packed_boxes is None:
         return False, []
-    else:
-        while len(item_for_series) > 0:
-            # choose item is item the biggest item sku_quantity
-            item = item_for_series[0]
-            item_sku_qty = item.get("sku_quantity")
-            item_qty = item.get("qty_order")
-            # subtract shipped number
-            if item.get("order_item_id") in list_item_id_shipped:
-                for item_shipped in list_item_shipped:
-                    if item_shipped.get("order_item_id") == item.get("order_item_id"):
-                        item_qty = item_qty - int(item_shipped.get("qty_order"))
-            # if item has order quantity not 0, begin divide process
-            if item_qty > 0:
-                # choose max_quantity is the biggest quantity valid
-                max_qty = list_max_quantity[0]
-                box = None
-                # find in divided box not full and remain space bigger than current item sku_quantity
-                for box_item in list_box:
-                    if box_item.get("remain") >= item_sku_qty:
-                        box = box_item
-                        break
-                # if not find valid box in divided box, create new box with max capacity is max_quantity
-                if box is None:
-                    box = {"max": max_qty, "remain": max_qty, "element": []}
-                    list_box.append(box)
-                box_remain_qty = box["remain"]
-                # the current quantity of box is box max capacity if box max capacity smaller than item ordered quantity
-                item_in_box_qty = min(box_remain_qty, item_qty * item_sku_qty)
-                # check if box max capacity mod item_sku_qty is not equal 0
-                if item_in_box_qty >= item_sku_qty:
-                    item_in_box_qty = item_in_box_qty - (item_in_box_qty % item_sku_qty)
-                # ordered quantity remain
-                item_remain_qty = item_qty * item_sku_qty - item_in_box_qty
-                # calculate box capacity remain
-                box["remain"] = box_remain_qty - item_in_box_qty
-                # add item to current box
-                box["element"].append(
-                    {
-                        "order_item_id": item.get("order_item_id"),
-                        "item_sku_qty": item_sku_qty,
-                        "weight": item.get("weight"),
-                        "weight_unit": item.get("weight_unit"),
-                        "product_qty": item_in_box_qty // item_sku_qty,
-                    }
-                )
-                # if current item order quantity remain = 0, remove from list order item
-                if item_remain_qty == 0:
-                    item_for_series.pop(0)
-                else:
-                    # update item ordered quantity remain
-                    item_for_series[0]["qty_order"] = item_remain_qty // item_sku_qty
-            # if item has order quantity is 0, remove item
-            else:
-                item_for_series.pop(0)
-    completed_result = []
-    # find box with remain capacity is not 0
-    for idx, box in enumerate(list_box):
-        if box["remain"] != 0:
-            miss_box = list_box[idx]
-            found_valid_qty = False
-            # calculate quantity need to fill into box
-            box_fill = miss_box["max"] - miss_box["remain"]
-            # find smaller box valid
-            for max_qty in list_max_quantity:
-                # box with max capacity bigger than sum of item and sum of item bigger than 1/2 capacity
-                if max_qty >= box_fill:
-                    if box_fill >= max_qty / 2:
-                        miss_box["max"] = max_qty
-                        miss_box["remain"] = max_qty - box_fill
-                        found_valid_qty = True
-            if found_valid_qty is True:
-                completed_result.append(miss_box)
-            # if not found valid smaller box
-            else:
-                # use the smallest box if this can contain calculated quantity item else keep it not change
-                if list_max_quantity[-1] >= box_fill:
-                    miss_box["max"] = list_max_quantity[-1]
-                    miss_box["remain"] = list_max_quantity[-1] - box_fill
-                    completed_result.append(miss_box)
-                else:
-                    completed_result.append(miss_box)
-        else:
-            completed_result.append(box)
 
-    for box in completed_result:
-        for package_rule in list_uni_package_rule:
-            if package_rule.get("max_quantity") == box["max"]:
-                box["box_id"] = package_rule.get("box_id")
-                box["length"] = package_rule.get("length")
-                box["width"] = package_rule.get("width")
-                box["height"] = package_rule.get("height")
-                box["dimension_unit"] = package_rule.get("dimension_unit")
-        box_weight = 0
-        for element in box["element"]:
-            box_weight += change_weight(element)
-        box["box_weight"] = box_weight
+    completed_result = []
+    for packed_box in packed_boxes:
+        box_type = packed_box.box_type
+        box = {
+            "max": box_type.max_quantity,
+            "remain": box_type.max_quantity - packed_box.fill,
+            "element": [],
+            "box_id": box_type.box_id,
+            "length": box_type.length,
+            "width": box_type.width,
+            "height": box_type.height,
+            "dimension_unit": box_type.dimension_unit,
+        }
+        for index, quantity in sorted(packed_box.quantities.items()):
+            item = item_for_series[index]
+            box["element"].append(
+                {
+                    "order_item_id": item.get("order_item_id"),
+                    "item_sku_qty": item.get("sku_quantity"),
+                    "weight": item.get("weight"),
+                    "weight_unit": item.get("weight_unit"),
+                    "product_qty": quantity,
+                }
+            )
+        box["box_weight"] = sum(change_weight(element) for element in box["element"])
         box["weight_unit"] = "lbs"
+        completed_result.append(box)
     return True, completed_result
 
 
@@ -419,72 +347,70 @@ def get_shipping_ref(obj, response, shipping_ref_type, value):
 
 def get_shipping_ref_code(carrier, shipping_ref_type):
     if carrier and shipping_ref_type:
-        service = carrier.service
-        data_service = ServicesSerializerShowInCarrier(service).data
-        for shipping_ref_item in data_service["shipping_ref_service"]:
-            if shipping_ref_item["type"] == shipping_ref_type.id:
-                return shipping_ref_item["code"]
+        for shipping_ref in carrier.service.shipping_ref_service.all():
+            if shipping_ref.type_id == shipping_ref_type.id:
+                return shipping_ref.code
     return None
 
 
 def change_product_quantity_when_canceling(objs):
+    """Move the units of cancelled items from pending back to on hand"""
     try:
-        data = []
-        product_ids = []
+        retailer_ids = dict(
+            RetailerPurchaseOrder.objects.filter(
+                id__in={item.order_id for item in objs}
+            ).values_list("id", "batch__retailer_id")
+        )
+        product_aliases = get_product_aliases(
+            (retailer_ids[item.order_id], item.merchant_sku) for item in objs
+        )
+        movements = []
         for item in objs:
-            serializer_item = RetailerPurchaseOrderItemSerializer(item)
-            if serializer_item.data["product_alias"] is not None:
-                if serializer_item.data["product_alias"]["product"] not in product_ids:
-                    product_ids.append(serializer_item.data["product_alias"]["product"])
-                    data.append(serializer_item.data)
-        product_list = Product.objects.filter(id__in=product_ids)
-        for item in data:
-            id_product = item["product_alias"]["product"]
-            qty = int(item["product_alias"]["sku_quantity"] * int(item["qty_ordered"]))
-            for product in product_list:
-                if id_product == product.id:
-                    qty_pending = product.qty_pending
-                    qty_on_hand = product.qty_on_hand
-                    product.qty_pending = qty_pending - qty
-                    product.qty_on_hand = qty_on_hand + qty
-        Product.objects.bulk_update(product_list, ["qty_pending", "qty_on_hand"])
+            product_alias = product_aliases.get(
+                (retailer_ids[item.order_id], item.merchant_sku)
+            )
+            if product_alias is not None:
+                qty = int(product_alias.sku_quantity) * int(item.qty_ordered)
+                movements.append(
+                    ProductInventoryMovement(
+                        product_id=product_alias.product_id,
+                        reason=ProductInventoryMovement.Reason.CANCEL,
+                        qty_on_hand_delta=qty,
+                        qty_pending_delta=-qty,
+                        order_id=item.order_id,
+                    )
+                )
+        record_inventory_movements(movements)
     except Exception as e:
         raise ParseError(e)
 
 
-def change_product_quantity_when_ship(serializer_order, shipment_list_serial):
+def change_product_quantity_when_ship(order: RetailerPurchaseOrder, package_ids):
+    """Remove the units of the packages shipped this time from pending"""
     try:
-        data_items = serializer_order.data["items"]
-        data_package = serializer_order.data["order_packages"]
-        product_ids = []
-        for item in data_items:
-            if item["product_alias"] is not None:
-                if item["product_alias"]["product"] not in product_ids:
-                    product_ids.append(item["product_alias"]["product"])
-        product_list = Product.objects.filter(id__in=product_ids)
-        list_package_id_ship_this_time = [
-            int(shipment.get("package")) for shipment in shipment_list_serial
-        ]
-        # only calculate with this time shipment
-        for item in data_items:
-            id = item["product_alias"]["product"]
-            ship_qty_ordered = 0
-            for package in data_package:
-                if int(package.get("id")) in list_package_id_ship_this_time:
-                    for item_package in package.get("order_item_packages"):
-                        if int(
-                            item_package.get("retailer_purchase_order_item").get("id")
-                        ) == int(item.get("id")):
-                            ship_qty_ordered += item_package.get("quantity", 0)
-            qty = int(item["product_alias"]["sku_quantity"] * int(ship_qty_ordered))
-            for product in product_list:
-                if id == product.id:
-                    qty_pending = product.qty_pending
-                    product.qty_pending = qty_pending - qty
-        whens = [
-            When(id=product.id, then=Value(int(product.qty_pending)))
-            for product in product_list
-        ]
-        product_list.update(qty_pending=Case(*whens, output_field=IntegerField()))
+        item_packages = OrderItemPackage.objects.filter(
+            package_id__in=package_ids
+        ).select_related("order_item")
+        retailer_id = order.batch.retailer_id
+        product_aliases = get_product_aliases(
+            (retailer_id, item_package.order_item.merchant_sku)
+            for item_package in item_packages
+        )
+        movements = []
+        for item_package in item_packages:
+            product_alias = product_aliases.get(
+                (retailer_id, item_package.order_item.merchant_sku)
+            )
+            if product_alias is not None:
+                movements.append(
+                    ProductInventoryMovement(
+                        product_id=product_alias.product_id,
+                        reason=ProductInventoryMovement.Reason.SHIP,
+                        qty_pending_delta=-int(product_alias.sku_quantity)
+                        * int(item_package.quantity),
+                        order_id=order.id,
+                    )
+                )
+        record_inventory_movements(movements)
     except Exception as e:
         raise ParseError(e)
@@ -0,0 +1,156 @@
+import base64
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from selleraxis.core.clients.boto3_client import s3_client
+from selleraxis.core.clients.http_client import get_http_session
+from selleraxis.gs1.exceptions import GS1FullException
+from selleraxis.gs1.models import GS1
+from selleraxis.gs1.services import SSCCAllocator
+from selleraxis.order_package.models import OrderPackage
+from selleraxis.shipments.models import ShipmentStatus
+
+from ..exceptions import ShippingLabelUploadException
+
+LABEL_DOWNLOAD_TIMEOUT = 60
+SHIPPING_BULK_PROGRESS_CACHE_KEY = "shipping_bulk_progress_{}_{}"
+
+# shared by every request, bounds the label transfers of the whole process
+label_executor = ThreadPoolExecutor(
+    max_workers=settings.SHIPPING_LABEL_MAX_WORKERS,
+    thread_name_prefix="shipping_label",
+)
+
+
+def upload_shipping_label(shipment: dict, key_prefix: str) -> str:
+    """Store the carrier label of a shipment on S3 and return its url"""
+    key = key_prefix + "_" + str(uuid.uuid4())
+    if shipment["document_type"] == "base64":
+        response = s3_client.put_object(
+            body=base64.b64decode(shipment["package_document"]),
+            bucket=settings.BUCKET_NAME,
+            key=key,
+            content_type="image/jpeg",
+        )
+    elif shipment["document_type"] == "url":
+        with get_http_session().get(
+            shipment["package_document"], stream=True, timeout=LABEL_DOWNLOAD_TIMEOUT
+        ) as r:
+            response = s3_client.upload_fileobj(
+                r.raw, bucket=settings.BUCKET_NAME, key=key
+            )
+    else:
+        return shipment["package_document"]
+
+    if not response.ok:
+        raise ShippingLabelUploadException
+    return response.data
+
+
+def upload_shipping_labels(shipments: List[dict], key_prefix: str) -> List[str]:
+    """Upload the labels in the label worker pool, urls keep the shipments order"""
+    futures = [
+        label_executor.submit(upload_shipping_label, shipment, key_prefix)
+        for shipment in shipments
+    ]
+    return [future.result() for future in futures]
+
+
+class ShippingBulkProgress:
+    """Per-order progress of a bulk shipping run, readable while it runs.
+
+    The run itself is PENDING until a worker picks it up, RUNNING, then
+    COMPLETED with the result of each order, or FAILED when it crashed.
+    """
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+    def __init__(
+        self,
+        organization_id,
+        progress_id: str,
+        order_ids: List[int],
+        status: str = PENDING,
+    ):
+        self.cache_key = SHIPPING_BULK_PROGRESS_CACHE_KEY.format(
+            organization_id, progress_id
+        )
+        self.data = {
+            "id": progress_id,
+            "status": status,
+            "total": len(order_ids),
+            "completed": 0,
+            "failed": 0,
+            "orders": {order_id: self.PENDING for order_id in order_ids},
+            "results": None,
+        }
+        self._lock = threading.Lock()
+        self.save()
+
+    @classmethod
+    def get(cls, organization_id, progress_id: str) -> dict:
+        return cache.get(
+            SHIPPING_BULK_PROGRESS_CACHE_KEY.format(organization_id, progress_id)
+        )
+
+    def update(self, order_id: int, status: str) -> None:
+        with self._lock:
+            self.data["orders"][order_id] = status
+            if status == self.COMPLETED:
+                self.data["completed"] += 1
+            elif status == self.FAILED:
+                self.data["failed"] += 1
+            self.save()
+
+    def finish(self, results: List[dict] = None) -> None:
+        """Close the run with the result of each order, FAILED without results"""
+        with self._lock:
+            self.data["status"] = self.FAILED if results is None else self.COMPLETED
+            self.data["results"] = results
+            self.save()
+
+    def save(self) -> None:
+        cache.set(self.cache_key, self.data, settings.SHIPPING_PROGRESS_TIMEOUT)
+
+
+def reserve_shipping_sscc(gs1_by_order: Dict[int, GS1]) -> SSCCAllocator:
+    """Allocator holding the SSCC of the unshipped packages of the orders.
+
+    Serial numbers are reserved with one round trip by GS1, however many
+    packages the orders have.
+    """
+    package_counts = dict(
+        OrderPackage.objects.filter(order_id__in=gs1_by_order.keys())
+        .exclude(
+            shipment_packages__status__in=[
+                ShipmentStatus.CREATED,
+                ShipmentStatus.SUBMITTED,
+            ]
+        )
+        .values("order_id")
+        .annotate(count=Count("id"))
+        .values_list("order_id", "count")
+    )
+    gs1s = {}
+    amounts = {}
+    for order_id, gs1 in gs1_by_order.items():
+        gs1s[gs1.pk] = gs1
+        amounts[gs1.pk] = amounts.get(gs1.pk, 0) + package_counts.get(order_id, 0)
+
+    allocator = SSCCAllocator()
+    for gs1_id, amount in amounts.items():
+        try:
+            allocator.reserve(gs1s[gs1_id], amount)
+        except GS1FullException:
+            # the orders that do not fit fail when shipped
+            pass
+    return allocator
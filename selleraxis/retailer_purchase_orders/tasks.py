@@ -0,0 +1,58 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from selleraxis.retailer_purchase_orders.services import order_detail_services
+from selleraxis.retailer_purchase_orders.services.shipping_services import (
+    ShippingBulkProgress,
+)
+from selleraxis.users.models import User
+
+SHIPPING_BULK_RUN_CACHE_KEY = "shipping_bulk_run_{}_{}"
+
+sqs_client = settings.SQS_CLIENT_TASK
+
+
+@sqs_client.task(
+    queue_name=settings.SHIPPING_BULK_SQS_NAME,
+    lazy=True,
+    wait_time_seconds=20,
+    visibility_timeout=settings.SHIPPING_BULK_VISIBILITY_TIMEOUT,
+)
+def ship_bulk_orders(organization_id, user_id, progress_id, data):
+    # the view module imports this task
+    from selleraxis.retailer_purchase_orders.views import ShippingBulkCreateAPIView
+
+    # a redelivered message must not ship the orders twice
+    if not cache.add(
+        SHIPPING_BULK_RUN_CACHE_KEY.format(organization_id, progress_id),
+        True,
+        settings.SHIPPING_PROGRESS_TIMEOUT,
+    ):
+        return
+
+    data = json.loads(data)
+    progress = ShippingBulkProgress(
+        organization_id=organization_id,
+        progress_id=progress_id,
+        order_ids=[item["id"] for item in data if "id" in item],
+        status=ShippingBulkProgress.RUNNING,
+    )
+    try:
+        ShippingBulkCreateAPIView(history_user=User.objects.get(pk=user_id)).ship_bulk(
+            organization_id, data, progress
+        )
+    except Exception:
+        progress.finish()
+        raise
+
+
+@sqs_client.task(
+    queue_name=settings.ORDER_DETAIL_SQS_NAME,
+    lazy=True,
+    wait_time_seconds=20,
+    visibility_timeout=300,
+)
+def build_order_details(order_ids):
+    order_detail_services.build_order_details(json.loads(order_ids))
@@ -0,0 +1,142 @@
+import unittest
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+
+from selleraxis.organizations.models import Organization
+from selleraxis.product_alias.models import ProductAlias
+from selleraxis.product_series.models import ProductSeries
+from selleraxis.products.models import Product
+from selleraxis.retailer_order_batchs.models import RetailerOrderBatch
+from selleraxis.retailer_partners.models import RetailerPartner
+from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
+from selleraxis.retailer_purchase_orders.management.commands.check_query_plans import (
+    explain,
+    get_plan_nodes,
+)
+from selleraxis.retailer_purchase_orders.models import (
+    QueueStatus,
+    RetailerPurchaseOrder,
+)
+from selleraxis.retailer_queue_histories.models import RetailerQueueHistory
+from selleraxis.retailers.models import Retailer
+from selleraxis.users.models import User
+
+ORDER_COUNT = 200
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "query plans are checked on PostgreSQL"
+)
+class CheckQueryPlansTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email="plans@selleraxis.com")
+        cls.organization = Organization.objects.create(name="plans", created_by=user)
+        cls.retailer = Retailer.objects.create(
+            name="plans", organization=cls.organization
+        )
+        partner = RetailerPartner.objects.create(
+            retailer_partner_id="plans", name="plans", retailer=cls.retailer
+        )
+        batch = RetailerOrderBatch.objects.create(
+            batch_number="plans", partner=partner, retailer=cls.retailer
+        )
+        series = ProductSeries.objects.create(
+            series="plans", organization=cls.organization
+        )
+        product = Product.objects.create(
+            sku="plans",
+            unit_of_measure="EA",
+            available="YES",
+            upc="plans",
+            unit_cost=1,
+            qty_on_hand=0,
+            qty_reserve=0,
+            product_series=series,
+        )
+
+        statuses = [status for status, _ in QueueStatus.choices]
+        orders = RetailerPurchaseOrder.objects.bulk_create(
+            RetailerPurchaseOrder(
+                retailer_purchase_order_id=str(index),
+                transaction_id=str(index),
+                senders_id_for_receiver="plans",
+                po_number=str(index),
+                shipping_code="plans",
+                sales_division="plans",
+                vendor_warehouse_id="plans",
+                cust_order_number=str(index),
+                po_hdr_data={},
+                control_number=str(index),
+                buying_contract="plans",
+                batch=batch,
+                status=statuses[index % len(statuses)],
+            )
+            for index in range(ORDER_COUNT)
+        )
+        RetailerPurchaseOrderItem.objects.bulk_create(
+            RetailerPurchaseOrderItem(
+                retailer_purchase_order_item_id=str(index),
+                order_line_number="1",
+                merchant_line_number="1",
+                qty_ordered=1,
+                unit_of_measure="EA",
+                upc="plans",
+                description="plans",
+                description_2="plans",
+                merchant_sku=str(index),
+                vendor_sku=str(index),
+                unit_cost=1,
+                shipping_code="plans",
+                expected_ship_date="plans",
+                order=order,
+            )
+            for index, order in enumerate(orders)
+        )
+        ProductAlias.objects.bulk_create(
+            ProductAlias(
+                sku=str(index),
+                merchant_sku=str(index),
+                vendor_sku=str(index),
+                product=product,
+                retailer=cls.retailer,
+            )
+            for index in range(ORDER_COUNT)
+        )
+        RetailerQueueHistory.objects.bulk_create(
+            RetailerQueueHistory(
+                type="plans",
+                label=RetailerQueueHistory.Label.INVENTORY,
+                retailer=cls.retailer,
+            )
+            for _ in range(ORDER_COUNT)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_hot_queries_use_an_index(self):
+        stdout = StringIO()
+        call_command(
+            "check_query_plans",
+            organization=self.organization.pk,
+            retailer=self.retailer.pk,
+            stdout=stdout,
+        )
+        self.assertNotIn("sequential scan", stdout.getvalue())
+
+    def test_sequential_scan_is_found(self):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = explain(RetailerPurchaseOrder.objects.filter(sales_division="plans"))
+        self.assertIn(
+            RetailerPurchaseOrder._meta.db_table,
+            [
+                node.get("Relation Name")
+                for node in get_plan_nodes(plan)
+                if node["Node Type"] == "Seq Scan"
+            ],
+        )
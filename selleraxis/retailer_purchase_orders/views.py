@@ -1,17 +1,17 @@
 import asyncio
-import base64
-import copy
 import datetime
+import json
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
-import boto3
 import pytz
-import requests
 from asgiref.sync import async_to_sync, sync_to_async
 from django.conf import settings
-from django.db.models import Count, F, Prefetch
+from django.db import connections
+from django.db.models import Prefetch
 from django.forms import model_to_dict
+from django.http import Http404, StreamingHttpResponse
 from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.timezone import get_default_timezone
 from django_filters.rest_framework import DjangoFilterBackend
@@ -32,23 +32,27 @@ from rest_framework.generics import (
 )
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_202_ACCEPTED
 from rest_framework.views import APIView
 
 from selleraxis.core.clients.boto3_client import s3_client
+from selleraxis.core.clients.sqs_outbox import sqs_outbox
 from selleraxis.core.pagination import Pagination
 from selleraxis.core.permissions import check_permission
+from selleraxis.core.utils.xsd_to_xml import upload_xml_files
+from selleraxis.core.views import StreamingListMixin
 from selleraxis.getting_order_histories.models import GettingOrderHistory
 from selleraxis.getting_order_histories.services import get_next_execution_time
 from selleraxis.organizations.models import Organization
 from selleraxis.permissions.models import Permissions
 from selleraxis.product_alias.models import ProductAlias
-from selleraxis.products.models import Product
 from selleraxis.retailer_carriers.models import RetailerCarrier
+from selleraxis.retailer_commercehub_sftp.models import RetailerCommercehubSFTP
 from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
 from selleraxis.retailer_purchase_orders.models import (
     QueueStatus,
     RetailerPurchaseOrder,
+    invalidate_order_details,
 )
 from selleraxis.retailer_purchase_orders.serializers import (
     BackorderInputSerializer,
@@ -77,6 +81,10 @@ from selleraxis.retailer_warehouse_products.serializers import (
 from selleraxis.retailer_warehouses.models import RetailerWarehouse
 from selleraxis.retailers.models import Retailer
 from selleraxis.service_api.models import ServiceAPI, ServiceAPIAction
+from selleraxis.service_api.services import (
+    get_carrier_access_token,
+    invalidate_carrier_access_token,
+)
 from selleraxis.shipments.models import Shipment, ShipmentStatus
 from selleraxis.shipping_service_types.models import ShippingServiceType
 from selleraxis.users.serializers import UserSerializer
@@ -90,7 +98,6 @@ from ..retailer_purchase_order_items.serializers import (
     RetailerPurchaseOrderItemSerializer,
 )
 from .exceptions import (
-    AddressValidationFailed,
     CarrierNotFound,
     CarrierShipperNotFound,
     DailyPicklistInvalidDate,
@@ -105,14 +112,29 @@ from .exceptions import (
     XMLSFTPUploadException,
 )
 from .services.acknowledge_xml_handler import AcknowledgeXMLHandler
+from .services.address_validation_services import validate_address, validate_addresses
+from .services.backfill_services import copy_ship_from
 from .services.backorder_xml_handler import BackorderXMLHandler
 from .services.cancel_xml_handler import CancelXMLHandler
 from .services.confirmation_xml_handler import ConfirmationXMLHandler
+from .services.order_detail_services import get_order_detail
+from .services.picklist_services import (
+    build_picklist,
+    get_picklist_rows,
+    stream_picklist_csv,
+)
+from .services.preload_services import preload_purchase_orders
 from .services.services import (
     change_product_quantity_when_canceling,
     change_product_quantity_when_ship,
     package_divide_service,
 )
+from .services.shipping_services import (
+    ShippingBulkProgress,
+    reserve_shipping_sscc,
+    upload_shipping_labels,
+)
+from .tasks import ship_bulk_orders
 
 
 class SearchRetailerPurchaseOrderView(ListAPIView):
@@ -140,7 +162,7 @@ class SearchRetailerPurchaseOrderView(ListAPIView):
             return SearchRetailerPurchaseOrderSerializer
 
 
-class ListCreateRetailerPurchaseOrderView(ListCreateAPIView):
+class ListCreateRetailerPurchaseOrderView(StreamingListMixin, ListCreateAPIView):
     model = RetailerPurchaseOrder
     queryset = RetailerPurchaseOrder.objects.all()
     permission_classes = [IsAuthenticated]
@@ -191,13 +213,20 @@ class ListCreateRetailerPurchaseOrderView(ListCreateAPIView):
         )
 
     def get(self, request, *args, **kwargs):
-        data = self.list(request, *args, **kwargs).data
+        response = self.list(request, *args, **kwargs)
+        if isinstance(response, StreamingHttpResponse):
+            return response
+        data = response.data
         if data.get("order_returns"):
             data["order_returns"]["notes"] = sorted(
                 data["order_returns"]["notes"],
                 key=lambda x: x["created_at"],
                 reverse=True,
             )
+        data.update(self.get_stream_extra_data())
+        return Response(data)
+
+    def get_stream_extra_data(self) -> dict:
         getting_order_history = (
             GettingOrderHistory.objects.filter(
                 organization=self.request.headers.get("organization")
@@ -205,15 +234,14 @@ class ListCreateRetailerPurchaseOrderView(ListCreateAPIView):
             .order_by("-created_at")
             .first()
         )
-        data["last_excution"] = (
-            getting_order_history.created_at.astimezone(pytz.utc)
+        return {
+            "last_excution": getting_order_history.created_at.astimezone(pytz.utc)
             if getting_order_history
-            else None
-        )
-        data["next_excution"] = get_next_execution_time(
-            self.request.headers.get("organization")
-        )
-        return Response(data)
+            else None,
+            "next_excution": get_next_execution_time(
+                self.request.headers.get("organization")
+            ),
+        }
 
     def check_permissions(self, _):
         match self.request.method:
@@ -258,21 +286,18 @@ class UpdateDeleteRetailerPurchaseOrderView(RetrieveUpdateDestroyAPIView):
 
     def get(self, request, *args, **kwargs):
         instance = self.get_object()
-        package_divide_data = package_divide_service(
-            reset=False,
-            retailer_purchase_order=instance,
-            retailer_id=instance.batch.retailer_id,
-        )
-        if package_divide_data.get("status") == 200:
-            instance.refresh_from_db()
-        error_message = None
+        detail, detail_pending = get_order_detail(instance)
+        if detail["order_packages"] and not instance.order_packages.all():
+            # the packages were divided while building the detail
+            instance = self.get_object()
+        preload_purchase_orders([instance])
         serializer = CustomReadRetailerPurchaseOrderSerializer(instance)
         # add status history of order
         status_history = []
         order_history = []
 
         for order_history_item in (
-            instance.order_history.all()
+            instance.order_history.select_related("user", "queue_history")
             .distinct("status", "user", "updated_at")
             .order_by("-updated_at")
         ):
@@ -298,9 +323,13 @@ class UpdateDeleteRetailerPurchaseOrderView(RetrieveUpdateDestroyAPIView):
         result = serializer.data
         items = result.get("items")
         mappings = {item.get("merchant_sku"): item for item in items}
-        product_aliases = ProductAlias.objects.filter(
-            merchant_sku__in=mappings.keys(),
-            retailer_id=instance.batch.retailer_id,
+        product_aliases = (
+            ProductAlias.objects.filter(
+                merchant_sku__in=mappings.keys(),
+                retailer_id=instance.batch.retailer_id,
+            )
+            .select_related("product")
+            .prefetch_related("retailer_product_aliases")
         )
         for product_alias in product_aliases:
             if mappings.get(product_alias.merchant_sku):
@@ -311,159 +340,70 @@ class UpdateDeleteRetailerPurchaseOrderView(RetrieveUpdateDestroyAPIView):
         warehouses = ItemRetailerWarehouseSerializer(
             RetailerWarehouse.objects.filter(
                 organization=self.request.headers.get("organization")
-            ),
+            ).prefetch_related("retailer_warehouse_products"),
             many=True,
         ).data
-        items = result["items"]
         for item in items:
             if item["product_alias"]:
-                item["product_alias"]["warehouse"] = []
-                if item["product_alias"]:
-                    for warehouse in warehouses:
-                        for retailer_warehouse_product_alias in item["product_alias"][
-                            "retailer_product_aliases"
-                        ]:
-                            for retailer_warehouse_product_warehouse in warehouse[
-                                "retailer_warehouse_products"
-                            ]:
-                                if (
-                                    retailer_warehouse_product_alias
-                                    == retailer_warehouse_product_warehouse
-                                ):
-                                    if (
-                                        warehouse
-                                        not in item["product_alias"]["warehouse"]
-                                    ):
-                                        item["product_alias"]["warehouse"].append(
-                                            warehouse
-                                        )
+                retailer_product_alias_ids = {
+                    retailer_product_alias["id"]
+                    for retailer_product_alias in item["product_alias"][
+                        "retailer_product_aliases"
+                    ]
+                }
+                item["product_alias"]["warehouse"] = [
+                    warehouse
+                    for warehouse in warehouses
+                    if any(
+                        retailer_warehouse_product["id"] in retailer_product_alias_ids
+                        for retailer_warehouse_product in warehouse[
+                            "retailer_warehouse_products"
+                        ]
+                    )
+                ]
 
         # list all status for fe handle
         result["status_history"] = status_history
         # list order history with xml url
         result["order_history"] = order_history
 
-        # update package divide result
-        if package_divide_data.get("status") != 200:
-            error_data = package_divide_data.get("data")
-            error_message = error_data.get("message")
-        else:
-            for order_package_item in result.get("order_packages"):
-                for divide_data in package_divide_data.get("data"):
-                    if order_package_item.get("id") == divide_data.get(
-                        "order_package_id"
-                    ):
-                        order_package_item["box_max_quantity"] = divide_data.get(
-                            "max_quantity"
-                        )
+        # apply the package divide, remain and ship quantity of the detail
+        item_packages = {}
         for order_package_item in result.get("order_packages"):
-            remain = order_package_item.get("box_max_quantity", 0)
-            if remain > 0:
-                for order_item in order_package_item.get("order_item_packages"):
-                    remain = remain - order_item.get("quantity") * order_item.get(
-                        "retailer_purchase_order_item"
-                    ).get("product_alias").get("sku_quantity")
-            order_package_item["remain"] = remain
+            order_package_item.update(
+                detail["order_packages"].get(str(order_package_item.get("id")), {})
+            )
+            order_package_item.setdefault("remain", 0)
+            for order_item_package in order_package_item.get("order_item_packages"):
+                item_packages[order_item_package.get("id")] = order_item_package
         result.get("order_packages").sort(key=lambda x: x["updated_at"], reverse=False)
         for package in result.get("order_packages"):
             package.get("shipment_packages").sort(
                 key=lambda x: x["updated_at"], reverse=False
             )
-        result["package_divide_error"] = error_message
-        result["list_box_valid"] = package_divide_data.get("list_box_valid", [])
-        result.get("list_box_valid").sort(
-            key=lambda x: x["max_quantity"], reverse=False
-        )
-        result["order_full_divide"] = True
+        result["package_divide_error"] = detail["package_divide_error"]
+        result["list_box_valid"] = detail["list_box_valid"]
+        result["order_full_divide"] = detail["order_full_divide"]
         for item in result.get("items"):
-            ship_qty_ordered = 0
-            item["ship_qty_ordered"] = 0
-            for order_package in result.get("order_packages"):
-                # check package shipped or not
-                is_shipped = False
-                if (
-                    order_package.get("shipment_packages") is not None
-                    and len(order_package.get("shipment_packages")) > 0
-                ):
-                    for shipment_package in order_package.get("shipment_packages"):
-                        # if shipment status is CREATED or SUBMITTED package will be shipped
-                        if shipment_package.get("status") in [
-                            ShipmentStatus.CREATED,
-                            ShipmentStatus.SUBMITTED,
-                        ]:
-                            is_shipped = True
-                            break
-                # if package shipped calculate ship qty of item, else ship qty = 0
-                if is_shipped:
-                    for order_item_package in order_package.get("order_item_packages"):
-                        retailer_purchase_order_item = order_item_package.get(
-                            "retailer_purchase_order_item"
-                        )
-                        if retailer_purchase_order_item is not None:
-                            if retailer_purchase_order_item.get("id") == item.get("id"):
-                                ship_qty_ordered = (
-                                    ship_qty_ordered
-                                    + order_item_package.get("quantity")
-                                )
-            item["ship_qty_ordered"] = ship_qty_ordered
-            if ship_qty_ordered != item.get("qty_ordered"):
-                result["order_full_divide"] = False
+            item["ship_qty_ordered"] = detail["ship_qty_ordered"].get(
+                str(item.get("id")), 0
+            )
         print_data = []
-        for n in range(1, instance.ship_times + 1):
-            list_package = []
+        for ship_data in detail["print_data"]:
             list_item = []
-            list_item_id = []
-            for order_package_item in result.get("order_packages"):
-                # check package shipped or not
-                is_shipped = False
-                for shipment_package in order_package_item.get("shipment_packages"):
-                    # if shipment status is CREATED or SUBMITTED package will be shipped
-                    if shipment_package.get("status") in [
-                        ShipmentStatus.CREATED,
-                        ShipmentStatus.SUBMITTED,
-                    ]:
-                        is_shipped = True
-                        break
-                # if package shipped calculate ship qty of item, else ship qty = 0
-                if is_shipped:
-                    if len(order_package_item.get("shipment_packages")) > 0:
-                        for shipment_package in order_package_item.get(
-                            "shipment_packages"
-                        ):
-                            # if shipment status is CREATED or SUBMITTED package will be shipped
-                            if shipment_package.get("status") in [
-                                ShipmentStatus.CREATED,
-                                ShipmentStatus.SUBMITTED,
-                            ]:
-                                package_ship_time = shipment_package.get("ship_times")
-                                if int(package_ship_time) == int(n):
-                                    list_package.append(order_package_item.get("id"))
-                                    for order_item_package in order_package_item.get(
-                                        "order_item_packages"
-                                    ):
-                                        if (
-                                            order_item_package.get(
-                                                "retailer_purchase_order_item"
-                                            ).get("id")
-                                            not in list_item_id
-                                        ):
-                                            list_item_id.append(
-                                                order_item_package.get(
-                                                    "retailer_purchase_order_item"
-                                                ).get("id")
-                                            )
-                                            ship_item = order_item_package.get(
-                                                "retailer_purchase_order_item"
-                                            )
-                                            ship_item[
-                                                "ship_qty_ordered"
-                                            ] = order_item_package.get("quantity")
-                                            list_item.append(ship_item)
-            if len(list_package) > 0:
-                print_data.append(
-                    {"list_package": list_package, "list_item": list_item}
-                )
+            for item_package_id in ship_data["list_item_package"]:
+                order_item_package = item_packages.get(item_package_id)
+                if order_item_package is None:
+                    continue
+                ship_item = order_item_package.get("retailer_purchase_order_item")
+                ship_item["ship_qty_ordered"] = order_item_package.get("quantity")
+                list_item.append(ship_item)
+            print_data.append(
+                {"list_package": ship_data["list_package"], "list_item": list_item}
+            )
         result["print_data"] = print_data
+        # the package divide is being built by the task worker
+        result["detail_pending"] = detail_pending
 
         return Response(data=result, status=status.HTTP_200_OK)
 
@@ -515,13 +455,9 @@ class RetailerPurchaseOrderXMLAPIView(APIView):
             label=RetailerQueueHistory.Label.ACKNOWLEDGMENT,
         )
 
-    def upload_to_s3(self, handler_obj, queue_history_obj):
-        s3_response = s3_client.upload_file(
-            filename=handler_obj.localpath, bucket=settings.BUCKET_NAME
-        )
-
-        # remove XML file on localhost path
-        handler_obj.remove_xml_file_localpath()
+    def upload_to_s3(self, handler_obj, queue_history_obj, s3_response=None):
+        if s3_response is None:
+            s3_response = self.archive_to_s3(handler_obj)
 
         if s3_response.ok:
             self.update_queue_history(
@@ -533,6 +469,15 @@ class RetailerPurchaseOrderXMLAPIView(APIView):
 
         self.update_queue_history(queue_history_obj, RetailerQueueHistory.Status.FAILED)
 
+    def archive_to_s3(self, handler_obj):
+        s3_response = s3_client.upload_file(
+            filename=handler_obj.localpath, bucket=settings.BUCKET_NAME
+        )
+
+        # remove XML file on localhost path
+        handler_obj.remove_xml_file_localpath()
+        return s3_response
+
     def update_queue_history(
         self, queue_history_obj, history_status: str, result_url=None
     ):
@@ -570,8 +515,26 @@ class RetailerPurchaseOrderAcknowledgeCreateAPIView(RetailerPurchaseOrderXMLAPIV
         serializer_order = RetailerPurchaseOrderAcknowledgeSerializer(order)
         ack_obj = AcknowledgeXMLHandler(data=serializer_order.data)
         file, file_created = ack_obj.upload_xml_file(False)
-        sftp_id = ack_obj.commercehub_sftp.id
-        retailer_id = ack_obj.commercehub_sftp.retailer_id
+        return self.get_acknowledge_response(
+            order, queue_history_obj, ack_obj, file, file_created
+        )
+
+    def get_acknowledge_response(
+        self,
+        order: RetailerPurchaseOrder,
+        queue_history_obj: RetailerQueueHistory,
+        ack_obj: AcknowledgeXMLHandler,
+        file,
+        file_created: bool,
+        s3_response=None,
+    ) -> dict:
+        commercehub_sftp = ack_obj.commercehub_sftp
+        sftp_id = commercehub_sftp.id if commercehub_sftp else None
+        retailer_id = (
+            commercehub_sftp.retailer_id
+            if commercehub_sftp
+            else order.batch.retailer_id
+        )
 
         error = XMLSFTPUploadException()
         response_data = {
@@ -583,7 +546,9 @@ class RetailerPurchaseOrderAcknowledgeCreateAPIView(RetailerPurchaseOrderXMLAPIV
         }
         if file_created:
             s3_file = self.upload_to_s3(
-                handler_obj=ack_obj, queue_history_obj=queue_history_obj
+                handler_obj=ack_obj,
+                queue_history_obj=queue_history_obj,
+                s3_response=s3_response,
             )
             if s3_file:
                 data = {"id": order.pk, "file": s3_file}
@@ -737,35 +702,74 @@ class RetailerPurchaseOrderAcknowledgeBulkCreateAPIView(
         responses = self.bulk_create(purchase_orders=list(purchase_orders))
         return Response(data=responses, status=HTTP_201_CREATED)
 
-    @async_to_sync
-    async def bulk_create(
-        self, purchase_orders: List[RetailerPurchaseOrder]
-    ) -> List[dict]:
-        tasks = []
-        for purchase_order in purchase_orders:
-            tasks.append(sync_to_async(self.create_task)(purchase_order))
+    def bulk_create(self, purchase_orders: List[RetailerPurchaseOrder]) -> List[dict]:
+        """Acknowledge the orders over one SFTP connection by retailer.
+
+        The files are uploaded to SFTP together, then archived to S3 in
+        parallel, before the queue histories and orders are updated.
+        """
+        commercehub_sftps = {
+            commercehub_sftp.retailer_id: commercehub_sftp
+            for commercehub_sftp in RetailerCommercehubSFTP.objects.filter(
+                retailer_id__in={order.batch.retailer_id for order in purchase_orders}
+            ).order_by("id")
+        }
+        queue_history_objs = [
+            self.create_queue_history(
+                order=purchase_order, label=RetailerQueueHistory.Label.ACKNOWLEDGMENT
+            )
+            for purchase_order in purchase_orders
+        ]
+        ack_objs = [
+            AcknowledgeXMLHandler(
+                data=RetailerPurchaseOrderAcknowledgeSerializer(purchase_order).data,
+                commercehub_sftp=commercehub_sftps.get(
+                    purchase_order.batch.retailer_id
+                ),
+            )
+            for purchase_order in purchase_orders
+        ]
+        uploads = upload_xml_files(ack_objs)
 
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-        return responses
+        uploaded_ack_objs = [
+            ack_obj
+            for ack_obj, (_, file_created) in zip(ack_objs, uploads)
+            if file_created
+        ]
+        with ThreadPoolExecutor(max_workers=settings.SFTP_UPLOAD_CHANNELS) as executor:
+            s3_responses = dict(
+                zip(
+                    map(id, uploaded_ack_objs),
+                    executor.map(self.archive_to_s3, uploaded_ack_objs),
+                )
+            )
 
-    def create_task(self, purchase_order: RetailerPurchaseOrder) -> dict:
-        queue_history_obj = self.create_queue_history(
-            order=purchase_order, label=RetailerQueueHistory.Label.ACKNOWLEDGMENT
-        )
-        response_data = self.create_acknowledge(purchase_order, queue_history_obj)
-        if response_data["status"] == RetailerQueueHistory.Status.COMPLETED.value:
-            purchase_order.status = QueueStatus.Acknowledged.value
-            purchase_order.save()
-            # create order history
-            new_order_history = RetailerPurchaseOrderHistory(
-                status=purchase_order.status,
-                order_id=purchase_order.id,
-                user=self.request.user,
-                queue_history_id=queue_history_obj.id,
+        responses = []
+        for purchase_order, queue_history_obj, ack_obj, (file, file_created) in zip(
+            purchase_orders, queue_history_objs, ack_objs, uploads
+        ):
+            response_data = self.get_acknowledge_response(
+                purchase_order,
+                queue_history_obj,
+                ack_obj,
+                file,
+                file_created,
+                s3_responses.get(id(ack_obj)),
             )
-            new_order_history.save()
+            if response_data["status"] == RetailerQueueHistory.Status.COMPLETED.value:
+                purchase_order.status = QueueStatus.Acknowledged.value
+                purchase_order.save()
+                # create order history
+                new_order_history = RetailerPurchaseOrderHistory(
+                    status=purchase_order.status,
+                    order_id=purchase_order.id,
+                    user=self.request.user,
+                    queue_history_id=queue_history_obj.id,
+                )
+                new_order_history.save()
+            responses.append(response_data)
 
-        return response_data
+        return responses
 
 
 class RetailerPurchaseOrderShipmentConfirmationCreateAPIView(
@@ -855,6 +859,7 @@ class RetailerPurchaseOrderShipmentConfirmationCreateAPIView(
                 package__id__in=[package.id for package in list_order_package_shipped],
                 status=ShipmentStatus.CREATED,
             ).update(status=ShipmentStatus.SUBMITTED)
+            invalidate_order_details(order_id=order.id)
 
             return {"id": order.pk, "file": s3_file}
 
@@ -880,6 +885,7 @@ class RetailerPurchaseOrderShipmentCancelCreateAPIView(RetailerPurchaseOrderXMLA
         RetailerPurchaseOrderItem.objects.bulk_update(
             objs, ["cancel_reason", "qty_ordered"]
         )
+        invalidate_order_details(order_id__in={obj.order_id for obj in objs})
 
         order = get_object_or_404(self.get_queryset(), id=pk)
         if order.status == QueueStatus.Shipped:
@@ -1173,6 +1179,7 @@ class ShipToAddressValidationView(CreateAPIView):
         verified_address: dict,
         purchase_order: RetailerPurchaseOrder,
         carrier: RetailerCarrier,
+        address_validation_response: dict = None,
     ) -> Address:
         if carrier is None:
             ShipToAddressValidationView.update_status_verified_address(
@@ -1181,68 +1188,17 @@ class ShipToAddressValidationView(CreateAPIView):
             )
             raise CarrierNotFound
 
-        origin_string = f"{carrier.client_id}:{carrier.client_secret}"
-        to_binary = origin_string.encode("UTF-8")
-        basic_auth = (base64.b64encode(to_binary)).decode("ascii")
-
-        login_api = ServiceAPI.objects.filter(
-            service_id=carrier.service, action=ServiceAPIAction.LOGIN
-        ).first()
-
-        try:
-            login_response = login_api.request(
-                {
-                    "client_id": carrier.client_id,
-                    "client_secret": carrier.client_secret,
-                    "basic_auth": basic_auth,
-                }
-            )
-        except KeyError:
-            ShipToAddressValidationView.update_status_verified_address(
-                purchase_order.verified_ship_to,
-                Address.Status.FAILED.value,
-            )
-            raise ServiceAPILoginFailed
-
-        address_validation_data = copy.deepcopy(verified_address)
-        address_validation_data["access_token"] = login_response["access_token"]
-
-        address_validation_api = ServiceAPI.objects.filter(
-            service_id=carrier.service, action=ServiceAPIAction.ADDRESS_VALIDATION
-        ).first()
-
-        try:
-            address_validation_response = address_validation_api.request(
-                address_validation_data
-            )
-            if "city" in address_validation_response:
-                address_validation_response.pop("city")
-        except KeyError:
-            ShipToAddressValidationView.update_status_verified_address(
-                purchase_order.verified_ship_to,
-                Address.Status.FAILED.value,
-            )
-            raise AddressValidationFailed
-
-        except Exception as e:
-            ShipToAddressValidationView.update_status_verified_address(
-                purchase_order.verified_ship_to,
-                Address.Status.FAILED.value,
-            )
-            if isinstance(e, APIException):
-                raise e
-
-            raise AddressValidationFailed
-
-        if (
-            "address_1" not in address_validation_response
-            and str(address_validation_response.get("status")).lower() != "success"
-        ):
-            ShipToAddressValidationView.update_status_verified_address(
-                purchase_order.verified_ship_to,
-                Address.Status.FAILED.value,
-            )
-            raise AddressValidationFailed
+        if address_validation_response is None:
+            try:
+                address_validation_response = validate_address(
+                    carrier, verified_address
+                )
+            except APIException:
+                ShipToAddressValidationView.update_status_verified_address(
+                    purchase_order.verified_ship_to,
+                    Address.Status.FAILED.value,
+                )
+                raise
 
         instance = purchase_order.verified_ship_to
 
@@ -1340,7 +1296,7 @@ class ShipToAddressValidationBulkCreateAPIView(ShipToAddressValidationView):
             "ship_to", "verified_ship_to", "batch__retailer__default_carrier"
         )
 
-        tasks = []
+        verified_addresses = []
         for purchase_order in purchase_orders:
             if isinstance(purchase_order.verified_ship_to, Address):
                 verified_ship_to = purchase_order.verified_ship_to
@@ -1356,15 +1312,46 @@ class ShipToAddressValidationBulkCreateAPIView(ShipToAddressValidationView):
                 purchase_order.verified_ship_to = verified_ship_to
                 purchase_order.save()
 
-            tasks.append(
-                sync_to_async(ShipToAddressValidationView.create_verified_address)(
-                    model_to_dict(purchase_order.verified_ship_to),
-                    purchase_order,
-                    purchase_order.batch.retailer.default_carrier,
-                )
+            verified_addresses.append(model_to_dict(purchase_order.verified_ship_to))
+
+        # orders shipped to the same address are validated once
+        carriers = [
+            purchase_order.batch.retailer.default_carrier
+            for purchase_order in purchase_orders
+        ]
+        validations = iter(
+            validate_addresses(
+                [
+                    (carrier, verified_address)
+                    for carrier, verified_address in zip(carriers, verified_addresses)
+                    if carrier is not None
+                ]
             )
+        )
+        responses = []
+        for purchase_order, verified_address, carrier in zip(
+            purchase_orders, verified_addresses, carriers
+        ):
+            validation = next(validations) if carrier is not None else None
+            try:
+                if isinstance(validation, Exception):
+                    ShipToAddressValidationView.update_status_verified_address(
+                        purchase_order.verified_ship_to,
+                        Address.Status.FAILED.value,
+                    )
+                    raise validation
+
+                responses.append(
+                    ShipToAddressValidationView.create_verified_address(
+                        verified_address, purchase_order, carrier, validation
+                    )
+                )
+            except APIException as e:
+                responses.append(e)
+            except Exception as e:
+                # a failing order does not fail the others
+                responses.append(APIException(str(e)))
 
-        responses = self.bulk_create(tasks=tasks)
         response_data = []
         for i, response in enumerate(responses):
             data = {
@@ -1387,16 +1374,15 @@ class ShipToAddressValidationBulkCreateAPIView(ShipToAddressValidationView):
 
         return Response(data=response_data, status=HTTP_201_CREATED)
 
-    @async_to_sync
-    async def bulk_create(self, tasks) -> List[dict]:
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-        return responses
-
 
 class ShippingView(APIView):
     permission_classes = [IsAuthenticated]
     queryset = RetailerPurchaseOrder.objects.all()
     serializer_class = ReadRetailerPurchaseOrderSerializer()
+    # set by bulk shipping, shared by its workers
+    sscc_allocator = None
+    # author of the order histories when shipping outside of a request
+    history_user = None
 
     def get_serializer(self, *args, **kwargs):
         return ShippingSerializer(*args, **kwargs)
@@ -1453,6 +1439,11 @@ class ShippingView(APIView):
         if gs1 is not None:
             order.gs1 = gs1
 
+        if order.ship_from is None and order.batch.retailer.ship_from_address:
+            ship_from = copy_ship_from(order.batch.retailer.ship_from_address)
+            ship_from.save()
+            order.ship_from = ship_from
+
         if order.verified_ship_to is None:
             verified_ship_to = ShipToAddressValidationView.ship_to_2_verified_ship_to(
                 order.ship_to,
@@ -1488,22 +1479,9 @@ class ShippingView(APIView):
             except Exception:
                 pass
 
-        origin_string = f"{order.carrier.client_id}:{order.carrier.client_secret}"
-        to_binary = origin_string.encode("UTF-8")
-        basic_auth = (base64.b64encode(to_binary)).decode("ascii")
-
-        login_api = ServiceAPI.objects.filter(
-            service_id=order.carrier.service, action=ServiceAPIAction.LOGIN
-        ).first()
-
         try:
-            login_response = login_api.request(
-                {
-                    "client_id": order.carrier.client_id,
-                    "client_secret": order.carrier.client_secret,
-                    "basic_auth": basic_auth,
-                },
-                is_sandbox=is_sandbox,
+            access_token = get_carrier_access_token(
+                order.carrier, is_sandbox=is_sandbox
             )
         except KeyError:
             raise ServiceAPILoginFailed
@@ -1516,7 +1494,7 @@ class ShippingView(APIView):
             raise ShippingServiceTypeNotFound
 
         shipping_data = ShipPurchaseOrderSerializer(order).data
-        shipping_data["access_token"] = login_response["access_token"]
+        shipping_data["access_token"] = access_token
         shipping_data["datetime"] = datetime
 
         shipping_api = ServiceAPI.objects.filter(
@@ -1529,6 +1507,10 @@ class ShippingView(APIView):
             )
         except KeyError:
             raise ServiceAPIRequestFailed
+        except APIException:
+            # the token may have been revoked, log in again on the next call
+            invalidate_carrier_access_token(order.carrier, is_sandbox=is_sandbox)
+            raise
 
         shipment_list = self.create_shipment(
             serializer=serializer_order,
@@ -1584,7 +1566,9 @@ class ShippingView(APIView):
         order.save()
         # create order history
         new_order_history = RetailerPurchaseOrderHistory(
-            status=order.status, order_id=order.id, user=self.request.user
+            status=order.status,
+            order_id=order.id,
+            user=self.history_user or self.request.user,
         )
         new_order_history.save()
 
@@ -1609,8 +1593,9 @@ class ShippingView(APIView):
             "list_item": list_item,
         }
 
-        result_serializer_order = ReadRetailerPurchaseOrderSerializer(order)
-        change_product_quantity_when_ship(result_serializer_order, shipment_list_serial)
+        change_product_quantity_when_ship(
+            order, [shipment.package_id for shipment in shipment_list]
+        )
 
         return Response(
             data=response_result,
@@ -1626,44 +1611,22 @@ class ShippingView(APIView):
     ) -> List:
         sscc_list = None
         if purchase_order.gs1:
-            sscc_list = purchase_order.gs1.get_sscc(len(shipping_response["shipments"]))
+            amount = len(shipping_response["shipments"])
+            if self.sscc_allocator is not None:
+                sscc_list = self.sscc_allocator.get_sscc(purchase_order.gs1, amount)
+            else:
+                sscc_list = purchase_order.gs1.get_sscc(amount)
         if purchase_order.carrier is None:
             raise CarrierNotFound
 
+        # labels are transferred in the shared label worker pool
+        package_documents = upload_shipping_labels(
+            shipping_response["shipments"],
+            key_prefix=serializer.data["carrier"]["service"]["name"],
+        )
         shipment_list = []
         for i, shipment in enumerate(shipping_response["shipments"]):
-            package_document = shipment["package_document"]
-            if shipment["document_type"] == "base64":
-                key = (
-                    serializer.data["carrier"]["service"]["name"]
-                    + "_"
-                    + str(uuid.uuid4())
-                )
-                imgdata = base64.b64decode(shipment["package_document"])
-                s3 = boto3.client("s3")
-                s3.put_object(
-                    Bucket=settings.BUCKET_NAME,
-                    Key=key,
-                    Body=imgdata,
-                    ContentType="image/jpeg",
-                )
-                package_document = (
-                    f"https://{settings.BUCKET_NAME}.s3.amazonaws.com/{key}"
-                )
-            if shipment["document_type"] == "url":
-                key = (
-                    serializer.data["carrier"]["service"]["name"]
-                    + "_"
-                    + str(uuid.uuid4())
-                )
-                r = requests.get(shipment["package_document"], stream=True)
-                session = boto3.Session()
-                s3 = session.resource("s3")
-                bucket = s3.Bucket(settings.BUCKET_NAME)
-                bucket.upload_fileobj(r.raw, key)
-                package_document = (
-                    f"https://{settings.BUCKET_NAME}.s3.amazonaws.com/{key}"
-                )
+            package_document = package_documents[i]
             shipment_list.append(
                 Shipment(
                     status=ShipmentStatus.CREATED,
@@ -1683,6 +1646,7 @@ class ShippingView(APIView):
                 )
             )
         Shipment.objects.bulk_create(shipment_list)
+        invalidate_order_details(order_id=purchase_order.id)
         return shipment_list
 
 
@@ -1690,6 +1654,17 @@ class ShippingBulkCreateAPIView(ShippingView):
     def get_serializer(self, *args, **kwargs):
         return ShippingBulkSerializer(*args, **kwargs)
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "progress_id",
+                openapi.IN_QUERY,
+                description="Client generated id of the run, generated when missing. "
+                "Per-order progress and results are readable at ship/bulk/progress/<progress_id>",
+                type=openapi.TYPE_STRING,
+            )
+        ]
+    )
     def post(self, request, *args, **kwargs):
         if isinstance(request.data, dict):
             serializer = ShippingSerializer(data=request.data)
@@ -1697,19 +1672,40 @@ class ShippingBulkCreateAPIView(ShippingView):
             order = get_object_or_404(self.get_queryset(), id=request.data["id"])
             return self.create_shipping(order=order, serializer=serializer)
 
-        data_serializers = {data["id"]: data for data in request.data if "id" in data}
-        purchase_orders = (
+        organization_id = self.request.headers.get("organization")
+        order_ids = [data["id"] for data in request.data if "id" in data]
+        if (
+            len(request.data)
+            != self.get_bulk_queryset(organization_id, order_ids).count()
+        ):
+            raise ParseError("Purchase order ids doesn't match!")
+
+        # labels are fetched and uploaded by the task worker, not the request
+        progress_id = request.query_params.get("progress_id") or uuid.uuid4().hex
+        if ShippingBulkProgress.get(organization_id, progress_id) is not None:
+            raise ParseError("Progress id is already used!")
+        progress = ShippingBulkProgress(
+            organization_id=organization_id,
+            progress_id=progress_id,
+            order_ids=order_ids,
+        )
+        ship_bulk_orders.trigger(
+            organization_id, request.user.pk, progress_id, json.dumps(request.data)
+        )
+        return Response(data=progress.data, status=HTTP_202_ACCEPTED)
+
+    @staticmethod
+    def get_bulk_queryset(organization_id, order_ids: List[int]):
+        return (
             RetailerPurchaseOrder.objects.filter(
-                batch__retailer__organization_id=self.request.headers.get(
-                    "organization"
-                ),
+                batch__retailer__organization_id=organization_id,
                 status__in=[
                     QueueStatus.Opened.value,
                     QueueStatus.Acknowledged.value,
                     QueueStatus.Partly_Shipped.value,
                     QueueStatus.Partly_Shipped_Confirmed.value,
                 ],
-                pk__in=data_serializers.keys(),
+                pk__in=order_ids,
             )
             .select_related(
                 "ship_from",
@@ -1720,12 +1716,19 @@ class ShippingBulkCreateAPIView(ShippingView):
                 "customer",
                 "batch__retailer",
                 "carrier",
+                "gs1",
             )
             .prefetch_related("items")
         )
 
-        if len(request.data) != purchase_orders.count():
-            raise ParseError("Purchase order ids doesn't match!")
+    def ship_bulk(
+        self, organization_id, request_data: List[dict], progress: ShippingBulkProgress
+    ) -> List[dict]:
+        """Ship the orders of a bulk request and record the result of each one"""
+        data_serializers = {data["id"]: data for data in request_data if "id" in data}
+        purchase_orders = self.get_bulk_queryset(
+            organization_id, data_serializers.keys()
+        )
 
         errors = {}
         serializers = []
@@ -1742,8 +1745,15 @@ class ShippingBulkCreateAPIView(ShippingView):
                         "detail": "Unprocessable Entity",
                     }
                 }
+                progress.update(purchase_order.pk, ShippingBulkProgress.FAILED)
 
-        responses = self.bulk_create(serializers=serializers)
+        gs1_by_order = {}
+        for serializer in serializers:
+            gs1 = serializer.validated_data.get("gs1") or serializer.instance.gs1
+            if gs1 is not None:
+                gs1_by_order[serializer.instance.pk] = gs1
+        self.sscc_allocator = reserve_shipping_sscc(gs1_by_order)
+        responses = self.bulk_create(serializers=serializers, progress=progress)
         data = {}
         for i, response in enumerate(responses):
             if isinstance(response, Response):
@@ -1780,71 +1790,112 @@ class ShippingBulkCreateAPIView(ShippingView):
                 else "COMPLETED",
             }
             response_data.append(response)
-        return Response(data=response_data, status=HTTP_201_CREATED)
 
-    @async_to_sync
-    async def bulk_create(self, serializers: List[ShippingSerializer]) -> List[dict]:
-        tasks = []
-        for serializer in serializers:
-            tasks.append(
-                sync_to_async(self.create_shipping)(serializer.instance, serializer)
+        # orders shipped or removed since the request was accepted
+        for order_id in data_serializers.keys() - data.keys():
+            progress.update(order_id, ShippingBulkProgress.FAILED)
+            response_data.append(
+                {
+                    "id": order_id,
+                    "po_number": None,
+                    "data": {
+                        "error": {
+                            "default_code": "not_found",
+                            "status_code": 404,
+                            "detail": "Purchase order can't be shipped anymore",
+                        }
+                    },
+                    "status": "FAILED",
+                }
             )
 
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        progress.finish(response_data)
+        return response_data
+
+    @async_to_sync
+    async def bulk_create(
+        self,
+        serializers: List[ShippingSerializer],
+        progress: ShippingBulkProgress = None,
+    ) -> List[dict]:
+        # carrier calls run in worker threads, at most SHIPPING_MAX_CONCURRENCY at once
+        semaphore = asyncio.Semaphore(settings.SHIPPING_MAX_CONCURRENCY)
+
+        async def ship(serializer: ShippingSerializer):
+            async with semaphore:
+                return await sync_to_async(self.ship_order, thread_sensitive=False)(
+                    serializer, progress
+                )
+
+        responses = await asyncio.gather(
+            *[ship(serializer) for serializer in serializers], return_exceptions=True
+        )
         return responses
 
+    def ship_order(
+        self, serializer: ShippingSerializer, progress: ShippingBulkProgress = None
+    ) -> Response:
+        try:
+            response = self.create_shipping(serializer.instance, serializer)
+        except Exception:
+            if progress is not None:
+                progress.update(serializer.instance.pk, ShippingBulkProgress.FAILED)
+            raise
+        finally:
+            # messages and connections of the worker thread are not request-scoped
+            sqs_outbox.flush()
+            connections.close_all()
+
+        if progress is not None:
+            progress.update(serializer.instance.pk, ShippingBulkProgress.COMPLETED)
+        return response
+
+
+class ShippingBulkProgressAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def check_permissions(self, _):
+        return check_permission(self, Permissions.CREATE_SHIPPING)
+
+    def get(self, request, progress_id, *args, **kwargs):
+        progress = ShippingBulkProgress.get(
+            request.headers.get("organization"), progress_id
+        )
+        if progress is None:
+            raise Http404
+        return Response(data=progress, status=HTTP_200_OK)
+
 
 class DailyPicklistAPIView(ListAPIView):
-    queryset = RetailerPurchaseOrderItem.objects.all()
+    queryset = ProductAlias.objects.all()
     serializer_class = DailyPicklistSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = Pagination
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["created_at"]
 
-    def get_queryset(self):
-        organization_id = self.request.headers.get("organization")
-        items = self.queryset.filter(
-            order__batch__retailer__organization_id=organization_id
-        )
+    def get_order_date(self) -> datetime.date | None:
         created_at = self.request.query_params.get("created_at")
-        if created_at:
-            created_at = parse_datetime(created_at) or parse_date(created_at)
-            if not isinstance(created_at, (datetime.datetime, datetime.date)):
-                raise DailyPicklistInvalidDate
-            if isinstance(created_at, datetime.datetime):
-                created_at = created_at.astimezone(get_default_timezone()).date()
-
-            created_at_gt = created_at - datetime.timedelta(days=1)
-            created_at_lt = created_at + datetime.timedelta(days=1)
-            items = items.filter(
-                order__order_date__gt=created_at_gt, order__order_date__lt=created_at_lt
-            )
-        queryset = (
-            Product.objects.filter(
-                products_aliases__merchant_sku__in=items.values_list(
-                    "merchant_sku", flat=True
-                ).distinct(),
-                products_aliases__retailer__organization_id=organization_id,
-            )
-            .values(
-                product_sku=F("sku"),
-                quantity=F("products_aliases__sku_quantity"),
-                merchant_sku=F("products_aliases__merchant_sku"),
-            )
-            .annotate(
-                id=F("pk"),
-                name=F("quantity"),
-                alias_count=Count("product_sku"),
-                total_quantity=(F("quantity") * F("alias_count")),
-                available_quantity=F("qty_on_hand"),
-                product_alias_sku=F("products_aliases__sku"),
-                product_alias_id=F("products_aliases__id"),
-            )
-            .order_by("quantity")
-            .distinct()
+        if not created_at:
+            return None
+        created_at = parse_datetime(created_at) or parse_date(created_at)
+        if not isinstance(created_at, (datetime.datetime, datetime.date)):
+            raise DailyPicklistInvalidDate
+        if isinstance(created_at, datetime.datetime):
+            created_at = created_at.astimezone(get_default_timezone()).date()
+        return created_at
+
+    def get_list_status(self) -> List[str]:
+        search_status = (self.request.query_params.get("status") or "").strip()
+        list_status = [
+            value.strip() for value in search_status.upper().split(",") if value.strip()
+        ]
+        return list_status or ["SHIPPED"]
+
+    def get_queryset(self):
+        return get_picklist_rows(
+            organization_id=self.request.headers.get("organization"),
+            order_date=self.get_order_date(),
+            list_status=self.get_list_status(),
         )
-        return queryset
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -1853,240 +1904,30 @@ class DailyPicklistAPIView(ListAPIView):
                 openapi.IN_QUERY,
                 type=openapi.TYPE_STRING,
             ),
-            # ... add more parameters as needed ...
+            openapi.Parameter(
+                "created_at",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "export",
+                openapi.IN_QUERY,
+                description="csv to stream the picklist lines",
+                type=openapi.TYPE_STRING,
+            ),
         ]
     )
     def get(self, request, *args, **kwargs):
-        search_status = request.query_params.get("status")
-        list_status = []
-        if search_status:
-            search_status = search_status.upper()
-            search_status = search_status.strip()
-            if search_status != "":
-                list_status = search_status.split(",")
-                for idx, value in enumerate(list_status):
-                    list_status[idx] = list_status[idx].strip()
-        serializers = self.get_serializer(
-            self.to_table_data(list_status=list_status), many=True
-        )
-        return Response(data=serializers.data)
-
-    def to_table_data(self, list_status):
-        if len(list_status) == 0:
-            list_status = ["SHIPPED"]
-        organization_id = self.request.headers.get("organization")
-        items = self.queryset.filter(
-            order__batch__retailer__organization_id=organization_id
-        )
-        created_at = self.request.query_params.get("created_at")
-        if created_at:
-            created_at = parse_datetime(created_at) or parse_date(created_at)
-            if not isinstance(created_at, (datetime.datetime, datetime.date)):
-                raise DailyPicklistInvalidDate
-            if isinstance(created_at, datetime.datetime):
-                created_at = created_at.astimezone(get_default_timezone()).date()
-
-            created_at_gt = created_at - datetime.timedelta(days=1)
-            created_at_lt = created_at + datetime.timedelta(days=1)
-            items = items.filter(
-                order__order_date__gt=created_at_gt, order__order_date__lt=created_at_lt
+        rows = self.get_queryset()
+        if request.query_params.get("export", "").lower() == "csv":
+            response = StreamingHttpResponse(
+                stream_picklist_csv(rows.iterator()), content_type="text/csv"
             )
+            response["Content-Disposition"] = 'attachment; filename="picklist.csv"'
+            return response
 
-        instances = self.get_queryset()
-        hash_instances = {}
-        quantities = []
-        for instance in instances:
-            product_alias_sku = instance.get("product_alias_sku")
-            instance.pop("product_alias_sku")
-            merchant_sku = instance["merchant_sku"]
-            product_sku = instance["product_sku"]
-            quantity = instance["quantity"]
-            available_quantity = instance["available_quantity"]
-            product_alias_id = instance["product_alias_id"]
-            instance.pop("product_alias_id")
-            instance.pop("available_quantity")
-            instance.pop("product_sku")
-            data = {"id": instance["id"]}
-            # check product_sku exist in list result
-            if product_sku not in hash_instances:
-                data["product_sku"] = product_sku
-                data["group"] = [instance]
-                data["available_quantity"] = available_quantity
-                data["product_alias_info"] = []
-                # create product alias info
-                if product_alias_sku is not None:
-                    list_quantity = []
-                    # only check item have status SHIPPED
-                    for item in items:
-                        if item.merchant_sku == merchant_sku:
-                            if (item.order.status.upper() in list_status) or (
-                                "ALL" in list_status
-                            ):
-                                list_quantity.append(
-                                    {
-                                        "quantity": item.qty_ordered,
-                                        "po_number": item.order.po_number,
-                                        "order_id": item.order.id,
-                                    }
-                                )
-                    # append product_alias if found order valid
-                    if len(list_quantity) > 0:
-                        data.get("product_alias_info").append(
-                            {
-                                "product_alias_id": product_alias_id,
-                                "product_alias_sku": product_alias_sku,
-                                "merchant_sku": merchant_sku,
-                                "packaging": quantity,
-                                "list_quantity": list_quantity,
-                            }
-                        )
-                    # calculate sum of package for each sku quantity
-                    for group_item in data["group"]:
-                        group_item["count"] = 0
-                        for product_alias in data.get("product_alias_info"):
-                            if str(group_item.get("name")) == str(
-                                product_alias.get("packaging")
-                            ):
-                                for quantity_item in product_alias.get("list_quantity"):
-                                    group_item["count"] += quantity_item.get("quantity")
-                # sum of item in all package
-                if len(data["product_alias_info"]) > 0:
-                    data["quantity"] = 0
-                    for group_item in data["group"]:
-                        data["quantity"] += group_item.get("count") * int(
-                            group_item.get("name")
-                        )
-                    hash_instances[product_sku] = data
-            else:
-                add_item = False
-                for group_item in hash_instances[product_sku]["group"]:
-                    if group_item.get("name") == instance.get("name"):
-                        add_item = True
-                        group_item["alias_count"] += instance.get("alias_count")
-                        group_item["total_quantity"] += instance.get("total_quantity")
-                if add_item is False:
-                    hash_instances[product_sku]["group"].append(instance)
-
-                if len(hash_instances[product_sku]["product_alias_info"]) > 0:
-                    add_info = False
-                    # check product alias, if exist update info
-                    for product_alias_info in hash_instances[product_sku][
-                        "product_alias_info"
-                    ]:
-                        if (
-                            product_alias_info.get("product_alias_sku")
-                            == product_alias_sku
-                        ):
-                            add_info = True
-                            for item in items:
-                                if item.merchant_sku == merchant_sku:
-                                    if (item.order.status.upper() in list_status) or (
-                                        "ALL" in list_status
-                                    ):
-                                        add_quantity = False
-                                        for alias_quantity in product_alias_info.get(
-                                            "list_quantity"
-                                        ):
-                                            # check po number, if exist increase quantity
-                                            if (
-                                                alias_quantity.get("po_number")
-                                                == item.order.po_number
-                                            ):
-                                                add_quantity = True
-                                                alias_quantity[
-                                                    "quantity"
-                                                ] += item.qty_ordered
-                                        if add_quantity is False:
-                                            # add new po number and quantity
-                                            product_alias_info.get(
-                                                "list_quantity"
-                                            ).append(
-                                                {
-                                                    "quantity": item.qty_ordered,
-                                                    "po_number": item.order.po_number,
-                                                    "order_id": item.order.id,
-                                                }
-                                            )
-                    # add new product alias
-                    if add_info is False:
-                        list_quantity = []
-                        # only check item have status SHIPPED
-                        for item in items:
-                            if item.merchant_sku == merchant_sku:
-                                if (item.order.status.upper() in list_status) or (
-                                    "ALL" in list_status
-                                ):
-                                    list_quantity.append(
-                                        {
-                                            "quantity": item.qty_ordered,
-                                            "po_number": item.order.po_number,
-                                            "order_id": item.order.id,
-                                        }
-                                    )
-                        # append product_alias if found order valid
-                        if len(list_quantity) > 0:
-                            new_product_alias = {
-                                "product_alias_id": product_alias_id,
-                                "product_alias_sku": product_alias_sku,
-                                "packaging": quantity,
-                                "list_quantity": list_quantity,
-                            }
-                            hash_instances[product_sku]["product_alias_info"].append(
-                                new_product_alias
-                            )
-                    # calculate sum of package for each sku quantity after update
-                    for group_item in hash_instances[product_sku]["group"]:
-                        group_item["count"] = 0
-                        for product_alias in hash_instances[product_sku][
-                            "product_alias_info"
-                        ]:
-                            if str(group_item.get("name")) == str(
-                                product_alias.get("packaging")
-                            ):
-                                for quantity_item in product_alias.get("list_quantity"):
-                                    group_item["count"] += quantity_item.get("quantity")
-
-            if quantity not in quantities:
-                quantities.append(quantity)
-            # remove group not have valid order
-            for key in hash_instances:
-                list_group = hash_instances[f"{key}"].get("group")
-                list_group = [item for item in list_group if item.get("count") != 0]
-                hash_instances[f"{key}"]["group"] = list_group
-                # sum of item in all package
-                hash_instances[f"{key}"]["quantity"] = 0
-                for group_item in list_group:
-                    hash_instances[f"{key}"]["quantity"] += group_item.get(
-                        "count"
-                    ) * int(group_item.get("name"))
-        return self.reprocess_table_data(hash_instances, quantities)
-
-    def reprocess_table_data(self, hash_instances, quantities) -> List[dict]:
-        new_quantity = []
-        for key in hash_instances:
-            groups = hash_instances[key]["group"]
-            group_quantities = [group["quantity"] for group in groups]
-            for quantity in group_quantities:
-                if quantity not in new_quantity:
-                    new_quantity.append(quantity)
-
-        for key in hash_instances:
-            groups = hash_instances[key]["group"]
-            group_quantities = [group["quantity"] for group in groups]
-            for quantity in new_quantity:
-                if quantity not in group_quantities:
-                    groups.append(
-                        {
-                            "name": quantity,
-                            "alias_count": 0,
-                            "quantity": quantity,
-                            "count": 0,
-                            "total_quantity": 0,
-                        }
-                    )
-            sorted_groups = sorted(groups, key=lambda x: x["quantity"])
-            hash_instances[key]["group"] = sorted_groups
-        return hash_instances.values()
+        serializers = self.get_serializer(build_picklist(rows), many=True)
+        return Response(data=serializers.data)
 
 
 class OrderStatusIsBypassedAcknowledge(APIView):
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.14 on 2024-01-24 09:30
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("retailer_queue_histories", "0005_alter_retailerqueuehistory_label"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="retailerqueuehistory",
+            index=models.Index(
+                fields=["retailer", "label", "-created_at"],
+                name="queue_history_label_idx",
+            ),
+        ),
+    ]
@@ -33,3 +33,11 @@ class RetailerQueueHistory(models.Model):
     result_url = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["retailer", "label", "-created_at"],
+                name="queue_history_label_idx",
+            ),
+        ]
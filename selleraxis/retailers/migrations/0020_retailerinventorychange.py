@@ -0,0 +1,54 @@
+# Generated by Django 3.2.14 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product_alias", "0007_productalias_merchant_sku_idx"),
+        ("retailers", "0019_retailer_remove_live_qbo_info"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RetailerInventoryChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "product_alias",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory_changes",
+                        to="product_alias.productalias",
+                    ),
+                ),
+                (
+                    "retailer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory_changes",
+                        to="retailers.retailer",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="retailerinventorychange",
+            constraint=models.UniqueConstraint(
+                fields=("retailer", "product_alias"),
+                name="unique_retailer_inventory_change",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.14 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retailers", "0020_retailerinventorychange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="retailerinventorychange",
+            name="version",
+            field=models.IntegerField(default=0),
+        ),
+    ]
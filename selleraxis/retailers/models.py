@@ -90,3 +90,31 @@ class Retailer(SQSSyncModel):
     sync_token = models.IntegerField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class RetailerInventoryChange(models.Model):
+    """Product alias whose inventory changed since the last push of its retailer.
+
+    A change without product alias requests a full inventory of the retailer.
+    """
+
+    retailer = models.ForeignKey(
+        Retailer, on_delete=models.CASCADE, related_name="inventory_changes"
+    )
+    product_alias = models.ForeignKey(
+        "product_alias.ProductAlias",
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="inventory_changes",
+    )
+    # bumped when the product alias changes again before being pushed
+    version = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["retailer", "product_alias"],
+                name="unique_retailer_inventory_change",
+            )
+        ]
@@ -160,6 +160,12 @@ class XMLRetailerSerializer(ReadRetailerSerializer):
         return product_alias_serializer.data
 
 
+class XMLStreamRetailerSerializer(ReadRetailerSerializer):
+    """Retailer data of the inventory XML, its product aliases are streamed separately"""
+
+    retailer_products_aliases = None
+
+
 class ReadRetailerSerializerShow(serializers.ModelSerializer):
     retailer_queue_history = RetailerQueueHistorySerializer(read_only=True, many=True)
 
@@ -8,7 +8,9 @@ from django.db import IntegrityError
 from rest_framework import exceptions
 
 from selleraxis.core.clients.boto3_client import s3_client
+from selleraxis.core.clients.sftp_client import CommerceHubSFTPClient
 from selleraxis.core.utils.xml_generator import XMLGenerator
+from selleraxis.core.utils.xsd_to_xml import XMLStreamTee
 from selleraxis.retailer_commercehub_sftp.models import RetailerCommercehubSFTP
 from selleraxis.retailer_queue_histories.models import RetailerQueueHistory
 
@@ -144,33 +146,47 @@ def inventory_commecerhub(retailer) -> None:
             mandatory_only=True,
         )
 
-        xml_obj.generate()
         filename = "{date}_{random}_{organization}_{merchant_id}_inventory.xml".format(
             date=datetime.datetime.now().strftime(DEFAULT_DATE_FILE_FORMAT),
             random=randint(100000, 999999),
             organization=retailer["organization"],
             merchant_id=retailer["merchant_id"],
         )
-        xml_obj.write(filename)
-
-        # upload xml file to sftp
-        upload_xml_to_sftp(
-            retailer_sftp.sftp_host,
-            retailer_sftp.sftp_username,
-            retailer_sftp.sftp_password,
-            filename,
-            retailer_sftp.inventory_sftp_directory,
-        )
 
-        # upload xml file to s3
-        s3_response = s3_client.upload_file(
-            filename=filename, bucket=settings.BUCKET_NAME
+        # stream xml file to sftp and s3 at once, under a temporary name
+        # published once the file is complete and archived
+        partial_filename = f"{filename}.part"
+        s3_upload = s3_client.create_multipart_upload(
+            bucket=settings.BUCKET_NAME, key=filename
         )
-        if s3_response.ok:
-            queue_history_obj.result_url = s3_response.data
+        sftp_client = CommerceHubSFTPClient(**retailer_sftp.__dict__)
+        try:
+            sftp_client.connect()
+            with sftp_client.create(
+                retailer_sftp.inventory_sftp_directory, partial_filename
+            ) as sftp_file:
+                xml_obj.generate_stream(XMLStreamTee(sftp_file, s3_upload).write)
+
+            result_url = s3_upload.complete()
+            sftp_client.rename(
+                retailer_sftp.inventory_sftp_directory, partial_filename, filename
+            )
+            queue_history_obj.result_url = result_url
             queue_history_obj.status = RetailerQueueHistory.Status.COMPLETED
-
-        xml_obj.remove()
+        except Exception:
+            try:
+                s3_upload.abort()
+            except Exception:
+                pass
+            try:
+                sftp_client.remove(
+                    retailer_sftp.inventory_sftp_directory, partial_filename
+                )
+            except Exception:
+                pass
+            raise
+        finally:
+            sftp_client.close()
 
     except RetailerCommercehubSFTP.DoesNotExist:
         errors.append("SFTP info not found, please create SFTP.")
@@ -1,19 +1,35 @@
-import asyncio
+import logging
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import List
 
-import paramiko
 import xmltodict
-from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
 from django.utils.timezone import get_default_timezone
 
+from selleraxis.core.clients.sftp_client import CommerceHubSFTPClient, SFTPClientPool
+from selleraxis.core.utils.bulk_upsert import bulk_upsert
 from selleraxis.core.utils.company_detected import from_retailer_to_company
-from selleraxis.retailer_commercehub_sftp.models import RetailerCommercehubSFTP
+from selleraxis.retailer_commercehub_sftp.models import RetailerOrderFileCursor
 from selleraxis.retailer_order_batchs.models import RetailerOrderBatch
 from selleraxis.retailer_participating_parties.models import RetailerParticipatingParty
 from selleraxis.retailer_partners.models import RetailerPartner
 from selleraxis.retailer_person_places.models import RetailerPersonPlace
-from selleraxis.retailer_purchase_order_items.models import RetailerPurchaseOrderItem
-from selleraxis.retailer_purchase_orders.models import RetailerPurchaseOrder
+from selleraxis.retailer_purchase_order_items.models import (
+    RetailerPurchaseOrderItem,
+    subtract_inventory_for_order_items,
+)
+from selleraxis.retailer_purchase_orders.models import (
+    RetailerPurchaseOrder,
+    invalidate_order_details,
+    schedule_order_detail_build,
+)
+from selleraxis.retailer_purchase_orders.services.backfill_services import (
+    backfill_orders,
+)
 from selleraxis.retailers.models import Retailer
 from selleraxis.retailers.services.dictionaries import (
     order_batch_key_dictionary,
@@ -24,6 +40,14 @@ from selleraxis.retailers.services.dictionaries import (
     purchase_order_key_dictionary,
 )
 
+ORDER_MESSAGE_BATCH = "OrderMessageBatch"
+ORDER_ADDRESS_FIELDS = {
+    "ship_to": "ship_to_id",
+    "bill_to": "bill_to_id",
+    "invoice_to": "invoice_to_id",
+    "customer": "customer_id",
+}
+
 
 def convert_order_date(order_date):
     try:
@@ -35,263 +59,363 @@ def convert_order_date(order_date):
         pass
 
 
-async def read_purchase_order_data(data, retailer, order_batch):
-    # Convert order data key
-    order_dict = {}
-    for key, value in data.items():
-        if key in purchase_order_key_dictionary:
-            order_dict[purchase_order_key_dictionary[key]] = value
-
-    # Convert participating party data key
-    participating_party_raw = order_dict.pop("participating_party")
-    participating_party_dict = {}
-
-    for key, value in participating_party_raw.items():
-        if key in participating_party_key_dictionary:
-            participating_party_dict[participating_party_key_dictionary[key]] = value
-
-    # Save participating party to DB if not exist
-    participating_party, _ = await sync_to_async(
-        RetailerParticipatingParty.objects.update_or_create
-    )(
-        retailer_participating_party_id=participating_party_dict[
-            "retailer_participating_party_id"
-        ],
-        retailer=retailer,
-        defaults=participating_party_dict,
-    )
-
-    # Convert person places to list
-    person_places_raw = order_dict.pop("person_place")
-    if person_places_raw.__class__ != list:
-        person_places_raw = [person_places_raw]
-
-    person_places = []
-
-    for person_place_raw in person_places_raw:
-        person_place_dict = {}
-
-        # Convert person place data key
-        for key, value in person_place_raw.items():
-            if key in person_place_key_dictionary and value:
-                person_place_dict[person_place_key_dictionary[key]] = value
-
-        retailer_person_place_id = person_place_dict["retailer_person_place_id"]
-        person_place_dict.pop("retailer_person_place_id")  # TypeError: multiple args
-
-        # Save person place to DB if not exist
-        person_place, _ = await sync_to_async(
-            RetailerPersonPlace.objects.update_or_create
-        )(
-            retailer_person_place_id=retailer_person_place_id,
-            retailer=retailer,
-            defaults=person_place_dict,
-        )
+def convert_data_key(data: dict, key_dictionary: dict) -> dict:
+    return {
+        key_dictionary[key]: value
+        for key, value in data.items()
+        if key in key_dictionary
+    }
 
-        person_places.append(person_place)
 
-    # Find order's address information
-    ship_to = order_dict.pop("ship_to", None)
-    bill_to = order_dict.pop("bill_to", None)
-    customer = order_dict.pop("customer", None)
-    invoice_to = order_dict.pop("invoice_to", None)
+def as_list(data) -> list:
+    return data if isinstance(data, list) else [data]
 
-    ship_to_id = None
-    bill_to_id = None
-    customer_id = None
-    invoice_to_id = None
 
-    for person_place in person_places:
-        if (
-            ship_to is not None
-            and person_place.retailer_person_place_id == ship_to["@personPlaceID"]
-        ):
-            company = from_retailer_to_company(
-                merchant_id=retailer.merchant_id, name=person_place.name
-            )
-            if company:
-                person_place.company = company
-                await sync_to_async(person_place.save)()
-            ship_to_id = person_place.id
-        if (
-            bill_to is not None
-            and person_place.retailer_person_place_id == bill_to["@personPlaceID"]
-        ):
-            bill_to_id = person_place.id
-        if (
-            invoice_to is not None
-            and person_place.retailer_person_place_id == invoice_to["@personPlaceID"]
-        ):
-            invoice_to_id = person_place.id
-        if (
-            customer is not None
-            and person_place.retailer_person_place_id == customer["@personPlaceID"]
+class OrderBatchStreamReader:
+    """
+    Receives the children of an OrderMessageBatch while xmltodict is still parsing
+    the file, so that orders are written chunk by chunk instead of after the whole
+    document has been loaded.
+    """
+
+    def __init__(self, engine, file_name: str, available_batch_numbers: set):
+        self.engine = engine
+        self.file_name = file_name
+        self.available_batch_numbers = available_batch_numbers
+        self.order_batch = None
+        self.orders_raw = []
+
+    def __call__(self, path, item) -> bool:
+        root_name, root_attrs = path[0]
+        batch_number = (root_attrs or {}).get("batchNumber")
+        if root_name != ORDER_MESSAGE_BATCH or (
+            batch_number in self.available_batch_numbers
         ):
-            customer_id = person_place.id
-
-    order_dict["ship_to_id"] = ship_to_id
-    order_dict["bill_to_id"] = bill_to_id
-    order_dict["customer_id"] = customer_id
-    order_dict["invoice_to_id"] = invoice_to_id
-
-    order_dict["participating_party_id"] = participating_party.id
-    order_dict["batch_id"] = order_batch.id
-    if hasattr(retailer.__dict__, "default_warehouse"):
-        if retailer.default_warehouse:
-            order_dict["warehouse_id"] = retailer.default_warehouse.id
-    else:
-        if retailer.default_warehouse_id:
-            order_dict["warehouse_id"] = retailer.default_warehouse_id
-
-    items_raw = order_dict.pop("items")
-
-    # Convert order date
-    order_dict["order_date"] = convert_order_date(order_dict.get("order_date"))
-
-    # Save order to DB if not exist
-    order, _ = await sync_to_async(RetailerPurchaseOrder.objects.update_or_create)(
-        retailer_purchase_order_id=order_dict["retailer_purchase_order_id"],
-        batch=order_batch,
-        defaults=order_dict,
-    )
-
-    if items_raw.__class__ != list:
-        items_raw = [items_raw]
-
-    create_item_cursor = []
-
-    for item_raw in items_raw:
-        item_dict = {}
-
-        # Convert order items data key
-        for key, value in item_raw.items():
-            if key in purchase_order_item_key_dictionary:
-                item_dict[purchase_order_item_key_dictionary[key]] = value
-
-        item_dict["order_id"] = order.id
-        # Save order items to DB if not exist
-        create_item_cursor.append(
-            sync_to_async(RetailerPurchaseOrderItem.objects.update_or_create)(
-                retailer_purchase_order_item_id=item_dict[
-                    "retailer_purchase_order_item_id"
-                ],
-                order=order,
-                defaults=item_dict,
+            # stop reading files which are not new order batches
+            return False
+
+        name, attrs = path[-1]
+        data = self.to_dict(attrs, item)
+        key = order_batch_key_dictionary.get(name)
+        if key == "partner":
+            self.order_batch = self.engine.save_order_batch(
+                batch_number, data, self.file_name
             )
-        )
+            self.flush(self.engine.chunk_size)
+        elif key == "orders":
+            self.orders_raw.append(data)
+            self.flush(self.engine.chunk_size)
 
-        # TODO: Subtract inventory quantity
+        return True
 
-    await asyncio.gather(*create_item_cursor, return_exceptions=True)
+    def flush(self, chunk_size: int = 1) -> None:
+        if self.order_batch is None or len(self.orders_raw) < chunk_size:
+            return
 
+        orders_raw, self.orders_raw = self.orders_raw, []
+        self.engine.save_orders(self.order_batch, orders_raw)
 
-async def read_purchase_order_xml_data(
-    ftp, path, file_xml, available_batch_numbers, retailer, order_history
-):
-    # Read file
-    data_xml = ftp.open(path + file_xml)
-    xml_content = data_xml.read()
-    data_xml.close()
-    data = xmltodict.parse(xml_content)
-    if (
-        "OrderMessageBatch" in data
-        and data["OrderMessageBatch"].get("@batchNumber") not in available_batch_numbers
+    def close(self) -> None:
+        if self.orders_raw and self.order_batch is None:
+            logging.warning(
+                f"Order batch file {self.file_name} has no partner, skip its orders."
+            )
+            return
+
+        self.flush()
+
+    @staticmethod
+    def to_dict(attrs, item) -> dict:
+        """Build the same dict xmltodict.parse returns for a non streamed element"""
+        data = {f"@{key}": value for key, value in (attrs or {}).items()}
+        if isinstance(item, dict):
+            data.update(item)
+        elif item is not None:
+            # streamed text also carries the whitespace between the previous siblings
+            data["#text"] = item.strip()
+        return data
+
+
+class PurchaseOrderImportEngine:
+    """
+    Import new order batches from the retailer's CommerceHub SFTP folder.
+
+    Files are listed once and streamed through a bounded pool of workers sharing a
+    pool of SFTP sessions. Each file is parsed incrementally and its participating
+    parties, person places, orders and items are upserted chunk by chunk.
+
+    Name, size and mtime of imported files are kept in RetailerOrderFileCursor so
+    unchanged files are skipped before being downloaded, unless ``backfill`` is set.
+    """
+
+    def __init__(
+        self,
+        retailer: Retailer,
+        history=None,
+        max_workers: int = None,
+        chunk_size: int = None,
+        backfill: bool = False,
     ):
-        # Convert order batch data key
-        batch_order_dict = {}
-
-        for key, value in data["OrderMessageBatch"].items():
-            if key in order_batch_key_dictionary:
-                batch_order_dict[order_batch_key_dictionary[key]] = value
+        self.retailer = retailer
+        self.history = history
+        self.backfill = backfill
+        self.max_workers = max_workers or settings.ORDER_IMPORT_MAX_WORKERS
+        self.chunk_size = chunk_size or settings.ORDER_IMPORT_CHUNK_SIZE
+        self.sftp_config = retailer.retailer_commercehub_sftp.__dict__
+        self.path = self.get_purchase_orders_path()
+        self._lock = threading.Lock()
+
+    def get_purchase_orders_path(self) -> str:
+        path = (
+            self.sftp_config.get("purchase_orders_sftp_directory")
+            or f"/outgoing/orders/{self.retailer.merchant_id}/"
+        )
+        return path if path[-1] == "/" else path + "/"
+
+    def create_sftp_client(self) -> CommerceHubSFTPClient:
+        sftp_client = CommerceHubSFTPClient(**self.sftp_config)
+        sftp_client.purchase_orders_sftp_directory = self.path
+        return sftp_client
+
+    def run(self) -> List[str]:
+        """Import every new order batch file, return the listed file names"""
+        sftp_pool = SFTPClientPool(self.create_sftp_client, max_size=self.max_workers)
+        try:
+            with sftp_pool.session() as sftp_client:
+                file_attrs = [
+                    file_attr
+                    for file_attr in sftp_client.listdir_attr_purchase_orders()
+                    if not stat.S_ISDIR(file_attr.st_mode or 0)
+                ]
+
+            new_file_attrs = self.exclude_imported_files(file_attrs)
+            available_batch_numbers = set(
+                RetailerOrderBatch.objects.filter(
+                    retailer_id=self.retailer.pk
+                ).values_list("batch_number", flat=True)
+            )
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self.import_file,
+                        sftp_pool,
+                        file_attr.filename,
+                        available_batch_numbers,
+                    )
+                    for file_attr in new_file_attrs
+                ]
+
+            self.save_file_cursors(
+                [
+                    file_attr
+                    for file_attr, future in zip(new_file_attrs, futures)
+                    if future.exception() is None
+                ]
+            )
 
-        partner_raw = batch_order_dict.pop("partner")
+            # raise the first failure once every file had its chance to be imported
+            for future in futures:
+                future.result()
+        finally:
+            sftp_pool.close()
 
-        # Convert partner data key
-        partner_dict = {}
+        return [file_attr.filename for file_attr in file_attrs]
 
-        for key, value in partner_raw.items():
-            if key in partner_key_dictionary:
-                partner_dict[partner_key_dictionary[key]] = value
+    def exclude_imported_files(self, file_attrs: list) -> list:
+        if self.backfill:
+            return file_attrs
 
-        # Save partner to DB if not exist
-        partner_dict["retailer_id"] = retailer.id
-        partner, _ = await sync_to_async(RetailerPartner.objects.update_or_create)(
-            retailer_partner_id=partner_dict["retailer_partner_id"],
-            retailer=retailer,
-            defaults=partner_dict,
+        cursors = {
+            file_name: (file_size, file_mtime)
+            for file_name, file_size, file_mtime in RetailerOrderFileCursor.objects.filter(
+                retailer_id=self.retailer.pk
+            ).values_list(
+                "file_name", "file_size", "file_mtime"
+            )
+        }
+        return [
+            file_attr
+            for file_attr in file_attrs
+            if cursors.get(file_attr.filename)
+            != (file_attr.st_size, file_attr.st_mtime)
+        ]
+
+    def save_file_cursors(self, file_attrs: list) -> None:
+        bulk_upsert(
+            RetailerOrderFileCursor,
+            ("file_name",),
+            {
+                (file_attr.filename,): {
+                    "file_size": file_attr.st_size,
+                    "file_mtime": file_attr.st_mtime,
+                }
+                for file_attr in file_attrs
+            },
+            retailer=self.retailer,
         )
 
-        # Save order batch to DB if not exist
-        order_batch, _ = await sync_to_async(
-            RetailerOrderBatch.objects.update_or_create
-        )(
-            batch_number=batch_order_dict["batch_number"],
-            retailer=retailer,
-            getting_order_history=order_history,
+    def import_file(
+        self, sftp_pool: SFTPClientPool, file_name: str, available_batch_numbers: set
+    ) -> None:
+        reader = OrderBatchStreamReader(self, file_name, available_batch_numbers)
+        try:
+            with sftp_pool.session() as sftp_client:
+                with sftp_client.open(self.path + file_name) as xml_file:
+                    xmltodict.parse(xml_file, item_depth=2, item_callback=reader)
+                reader.close()
+        except xmltodict.ParsingInterrupted:
+            pass
+        finally:
+            # every worker thread owns a database connection
+            connections.close_all()
+
+    def save_order_batch(
+        self, batch_number: str, partner_raw: dict, file_name: str
+    ) -> RetailerOrderBatch:
+        partner_dict = convert_data_key(partner_raw, partner_key_dictionary)
+        partner_id = partner_dict["retailer_partner_id"]
+        with self._lock:
+            partners, _ = bulk_upsert(
+                RetailerPartner,
+                ("retailer_partner_id",),
+                {(partner_id,): partner_dict},
+                retailer=self.retailer,
+            )
+
+        order_batch, _ = RetailerOrderBatch.objects.update_or_create(
+            batch_number=batch_number,
+            retailer=self.retailer,
+            getting_order_history=self.history,
             defaults={
-                "batch_number": batch_order_dict["batch_number"],
-                "partner_id": partner.id,
-                "retailer_id": retailer.id,
-                "file_name": file_xml,
+                "batch_number": batch_number,
+                "partner_id": partners[(partner_id,)].id,
+                "retailer_id": self.retailer.id,
+                "file_name": file_name,
             },
         )
+        return order_batch
 
-        # Convert orders to list
-        orders_raw = batch_order_dict.pop("orders")
-        if orders_raw.__class__ != list:
-            orders_raw = [orders_raw]
+    def save_orders(self, order_batch: RetailerOrderBatch, orders_raw: list) -> None:
+        participating_parties = {}
+        person_places = {}
+        order_entries = []
+        for order_raw in orders_raw:
+            order_dict = convert_data_key(order_raw, purchase_order_key_dictionary)
+            participating_party_dict = convert_data_key(
+                order_dict.pop("participating_party"),
+                participating_party_key_dictionary,
+            )
+            participating_party_id = participating_party_dict[
+                "retailer_participating_party_id"
+            ]
+            participating_parties[(participating_party_id,)] = participating_party_dict
+
+            person_place_dicts = {}
+            for person_place_raw in as_list(order_dict.pop("person_place")):
+                person_place_dict = {
+                    person_place_key_dictionary[key]: value
+                    for key, value in person_place_raw.items()
+                    if key in person_place_key_dictionary and value
+                }
+                person_place_id = person_place_dict.pop("retailer_person_place_id")
+                person_place_dicts[person_place_id] = person_place_dict
+
+            # find order's address information
+            person_place_refs = {}
+            for key, field in ORDER_ADDRESS_FIELDS.items():
+                address = order_dict.pop(key, None)
+                if address is not None and (
+                    address["@personPlaceID"] in person_place_dicts
+                ):
+                    person_place_refs[field] = address["@personPlaceID"]
+
+            ship_to = person_place_dicts.get(person_place_refs.get("ship_to_id"))
+            if ship_to is not None:
+                company = from_retailer_to_company(
+                    merchant_id=self.retailer.merchant_id, name=ship_to.get("name", "")
+                )
+                if company:
+                    ship_to["company"] = company
+
+            for person_place_id, person_place_dict in person_place_dicts.items():
+                person_places.setdefault((person_place_id,), {}).update(
+                    person_place_dict
+                )
+
+            order_entries.append(
+                (order_dict, participating_party_id, person_place_refs)
+            )
 
-        # Read order data
-        read_purchase_order_cursors = []
+        # parties and places are shared by all batches, write them outside of the
+        # order transaction so concurrent workers see each other's rows
+        with self._lock:
+            participating_parties, _ = bulk_upsert(
+                RetailerParticipatingParty,
+                ("retailer_participating_party_id",),
+                participating_parties,
+                retailer=self.retailer,
+            )
+            person_places, _ = bulk_upsert(
+                RetailerPersonPlace,
+                ("retailer_person_place_id",),
+                person_places,
+                retailer=self.retailer,
+            )
 
-        for order_raw in orders_raw:
-            read_purchase_order_cursors.append(
-                read_purchase_order_data(order_raw, retailer, order_batch)
+        with transaction.atomic():
+            order_rows = {}
+            items_raw = {}
+            for order_dict, participating_party_id, person_place_refs in order_entries:
+                for field in ORDER_ADDRESS_FIELDS.values():
+                    person_place_id = person_place_refs.get(field)
+                    order_dict[field] = (
+                        person_places[(person_place_id,)].id
+                        if person_place_id
+                        else None
+                    )
+
+                order_dict["participating_party_id"] = participating_parties[
+                    (participating_party_id,)
+                ].id
+                if self.retailer.default_warehouse_id:
+                    order_dict["warehouse_id"] = self.retailer.default_warehouse_id
+                order_dict["order_date"] = convert_order_date(
+                    order_dict.get("order_date")
+                )
+                order_id = order_dict["retailer_purchase_order_id"]
+                items_raw[order_id] = as_list(order_dict.pop("items"))
+                order_rows[(order_id,)] = order_dict
+
+            orders, _ = bulk_upsert(
+                RetailerPurchaseOrder,
+                ("retailer_purchase_order_id",),
+                order_rows,
+                batch=order_batch,
             )
 
-        await asyncio.gather(*read_purchase_order_cursors)
-
-
-@async_to_sync
-async def import_purchase_order(retailer: Retailer):
-    retailer_sftp = await sync_to_async(
-        RetailerCommercehubSFTP.objects.filter(retailer=retailer).first
-    )()
-    path = (
-        retailer_sftp.purchase_orders_sftp_directory
-        if retailer_sftp.purchase_orders_sftp_directory[-1] == "/"
-        else retailer_sftp.purchase_orders_sftp_directory + "/"
-    )
-
-    # Connect to retailer's server
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    ssh.connect(
-        retailer_sftp.sftp_host,
-        username=retailer_sftp.sftp_username,
-        password=retailer_sftp.sftp_password,
-    )
-    ftp = ssh.open_sftp()
-    ftp.chdir(path)
-
-    # Get available order batch
-    available_order_batch = await sync_to_async(
-        lambda: list(RetailerOrderBatch.objects.filter(retailer=retailer))
-    )()
-    available_batch_numbers = [
-        order_batch.batch_number for order_batch in available_order_batch
-    ]
-
-    # Read XML file
-    read_xml_cursors = []
-
-    for file_xml in ftp.listdir():
-        read_xml_cursors.append(
-            read_purchase_order_xml_data(
-                ftp, path, file_xml, available_batch_numbers, retailer
+            item_rows = {}
+            for order_id, order_items_raw in items_raw.items():
+                order = orders[(order_id,)]
+                for item_raw in order_items_raw:
+                    item_dict = convert_data_key(
+                        item_raw, purchase_order_item_key_dictionary
+                    )
+                    item_id = item_dict["retailer_purchase_order_item_id"]
+                    item_rows[(order.id, item_id)] = item_dict
+
+            _, created_items = bulk_upsert(
+                RetailerPurchaseOrderItem,
+                ("order_id", "retailer_purchase_order_item_id"),
+                item_rows,
             )
-        )
+            order_ids = [order.id for order in orders.values()]
+            invalidate_order_details(order_id__in=order_ids)
+            # new orders are divided into packages before being opened
+            schedule_order_detail_build(order_ids)
+            backfill_orders(RetailerPurchaseOrder.objects.filter(id__in=order_ids))
+            if created_items:
+                subtract_inventory_for_order_items(created_items, self.retailer.id)
 
-    await asyncio.gather(*read_xml_cursors)
 
-    ssh.close()
+def import_purchase_order(retailer: Retailer, backfill: bool = False):
+    PurchaseOrderImportEngine(retailer, backfill=backfill).run()
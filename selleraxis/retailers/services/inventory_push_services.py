@@ -0,0 +1,173 @@
+"""
+Coalesced inventory push to CommerceHub.
+
+Inventory changes only mark the product aliases of a retailer as changed, and
+schedule one delayed push of the retailer per debounce window. The push then
+sends a file with the changed product aliases only, or the whole inventory
+when it was requested or when the last full push is too old.
+"""
+from typing import Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from selleraxis.core.clients.boto3_client import sqs_client
+from selleraxis.core.utils.xsd_to_xml import S3UploadException
+from selleraxis.retailer_queue_histories.models import RetailerQueueHistory
+from selleraxis.retailers.exceptions import (
+    InventoryXMLS3UploadException,
+    InventoryXMLSFTPUploadException,
+)
+from selleraxis.retailers.models import Retailer, RetailerInventoryChange
+from selleraxis.retailers.serializers import XMLStreamRetailerSerializer
+from selleraxis.retailers.services.inventory_xml_handler import InventoryXMLHandler
+
+INVENTORY_PUSH_SCHEDULED_KEY = "inventory_push_scheduled_{}"
+INVENTORY_FULL_PUSH_KEY = "inventory_full_push_{}"
+INVENTORY_CHANGE_BATCH_SIZE = 1000
+# longest delay of an SQS message
+SQS_MAX_DELAY_SECONDS = 900
+
+
+def mark_inventory_changed(product_aliases: Iterable[Tuple[int, int]]) -> None:
+    """Mark (retailer id, product alias id) pairs for the next push.
+
+    A pair already marked gets its version bumped, so a push started before
+    this change does not consume it.
+    """
+    changes = sorted(
+        {
+            (retailer_id, product_alias_id)
+            for retailer_id, product_alias_id in product_aliases
+        }
+    )
+    table = connection.ops.quote_name(RetailerInventoryChange._meta.db_table)
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        for start in range(0, len(changes), INVENTORY_CHANGE_BATCH_SIZE):
+            batch = changes[start : start + INVENTORY_CHANGE_BATCH_SIZE]  # noqa
+            cursor.execute(
+                f"INSERT INTO {table} "
+                "(retailer_id, product_alias_id, version, created_at) "
+                f"VALUES {', '.join(['(%s, %s, 0, %s)'] * len(batch))} "
+                "ON CONFLICT (retailer_id, product_alias_id) "
+                f"DO UPDATE SET version = {table}.version + 1",
+                [
+                    value
+                    for retailer_id, product_alias_id in batch
+                    for value in (retailer_id, product_alias_id, now)
+                ],
+            )
+    schedule_inventory_push({retailer_id for retailer_id, _ in changes})
+
+
+def mark_full_inventory(retailer_ids: Iterable[int]) -> None:
+    """Send the whole inventory of the retailers at their next push"""
+    retailer_ids = set(retailer_ids)
+    RetailerInventoryChange.objects.bulk_create(
+        [
+            RetailerInventoryChange(retailer_id=retailer_id)
+            for retailer_id in retailer_ids
+        ]
+    )
+    schedule_inventory_push(retailer_ids)
+
+
+def schedule_inventory_push(retailer_ids: Iterable[int]) -> None:
+    """Queue one delayed push by retailer and debounce window"""
+    delay = min(settings.INVENTORY_PUSH_DEBOUNCE_SECONDS, SQS_MAX_DELAY_SECONDS)
+    for retailer_id in retailer_ids:
+        # the changes marked until the push is sent are part of it
+        if cache.add(INVENTORY_PUSH_SCHEDULED_KEY.format(retailer_id), True, delay):
+            sqs_client.create_queue(
+                message_body=str(retailer_id),
+                queue_name=settings.SQS_UPDATE_RETAILER_INVENTORY_SQS_NAME,
+                DelaySeconds=delay,
+            )
+
+
+def is_full_push_due(retailer: Retailer) -> bool:
+    # the key of a full push expires after the refresh interval
+    return not cache.get(INVENTORY_FULL_PUSH_KEY.format(retailer.pk))
+
+
+def push_retailer_inventory(retailer: Retailer, full: bool = False) -> dict:
+    """Send the changed product aliases of the retailer, or all of them.
+
+    Only the changes seen when the push starts are consumed, the ones marked
+    or marked again meanwhile are sent by the next push. Returns the id of the
+    retailer and the url of the file, None when nothing changed.
+    """
+    changes = RetailerInventoryChange.objects.filter(retailer=retailer)
+    pushed_changes = list(changes.values_list("id", "product_alias_id", "version"))
+    full = (
+        full
+        or is_full_push_due(retailer)
+        or any(product_alias_id is None for _, product_alias_id, _ in pushed_changes)
+    )
+    if not full and not pushed_changes:
+        return {"id": retailer.pk, "file": None}
+
+    product_aliases = retailer.retailer_products_aliases.all()
+    if not full:
+        product_aliases = product_aliases.filter(
+            id__in={product_alias_id for _, product_alias_id, _ in pushed_changes}
+        )
+    queue_history_obj = RetailerQueueHistory.objects.create(
+        retailer_id=retailer.pk,
+        type=retailer.type,
+        status=RetailerQueueHistory.Status.PENDING,
+        label=RetailerQueueHistory.Label.INVENTORY,
+    )
+    inventory_obj = InventoryXMLHandler(
+        data=XMLStreamRetailerSerializer(retailer).data,
+        product_aliases=product_aliases,
+    )
+    response_data = stream_inventory_xml(retailer, inventory_obj, queue_history_obj)
+
+    delete_pushed_changes(pushed_changes)
+    if full:
+        cache.set(
+            INVENTORY_FULL_PUSH_KEY.format(retailer.pk),
+            True,
+            settings.INVENTORY_FULL_REFRESH_INTERVAL_HOURS * 3600,
+        )
+    if changes.exists():
+        schedule_inventory_push([retailer.pk])
+    return response_data
+
+
+def delete_pushed_changes(pushed_changes: List[Tuple[int, int, int]]) -> None:
+    """Delete the pushed changes, unless their version was bumped since"""
+    change_ids = {}
+    for change_id, _, version in pushed_changes:
+        change_ids.setdefault(version, []).append(change_id)
+    if not change_ids:
+        return
+    condition = Q()
+    for version, ids in change_ids.items():
+        condition |= Q(id__in=ids, version=version)
+    RetailerInventoryChange.objects.filter(condition).delete()
+
+
+def stream_inventory_xml(
+    retailer: Retailer,
+    inventory_obj: InventoryXMLHandler,
+    queue_history_obj: RetailerQueueHistory,
+) -> dict:
+    """Stream the inventory XML to SFTP and S3 and record the result in the queue history"""
+    result, file_created = inventory_obj.stream_xml_file(bucket=settings.BUCKET_NAME)
+    if file_created:
+        queue_history_obj.status = RetailerQueueHistory.Status.COMPLETED
+        queue_history_obj.result_url = result
+        queue_history_obj.save()
+        return {"id": retailer.pk, "file": result}
+
+    queue_history_obj.status = RetailerQueueHistory.Status.FAILED
+    queue_history_obj.save()
+    if isinstance(result, S3UploadException):
+        raise InventoryXMLS3UploadException
+    raise InventoryXMLSFTPUploadException
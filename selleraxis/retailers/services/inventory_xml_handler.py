@@ -1,11 +1,15 @@
 from datetime import datetime
+from typing import Iterator
 
+from django.conf import settings
+from django.db.models import QuerySet
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
 from selleraxis.core.utils.common import random_chars
 from selleraxis.core.utils.xsd_to_xml import XSD2XML
-from selleraxis.retailer_commercehub_sftp.models import RetailerCommercehubSFTP
+from selleraxis.product_alias.models import ProductAlias
+from selleraxis.product_alias.serializers import ReadProductAliasDataSerializer
 
 DEFAULT_FORMAT_DATE = "%Y%m%d"
 DEFAULT_FORMAT_DATETIME_FILE = "%Y%m%d%H%M%S"
@@ -17,10 +21,24 @@ DEFAULT_XSD_FILE_URL = "./selleraxis/retailers/services/HubXML_Inventory.xsd"
 
 
 class InventoryXMLHandler(XSD2XML):
-    def __init__(self, data: dict, sftp_config: dict = None, *args, **kwargs):
+    """
+    Inventory XML handler
+        :param dict data: retailer data
+        :param QuerySet product_aliases: when specified, the product aliases are read
+            from the database in chunks while the XML is streamed, instead of being
+            serialized in data["retailer_products_aliases"]
+    """
+
+    def __init__(
+        self,
+        data: dict,
+        sftp_config: dict = None,
+        product_aliases: QuerySet = None,
+        *args,
+        **kwargs,
+    ):
         super().__init__(data, sftp_config, *args, **kwargs)
-        self.commercehub_sftp: RetailerCommercehubSFTP | None = None
-        self.retailer_id = None
+        self.product_aliases = product_aliases
 
     def set_localpath(self) -> None:
         self.localpath = "{upload_date}_{merchant_id}_{organization_id}_{retailer_id}_{rand}_inventory.xml".format(
@@ -51,46 +69,83 @@ class InventoryXMLHandler(XSD2XML):
         else:
             self.schema_file = DEFAULT_XSD_FILE_URL
 
-    def set_sftp_info(self) -> None:
-        self.retailer_id = self.clean_data["id"]
-        self.commercehub_sftp = RetailerCommercehubSFTP.objects.filter(
-            retailer_id=self.retailer_id
-        ).last()
-        if self.commercehub_sftp:
-            self.sftp_config = self.commercehub_sftp.__dict__
+    def get_retailer_id(self) -> int:
+        return self.clean_data["id"]
 
     def remove_xml_file_localpath(self) -> None:
         self.xml_generator.remove()
 
     def set_data(self) -> None:
+        if self.product_aliases is not None:
+            self.clean_data["retailer_products_aliases"] = self.iter_product_aliases()
+            self.clean_data["advice_file_count"] = self.product_aliases.count()
+        else:
+            retailer_products_aliases = self.clean_data.get(
+                "retailer_products_aliases", []
+            )
+            self.clean_data["retailer_products_aliases"] = [
+                product_alias
+                for product_alias in retailer_products_aliases
+                if self.clean_product_alias(product_alias)
+            ]
+            self.clean_data["advice_file_count"] = len(retailer_products_aliases)
+
+        self.clean_data["vendor"] = DEFAULT_VENDOR
+
+    def iter_product_aliases(self) -> Iterator[dict]:
+        """Serialize the product aliases chunk by chunk from a server-side cursor"""
+        product_alias_ids = (
+            self.product_aliases.order_by("id")
+            .values_list("id", flat=True)
+            .iterator(chunk_size=settings.INVENTORY_XML_CHUNK_SIZE)
+        )
+        chunk = []
+        for product_alias_id in product_alias_ids:
+            chunk.append(product_alias_id)
+            if len(chunk) >= settings.INVENTORY_XML_CHUNK_SIZE:
+                yield from self.serialize_product_aliases(chunk)
+                chunk = []
+
+        if chunk:
+            yield from self.serialize_product_aliases(chunk)
+
+    def serialize_product_aliases(self, product_alias_ids: list) -> Iterator[dict]:
+        product_aliases = (
+            ProductAlias.objects.filter(id__in=product_alias_ids)
+            .select_related("product")
+            .prefetch_related(
+                "retailer_product_aliases__retailer_warehouse",
+                "retailer_product_aliases__product_warehouse_statices",
+            )
+            .order_by("id")
+        )
+        for product_alias in ReadProductAliasDataSerializer(
+            product_aliases, many=True
+        ).data:
+            if self.clean_product_alias(product_alias):
+                yield product_alias
+
+    def clean_product_alias(self, product_alias: dict) -> bool:
+        """Prepare the product alias data, return False when it should be skipped"""
         object_available = {
             "Available": "YES",
             "Unavailable": "NO",
             "Guaranteed": "GUARANTEED",
             "Discontinued": "DISCONTINUED",
         }
-        retailer_products_aliases = self.clean_data.get("retailer_products_aliases", [])
-        checked_retailer_warehouse_products = []
-        for product_alias in retailer_products_aliases:
-            product_alias["availability"] = object_available[
-                product_alias["availability"]
-            ]
-            if product_alias.get("product").get("description").isspace():
-                product_alias["product"]["description"] = None
-            if product_alias["product"]["description"] == "":
-                product_alias["product"]["description"] = None
-            list_retailer_warehouse_products = product_alias.get(
-                "retailer_warehouse_products", []
-            )
-            if len(list_retailer_warehouse_products) > 0:
-                self.process_product_alias(product_alias)
-                checked_retailer_warehouse_products.append(product_alias)
+        product_alias["availability"] = object_available[product_alias["availability"]]
+        if product_alias.get("product").get("description").isspace():
+            product_alias["product"]["description"] = None
+        if product_alias["product"]["description"] == "":
+            product_alias["product"]["description"] = None
+        list_retailer_warehouse_products = product_alias.get(
+            "retailer_warehouse_products", []
+        )
+        if len(list_retailer_warehouse_products) > 0:
+            self.process_product_alias(product_alias)
+            return True
 
-        self.clean_data[
-            "retailer_products_aliases"
-        ] = checked_retailer_warehouse_products
-        self.clean_data["vendor"] = DEFAULT_VENDOR
-        self.clean_data["advice_file_count"] = len(retailer_products_aliases)
+        return False
 
     def process_product_alias(self, product_alias: dict) -> None:
         product = product_alias.get("product", {})
@@ -1,91 +1,19 @@
-import json
 import logging
 
 import requests
 from rest_framework.exceptions import ParseError
 
+from selleraxis.core.clients.qbo_client import QBOClient, get_fault_message
+from selleraxis.core.utils.qbo_cache import QBOCache
 from selleraxis.core.utils.qbo_environment import production_and_sandbox_environments
-from selleraxis.core.utils.qbo_token import check_token_exp, create_qbo_unhandled
+from selleraxis.core.utils.qbo_sync import QBOBatchSync, is_stale_object
 from selleraxis.qbo_unhandled_data.models import QBOUnhandledData
+from selleraxis.retailers.models import Retailer
 from selleraxis.settings.common import DATE_FORMAT, LOGGER_FORMAT
 
 logging.basicConfig(format=LOGGER_FORMAT, datefmt=DATE_FORMAT)
 
 
-def save_retailer_qbo(
-    organization, access_token, realm_id, data, action, model, object_id, is_sandbox
-):
-    """Create Customer in qbo.
-
-    Args:
-        action: An string.
-        model: An string.
-        object_id: An integer.
-        data: A dict.
-        access_token: An string.
-        organization: Organization object.
-        realm_id: An string.
-        is_sandbox: A boolean.
-    Returns:
-        return status saving process, data return.
-    Raises:
-        ParseError: Error when saving
-        ParseError: Invalid token (both access token and refresh token expired)
-    """
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-    }
-    retailer_data = data
-
-    url = f"{production_and_sandbox_environments(is_sandbox)}/v3/company/{realm_id}/customer"
-    response = requests.post(url, headers=headers, data=json.dumps(retailer_data))
-    if response.status_code == 400:
-        status = QBOUnhandledData.Status.FAIL
-        create_qbo_unhandled(action, model, object_id, organization, status, is_sandbox)
-        json_response = json.loads(response.text)
-        response_fault = json_response.get("Fault")
-        if response_fault and response_fault.get("Error"):
-            if (
-                isinstance(response_fault.get("Error"), list)
-                and len(response_fault.get("Error")) == 1
-            ):
-                if response_fault.get("Error")[0].get("code") == "6240":
-                    raise ParseError(response_fault.get("Error")[0].get("Detail"))
-        logging.error(response.text)
-        raise ParseError(response.text)
-    if response.status_code == 401:
-        get_token_result, token_data = check_token_exp(organization, is_sandbox)
-        if get_token_result is False:
-            status = QBOUnhandledData.Status.EXPIRED
-            create_qbo_unhandled(
-                action, model, object_id, organization, status, is_sandbox
-            )
-
-            organization.qbo_access_token = None
-            organization.qbo_refresh_token = None
-            organization.qbo_access_token_exp_time = None
-            organization.qbo_refresh_token_exp_time = None
-            organization.save()
-
-            raise ParseError("Invalid token")
-        access_token = token_data.get("access_token")
-        return save_retailer_qbo(
-            organization=organization,
-            access_token=access_token,
-            realm_id=realm_id,
-            data=data,
-            action=action,
-            model=model,
-            object_id=object_id,
-            is_sandbox=is_sandbox,
-        )
-
-    retailer_qbo = response.json()
-    return True, retailer_qbo
-
-
 def query_retailer_qbo(retailer_to_qbo, access_token, realm_id, is_sandbox):
     """Query Customer in qbo by DisplayName.
 
@@ -100,12 +28,24 @@ def query_retailer_qbo(retailer_to_qbo, access_token, realm_id, is_sandbox):
         None
     """
     try:
+        search_name = retailer_to_qbo.name.strip()
+        qbo_cache = QBOCache(retailer_to_qbo.organization_id, is_sandbox)
+        qbo_cache.refresh(
+            QBOClient(retailer_to_qbo.organization, is_sandbox, access_token)
+        )
+        customer = qbo_cache.get_many("Customer", [search_name]).get(
+            search_name.upper()
+        )
+        if customer is not None:
+            RetailerQBOSync.link_customer(retailer_to_qbo, customer)
+            retailer_to_qbo.save()
+            return True, None
+
         headers = {
             "Content-Type": "text/plain",
             "Authorization": f"Bearer {access_token}",
             "Accept": "application/json",
         }
-        search_name = retailer_to_qbo.name.strip()
         url = (
             f"{production_and_sandbox_environments(is_sandbox)}/v3/company/{realm_id}/query"
             f"?query=select * from Customer Where DisplayName = '{search_name}'"
@@ -127,6 +67,7 @@ def query_retailer_qbo(retailer_to_qbo, access_token, realm_id, is_sandbox):
             if list_item is not None:
                 if len(list_item) > 0:
                     if list_item[0].get("DisplayName").upper() == search_name.upper():
+                        qbo_cache.set_many("Customer", list_item[:1])
                         retailer_to_qbo.qbo_customer_ref_id = int(
                             list_item[0].get("Id")
                         )
@@ -144,44 +85,6 @@ def query_retailer_qbo(retailer_to_qbo, access_token, realm_id, is_sandbox):
         return False, f"Error query customer: {e}"
 
 
-def validate_token(organization, action, model, object_id, is_sandbox):
-    """Validate qbo token.
-
-    Args:
-        organization: Organization object.
-        action: An string.
-        model: An string.
-        object_id: An integer.
-        is_sandbox: An boolean
-    Returns:
-        return status saving process, data return.
-    Raises:
-        ParseError: Missing realm id
-        ParseError: Invalid token (both access token and refresh token expired)
-    """
-    realm_id = organization.realm_id
-    if realm_id is None:
-        status = QBOUnhandledData.Status.UNHANDLED
-        create_qbo_unhandled(action, model, object_id, organization, status, is_sandbox)
-        raise ParseError("Missing realm id")
-
-    get_token_result, token_data = check_token_exp(organization, is_sandbox)
-    if get_token_result is False:
-        status = QBOUnhandledData.Status.EXPIRED
-        create_qbo_unhandled(action, model, object_id, organization, status, is_sandbox)
-
-        organization.qbo_access_token = None
-        organization.qbo_refresh_token = None
-        organization.qbo_access_token_exp_time = None
-        organization.qbo_refresh_token_exp_time = None
-        organization.save()
-
-        raise ParseError("Invalid token")
-
-    access_token = token_data.get("access_token")
-    return access_token
-
-
 def validate_action_and_model(action, model):
     """Validate qbo token.
 
@@ -211,6 +114,135 @@ def validate_action_and_model(action, model):
     return action, model
 
 
+class RetailerQBOSync(QBOBatchSync):
+    """Sync retailers to QBO customers.
+
+    Existing customers are found in the QBO cache or with one
+    ``DisplayName IN (...)`` query and customers are created/updated through
+    /batch. Customers updated with a stale SyncToken are read again and
+    retried once.
+    """
+
+    model = QBOUnhandledData.Model.RETAILER
+
+    def sync_objects(self, retailers):
+        customers = self.lookup("Customer", [retailer.name for retailer in retailers])
+
+        operations = []
+        for retailer in retailers:
+            customer = customers.get(retailer.name.strip().upper())
+            if customer is None:
+                retailer.qbo_customer_ref_id = None
+                retailer.sync_token = None
+                operations.append((retailer, "create", {"DisplayName": retailer.name}))
+                continue
+            self.link_customer(retailer, customer)
+            if self.action == QBOUnhandledData.Action.UPDATE:
+                operations.append((retailer, "update", self.get_update_body(retailer)))
+            else:
+                self.done(retailer, customer)
+
+        try:
+            stale_retailers = self.write_customers(operations)
+            if stale_retailers:
+                # the cached SyncToken is outdated, read the customers again once
+                names = [retailer.name for retailer in stale_retailers]
+                self.cache.delete("Customer", names)
+                customers = self.lookup("Customer", names)
+                operations = []
+                for retailer in stale_retailers:
+                    customer = customers.get(retailer.name.strip().upper())
+                    if customer is None:
+                        self.fail([retailer], f"Customer {retailer.name} not found")
+                        continue
+                    self.link_customer(retailer, customer)
+                    operations.append(
+                        (retailer, "update", self.get_update_body(retailer))
+                    )
+                for retailer in self.write_customers(operations):
+                    self.fail([retailer], f"Customer {retailer.name} is stale")
+        finally:
+            Retailer.objects.bulk_update(
+                retailers, ["name", "qbo_customer_ref_id", "sync_token"]
+            )
+
+    def write_customers(self, operations) -> list:
+        """Create/update the customers, returns the retailers sent with a stale SyncToken"""
+        stale_retailers = []
+        written_customers = []
+        batch_items = self.client.batch(
+            [
+                {"operation": operation, "Customer": body}
+                for _, operation, body in operations
+            ]
+        )
+        for (retailer, _, _), batch_item in zip(operations, batch_items):
+            customer = batch_item.get("Customer")
+            if customer is None:
+                if is_stale_object(batch_item):
+                    stale_retailers.append(retailer)
+                else:
+                    self.fail([retailer], get_fault_message(batch_item))
+                continue
+            self.link_customer(retailer, customer)
+            self.done(retailer, customer)
+            written_customers.append(customer)
+        self.cache.set_many("Customer", written_customers)
+        return stale_retailers
+
+    @staticmethod
+    def get_update_body(retailer) -> dict:
+        return {
+            "Id": str(retailer.qbo_customer_ref_id),
+            "DisplayName": retailer.name,
+            "SyncToken": str(retailer.sync_token or 0),
+        }
+
+    @staticmethod
+    def link_customer(retailer, customer):
+        retailer.qbo_customer_ref_id = int(customer.get("Id"))
+        retailer.sync_token = int(customer.get("SyncToken"))
+        retailer.name = customer.get("DisplayName")
+
+
+def sync_retailers_qbo(organization, retailers, is_sandbox, action="Create") -> list:
+    """Sync retailers of organization to qbo in one run.
+
+    Args:
+        organization: Organization object.
+        retailers: List of Retailer objects.
+        is_sandbox: A bool.
+        action: An string.
+    Returns:
+        return id, name, qbo id and message of each retailer.
+    """
+    action, _ = validate_action_and_model(action=action, model="Retailer")
+    retailers = list(retailers)
+    results = RetailerQBOSync(organization, is_sandbox, action).sync(retailers)
+    list_response = []
+    for retailer in retailers:
+        customer, error = results[retailer.id]
+        list_response.append(
+            {
+                "id": retailer.id,
+                "name": retailer.name,
+                "qbo_id": int(customer.get("Id")) if customer else None,
+                "create_qbo_message": "Success" if error is None else error,
+            }
+        )
+    return list_response
+
+
+def sync_retailer_qbo(action, model, retailer_to_qbo, is_sandbox):
+    action, model = validate_action_and_model(action=action, model=model)
+    customer, error = RetailerQBOSync(
+        retailer_to_qbo.organization, is_sandbox, action
+    ).sync([retailer_to_qbo])[retailer_to_qbo.id]
+    if error is not None:
+        raise ParseError(error)
+    return customer
+
+
 def create_quickbook_retailer_service(action, model, retailer_to_qbo, is_sandbox):
     """Create qbo retailer(customer).
 
@@ -224,54 +256,13 @@ def create_quickbook_retailer_service(action, model, retailer_to_qbo, is_sandbox
     Raises:
         ParseError: Message create qbo fail.
     """
-    organization = retailer_to_qbo.organization
-    action, model = validate_action_and_model(action=action, model=model)
-    access_token = validate_token(
-        organization, action, model, retailer_to_qbo.id, is_sandbox
-    )
-    realm_id = organization.realm_id
-    check_qbo, query_message = query_retailer_qbo(
-        retailer_to_qbo=retailer_to_qbo,
-        access_token=access_token,
-        realm_id=realm_id,
-        is_sandbox=is_sandbox,
-    )
-    if check_qbo is True:
-        qbo_id = retailer_to_qbo.qbo_customer_ref_id
-        sync_token = retailer_to_qbo.sync_token
-        result = {
-            "id": retailer_to_qbo.id,
-            "name": retailer_to_qbo.name,
-            "qbo_id": qbo_id,
-            "sync_token": sync_token,
-        }
-        return result
-    # if query qbo in create service fail or non exist -> create
-    request_body = {
-        "DisplayName": retailer_to_qbo.name,
+    sync_retailer_qbo(action, model, retailer_to_qbo, is_sandbox)
+    return {
+        "id": retailer_to_qbo.id,
+        "name": retailer_to_qbo.name,
+        "qbo_id": retailer_to_qbo.qbo_customer_ref_id,
+        "sync_token": retailer_to_qbo.sync_token,
     }
-    creating_result, retailer_qbo = save_retailer_qbo(
-        organization=organization,
-        access_token=access_token,
-        realm_id=realm_id,
-        data=request_body,
-        action=action,
-        model=model,
-        object_id=retailer_to_qbo.id,
-        is_sandbox=is_sandbox,
-    )
-    qbo_id = None
-    qbo_synctoken = None
-    if retailer_qbo.get("Customer"):
-        qbo_id = retailer_qbo.get("Customer").get("Id")
-        qbo_synctoken = retailer_qbo.get("Customer").get("SyncToken")
-    if qbo_id is not None:
-        retailer_to_qbo.qbo_customer_ref_id = int(qbo_id)
-        retailer_to_qbo.save()
-    if qbo_synctoken is not None:
-        retailer_to_qbo.sync_token = int(qbo_synctoken)
-        retailer_to_qbo.save()
-    return retailer_qbo
 
 
 def update_quickbook_retailer_service(action, model, retailer_to_qbo, is_sandbox):
@@ -283,93 +274,9 @@ def update_quickbook_retailer_service(action, model, retailer_to_qbo, is_sandbox
         retailer_to_qbo: Product object.
         is_sandbox: A bool.
     Returns:
-        return retailer id, name and qbo info.
+        return qbo customer.
     Raises:
         ParseError: Message update qbo fail.
     """
-    organization = retailer_to_qbo.organization
-    action, model = validate_action_and_model(action=action, model=model)
-    access_token = validate_token(
-        organization, action, model, retailer_to_qbo.id, is_sandbox
-    )
-    realm_id = organization.realm_id
-    check_qbo, query_message = query_retailer_qbo(
-        retailer_to_qbo=retailer_to_qbo,
-        access_token=access_token,
-        realm_id=realm_id,
-        is_sandbox=is_sandbox,
-    )
-    if check_qbo is False:
-        if query_message is None:
-            # create new obj qbo when not exist
-            request_body = {
-                "DisplayName": retailer_to_qbo.name,
-            }
-            creating_result, retailer_qbo = save_retailer_qbo(
-                organization=organization,
-                access_token=access_token,
-                realm_id=realm_id,
-                data=request_body,
-                action=action,
-                model=model,
-                object_id=retailer_to_qbo.id,
-                is_sandbox=is_sandbox,
-            )
-            qbo_id = None
-            qbo_synctoken = None
-            if retailer_qbo.get("Customer"):
-                qbo_id = retailer_qbo.get("Customer").get("Id")
-                qbo_synctoken = retailer_qbo.get("Customer").get("SyncToken")
-            if qbo_id is not None:
-                retailer_to_qbo.qbo_customer_ref_id = int(qbo_id)
-                retailer_to_qbo.save()
-            if qbo_synctoken is not None:
-                retailer_to_qbo.sync_token = int(qbo_synctoken)
-                retailer_to_qbo.save()
-            return retailer_qbo
-        # If toke expired when query
-        elif query_message == "expired":
-            status = QBOUnhandledData.Status.EXPIRED
-            create_qbo_unhandled(
-                action, model, retailer_to_qbo.id, organization, status, is_sandbox
-            )
-            raise ParseError(query_message)
-        # If cant not query
-        else:
-            status = QBOUnhandledData.Status.FAIL
-            create_qbo_unhandled(
-                action, model, retailer_to_qbo.id, organization, status, is_sandbox
-            )
-            raise ParseError(query_message)
-    qbo_customer_ref_id = retailer_to_qbo.qbo_customer_ref_id
-    if qbo_customer_ref_id is None:
-        status = QBOUnhandledData.Status.FAIL
-        create_qbo_unhandled(
-            action, model, retailer_to_qbo.id, organization, status, is_sandbox
-        )
-        raise ParseError(query_message)
-
-    sync_token = retailer_to_qbo.sync_token
-    request_body = {
-        "Id": str(qbo_customer_ref_id),
-        "DisplayName": retailer_to_qbo.name,
-        "SyncToken": str(sync_token) if sync_token is not None else 0,
-    }
-
-    update_result, retailer_qbo = save_retailer_qbo(
-        organization=organization,
-        access_token=access_token,
-        realm_id=realm_id,
-        data=request_body,
-        action=action,
-        model=model,
-        object_id=retailer_to_qbo.id,
-        is_sandbox=is_sandbox,
-    )
-    sync_token = None
-    if retailer_qbo.get("Customer"):
-        sync_token = retailer_qbo.get("Customer").get("SyncToken")
-    if sync_token is not None:
-        retailer_to_qbo.sync_token = int(sync_token)
-        retailer_to_qbo.save()
-    return retailer_qbo
+    customer = sync_retailer_qbo(action, model, retailer_to_qbo, is_sandbox)
+    return {"Customer": customer}
@@ -1,7 +1,3 @@
-import asyncio
-
-from asgiref.sync import async_to_sync, sync_to_async
-from django.conf import settings
 from django.db.models import OuterRef, Subquery
 from django.http import Http404
 from drf_yasg import openapi
@@ -22,7 +18,6 @@ from rest_framework.status import HTTP_200_OK
 from rest_framework.views import APIView
 
 from selleraxis.addresses.models import Address
-from selleraxis.core.clients.boto3_client import s3_client
 from selleraxis.core.pagination import Pagination
 from selleraxis.core.permissions import check_permission
 from selleraxis.permissions.models import Permissions
@@ -37,15 +32,20 @@ from selleraxis.retailers.serializers import (
     RetailerSerializer,
     UpdateRetailerSerializer,
     XMLRetailerSerializer,
+    XMLStreamRetailerSerializer,
 )
 from selleraxis.retailers.services.import_data import import_purchase_order
 from selleraxis.retailers.services.inventory_xml_handler import InventoryXMLHandler
 
 from ..core.custom_permission import CustomPermission
 from ..organizations.models import Organization
-from .exceptions import InventoryXMLS3UploadException, InventoryXMLSFTPUploadException
+from .services.inventory_push_services import (
+    push_retailer_inventory,
+    stream_inventory_xml,
+)
 from .services.retailer_qbo_services import (
     create_quickbook_retailer_service,
+    sync_retailers_qbo,
     update_quickbook_retailer_service,
 )
 
@@ -223,49 +223,22 @@ class RetailerInventoryXML(RetrieveAPIView):
         )
         return retailer
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "full",
+                openapi.IN_QUERY,
+                description="Send every product alias, not only the changed ones",
+                type=openapi.TYPE_BOOLEAN,
+            )
+        ]
+    )
     def retrieve(self, request, *args, **kwargs):
         retailer = self.get_object()
-        queue_history_obj = self.create_queue_history(retailer=retailer)
-        response_data = self.create_inventory(
-            retailer=retailer, queue_history_obj=queue_history_obj
-        )
+        full = request.query_params.get("full", "").lower() in ("1", "true")
+        response_data = push_retailer_inventory(retailer=retailer, full=full)
         return Response(data=response_data, status=HTTP_200_OK)
 
-    def create_queue_history(self, retailer: Retailer) -> RetailerQueueHistory:
-        return RetailerQueueHistory.objects.create(
-            retailer_id=retailer.pk,
-            type=retailer.type,
-            status=RetailerQueueHistory.Status.PENDING,
-            label=RetailerQueueHistory.Label.INVENTORY,
-        )
-
-    def create_inventory(
-        self, retailer: Retailer, queue_history_obj: RetailerQueueHistory
-    ) -> dict:
-        serializer = self.serializer_class(retailer)
-        inventory_obj = InventoryXMLHandler(data=serializer.data)
-        file, file_created = inventory_obj.upload_xml_file(False)
-        if file_created:
-            s3_response = s3_client.upload_file(
-                filename=inventory_obj.localpath, bucket=settings.BUCKET_NAME
-            )
-            # remove XML file on localhost path
-            inventory_obj.remove_xml_file_localpath()
-            if s3_response.ok:
-                queue_history_obj.status = RetailerQueueHistory.Status.COMPLETED
-                queue_history_obj.result_url = s3_response.data
-                queue_history_obj.save()
-            else:
-                queue_history_obj.status = RetailerQueueHistory.Status.FAILED
-                queue_history_obj.save()
-                raise InventoryXMLS3UploadException
-
-            return {"id": retailer.pk, "file": s3_response.data}
-
-        queue_history_obj.status = RetailerQueueHistory.Status.FAILED
-        queue_history_obj.save()
-        raise InventoryXMLSFTPUploadException
-
 
 class RetailerCheckOrder(RetrieveAPIView):
     queryset = Retailer.objects.all()
@@ -331,34 +304,12 @@ class RetailerSQSInventoryXMLView(GenericAPIView):
     def create_inventory_retailer(
         self, retailer: Retailer, queue_history_obj: RetailerQueueHistory, ids: list
     ) -> dict:
-        serializer = self.serializer_class(retailer)
-        data = serializer.data
-        filtered_aliases = [
-            alias for alias in data["retailer_products_aliases"] if alias["id"] in ids
-        ]
-        data["retailer_products_aliases"] = filtered_aliases
-        inventory_obj = InventoryXMLHandler(data=data)
-        file, file_created = inventory_obj.upload_xml_file(False)
-        if file_created:
-            s3_response = s3_client.upload_file(
-                filename=inventory_obj.localpath, bucket=settings.BUCKET_NAME
-            )
-            # remove XML file on localhost path
-            inventory_obj.remove_xml_file_localpath()
-            if s3_response.ok:
-                queue_history_obj.status = RetailerQueueHistory.Status.COMPLETED
-                queue_history_obj.result_url = s3_response.data
-                queue_history_obj.save()
-            else:
-                queue_history_obj.status = RetailerQueueHistory.Status.FAILED
-                queue_history_obj.save()
-                raise InventoryXMLS3UploadException
-
-            return {"id": retailer.pk, "file": s3_response.data}
-
-        queue_history_obj.status = RetailerQueueHistory.Status.FAILED
-        queue_history_obj.save()
-        raise InventoryXMLSFTPUploadException
+        serializer = XMLStreamRetailerSerializer(retailer)
+        inventory_obj = InventoryXMLHandler(
+            data=serializer.data,
+            product_aliases=retailer.retailer_products_aliases.filter(id__in=ids),
+        )
+        return stream_inventory_xml(retailer, inventory_obj, queue_history_obj)
 
 
 class QuickbookCreateRetailer(GenericAPIView):
@@ -481,33 +432,9 @@ class BulkManualCreateRetailerQBOView(APIView):
                     "create_qbo_message": "Not found",
                 }
                 list_response.append(response_item)
-        res = self.bulk_create_retailer_qbo_process(list_retailer, organization)
-        list_response += res
-        return Response(data=list_response, status=status.HTTP_200_OK)
-
-    @async_to_sync
-    async def bulk_create_retailer_qbo_process(self, list_retailer, organization):
-        response = await asyncio.gather(
-            *[self.create_QBO(retailer, organization) for retailer in list_retailer]
+        list_response += sync_retailers_qbo(
+            organization=organization,
+            retailers=list_retailer,
+            is_sandbox=organization.is_sandbox,
         )
-        return response
-
-    @sync_to_async
-    def create_QBO(self, retailer_to_qbo, organization):
-        response_item = {
-            "id": retailer_to_qbo.id,
-            "name": retailer_to_qbo.name,
-            "qbo_id": None,
-            "create_qbo_message": "Success",
-        }
-        try:
-            response = create_quickbook_retailer_service(
-                action="Create",
-                model="Retailer",
-                retailer_to_qbo=retailer_to_qbo,
-                is_sandbox=organization.is_sandbox,
-            )
-            response_item["qbo_id"] = response.get("qbo_id")
-        except Exception as e:
-            response_item["create_qbo_message"] = e.detail
-        return response_item
+        return Response(data=list_response, status=status.HTTP_200_OK)
@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+from selleraxis.core.permission_cache import invalidate_organization_permissions
 from selleraxis.roles.models import Role
 from selleraxis.users.models import User
 
@@ -9,3 +12,12 @@ class RoleUser(models.Model):
     role = models.ForeignKey(Role, related_name="members", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+@receiver([post_save, post_delete], sender=RoleUser)
+def invalidate_role_user_permission_cache(sender, instance, **kwargs):
+    try:
+        invalidate_organization_permissions(instance.role.organization_id)
+    except Role.DoesNotExist:
+        # deleted along with its role, which invalidates the organization
+        pass
@@ -1,6 +1,9 @@
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+from selleraxis.core.permission_cache import invalidate_organization_permissions
 from selleraxis.organizations.models import Organization
 from selleraxis.permissions.models import Permissions
 
@@ -15,3 +18,8 @@ class Role(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_role_permission_cache(sender, instance, **kwargs):
+    invalidate_organization_permissions(instance.organization_id)
@@ -1,13 +1,25 @@
-import copy
 import json
+import threading
 
 import jinja2
 import requests
 from django.db import models
 from rest_framework.exceptions import APIException
 
+from selleraxis.core.clients.http_client import create_http_session
 from selleraxis.services.models import Services
 
+# compiled templates and response paths by (service api id, updated_at)
+_compiled_cache = {}
+_compiled_cache_lock = threading.Lock()
+# keep-alive sessions by service id
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+RESPONSE_PATH = "path"
+RESPONSE_NESTED = "nested"
+RESPONSE_VALUE = "value"
+
 
 class ServiceAPIAction(models.TextChoices):
     ADDRESS_VALIDATION = "ADDRESS_VALIDATION"
@@ -16,6 +28,72 @@ class ServiceAPIAction(models.TextChoices):
     LOGIN = "LOGIN"
 
 
+def compile_response_format(response_format: dict) -> list:
+    """Pre-split the {{a.b.0}} paths of a response format"""
+    compiled = []
+    for key, path in response_format.items():
+        if isinstance(path, str) and path.startswith("{{") and path.endswith("}}"):
+            compiled.append((key, RESPONSE_PATH, tuple(path[2:-2].split("."))))
+        elif isinstance(path, dict):
+            types = str(path["type"]).lower().split("|")
+            compiled.append(
+                (
+                    key,
+                    RESPONSE_NESTED,
+                    (
+                        types,
+                        tuple(path["field"][2:-2].split(".")),
+                        compile_response_format(path["data"]),
+                    ),
+                )
+            )
+        else:
+            compiled.append((key, RESPONSE_VALUE, path))
+    return compiled
+
+
+def read_compiled_response(res, compiled_format: list) -> dict:
+    res_data = {}
+
+    for key, kind, path in compiled_format:
+        if kind == RESPONSE_PATH:
+            value = res[path[0]]
+            for sub_path in path[1:]:
+                if isinstance(value, list):
+                    if len(value) > int(sub_path):
+                        value = value[int(sub_path)]
+                    else:
+                        value = ""
+                else:
+                    value = value[sub_path]
+            res_data[key] = value
+
+        elif kind == RESPONSE_NESTED:
+            types, field_path, data_format = path
+            if "list" in types or "dict" in types:
+                res_data[key] = []
+
+                value = res[field_path[0]]
+                for sub_path in field_path[1:]:
+                    if isinstance(value, list):
+                        value = value[int(sub_path)]
+                    else:
+                        value = value[sub_path]
+
+                if "list" in types and isinstance(value, list):
+                    for data_item in value:
+                        res_data[key].append(
+                            read_compiled_response(data_item, data_format)
+                        )
+
+                elif "dict" in types and isinstance(value, dict):
+                    res_data[key].append(read_compiled_response(value, data_format))
+        else:
+            res_data[key] = path
+
+    return res_data
+
+
 class ServiceAPI(models.Model):
     action = models.CharField(max_length=255, choices=ServiceAPIAction.choices)
     sandbox_url = models.CharField(max_length=255)
@@ -29,90 +107,82 @@ class ServiceAPI(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def read_response_data(self, res, response_format):
-        res_data = {}
-
-        for key in response_format:
-            path = response_format[key]
+        return read_compiled_response(res, compile_response_format(response_format))
+
+    def read_response(self, res) -> dict:
+        """Read res with the stored response format"""
+        return read_compiled_response(res, self.get_compiled()["response"])
+
+    def get_compiled(self) -> dict:
+        """Compiled templates and response format, recompiled when the row changes"""
+        if self.pk is None:
+            return self.compile()
+
+        key = (self.pk, self.updated_at)
+        compiled = _compiled_cache.get(key)
+        if compiled is None:
+            compiled = self.compile()
+            with _compiled_cache_lock:
+                for cached_key in [k for k in _compiled_cache if k[0] == self.pk]:
+                    del _compiled_cache[cached_key]
+                _compiled_cache[key] = compiled
+        return compiled
+
+    def compile(self) -> dict:
+        environment = jinja2.Environment()
+        return {
+            "sandbox_url": environment.from_string(self.sandbox_url),
+            "production_url": environment.from_string(self.production_url),
+            "header": environment.from_string(self.header),
+            "body": environment.from_string(self.body),
+            "response": compile_response_format(json.loads(self.response)),
+        }
+
+    def get_session(self) -> requests.Session:
+        """Keep-alive session of the service, retries failed connections with backoff"""
+        session = _sessions.get(self.service_id)
+        if session is None:
+            with _sessions_lock:
+                session = _sessions.get(self.service_id)
+                if session is None:
+                    session = create_http_session()
+                    _sessions[self.service_id] = session
+        return session
 
-            if isinstance(path, str) and path.startswith("{{") and path.endswith("}}"):
-                path = path[2:-2]
-                for i, sub_path in enumerate(path.split(".")):
-                    if i == 0:
-                        res_data[key] = res[sub_path]
-                    else:
-                        if isinstance(res_data[key], list):
-                            if len(res_data[key]) > int(sub_path):
-                                res_data[key] = res_data[key][int(sub_path)]
-                            else:
-                                res_data[key] = ""
-                        else:
-                            res_data[key] = res_data[key][sub_path]
-            elif isinstance(path, dict):
-                types = str(path["type"]).lower().split("|")
-                if "list" in types or "dict" in types:
-                    res_data[key] = []
-                    sub_path = path["field"][2:-2]
-
-                    sub_res_data = copy.copy(res_data)
-
-                    for i, sub_path in enumerate(sub_path.split(".")):
-                        if i == 0:
-                            sub_res_data[key] = res[sub_path]
-                        else:
-                            if isinstance(sub_res_data[key], list):
-                                sub_res_data[key] = sub_res_data[key][int(sub_path)]
-                            else:
-                                sub_res_data[key] = sub_res_data[key][sub_path]
-
-                    if "list" in types and isinstance(sub_res_data[key], list):
-                        for data_item in sub_res_data[key]:
-                            res_data[key].append(
-                                self.read_response_data(data_item, path["data"])
-                            )
-
-                    elif "dict" in types and isinstance(sub_res_data[key], dict):
-                        res_data[key].append(
-                            self.read_response_data(sub_res_data[key], path["data"])
-                        )
-            else:
-                res_data[key] = path
+    def request(self, data, is_sandbox=True):
+        res = self.send(data, is_sandbox=is_sandbox)
 
-        return res_data
+        try:
+            return self.read_response(res)
+        except KeyError:
+            raise APIException(res)
 
-    def request(self, data, is_sandbox=True):
-        environment = jinja2.Environment()
+    def send(self, data, is_sandbox=True) -> dict:
+        """Render the templates, call the API and return its raw json response"""
+        compiled = self.get_compiled()
 
         if is_sandbox:
-            url_template = environment.from_string(self.sandbox_url)
+            url_template = compiled["sandbox_url"]
         else:
-            url_template = environment.from_string(self.production_url)
-        header_template = environment.from_string(self.header)
-        body_template = environment.from_string(self.body)
+            url_template = compiled["production_url"]
 
         url = url_template.render(**data)
 
-        headers = json.loads(header_template.render(**data))
+        headers = json.loads(compiled["header"].render(**data))
         if headers["Content-Type"] == "application/json":
-            body = body_template.render(**data)
+            body = compiled["body"].render(**data)
         else:
-            body = json.loads(body_template.render(**data))
+            body = json.loads(compiled["body"].render(**data))
 
         if headers.get("transactionSrc") is not None:
             if is_sandbox:
                 headers["transactionSrc"] = "testing"
 
-        res = requests.request(
+        res = self.get_session().request(
             self.method,
             url,
             headers=headers,
             data=body,
         )
 
-        res = res.json()
-
-        response_format = json.loads(self.response)
-
-        try:
-            return self.read_response_data(res, response_format)
-        except KeyError:
-            raise APIException(res)
+        return res.json()
@@ -0,0 +1,105 @@
+import base64
+import hashlib
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from selleraxis.retailer_carriers.models import RetailerCarrier
+from selleraxis.service_api.models import ServiceAPI, ServiceAPIAction
+
+ACCESS_TOKEN_CACHE_KEY = "carrier_access_token_{}"
+ACCESS_TOKEN_LOCK_CACHE_KEY = "carrier_access_token_lock_{}"
+ACCESS_TOKEN_LOCK_TIMEOUT = 30
+ACCESS_TOKEN_POLL_INTERVAL = 0.1
+
+# one login per token at a time inside the process, the cache lock covers
+# the other gunicorn workers
+_refresh_locks = defaultdict(threading.Lock)
+_refresh_locks_lock = threading.Lock()
+
+
+def get_access_token_key(carrier: RetailerCarrier, is_sandbox: bool) -> str:
+    credentials = f"{carrier.client_id}:{carrier.client_secret}".encode("UTF-8")
+    return "{}_{}_{}".format(
+        carrier.service_id,
+        "sandbox" if is_sandbox else "production",
+        hashlib.sha256(credentials).hexdigest(),
+    )
+
+
+def get_carrier_access_token(carrier: RetailerCarrier, is_sandbox=True) -> str:
+    """Return a valid access token of the carrier, logging in only when needed.
+
+    Tokens are cached until shortly before the expires_in of the provider, a
+    token is refreshed once even when many workers ask for it at the same time.
+    """
+    token_key = get_access_token_key(carrier, is_sandbox)
+    cache_key = ACCESS_TOKEN_CACHE_KEY.format(token_key)
+    access_token = cache.get(cache_key)
+    if access_token:
+        return access_token
+
+    with _refresh_locks_lock:
+        refresh_lock = _refresh_locks[token_key]
+
+    with refresh_lock:
+        access_token = cache.get(cache_key)
+        if access_token:
+            return access_token
+
+        lock_key = ACCESS_TOKEN_LOCK_CACHE_KEY.format(token_key)
+        deadline = time.monotonic() + ACCESS_TOKEN_LOCK_TIMEOUT
+        while not cache.add(lock_key, True, ACCESS_TOKEN_LOCK_TIMEOUT):
+            time.sleep(ACCESS_TOKEN_POLL_INTERVAL)
+            access_token = cache.get(cache_key)
+            if access_token:
+                return access_token
+
+            if time.monotonic() > deadline:
+                # the other worker did not finish its login, do it here
+                break
+
+        try:
+            return login_carrier(carrier, is_sandbox, cache_key)
+        finally:
+            cache.delete(lock_key)
+
+
+def login_carrier(carrier: RetailerCarrier, is_sandbox: bool, cache_key: str) -> str:
+    origin_string = f"{carrier.client_id}:{carrier.client_secret}"
+    to_binary = origin_string.encode("UTF-8")
+    basic_auth = (base64.b64encode(to_binary)).decode("ascii")
+
+    login_api = ServiceAPI.objects.filter(
+        service_id=carrier.service, action=ServiceAPIAction.LOGIN
+    ).first()
+
+    res = login_api.send(
+        {
+            "client_id": carrier.client_id,
+            "client_secret": carrier.client_secret,
+            "basic_auth": basic_auth,
+        },
+        is_sandbox=is_sandbox,
+    )
+    login_response = login_api.read_response(res)
+    access_token = login_response["access_token"]
+
+    expires_in = res.get("expires_in") or login_response.get("expires_in")
+    try:
+        timeout = int(expires_in) - settings.CARRIER_ACCESS_TOKEN_EXPIRY_MARGIN
+    except (TypeError, ValueError):
+        timeout = settings.CARRIER_ACCESS_TOKEN_DEFAULT_TIMEOUT
+
+    if timeout > 0:
+        cache.set(cache_key, access_token, timeout)
+    return access_token
+
+
+def invalidate_carrier_access_token(carrier: RetailerCarrier, is_sandbox=True) -> None:
+    """Drop the cached token, e.g. when the carrier rejected a request with it"""
+    token_key = get_access_token_key(carrier, is_sandbox)
+    cache.delete(ACCESS_TOKEN_CACHE_KEY.format(token_key))
@@ -89,6 +89,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "selleraxis.core.middlewares.RequestContextMiddleware",
     "selleraxis.core.middlewares.OrganizationMiddleware",
 ]
 
@@ -219,13 +220,121 @@ SWAGGER_SETTINGS = {
 }
 
 # Cache Config
-CACHES = {
-    "default": {
+# an in-process LRU in front of the cache shared by the containers, Redis when
+# CACHE_REDIS_URL is set, a local diskcache otherwise
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+if CACHE_REDIS_URL:
+    SHARED_CACHE = {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": CACHE_REDIS_URL,
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SOCKET_CONNECT_TIMEOUT": 1,
+            "SOCKET_TIMEOUT": 1,
+        },
+    }
+else:
+    SHARED_CACHE = {
         "BACKEND": "diskcache.DjangoCache",
         "LOCATION": "./caches",
         "TIMEOUT": 300,
         "SHARDS": 8,
         "DATABASE_TIMEOUT": 0.010,  # 10 milliseconds
         "OPTIONS": {"size_limit": 2**30},  # 1 gigabyte
+    }
+CACHES = {
+    "default": {
+        "BACKEND": "selleraxis.core.cache.TieredCache",
+        "LOCATION": "shared",
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "LOCAL_TIMEOUT": int(os.getenv("CACHE_LOCAL_TIMEOUT", 5)),
+            "LOCAL_MAX_ENTRIES": int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", 1000)),
+        },
     },
+    "shared": SHARED_CACHE,
 }
+CACHE_COMPUTE_LOCK_TIMEOUT = int(os.getenv("CACHE_COMPUTE_LOCK_TIMEOUT", 30))
+
+# Order import
+ORDER_IMPORT_MAX_WORKERS = int(os.getenv("ORDER_IMPORT_MAX_WORKERS", 4))
+ORDER_IMPORT_CHUNK_SIZE = int(os.getenv("ORDER_IMPORT_CHUNK_SIZE", 200))
+
+# Inventory XML
+INVENTORY_XML_CHUNK_SIZE = int(os.getenv("INVENTORY_XML_CHUNK_SIZE", 500))
+
+# Outgoing HTTP connection pool
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 10))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 32))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 3))
+HTTP_RETRY_BACKOFF_FACTOR = float(os.getenv("HTTP_RETRY_BACKOFF_FACTOR", 0.5))
+
+# Bulk shipping
+SHIPPING_MAX_CONCURRENCY = int(os.getenv("SHIPPING_MAX_CONCURRENCY", 8))
+SHIPPING_LABEL_MAX_WORKERS = int(os.getenv("SHIPPING_LABEL_MAX_WORKERS", 16))
+SHIPPING_PROGRESS_TIMEOUT = int(os.getenv("SHIPPING_PROGRESS_TIMEOUT", 3600))
+SHIPPING_BULK_VISIBILITY_TIMEOUT = int(
+    os.getenv("SHIPPING_BULK_VISIBILITY_TIMEOUT", 1800)
+)
+
+# Order detail
+ORDER_DETAIL_BUILD_TIMEOUT = int(os.getenv("ORDER_DETAIL_BUILD_TIMEOUT", 600))
+ORDER_DETAIL_BUILD_CHUNK_SIZE = int(os.getenv("ORDER_DETAIL_BUILD_CHUNK_SIZE", 100))
+
+# Carrier access tokens
+CARRIER_ACCESS_TOKEN_DEFAULT_TIMEOUT = int(
+    os.getenv("CARRIER_ACCESS_TOKEN_DEFAULT_TIMEOUT", 1800)
+)
+CARRIER_ACCESS_TOKEN_EXPIRY_MARGIN = int(
+    os.getenv("CARRIER_ACCESS_TOKEN_EXPIRY_MARGIN", 60)
+)
+
+# Permissions
+PERMISSION_CACHE_TIMEOUT = int(os.getenv("PERMISSION_CACHE_TIMEOUT", 300))
+
+# QBO lookup cache
+QBO_CACHE_TIMEOUT = int(os.getenv("QBO_CACHE_TIMEOUT", 86400))
+QBO_CDC_REFRESH_INTERVAL = int(os.getenv("QBO_CDC_REFRESH_INTERVAL", 60))
+
+# Package divide
+PACKAGE_DIVIDE_BOX_COST = float(os.getenv("PACKAGE_DIVIDE_BOX_COST", 10))
+PACKAGE_DIVIDE_EXACT_MAX_STATES = int(
+    os.getenv("PACKAGE_DIVIDE_EXACT_MAX_STATES", 1000)
+)
+PACKAGE_DIVIDE_EXACT_MAX_UNITS = int(os.getenv("PACKAGE_DIVIDE_EXACT_MAX_UNITS", 100))
+PACKAGE_DIVIDE_CACHE_TIMEOUT = int(os.getenv("PACKAGE_DIVIDE_CACHE_TIMEOUT", 86400))
+
+# GS1 serial numbers
+GS1_USAGE_WINDOW_DAYS = int(os.getenv("GS1_USAGE_WINDOW_DAYS", 30))
+GS1_FULL_WARNING_DAYS = int(os.getenv("GS1_FULL_WARNING_DAYS", 30))
+
+# Pagination
+PAGINATION_COUNT_CACHE_TIMEOUT = int(os.getenv("PAGINATION_COUNT_CACHE_TIMEOUT", 300))
+STREAMING_LIST_CHUNK_SIZE = int(os.getenv("STREAMING_LIST_CHUNK_SIZE", 500))
+
+# Inventory ledger
+INVENTORY_MOVEMENT_RETENTION_DAYS = int(
+    os.getenv("INVENTORY_MOVEMENT_RETENTION_DAYS", 30)
+)
+
+# Inventory push
+INVENTORY_PUSH_DEBOUNCE_SECONDS = int(os.getenv("INVENTORY_PUSH_DEBOUNCE_SECONDS", 300))
+INVENTORY_FULL_REFRESH_INTERVAL_HOURS = int(
+    os.getenv("INVENTORY_FULL_REFRESH_INTERVAL_HOURS", 24)
+)
+
+# Bulk XML upload
+SFTP_UPLOAD_CHANNELS = int(os.getenv("SFTP_UPLOAD_CHANNELS", 4))
+
+# Bulk invoicing
+INVOICE_BULK_MAX_ORDERS = int(os.getenv("INVOICE_BULK_MAX_ORDERS", 300))
+
+# Address validation
+ADDRESS_VALIDATION_CACHE_TIMEOUT = int(
+    os.getenv("ADDRESS_VALIDATION_CACHE_TIMEOUT", 7 * 24 * 3600)
+)
+ADDRESS_VALIDATION_NEGATIVE_CACHE_TIMEOUT = int(
+    os.getenv("ADDRESS_VALIDATION_NEGATIVE_CACHE_TIMEOUT", 3600)
+)
+ADDRESS_VALIDATION_MAX_WORKERS = int(os.getenv("ADDRESS_VALIDATION_MAX_WORKERS", 8))
@@ -75,6 +75,8 @@ SQS_UPDATE_RETAILER_INVENTORY_SQS_NAME = os.getenv(
 RETAILER_GETTING_ORDER_SQS_NAME = os.getenv(
     "RETAILER_GETTING_ORDER_SQS_NAME", "dev-retailer_getting_order_sqs"
 )
+SHIPPING_BULK_SQS_NAME = os.getenv("SHIPPING_BULK_SQS_NAME", "dev-shipping_bulk_sqs")
+ORDER_DETAIL_SQS_NAME = os.getenv("ORDER_DETAIL_SQS_NAME", "dev-order_detail_sqs")
 
 CRUD_PRODUCT_SQS_NAME = os.getenv("CRUD_PRODUCT_SQS_NAME", "dev-qbo_sync_product")
 CRUD_RETAILER_SQS_NAME = os.getenv("CRUD_RETAILER_SQS_NAME", "dev-qbo_sync_retailer")
@@ -86,6 +86,8 @@ SQS_GET_NEW_ORDER_BY_RETAILER_SFTP_GROUP_SQS_NAME = os.getenv(
 RETAILER_GETTING_ORDER_SQS_NAME = os.getenv(
     "RETAILER_GETTING_ORDER_SQS_NAME", "dev-retailer_getting_order_sqs"
 )
+SHIPPING_BULK_SQS_NAME = os.getenv("SHIPPING_BULK_SQS_NAME", "dev-shipping_bulk_sqs")
+ORDER_DETAIL_SQS_NAME = os.getenv("ORDER_DETAIL_SQS_NAME", "dev-order_detail_sqs")
 GETTING_NEW_ORDER_RULE_NAME = os.getenv(
     "GETTING_NEW_ORDER_RULE_NAME",
     "dev_call_lambda_get_new_order_trigger",
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from selleraxis.order_package.models import OrderPackage
 from selleraxis.retailer_carriers.models import RetailerCarrier
+from selleraxis.retailer_purchase_orders.models import invalidate_order_details
 from selleraxis.shipping_service_types.models import ShippingServiceType
 
 
@@ -29,3 +32,9 @@ class Shipment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     ship_times = models.IntegerField(default=1)
+
+
+@receiver([post_save, post_delete], sender=Shipment)
+def invalidate_shipment_order_detail(sender, instance, **kwargs):
+    if instance.package_id is not None:
+        invalidate_order_details(order__order_packages__id=instance.package_id)
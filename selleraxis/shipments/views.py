@@ -1,22 +1,26 @@
-import base64
-
-from django.db.models import Case, IntegerField, Value, When
 from django.forms import model_to_dict
 from rest_framework import status
-from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.exceptions import APIException, ParseError, ValidationError
 from rest_framework.generics import DestroyAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from selleraxis.core.permissions import check_permission
 from selleraxis.permissions.models import Permissions
-from selleraxis.product_alias.models import ProductAlias
-from selleraxis.products.models import Product
+from selleraxis.products.inventory_services import (
+    get_product_aliases,
+    record_inventory_movements,
+)
+from selleraxis.products.models import ProductInventoryMovement
 from selleraxis.retailer_purchase_order_histories.models import (
     RetailerPurchaseOrderHistory,
 )
 from selleraxis.retailer_purchase_orders.models import QueueStatus
 from selleraxis.service_api.models import ServiceAPI, ServiceAPIAction
+from selleraxis.service_api.services import (
+    get_carrier_access_token,
+    invalidate_carrier_access_token,
+)
 from selleraxis.shipments.models import Shipment, ShipmentStatus
 from selleraxis.shipments.serializers import ShipmentSerializer
 
@@ -41,22 +45,9 @@ class CancelShipmentView(DestroyAPIView):
         is_sandbox = instance.carrier.organization.is_sandbox
         if instance.status.upper() != ShipmentStatus.CREATED:
             raise ParseError("Only created status shipment can be voiced")
-        origin_string = f"{instance.carrier.client_id}:{instance.carrier.client_secret}"
-        to_binary = origin_string.encode("UTF-8")
-        basic_auth = (base64.b64encode(to_binary)).decode("ascii")
-
-        login_api = ServiceAPI.objects.filter(
-            service_id=instance.carrier.service, action=ServiceAPIAction.LOGIN
-        ).first()
-
         try:
-            login_response = login_api.request(
-                {
-                    "client_id": instance.carrier.client_id,
-                    "client_secret": instance.carrier.client_secret,
-                    "basic_auth": basic_auth,
-                },
-                is_sandbox=is_sandbox,
+            access_token = get_carrier_access_token(
+                instance.carrier, is_sandbox=is_sandbox
             )
         except KeyError:
             raise ValidationError(
@@ -65,7 +56,7 @@ class CancelShipmentView(DestroyAPIView):
             )
 
         cancel_shipment_data = model_to_dict(instance)
-        cancel_shipment_data["access_token"] = login_response["access_token"]
+        cancel_shipment_data["access_token"] = access_token
         cancel_shipment_data["carrier"] = model_to_dict(instance.carrier)
 
         cancel_shipment_api = ServiceAPI.objects.filter(
@@ -79,6 +70,10 @@ class CancelShipmentView(DestroyAPIView):
             )
         except KeyError:
             raise ParseError("Shipment void fail!")
+        except APIException:
+            # the token may have been revoked, log in again on the next call
+            invalidate_carrier_access_token(instance.carrier, is_sandbox=is_sandbox)
+            raise
         if (
             isinstance(cancel_shipment_response["status"], bool)
             and cancel_shipment_response["status"] is True
@@ -124,52 +119,33 @@ class CancelShipmentView(DestroyAPIView):
                     order_voided.save()
 
             list_item_package = order_package.order_item_packages.all().select_related(
-                "order_item__order__batch__retailer"
+                "order_item"
+            )
+            retailer_id = order_voided.batch.retailer_id
+            product_aliases = get_product_aliases(
+                (retailer_id, item_package.order_item.merchant_sku)
+                for item_package in list_item_package
             )
-            list_product_alias = ProductAlias.objects.filter(
-                merchant_sku__in=[
-                    item_package.order_item.merchant_sku
-                    for item_package in list_item_package
-                ],
-                retailer__id__in=[
-                    item_package.order_item.order.batch.retailer.id
-                    for item_package in list_item_package
-                ],
-            ).select_related("retailer", "product")
-            product_ids = [
-                product_alias.product.id for product_alias in list_product_alias
-            ]
-            list_product = Product.objects.filter(id__in=product_ids)
-            # check item package of voided package
+            # units of the voided package are pending again
+            movements = []
             for item_package in list_item_package:
-                # find product alias
-                valid_alias = None
-                for product_alias in list_product_alias:
-                    if (
-                        item_package.order_item.merchant_sku
-                        == product_alias.merchant_sku
-                        and item_package.order_item.order.batch.retailer.id
-                        == product_alias.retailer.id
-                    ):
-                        valid_alias = product_alias
-                        break
-                # update qty pending if alias valid
-                if valid_alias is not None:
-                    qty = int(valid_alias.sku_quantity) * int(item_package.quantity)
-                    for product in list_product:
-                        if product.id == valid_alias.product.id:
-                            qty_pending = product.qty_pending
-                            product.qty_pending = qty_pending + qty
-                else:
+                valid_alias = product_aliases.get(
+                    (retailer_id, item_package.order_item.merchant_sku)
+                )
+                if valid_alias is None:
                     raise ParseError(
                         "Some items don't have product alias, can't update pending quantity"
                     )
-            # update bulk
-            whens = [
-                When(id=product.id, then=Value(int(product.qty_pending)))
-                for product in list_product
-            ]
-            list_product.update(qty_pending=Case(*whens, output_field=IntegerField()))
+                movements.append(
+                    ProductInventoryMovement(
+                        product_id=valid_alias.product_id,
+                        reason=ProductInventoryMovement.Reason.VOID,
+                        qty_pending_delta=int(valid_alias.sku_quantity)
+                        * int(item_package.quantity),
+                        order_id=order_voided.id,
+                    )
+                )
+            record_inventory_movements(movements)
 
             return Response(
                 data={
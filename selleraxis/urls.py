@@ -34,6 +34,7 @@ from selleraxis.files.views import GetUploadPresignedURLView
 from selleraxis.getting_order_histories.views import ListGettingOrderHistoryView
 from selleraxis.gs1.views import BulkGS1View, ListCreateGS1View, UpdateDeleteGS1View
 from selleraxis.invoice.views import (
+    BulkCreateInvoiceView,
     CreateInvoiceView,
     CreateQBOTokenView,
     GetQBOAuthorizationURLView,
@@ -146,6 +147,7 @@ from selleraxis.retailer_purchase_orders.views import (
     SearchRetailerPurchaseOrderView,
     ShipFromAddressView,
     ShippingBulkCreateAPIView,
+    ShippingBulkProgressAPIView,
     ShippingView,
     ShipToAddressValidationBulkCreateAPIView,
     ShipToAddressValidationView,
@@ -359,6 +361,10 @@ urlpatterns = [
         "api/retailer-purchase-orders/ship/bulk",
         ShippingBulkCreateAPIView.as_view(),
     ),
+    path(
+        "api/retailer-purchase-orders/ship/bulk/progress/<str:progress_id>",
+        ShippingBulkProgressAPIView.as_view(),
+    ),
     path(
         "api/retailer-purchase-orders/histories", ListGettingOrderHistoryView.as_view()
     ),
@@ -650,6 +656,10 @@ urlpatterns = [
         "api/retailer-purchase-orders/<str:pk>/refresh-invoice",
         RefreshInvoiceView.as_view(),
     ),
+    path(
+        "api/retailer-purchase-orders/invoice/bulk",
+        BulkCreateInvoiceView.as_view(),
+    ),
     # shipping_service_type
     path(
         "api/shipping_service_type",